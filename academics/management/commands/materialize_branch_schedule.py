@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from academics.services.schedule_service import materialize_branch_weekly_slots
+from branches.models import Branch
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Genere les cours dates de toutes les classes d'une annexe sur une periode "
+        "a partir des creneaux hebdomadaires (conflits ignores et reportes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch-code", required=True, help="Code de l'annexe (ex: KC).")
+        parser.add_argument(
+            "--start",
+            default="",
+            help="Premier jour au format YYYY-MM-DD (defaut: lundi de la semaine courante).",
+        )
+        parser.add_argument("--end", default="", help="Dernier jour inclus au format YYYY-MM-DD.")
+        parser.add_argument("--weeks", type=int, default=1, help="Nombre de semaines si --end est absent (defaut: 1).")
+        parser.add_argument(
+            "--class-id",
+            type=int,
+            action="append",
+            dest="class_ids",
+            help="Limite la generation a cette classe (option repetable).",
+        )
+        parser.add_argument("--user", default="", help="Utilisateur auteur des cours (defaut: premier superutilisateur).")
+
+    def handle(self, *args, **options):
+        branch = Branch.objects.filter(code__iexact=options["branch_code"]).first()
+        if branch is None:
+            raise CommandError(f"Annexe introuvable : {options['branch_code']}")
+
+        start_date = self._parse_date(options["start"], "--start")
+        if start_date is None:
+            today = timezone.localdate()
+            start_date = today - timedelta(days=today.weekday())
+        end_date = self._parse_date(options["end"], "--end")
+        if end_date is None:
+            end_date = start_date + timedelta(days=7 * max(1, options["weeks"]) - 1)
+
+        user = self._resolve_user(options["user"])
+        try:
+            summary = materialize_branch_weekly_slots(
+                user=user,
+                branch=branch,
+                start_date=start_date,
+                end_date=end_date,
+                academic_classes=options["class_ids"],
+            )
+        except ValidationError as exc:
+            raise CommandError(" ".join(exc.messages)) from exc
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"[schedule] {branch.name} du {start_date.isoformat()} au {end_date.isoformat()} : "
+                f"{summary['created']} cours crees, {summary['skipped_existing']} deja presents, "
+                f"{len(summary['skipped_conflicts'])} ignores (conflits)."
+            )
+        )
+        for conflict in summary["skipped_conflicts"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f" - {conflict['class_label']} {conflict['date'].isoformat()} "
+                    f"{conflict['start_time']}-{conflict['end_time']} {conflict['ec_title']} : "
+                    f"{' '.join(conflict['messages'])}"
+                )
+            )
+
+    def _parse_date(self, raw_date, option_name):
+        if not raw_date:
+            return None
+        try:
+            return datetime.strptime(raw_date, "%Y-%m-%d").date()
+        except ValueError as exc:
+            raise CommandError(f"{option_name} doit etre au format YYYY-MM-DD") from exc
+
+    def _resolve_user(self, username):
+        if username:
+            user = User.objects.filter(username=username, is_active=True).first()
+            if user is None:
+                raise CommandError(f"Utilisateur introuvable : {username}")
+            return user
+        user = User.objects.filter(is_superuser=True, is_active=True).order_by("id").first()
+        if user is None:
+            raise CommandError("Aucun superutilisateur actif : preciser --user.")
+        return user
@@ -6,7 +6,7 @@ from decimal import Decimal
 
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import F, Q
 from django.utils import timezone
 
 from academics.models import (
@@ -16,6 +16,7 @@ from academics.models import (
     AcademicScheduleExecutionLog,
     WeeklyScheduleSlot,
 )
+from core.cache import get_or_compute, invalidate_tags
 from portal.student.widgets.academics import get_student_academic_snapshot
 
 
@@ -347,6 +348,12 @@ def _build_week_grid_from_weekly_slots(slots, week_start: date):
 
 def _merge_weekly_slots_into_grid(schedule: dict, weekly_slots, week_start: date):
     """Show official weekly slots that have not yet been materialized as dated events."""
+    today = timezone.localdate()
+    serialized_slots = [_serialize_weekly_slot(slot, week_start, highlight_today=today) for slot in weekly_slots]
+    return _merge_serialized_weekly_slots(schedule, serialized_slots, week_start)
+
+
+def _merge_serialized_weekly_slots(schedule: dict, serialized_slots, week_start: date):
     serialized_events = list(schedule.get("events") or [])
     existing_keys = {
         (
@@ -359,18 +366,17 @@ def _merge_weekly_slots_into_grid(schedule: dict, weekly_slots, week_start: date
         for event in serialized_events
     }
     added = 0
-    today = timezone.localdate()
-    for slot in weekly_slots:
+    for slot in serialized_slots:
         key = (
-            int(slot.weekday),
-            slot.start_time.strftime("%H:%M"),
-            slot.end_time.strftime("%H:%M"),
-            slot.ec_id,
-            slot.teacher_id,
+            slot["weekday_index"],
+            slot["start_time"],
+            slot["end_time"],
+            slot["ec_id"],
+            slot["teacher_id"],
         )
         if key in existing_keys:
             continue
-        serialized_events.append(_serialize_weekly_slot(slot, week_start, highlight_today=today))
+        serialized_events.append(slot)
         existing_keys.add(key)
         added += 1
 
@@ -738,42 +744,109 @@ def suggest_available_slots(*, academic_class, teacher, branch, academic_year, d
     return sorted(suggestions, key=lambda item: (-item["score"], item["start"]))
 
 
-def get_class_week_schedule(academic_class: AcademicClass, week_start):
-    queryset, normalized = _week_queryset(
-        AcademicScheduleEvent.objects.filter(academic_class=academic_class),
-        week_start,
+# ==========================================================
+# GRILLES HEBDOMADAIRES EN CACHE (classe, semaine ISO)
+# ==========================================================
+# Les evenements serialises d'une classe pour une semaine (dates + creneaux
+# hebdomadaires officiels) sont calcules une fois puis relus depuis le
+# cache partage ; la grille (jours, lignes, compteurs) est recomposee a la
+# lecture, sans requete. Toute modification d'un AcademicScheduleEvent ou
+# d'un WeeklyScheduleSlot invalide le tag de sa classe (academics/signals.py).
+# Les emplois du temps etudiant, enseignant, surveillant et DG composent
+# a partir de ces grilles de classe.
+
+WEEK_GRID_CACHE_TIMEOUT = 6 * 3600
+
+
+def class_schedule_tag(academic_class_id) -> str:
+    return f"schedule-class:{academic_class_id}"
+
+
+def invalidate_class_week_grids(*academic_class_ids):
+    invalidate_tags(*(class_schedule_tag(pk) for pk in academic_class_ids if pk))
+
+
+def _refresh_today_flags(serialized_events):
+    today = timezone.localdate()
+    for event in serialized_events:
+        event["is_today"] = timezone.localtime(event["start_datetime"]).date() == today
+    return serialized_events
+
+
+def _get_class_week_store(academic_class_id, normalized: date) -> dict:
+    """{"events": evenements dates, "weekly_slots": creneaux hebdomadaires} serialises."""
+
+    def build():
+        queryset, _ = _week_queryset(
+            AcademicScheduleEvent.objects.filter(academic_class_id=academic_class_id),
+            normalized,
+        )
+        weekly_slots = (
+            WeeklyScheduleSlot.objects.select_related("academic_class", "ec", "ec__ue", "teacher", "branch")
+            .filter(academic_class_id=academic_class_id, is_active=True)
+            .filter(branch_id=F("academic_class__branch_id"))
+            .order_by("weekday", "start_time", "id")
+        )
+        return {
+            "events": [_serialize_event(event) for event in queryset],
+            "weekly_slots": [_serialize_weekly_slot(slot, normalized) for slot in weekly_slots],
+        }
+
+    year, week, _weekday = normalized.isocalendar()
+    store = get_or_compute(
+        f"schedule:class-week:v1:{academic_class_id}:{year}-W{week:02d}",
+        build,
+        timeout=WEEK_GRID_CACHE_TIMEOUT,
+        tags=[class_schedule_tag(academic_class_id)],
+        namespace="schedule:class_week",
     )
-    events = list(queryset)
-    return _build_week_grid(events, normalized)
+    _refresh_today_flags(store["events"])
+    _refresh_today_flags(store["weekly_slots"])
+    return store
+
+
+def get_class_week_schedule(academic_class: AcademicClass, week_start):
+    normalized = _normalize_week_start(week_start)
+    store = _get_class_week_store(academic_class.pk, normalized)
+    return _build_week_grid_from_serialized(store["events"], normalized)
 
 
 def get_class_week_schedule_with_weekly_slots(academic_class: AcademicClass, week_start):
-    schedule = get_class_week_schedule(academic_class, week_start)
-    weekly_slots = list_weekly_slots_for_class(academic_class, active_only=True)
-    if weekly_slots:
-        normalized = schedule.get("week_start") or _normalize_week_start(week_start)
-        return _merge_weekly_slots_into_grid(schedule, weekly_slots, normalized)
+    normalized = _normalize_week_start(week_start)
+    store = _get_class_week_store(academic_class.pk, normalized)
+    schedule = _build_week_grid_from_serialized(store["events"], normalized)
+    if store["weekly_slots"]:
+        return _merge_serialized_weekly_slots(schedule, store["weekly_slots"], normalized)
     return schedule
 
 
 def _nearest_available_schedule_week(academic_class: AcademicClass, requested_week_start: date):
-    base_queryset = (
-        AcademicScheduleEvent.objects.filter(
-            academic_class=academic_class,
-            is_active=True,
+    def build():
+        base_queryset = (
+            AcademicScheduleEvent.objects.filter(
+                academic_class=academic_class,
+                is_active=True,
+            )
+            .exclude(status=AcademicScheduleEvent.STATUS_CANCELLED)
+            .order_by("start_datetime", "id")
         )
-        .exclude(status=AcademicScheduleEvent.STATUS_CANCELLED)
-        .order_by("start_datetime", "id")
+        current_week_start = timezone.make_aware(datetime.combine(requested_week_start, time.min))
+        upcoming_event = base_queryset.filter(start_datetime__gte=current_week_start).first()
+        if upcoming_event is not None:
+            return _normalize_week_start(upcoming_event.start_datetime)
+
+        previous_event = base_queryset.order_by("-start_datetime", "-id").first()
+        if previous_event is not None:
+            return _normalize_week_start(previous_event.start_datetime)
+        return None
+
+    return get_or_compute(
+        f"schedule:nearest-week:v1:{academic_class.pk}:{requested_week_start.isoformat()}",
+        build,
+        timeout=WEEK_GRID_CACHE_TIMEOUT,
+        tags=[class_schedule_tag(academic_class.pk)],
+        namespace="schedule:nearest_week",
     )
-    current_week_start = timezone.make_aware(datetime.combine(requested_week_start, time.min))
-    upcoming_event = base_queryset.filter(start_datetime__gte=current_week_start).first()
-    if upcoming_event is not None:
-        return _normalize_week_start(upcoming_event.start_datetime)
-
-    previous_event = base_queryset.order_by("-start_datetime", "-id").first()
-    if previous_event is not None:
-        return _normalize_week_start(previous_event.start_datetime)
-    return None
 
 
 def get_student_week_schedule(student, week_start):
@@ -818,13 +891,27 @@ def get_student_week_schedule(student, week_start):
 
 
 def get_teacher_week_schedule(user, week_start):
+    """Compose la semaine de l'enseignant a partir des grilles (en cache) de ses classes."""
     teacher_user = getattr(user, "user", user)
-    queryset, normalized = _week_queryset(
-        AcademicScheduleEvent.objects.filter(teacher=teacher_user),
-        week_start,
+    start, end, normalized = _week_bounds(week_start)
+    class_ids = (
+        AcademicScheduleEvent.objects.filter(
+            teacher=teacher_user,
+            is_active=True,
+            start_datetime__gte=start,
+            start_datetime__lt=end,
+        )
+        .values_list("academic_class_id", flat=True)
+        .distinct()
     )
-    events = list(queryset)
-    return _build_week_grid(events, normalized)
+    events = [
+        event
+        for class_id in sorted(set(class_ids))
+        for event in _get_class_week_store(class_id, normalized)["events"]
+        if event["teacher_id"] == teacher_user.pk
+    ]
+    events.sort(key=lambda event: (event["start_datetime"], event["id"]))
+    return _build_week_grid_from_serialized(events, normalized)
 
 
 def get_branch_week_schedule(branch, week_start):
@@ -1224,71 +1311,288 @@ def materialize_week_events_from_weekly_slots(*, user, academic_class: AcademicC
     affiche bien les cours.
     """
     normalized_week_start = _normalize_week_start(week_start)
-    branch = academic_class.branch
-    slots = list_weekly_slots_for_class(academic_class, active_only=True)
-    if not slots:
-        return {"created": 0, "skipped_existing": 0, "week_start": normalized_week_start}
-
-    week_start_dt = timezone.make_aware(datetime.combine(normalized_week_start, time.min))
-    week_end_dt = week_start_dt + timedelta(days=7)
-    existing_events = list(
-        AcademicScheduleEvent.objects.filter(
-            academic_class=academic_class,
-            branch=branch,
-            start_datetime__gte=week_start_dt,
-            start_datetime__lt=week_end_dt,
-            is_active=True,
-        ).exclude(status=AcademicScheduleEvent.STATUS_CANCELLED)
+    result = materialize_branch_weekly_slots(
+        user=user,
+        branch=academic_class.branch,
+        start_date=normalized_week_start,
+        end_date=normalized_week_start + timedelta(days=6),
+        academic_classes=[academic_class],
     )
-    existing_keys = {
-        (
-            timezone.localtime(ev.start_datetime).date().isoformat(),
-            timezone.localtime(ev.start_datetime).time().strftime("%H:%M"),
-            timezone.localtime(ev.end_datetime).time().strftime("%H:%M"),
-            ev.ec_id,
-            ev.teacher_id,
-        )
-        for ev in existing_events
+    return {
+        "created": result["created"],
+        "skipped_existing": result["skipped_existing"],
+        "skipped_conflicts": result["skipped_conflicts"],
+        "week_start": normalized_week_start,
     }
 
-    created = 0
-    skipped = 0
+
+def _occupancy_keys(event: AcademicScheduleEvent):
+    """Ressources occupees par un cours : classe, enseignant, salle, EC."""
+    keys = [("class", event.academic_class_id)]
+    if event.teacher_id:
+        keys.append(("teacher", event.teacher_id))
+    if event.location and event.location.strip():
+        keys.append(("room", event.location.strip().lower()))
+    if event.ec_id:
+        keys.append(("ec", event.ec_id))
+    return keys
+
+
+def _occupancy_days(event: AcademicScheduleEvent):
+    day = timezone.localtime(event.start_datetime).date()
+    last_day = timezone.localtime(event.end_datetime).date()
+    while day <= last_day:
+        yield day
+        day += timedelta(days=1)
+
+
+_OCCUPANCY_MESSAGES = {
+    "class": "Classe occupee : {label}.",
+    "teacher": "Enseignant deja programme : {label}.",
+    "room": "Salle occupee : {label}.",
+    "ec": "Cet EC est deja planifie sur le meme creneau.",
+}
+
+
+def materialize_branch_weekly_slots(*, user, branch, start_date: date, end_date: date, academic_classes=None):
+    """
+    Génère les cours datés de toutes les classes d'une annexe, du start_date
+    au end_date inclus, à partir de leurs créneaux hebdomadaires actifs.
+
+    Mêmes règles que create_schedule_event (conflits classe / enseignant /
+    salle / EC, affectations et volume horaire prévu), mais évaluées en
+    mémoire : les cours existants de la période sont chargés une fois et les
+    cours générés dans le même passage comptent aussitôt. Un créneau en
+    conflit est ignoré et reporté dans le résumé au lieu d'interrompre la
+    génération ; cours et journaux de création sont insérés par lots.
+
+    academic_classes limite la génération à ces classes de l'annexe (actives
+    ou non) ; par défaut, toutes les classes actives.
+    """
+    from portal.models import DirectorTeacherAssignment
+    from portal.services.supervisor_day_snapshot import branch_schedule_tag
+
+    if isinstance(start_date, datetime):
+        start_date = timezone.localtime(start_date).date()
+    if isinstance(end_date, datetime):
+        end_date = timezone.localtime(end_date).date()
+    if end_date < start_date:
+        raise ValidationError(["La date de fin doit etre posterieure a la date de debut."])
+
+    summary = {
+        "created": 0,
+        "skipped_existing": 0,
+        "skipped_conflicts": [],
+        "created_by_class": {},
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+
+    classes_qs = AcademicClass.objects.filter(branch=branch)
+    if academic_classes is None:
+        classes_qs = classes_qs.filter(is_active=True)
+    else:
+        classes_qs = classes_qs.filter(pk__in=[getattr(item, "pk", item) for item in academic_classes])
+    classes = {
+        academic_class.pk: academic_class
+        for academic_class in classes_qs.select_related("programme", "branch", "academic_year")
+    }
+    if not classes:
+        return summary
+
+    slots_by_weekday = defaultdict(list)
+    slots = (
+        WeeklyScheduleSlot.objects
+        .select_related("ec__ue__semester", "teacher")
+        .filter(academic_class_id__in=classes, branch=branch, is_active=True)
+        .order_by("academic_class_id", "weekday", "start_time", "id")
+    )
     for slot in slots:
-        slot_date = normalized_week_start + timedelta(days=int(slot.weekday))
-        start_dt = timezone.make_aware(datetime.combine(slot_date, slot.start_time))
-        end_dt = timezone.make_aware(datetime.combine(slot_date, slot.end_time))
-        key = (
-            slot_date.isoformat(),
-            slot.start_time.strftime("%H:%M"),
-            slot.end_time.strftime("%H:%M"),
-            slot.ec_id,
-            slot.teacher_id,
+        slot.academic_class = classes[slot.academic_class_id]
+        slots_by_weekday[int(slot.weekday)].append(slot)
+    if not slots_by_weekday:
+        return summary
+
+    range_start = timezone.make_aware(datetime.combine(start_date, time.min))
+    range_end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+
+    # Occupation de la periode : tous les cours actifs de l'annexe, toutes
+    # classes confondues (conflits enseignant / salle inter-classes).
+    occupancy = defaultdict(list)
+    existing_keys = set()
+    existing_events = (
+        _base_conflict_queryset()
+        .filter(branch=branch)
+        .filter(_overlap_filter(range_start, range_end))
+        .select_related("academic_class__programme", "academic_class__branch")
+    )
+    for existing in existing_events:
+        for resource in _occupancy_keys(existing):
+            for day in _occupancy_days(existing):
+                occupancy[(resource, day)].append(existing)
+        local_start = timezone.localtime(existing.start_datetime)
+        existing_keys.add(
+            (
+                existing.academic_class_id,
+                local_start.date(),
+                local_start.time().replace(second=0, microsecond=0),
+                timezone.localtime(existing.end_datetime).time().replace(second=0, microsecond=0),
+                existing.ec_id,
+                existing.teacher_id,
+            )
         )
-        if key in existing_keys:
-            skipped += 1
-            continue
-        title = f"{slot.ec.title} - {academic_class.display_name}"
-        create_schedule_event(
-            user=user,
-            event_type=AcademicScheduleEvent.EVENT_TYPE_COURSE,
-            status=AcademicScheduleEvent.STATUS_PLANNED,
-            academic_class=academic_class,
-            academic_year=academic_class.academic_year,
-            branch=branch,
-            ec=slot.ec,
-            teacher=slot.teacher,
-            title=title,
-            description="",
-            start_datetime=start_dt,
-            end_datetime=end_dt,
-            location=slot.room or "",
-            is_online=False,
-            is_active=True,
+
+    # Garde-fous d'affectation : une requete pour les affectations, une pour
+    # le volume deja planifie (toutes dates, comme _validate_assignment_guardrails).
+    assignments = defaultdict(list)
+    for assignment in DirectorTeacherAssignment.objects.select_related("ec").filter(
+        branch=branch,
+        academic_class_id__in=classes,
+        is_active=True,
+    ):
+        assignments[(assignment.academic_class_id, assignment.teacher_id)].append(assignment)
+
+    scheduled_minutes = defaultdict(int)
+    for class_id, teacher_id, ec_id, academic_year_id, event_start, event_end in (
+        _base_conflict_queryset()
+        .filter(branch=branch, academic_class_id__in=classes)
+        .values_list("academic_class_id", "teacher_id", "ec_id", "academic_year_id", "start_datetime", "end_datetime")
+    ):
+        minutes = int((event_end - event_start).total_seconds() // 60)
+        scheduled_minutes[(class_id, teacher_id, ec_id, academic_year_id)] += minutes
+        scheduled_minutes[(class_id, teacher_id, None, academic_year_id)] += minutes
+
+    def _guardrail_errors(event):
+        class_assignments = assignments.get((event.academic_class_id, event.teacher_id), [])
+        if not class_assignments:
+            return []
+        matched = next((item for item in class_assignments if item.ec_id == event.ec_id), None)
+        matched = matched or next((item for item in class_assignments if item.ec_id is None), None)
+        if matched is None:
+            ec_labels = ", ".join(
+                sorted({item.ec.title for item in class_assignments if item.ec_id})
+            ) or "affectation de classe"
+            return [f"L'enseignant n'est pas affecte a cet EC pour cette classe. Affectations autorisees: {ec_labels}."]
+        if matched.planned_hours is None:
+            return []
+        minutes = scheduled_minutes[(event.academic_class_id, event.teacher_id, matched.ec_id, event.academic_year_id)]
+        total_hours = Decimal(minutes + event.duration_minutes) / Decimal("60")
+        if total_hours > matched.planned_hours:
+            scope_label = matched.ec.title if matched.ec_id else event.academic_class.display_name
+            return [
+                f"Heures depassees pour l'affectation '{scope_label}' : {total_hours:.2f} h planifiees pour {matched.planned_hours:.2f} h prevues."
+            ]
+        return []
+
+    def _occupancy_errors(event):
+        messages = []
+        for resource in _occupancy_keys(event):
+            for day in _occupancy_days(event):
+                for other in occupancy.get((resource, day), ()):
+                    if other.start_datetime < event.end_datetime and other.end_datetime > event.start_datetime:
+                        message = _OCCUPANCY_MESSAGES[resource[0]].format(label=_format_event_conflict_label(other))
+                        if message not in messages:
+                            messages.append(message)
+        return messages
+
+    new_events = []
+    day = start_date
+    while day <= end_date:
+        for slot in slots_by_weekday.get(day.weekday(), ()):
+            academic_class = slot.academic_class
+            key = (
+                academic_class.pk,
+                day,
+                slot.start_time.replace(second=0, microsecond=0),
+                slot.end_time.replace(second=0, microsecond=0),
+                slot.ec_id,
+                slot.teacher_id,
+            )
+            if key in existing_keys:
+                summary["skipped_existing"] += 1
+                continue
+
+            event = AcademicScheduleEvent(
+                created_by=user,
+                updated_by=user,
+                event_type=AcademicScheduleEvent.EVENT_TYPE_COURSE,
+                status=AcademicScheduleEvent.STATUS_PLANNED,
+                academic_class=academic_class,
+                academic_year=academic_class.academic_year,
+                branch=branch,
+                ec=slot.ec,
+                teacher=slot.teacher,
+                title=f"{slot.ec.title} - {academic_class.display_name}",
+                description="",
+                start_datetime=timezone.make_aware(datetime.combine(day, slot.start_time)),
+                end_datetime=timezone.make_aware(datetime.combine(day, slot.end_time)),
+                location=slot.room or "",
+                is_online=False,
+                is_active=True,
+            )
+            try:
+                # clean() et non full_clean() : les cles etrangeres viennent
+                # d'etre chargees, inutile de les revalider une par une.
+                event.clean()
+                errors = _guardrail_errors(event) + _occupancy_errors(event)
+            except ValidationError as exc:
+                errors = exc.messages
+            if errors:
+                summary["skipped_conflicts"].append(
+                    {
+                        "academic_class_id": academic_class.pk,
+                        "class_label": academic_class.display_name,
+                        "date": day,
+                        "start_time": slot.start_time.strftime("%H:%M"),
+                        "end_time": slot.end_time.strftime("%H:%M"),
+                        "ec_title": slot.ec.title,
+                        "slot_id": slot.pk,
+                        "messages": errors,
+                    }
+                )
+                continue
+
+            for resource in _occupancy_keys(event):
+                occupancy[(resource, day)].append(event)
+            existing_keys.add(key)
+            minutes = event.duration_minutes
+            scheduled_minutes[(academic_class.pk, event.teacher_id, event.ec_id, event.academic_year_id)] += minutes
+            scheduled_minutes[(academic_class.pk, event.teacher_id, None, event.academic_year_id)] += minutes
+            new_events.append(event)
+        day += timedelta(days=1)
+
+    if not new_events:
+        return summary
+
+    with transaction.atomic():
+        AcademicScheduleEvent.objects.bulk_create(new_events)
+        AcademicScheduleChangeLog.objects.bulk_create(
+            AcademicScheduleChangeLog(
+                event=event,
+                action_type=AcademicScheduleChangeLog.ACTION_CREATED,
+                new_start_datetime=event.start_datetime,
+                new_end_datetime=event.end_datetime,
+                new_status=event.status,
+                changed_by=user,
+            )
+            for event in new_events
+        )
+        # bulk_create ne declenche pas post_save : grilles, portails etudiant et enseignant,
+        # instantane du jour du surveillant.
+        class_ids = {event.academic_class_id for event in new_events}
+        invalidate_class_week_grids(*class_ids)
+        invalidate_tags(
+            *(f"class:{class_id}" for class_id in class_ids),
+            *(f"teacher:{event.teacher_id}" for event in new_events),
+            branch_schedule_tag(branch.pk),
         )
-        existing_keys.add(key)
-        created += 1
 
-    return {"created": created, "skipped_existing": skipped, "week_start": normalized_week_start}
+    created_by_class = defaultdict(int)
+    for event in new_events:
+        created_by_class[event.academic_class_id] += 1
+    summary["created"] = len(new_events)
+    summary["created_by_class"] = dict(created_by_class)
+    return summary
 
 
 def create_schedule(*, user, **data):
@@ -20,19 +20,122 @@ from students.services.attendance_service import mark_teacher_attendance
 User = get_user_model()
 
 
-def get_supervisor_today_course_rows(*, branch, target_date=None):
+def serialize_supervised_event(event):
+    """Champs d'un cours utiles au suivi du jour, en dict pur (stockable en cache)."""
+    return {
+        "id": event.id,
+        "academic_class_id": event.academic_class_id,
+        "class_name": event.academic_class.display_name,
+        "teacher_id": event.teacher_id,
+        "teacher_name": event.teacher.get_full_name() or event.teacher.username,
+        "subject_title": event.ec.title,
+        "location": event.location,
+        "is_online": event.is_online,
+        "start_datetime": event.start_datetime,
+        "end_datetime": event.end_datetime,
+        "status": event.status,
+        "status_label": event.get_status_display(),
+        "execution_started": any(
+            log.is_completed is False and log.started_at is not None for log in event.execution_logs.all()
+        ),
+    }
+
+
+def serialize_status_record(record):
+    """Presence enseignant ou cahier de texte reduit a son statut (None si absent)."""
+    if record is None:
+        return None
+    return {
+        "id": record.id,
+        "event_id": record.schedule_event_id,
+        "status": record.status,
+        "status_label": record.get_status_display(),
+    }
+
+
+def build_supervisor_course_row(event, *, teacher_attendance=None, lesson_log=None, now=None):
     """
-    Liste des cours du jour avec phase pedagogique et indicateurs d'action (sans logique dans les templates).
+    Ligne « cours du jour » du surveillant.
+
+    `event` vient de serialize_supervised_event, `teacher_attendance` et
+    `lesson_log` de serialize_status_record : la phase (prevu, en cours, a
+    cloturer) depend de l'heure et se calcule ici, a la lecture.
     """
-    if branch is None:
-        return []
+    now = now or timezone.now()
+    local_start = timezone.localtime(event["start_datetime"])
+    local_end = timezone.localtime(event["end_datetime"])
+    event_status = event["status"]
+
+    if event_status == AcademicScheduleEvent.STATUS_COMPLETED:
+        phase_code = "done"
+        phase_label = "Termine"
+    elif event_status == AcademicScheduleEvent.STATUS_ONGOING:
+        phase_code = "ongoing"
+        phase_label = "En cours"
+    elif now < event["start_datetime"]:
+        phase_code = "planned"
+        phase_label = "Prevu"
+    elif now <= event["end_datetime"]:
+        phase_code = "ongoing"
+        phase_label = "En cours"
+    else:
+        phase_code = "followup"
+        phase_label = "A cloturer"
+
+    course_started_flag = bool(
+        lesson_log
+        and lesson_log["status"]
+        not in {
+            LessonLog.STATUS_PLANNED,
+            LessonLog.STATUS_CANCELLED,
+        }
+    )
 
-    target_date = target_date or timezone.localdate()
+    return {
+        "event_id": event["id"],
+        "academic_class_id": event["academic_class_id"],
+        "time_range": f"{local_start.strftime('%H:%M')} - {local_end.strftime('%H:%M')}",
+        "class_name": event["class_name"],
+        "teacher_name": event["teacher_name"],
+        "subject_title": event["subject_title"],
+        "room": event["location"] or ("En ligne" if event["is_online"] else "Salle non precisee"),
+        "event_status": event_status,
+        "event_status_label": event["status_label"],
+        "phase_code": phase_code,
+        "phase_label": phase_label,
+        "teacher_present_code": teacher_attendance["status"] if teacher_attendance else None,
+        "teacher_present_label": teacher_attendance["status_label"] if teacher_attendance else "",
+        "course_started_flag": course_started_flag,
+        "lesson_status_code": lesson_log["status"] if lesson_log else "",
+        "lesson_status_label": lesson_log["status_label"] if lesson_log else "",
+        "can_open_session": phase_code in {"planned", "ongoing", "followup"}
+        and event_status
+        not in {
+            AcademicScheduleEvent.STATUS_COMPLETED,
+            AcademicScheduleEvent.STATUS_CANCELLED,
+        },
+        "can_close_session": event_status
+        in {
+            AcademicScheduleEvent.STATUS_ONGOING,
+            AcademicScheduleEvent.STATUS_PLANNED,
+        }
+        or (phase_code == "followup" and event_status != AcademicScheduleEvent.STATUS_COMPLETED),
+        "execution_started": event["execution_started"],
+    }
+
+
+def get_branch_day_course_events(*, branch, target_date):
+    """Cours actifs (non annules) de l'annexe sur la journee, avec classe, enseignant et executions."""
     start = timezone.make_aware(datetime.combine(target_date, time.min))
     end = start + timedelta(days=1)
-
-    events = list(
-        AcademicScheduleEvent.objects.select_related("academic_class", "teacher", "ec", "branch")
+    return list(
+        AcademicScheduleEvent.objects.select_related(
+            "academic_class__programme",
+            "academic_class__branch",
+            "teacher",
+            "ec",
+            "branch",
+        )
         .prefetch_related("execution_logs")
         .filter(
             branch=branch,
@@ -45,94 +148,37 @@ def get_supervisor_today_course_rows(*, branch, target_date=None):
         .order_by("start_datetime", "id")
     )
 
+
+def get_supervisor_today_course_rows(*, branch, target_date=None):
+    """
+    Liste des cours du jour avec phase pedagogique et indicateurs d'action (sans logique dans les templates).
+    """
+    if branch is None:
+        return []
+
+    target_date = target_date or timezone.localdate()
+    events = get_branch_day_course_events(branch=branch, target_date=target_date)
+
     event_ids = [e.id for e in events]
     lesson_by_event = {
         row.schedule_event_id: row
-        for row in LessonLog.objects.select_related("schedule_event")
-        .filter(branch=branch, date=target_date, schedule_event_id__in=event_ids)
+        for row in LessonLog.objects.filter(branch=branch, date=target_date, schedule_event_id__in=event_ids)
     }
     teacher_att_by_event = {
         row.schedule_event_id: row
-        for row in TeacherAttendance.objects.select_related("teacher", "schedule_event")
-        .filter(branch=branch, date=target_date, schedule_event_id__in=event_ids)
+        for row in TeacherAttendance.objects.filter(branch=branch, date=target_date, schedule_event_id__in=event_ids)
     }
 
     now = timezone.now()
-    rows = []
-    for event in events:
-        local_start = timezone.localtime(event.start_datetime)
-        local_end = timezone.localtime(event.end_datetime)
-        lesson_log = lesson_by_event.get(event.id)
-        teacher_att = teacher_att_by_event.get(event.id)
-
-        if event.status == AcademicScheduleEvent.STATUS_COMPLETED:
-            phase_code = "done"
-            phase_label = "Termine"
-        elif event.status == AcademicScheduleEvent.STATUS_ONGOING:
-            phase_code = "ongoing"
-            phase_label = "En cours"
-        elif now < event.start_datetime:
-            phase_code = "planned"
-            phase_label = "Prevu"
-        elif now <= event.end_datetime:
-            phase_code = "ongoing"
-            phase_label = "En cours"
-        else:
-            phase_code = "followup"
-            phase_label = "A cloturer"
-
-        teacher_present_code = None
-        teacher_present_label = ""
-        if teacher_att:
-            teacher_present_code = teacher_att.status
-            teacher_present_label = teacher_att.get_status_display()
-
-        course_started_flag = bool(
-            lesson_log
-            and lesson_log.status
-            not in {
-                LessonLog.STATUS_PLANNED,
-                LessonLog.STATUS_CANCELLED,
-            }
-        )
-
-        exec_open = any(
-            log.is_completed is False and log.started_at is not None for log in event.execution_logs.all()
-        )
-
-        rows.append(
-            {
-                "event_id": event.id,
-                "time_range": f"{local_start.strftime('%H:%M')} - {local_end.strftime('%H:%M')}",
-                "class_name": event.academic_class.display_name,
-                "teacher_name": event.teacher.get_full_name() or event.teacher.username,
-                "subject_title": event.ec.title,
-                "room": event.location or ("En ligne" if event.is_online else "Salle non precisee"),
-                "event_status": event.status,
-                "event_status_label": event.get_status_display(),
-                "phase_code": phase_code,
-                "phase_label": phase_label,
-                "teacher_present_code": teacher_present_code,
-                "teacher_present_label": teacher_present_label,
-                "course_started_flag": course_started_flag,
-                "lesson_status_code": lesson_log.status if lesson_log else "",
-                "lesson_status_label": lesson_log.get_status_display() if lesson_log else "",
-                "can_open_session": phase_code in {"planned", "ongoing", "followup"}
-                and event.status
-                not in {
-                    AcademicScheduleEvent.STATUS_COMPLETED,
-                    AcademicScheduleEvent.STATUS_CANCELLED,
-                },
-                "can_close_session": event.status
-                in {
-                    AcademicScheduleEvent.STATUS_ONGOING,
-                    AcademicScheduleEvent.STATUS_PLANNED,
-                }
-                or (phase_code == "followup" and event.status != AcademicScheduleEvent.STATUS_COMPLETED),
-                "execution_started": exec_open,
-            }
+    return [
+        build_supervisor_course_row(
+            serialize_supervised_event(event),
+            teacher_attendance=serialize_status_record(teacher_att_by_event.get(event.id)),
+            lesson_log=serialize_status_record(lesson_by_event.get(event.id)),
+            now=now,
         )
-    return rows
+        for event in events
+    ]
 
 
 def start_session(*, event: AcademicScheduleEvent, supervisor: User, notes: str = ""):
@@ -1,8 +1,9 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.urls import reverse
 
-from academics.models import AcademicDiplomaAward, ECGrade
+from academics.models import AcademicClass, AcademicDiplomaAward, AcademicScheduleEvent, EC, ECGrade, WeeklyScheduleSlot
+from academics.services.schedule_service import invalidate_class_week_grids
 from academics.services.workflow import is_session_complete_for_class
 from communication.models import CommunicationNotification
 from communication.services.email_service import EmailService
@@ -134,3 +135,51 @@ def ec_grade_notify_session_complete(sender, instance, created, **kwargs):
         _notify_directors_session_complete(branch, semester, "normal")
     if not getattr(instance, "_was_retake_complete", False) and is_session_complete_for_class(semester, "retake"):
         _notify_directors_session_complete(branch, semester, "retake")
+
+
+# ==========================================================
+# GRILLES HEBDOMADAIRES EN CACHE
+# ==========================================================
+
+@receiver(pre_save, sender=AcademicScheduleEvent)
+@receiver(pre_save, sender=WeeklyScheduleSlot)
+def schedule_track_previous_class(sender, instance, **kwargs):
+    """Un creneau deplace vers une autre classe (enseignant, annexe) invalide aussi l'ancienne."""
+    instance._previous_academic_class_id = None
+    instance._previous_teacher_id = None
+    instance._previous_branch_id = None
+    if instance.pk:
+        previous = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("academic_class_id", "teacher_id", "branch_id")
+            .first()
+        )
+        if previous:
+            (
+                instance._previous_academic_class_id,
+                instance._previous_teacher_id,
+                instance._previous_branch_id,
+            ) = previous
+
+
+@receiver([post_save, post_delete], sender=AcademicScheduleEvent)
+@receiver([post_save, post_delete], sender=WeeklyScheduleSlot)
+def schedule_invalidate_week_grids(sender, instance, **kwargs):
+    invalidate_class_week_grids(
+        instance.academic_class_id,
+        getattr(instance, "_previous_academic_class_id", None),
+    )
+
+
+@receiver(post_save, sender=AcademicClass)
+def academic_class_invalidate_week_grids(sender, instance, created, **kwargs):
+    # Aussi a la creation : une cle primaire peut etre reutilisee (SQLite).
+    invalidate_class_week_grids(instance.pk)
+
+
+@receiver(post_save, sender=EC)
+def ec_invalidate_week_grids(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_class_week_grids(
+            EC.objects.filter(pk=instance.pk).values_list("ue__semester__academic_class_id", flat=True).first()
+        )
@@ -37,14 +37,18 @@ from academics.services.schedule_service import (
     complete_schedule_event,
     create_schedule_event,
     get_branch_activity_summary,
+    get_class_week_schedule,
     get_schedule_alerts,
     get_schedule_conflicts,
     get_schedule_quality_score,
     get_student_week_schedule,
     get_teacher_next_events,
+    get_teacher_week_schedule,
     get_weekly_schedule_stats,
+    materialize_branch_weekly_slots,
     postpone_schedule_event,
     suggest_available_slots,
+    update_schedule_event,
 )
 from admissions.models import Candidature
 from branches.models import Branch
@@ -978,6 +982,105 @@ class AcademicScheduleServiceTests(TestCase):
         self.assertIn("summary", schedule)
         self.assertIn("empty_days", schedule)
 
+    def test_class_week_grid_is_cached_and_rebuilt_on_event_change(self):
+        event = create_schedule_event(
+            user=self.director,
+            title="Cours grille",
+            description="",
+            event_type=AcademicScheduleEvent.EVENT_TYPE_COURSE,
+            academic_class=self.academic_class,
+            ec=self.ec,
+            teacher=self.teacher,
+            branch=self.branch,
+            academic_year=self.academic_year,
+            start_datetime=self._aware_dt(1, 8),
+            end_datetime=self._aware_dt(1, 10),
+            status=AcademicScheduleEvent.STATUS_PLANNED,
+            location="Salle A1",
+            is_online=False,
+            meeting_link="",
+            is_active=True,
+        )
+
+        self.assertEqual(get_class_week_schedule(self.academic_class, self.week_start)["events"][0]["location"], "Salle A1")
+        with self.assertNumQueries(0):
+            cached = get_class_week_schedule(self.academic_class, self.week_start)
+        self.assertEqual(len(cached["events"]), 1)
+
+        update_schedule_event(event, user=self.director, location="Salle B2")
+
+        self.assertEqual(get_class_week_schedule(self.academic_class, self.week_start)["events"][0]["location"], "Salle B2")
+        teacher_schedule = get_teacher_week_schedule(self.teacher, self.week_start)
+        self.assertEqual([item["id"] for item in teacher_schedule["events"]], [event.id])
+        self.assertEqual(get_teacher_week_schedule(self.teacher_two, self.week_start)["events"], [])
+
+    def test_branch_materialization_bulk_creates_and_reports_conflicts(self):
+        for weekday, ec, teacher in ((0, self.ec, self.teacher), (1, self.ec_two, self.teacher_two)):
+            WeeklyScheduleSlot.objects.create(
+                academic_class=self.academic_class,
+                ec=ec,
+                teacher=teacher,
+                branch=self.branch,
+                academic_year=self.academic_year,
+                weekday=weekday,
+                start_time=time(8, 0),
+                end_time=time(10, 0),
+                room="Salle grille",
+            )
+        blocking = create_schedule_event(
+            user=self.director,
+            title="Rattrapage",
+            description="",
+            event_type=AcademicScheduleEvent.EVENT_TYPE_COURSE,
+            academic_class=self.academic_class,
+            ec=self.ec,
+            teacher=self.teacher,
+            branch=self.branch,
+            academic_year=self.academic_year,
+            start_datetime=self._aware_dt(1, 9),
+            end_datetime=self._aware_dt(1, 11),
+            status=AcademicScheduleEvent.STATUS_PLANNED,
+            location="Salle B2",
+            is_online=False,
+            meeting_link="",
+            is_active=True,
+        )
+        self.assertEqual(len(get_class_week_schedule(self.academic_class, self.week_start)["events"]), 1)
+
+        summary = materialize_branch_weekly_slots(
+            user=self.director,
+            branch=self.branch,
+            start_date=self.week_start,
+            end_date=self.week_start + timedelta(days=13),
+        )
+
+        self.assertEqual(summary["created"], 3)
+        self.assertEqual(summary["created_by_class"], {self.academic_class.id: 3})
+        self.assertEqual(len(summary["skipped_conflicts"]), 1)
+        conflict = summary["skipped_conflicts"][0]
+        self.assertEqual(conflict["date"], self.week_start + timedelta(days=1))
+        self.assertTrue(any(message.startswith("Classe occupee") for message in conflict["messages"]))
+        created = AcademicScheduleEvent.objects.exclude(pk=blocking.pk)
+        self.assertEqual(created.count(), 3)
+        self.assertEqual(
+            AcademicScheduleChangeLog.objects.filter(
+                event__in=created,
+                action_type=AcademicScheduleChangeLog.ACTION_CREATED,
+            ).count(),
+            3,
+        )
+        # bulk_create sans signaux : la grille en cache doit tout de meme etre reconstruite.
+        self.assertEqual(len(get_class_week_schedule(self.academic_class, self.week_start)["events"]), 2)
+
+        rerun = materialize_branch_weekly_slots(
+            user=self.director,
+            branch=self.branch,
+            start_date=self.week_start,
+            end_date=self.week_start + timedelta(days=13),
+        )
+        self.assertEqual(rerun["created"], 0)
+        self.assertEqual(rerun["skipped_existing"], 3)
+
     def test_get_student_week_schedule_handles_empty_week(self):
         schedule = get_student_week_schedule(self.student, self.week_start)
 
@@ -1,8 +1,22 @@
-"""Couche centrale de compatibilite pour les acces ESFE."""
+"""
+Couche centrale de compatibilite pour les acces ESFE.
+
+Les droits d'un utilisateur (groupes et alias, role du profil, position,
+role canonique, portee globale, annexe) sont resolus une seule fois dans
+un AccessContext, memorise sur l'objet utilisateur : request.user etant
+recharge a chaque requete, le contexte vit le temps de la requete, quel
+que soit le nombre d'appels a can_access / get_user_* (vues, gabarits,
+permissions). AccessContextMiddleware l'expose en request.access.
+
+Les changements faits sur le meme objet utilisateur pendant la requete
+(profil, groupes, Branch.manager, PaymentAgent) vident le contexte via
+accounts.signals ; clear_access_context() le fait explicitement.
+"""
 
 from __future__ import annotations
 
 import logging
+from functools import cached_property
 
 from branches.models import Branch
 from payments.models import PaymentAgent
@@ -154,6 +168,9 @@ ACCESS_RULES = {
 }
 
 
+ACCESS_CONTEXT_ATTR = "_access_context"
+
+
 def _is_authenticated(user):
     return bool(user and getattr(user, "is_authenticated", False))
 
@@ -185,293 +202,250 @@ def _get_raw_group_names(user):
     }
 
 
-def _is_global_user(user, *, profile_role=None, groups=None, canonical_role=None):
-    if not _is_authenticated(user):
-        return False
-
-    profile_role = profile_role if profile_role is not None else get_user_profile_role(user)
-    groups = set(groups) if groups is not None else set(get_user_groups(user))
-    canonical_role = canonical_role if canonical_role is not None else get_user_role(user)
-
-    return bool(
-        user.is_superuser
-        or profile_role in {"superadmin"}
-        or bool({"executive_director", "deputy_executive_director"}.intersection(groups))
-        or canonical_role in {"directeur_general", "super_admin"}
-    )
-
-
-def get_user_profile_role(user):
-    profile = _get_profile(user)
-    role = _normalize_token(getattr(profile, "role", None))
-
-    if _is_authenticated(user):
-        logger.debug(
-            "Profil role detecte pour %s: %s",
-            getattr(user, "username", "anonymous"),
-            role,
-        )
-
-    return role
-
-
-def get_user_groups(user):
-    groups = _get_raw_group_names(user)
+def _expand_groups(groups, *, is_superuser):
     expanded_groups = set(groups)
 
     for cluster in GROUP_COMPAT_CLUSTERS:
         if groups.intersection(cluster):
             expanded_groups.update(cluster)
 
-    if _is_authenticated(user) and getattr(user, "is_superuser", False):
+    if is_superuser:
         expanded_groups.add("superuser")
 
-    ordered_groups = tuple(sorted(expanded_groups))
-
-    if _is_authenticated(user):
-        logger.debug(
-            "Groupes detectes pour %s: %s",
-            getattr(user, "username", "anonymous"),
-            ", ".join(ordered_groups) or "aucun",
+    return tuple(sorted(expanded_groups))
+
+
+class AccessContext:
+    """Droits resolus d'un utilisateur ; can() ne fait plus aucune requete."""
+
+    def __init__(self, user):
+        self.user = user
+        self.is_authenticated = _is_authenticated(user)
+        self.is_superuser = self.is_authenticated and bool(getattr(user, "is_superuser", False))
+        self.profile = _get_profile(user)
+        self.profile_role = _normalize_token(getattr(self.profile, "role", None))
+        self.groups = _expand_groups(_get_raw_group_names(user), is_superuser=self.is_superuser)
+        self.group_set = frozenset(self.groups)
+        self.position = self._resolve_position() if self.is_authenticated else None
+        self.role = self._resolve_role() if self.is_authenticated else None
+        self.is_global = self.is_authenticated and bool(
+            self.is_superuser
+            or self.profile_role in {"superadmin"}
+            or bool({"executive_director", "deputy_executive_director"}.intersection(self.group_set))
+            or self.role in {"directeur_general", "super_admin"}
         )
 
-    return ordered_groups
+        if self.is_authenticated:
+            logger.debug(
+                "Acces resolus pour %s: role=%s, profile_role=%s, position=%s, groups=%s, is_global=%s",
+                getattr(user, "username", "anonymous"),
+                self.role,
+                self.profile_role,
+                self.position,
+                ", ".join(self.groups) or "aucun",
+                self.is_global,
+            )
+
+    def _resolve_position(self):
+        user = self.user
+        explicit_position = _normalize_token(getattr(self.profile, "position", None))
+        if explicit_position:
+            return explicit_position
+        if self.is_superuser:
+            return "super_admin"
+        if Branch.objects.filter(manager=user).exists():
+            return "branch_manager"
+        if PaymentAgent.objects.filter(user=user).exists():
+            return "payment_agent"
+        if "deputy_executive_director" in self.group_set:
+            return "deputy_executive_director"
+        if "executive_director" in self.group_set:
+            return "executive_director"
+
+        profile_role = self.profile_role
+        if profile_role == "finance":
+            return "finance_manager"
+        if profile_role == "admissions":
+            return "admissions"
+        if profile_role == "teacher":
+            return "teacher"
+        if profile_role == "student":
+            return "student"
+        if profile_role == "executive":
+            return "director_of_studies"
+        if profile_role == "superadmin":
+            return "super_admin"
+        if {"secretary", "secretaries"}.intersection(self.group_set):
+            return "secretary"
+        if {"marketing", "marketing_manager"}.intersection(self.group_set):
+            return "marketing_manager"
+        return None
+
+    def _resolve_role(self):
+        position = self.position
+        role = None
+
+        if self.is_superuser:
+            role = "super_admin"
+        elif position in {"executive_director", "deputy_executive_director"}:
+            role = "directeur_general"
+        elif position == "super_admin":
+            role = "super_admin"
+        elif self.profile_role in PROFILE_ROLE_TO_CANONICAL:
+            role = PROFILE_ROLE_TO_CANONICAL[self.profile_role]
+        elif position in POSITION_TO_CANONICAL:
+            role = POSITION_TO_CANONICAL[position]
+        else:
+            for group_name in self.groups:
+                if group_name in GROUP_TO_CANONICAL:
+                    role = GROUP_TO_CANONICAL[group_name]
+                    break
+
+        if role is None and getattr(self.user, "is_staff", False) and self.groups:
+            role = "staff_admin"
+
+        return role
+
+    @cached_property
+    def branch(self):
+        """Annexe : profile.branch, puis PaymentAgent.branch, puis Branch.manager (aucune pour un superuser)."""
+        user = self.user
+        if not self.is_authenticated or self.is_superuser:
+            return None
+
+        profile_branch = getattr(self.profile, "branch", None)
+        if profile_branch:
+            return profile_branch
+
+        payment_agent = (
+            PaymentAgent.objects
+            .select_related("branch")
+            .filter(user=user)
+            .first()
+        )
+        if payment_agent and payment_agent.branch:
+            return payment_agent.branch
 
+        managed_branch = Branch.objects.filter(manager=user).first()
+        if managed_branch:
+            return managed_branch
 
-def get_user_position(user):
-    if not _is_authenticated(user):
+        logger.debug("Annexe detectee pour %s: aucune", user.username)
         return None
 
-    profile = _get_profile(user)
-    explicit_position = _normalize_token(getattr(profile, "position", None))
-    if explicit_position:
-        position = explicit_position
-    elif user.is_superuser:
-        position = "super_admin"
-    elif Branch.objects.filter(manager=user).exists():
-        position = "branch_manager"
-    elif PaymentAgent.objects.filter(user=user).exists():
-        position = "payment_agent"
-    elif "deputy_executive_director" in get_user_groups(user):
-        position = "deputy_executive_director"
-    elif "executive_director" in get_user_groups(user):
-        position = "executive_director"
-    else:
-        profile_role = get_user_profile_role(user)
-        if profile_role == "finance":
-            position = "finance_manager"
-        elif profile_role == "admissions":
-            position = "admissions"
-        elif profile_role == "teacher":
-            position = "teacher"
-        elif profile_role == "student":
-            position = "student"
-        elif profile_role == "executive":
-            position = "director_of_studies"
-        elif profile_role == "superadmin":
-            position = "super_admin"
-        elif {"secretary", "secretaries"}.intersection(set(get_user_groups(user))):
-            position = "secretary"
-        elif {"marketing", "marketing_manager"}.intersection(set(get_user_groups(user))):
-            position = "marketing_manager"
-        else:
-            position = None
+    def scope(self):
+        return {
+            "branch": self.branch,
+            "annexe": self.branch,
+            "is_global": self.is_global,
+            "role": self.role,
+            "profile_role": self.profile_role,
+            "groups": self.groups,
+            "position": self.position,
+        }
+
+    def can(self, action, resource=None):
+        action_key = _normalize_token(action)
+        resource_key = _normalize_token(resource)
+
+        if not self.is_authenticated:
+            logger.warning(
+                "Acces refuse (non authentifie): action=%s, resource=%s",
+                action_key,
+                resource_key,
+            )
+            return False
+
+        if self.is_superuser:
+            logger.debug(
+                "Acces accorde (superuser): user=%s, action=%s, resource=%s",
+                self.user.username,
+                action_key,
+                resource_key,
+            )
+            return True
+
+        rule = ACCESS_RULES.get((action_key, resource_key))
+        if not rule:
+            logger.warning(
+                "Acces refuse (regle inconnue): user=%s, action=%s, resource=%s, role=%s, groups=%s",
+                self.user.username,
+                action_key,
+                resource_key,
+                self.role,
+                list(self.groups),
+            )
+            return False
+
+        has_access = bool(
+            (rule["allow_global"] and self.is_global)
+            or self.profile_role in rule["profile_roles"]
+            or self.role in rule["canonical_roles"]
+            or self.position in rule["positions"]
+            or bool(self.group_set.intersection(rule["groups"]))
+        )
 
-    logger.debug(
-        "Position detectee pour %s: %s",
-        getattr(user, "username", "anonymous"),
-        position,
-    )
+        log_method = logger.debug if has_access else logger.warning
+        log_method(
+            "Acces %s: user=%s, action=%s, resource=%s, role=%s, profile_role=%s, position=%s, groups=%s, is_global=%s",
+            "accorde" if has_access else "refuse",
+            self.user.username,
+            action_key,
+            resource_key,
+            self.role,
+            self.profile_role,
+            self.position,
+            list(self.groups),
+            self.is_global,
+        )
 
-    return position
+        return has_access
 
 
-def get_user_role(user):
+def get_access_context(user):
+    """AccessContext memorise sur l'utilisateur (calcule au premier appel)."""
     if not _is_authenticated(user):
-        return None
+        return AccessContext(user)
 
-    profile_role = get_user_profile_role(user)
-    groups = set(get_user_groups(user))
-    position = get_user_position(user)
-
-    role = None
-
-    if user.is_superuser:
-        role = "super_admin"
-    elif position in {"executive_director", "deputy_executive_director"}:
-        role = "directeur_general"
-    elif position == "super_admin":
-        role = "super_admin"
-    elif profile_role in PROFILE_ROLE_TO_CANONICAL:
-        role = PROFILE_ROLE_TO_CANONICAL[profile_role]
-    elif position in POSITION_TO_CANONICAL:
-        role = POSITION_TO_CANONICAL[position]
-    else:
-        for group_name in sorted(groups):
-            if group_name in GROUP_TO_CANONICAL:
-                role = GROUP_TO_CANONICAL[group_name]
-                break
-
-    if role is None and getattr(user, "is_staff", False) and groups:
-        role = "staff_admin"
-
-    logger.debug(
-        "Role canonique detecte pour %s: %s (profile_role=%s, position=%s)",
-        getattr(user, "username", "anonymous"),
-        role,
-        profile_role,
-        position,
-    )
-
-    return role
+    context = getattr(user, ACCESS_CONTEXT_ATTR, None)
+    if context is None:
+        context = AccessContext(user)
+        setattr(user, ACCESS_CONTEXT_ATTR, context)
+    return context
 
 
-def get_user_annexe(user):
-    if not _is_authenticated(user):
-        return None
+def clear_access_context(user):
+    if user is None:
+        return
+    try:
+        delattr(user, ACCESS_CONTEXT_ATTR)
+    except AttributeError:
+        pass
 
-    if user.is_superuser:
-        logger.debug("Annexe detectee pour %s: aucune (superuser/global)", user.username)
-        return None
 
-    profile = _get_profile(user)
-    profile_branch = getattr(profile, "branch", None)
-    if profile_branch:
-        logger.debug(
-            "Annexe detectee pour %s via profile.branch: %s",
-            user.username,
-            profile_branch,
-        )
-        return profile_branch
-
-    payment_agent = (
-        PaymentAgent.objects
-        .select_related("branch")
-        .filter(user=user)
-        .first()
-    )
-    if payment_agent and payment_agent.branch:
-        logger.debug(
-            "Annexe detectee pour %s via PaymentAgent.branch: %s",
-            user.username,
-            payment_agent.branch,
-        )
-        return payment_agent.branch
-
-    managed_branch = Branch.objects.filter(manager=user).first()
-    if managed_branch:
-        logger.debug(
-            "Annexe detectee pour %s via Branch.manager: %s",
-            user.username,
-            managed_branch,
-        )
-        return managed_branch
+def get_user_profile_role(user):
+    return get_access_context(user).profile_role
 
-    logger.debug("Annexe detectee pour %s: aucune", user.username)
-    return None
 
+def get_user_groups(user):
+    return get_access_context(user).groups
 
-def get_user_scope(user):
-    profile_role = get_user_profile_role(user)
-    groups = get_user_groups(user)
-    canonical_role = get_user_role(user)
-    position = get_user_position(user)
-    branch = get_user_annexe(user)
-    is_global = _is_global_user(
-        user,
-        profile_role=profile_role,
-        groups=groups,
-        canonical_role=canonical_role,
-    )
-
-    scope = {
-        "branch": branch,
-        "annexe": branch,
-        "is_global": is_global,
-        "role": canonical_role,
-        "profile_role": profile_role,
-        "groups": groups,
-        "position": position,
-    }
 
-    if _is_authenticated(user):
-        logger.debug(
-            "Scope detecte pour %s: role=%s, profile_role=%s, position=%s, is_global=%s, branch=%s",
-            getattr(user, "username", "anonymous"),
-            canonical_role,
-            profile_role,
-            position,
-            is_global,
-            branch,
-        )
+def get_user_position(user):
+    return get_access_context(user).position
 
-    return scope
 
+def get_user_role(user):
+    return get_access_context(user).role
 
-def can_access(user, action, resource=None):
-    action_key = _normalize_token(action)
-    resource_key = _normalize_token(resource)
 
-    if not _is_authenticated(user):
-        logger.warning(
-            "Acces refuse (non authentifie): action=%s, resource=%s",
-            action_key,
-            resource_key,
-        )
-        return False
-
-    groups = set(get_user_groups(user))
-    profile_role = get_user_profile_role(user)
-    canonical_role = get_user_role(user)
-    position = get_user_position(user)
-    is_global = _is_global_user(
-        user,
-        profile_role=profile_role,
-        groups=groups,
-        canonical_role=canonical_role,
-    )
-
-    if user.is_superuser:
-        logger.debug(
-            "Acces accorde (superuser): user=%s, action=%s, resource=%s",
-            user.username,
-            action_key,
-            resource_key,
-        )
-        return True
+def get_user_annexe(user):
+    return get_access_context(user).branch
 
-    rule = ACCESS_RULES.get((action_key, resource_key))
-    if not rule:
-        logger.warning(
-            "Acces refuse (regle inconnue): user=%s, action=%s, resource=%s, role=%s, groups=%s",
-            user.username,
-            action_key,
-            resource_key,
-            canonical_role,
-            sorted(groups),
-        )
-        return False
-
-    has_access = bool(
-        (rule["allow_global"] and is_global)
-        or profile_role in rule["profile_roles"]
-        or canonical_role in rule["canonical_roles"]
-        or position in rule["positions"]
-        or bool(groups.intersection(rule["groups"]))
-    )
-
-    log_method = logger.debug if has_access else logger.warning
-    log_method(
-        "Acces %s: user=%s, action=%s, resource=%s, role=%s, profile_role=%s, position=%s, groups=%s, is_global=%s",
-        "accorde" if has_access else "refuse",
-        user.username,
-        action_key,
-        resource_key,
-        canonical_role,
-        profile_role,
-        position,
-        sorted(groups),
-        is_global,
-    )
-
-    return has_access
+
+def get_user_scope(user):
+    return get_access_context(user).scope()
+
+
+def can_access(user, action, resource=None):
+    return get_access_context(user).can(action, resource)
@@ -1,9 +1,6 @@
 import json
-from calendar import monthrange
-from datetime import date
 
 from django.db import transaction
-from django.db.models import Sum
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
@@ -17,6 +14,7 @@ from accounts.services.accounting_documents import (
     ensure_expense_reference,
     finalize_cash_movement_document,
 )
+from accounts.services.cash_ledger import freeze_monthly_closure, verified_month_totals
 from accounts.services.manager_intelligence import get_branch_cash_balance
 
 from accounts.dashboards.htmx_utils import (
@@ -148,35 +146,8 @@ def monthly_closure_create(request: HttpRequest) -> HttpResponse:
         response.status_code = 400
         return response
 
-    period_end = date(period_month.year, period_month.month, monthrange(period_month.year, period_month.month)[1])
-    report_movements = BranchCashMovement.objects.filter(
-        branch=request.branch,
-        movement_date__gte=period_month,
-        movement_date__lte=period_end,
-    )
-    total_entries = report_movements.filter(movement_type=BranchCashMovement.TYPE_IN).aggregate(total=Sum("amount"))["total"] or 0
-    total_exits = report_movements.filter(movement_type=BranchCashMovement.TYPE_OUT).aggregate(total=Sum("amount"))["total"] or 0
-    student_revenue = report_movements.filter(
-        movement_type=BranchCashMovement.TYPE_IN,
-        source=BranchCashMovement.SOURCE_STUDENT_PAYMENT,
-    ).aggregate(total=Sum("amount"))["total"] or 0
-    shop_revenue = report_movements.filter(
-        movement_type=BranchCashMovement.TYPE_IN,
-        source=BranchCashMovement.SOURCE_SHOP,
-    ).aggregate(total=Sum("amount"))["total"] or 0
-    salary_paid = report_movements.filter(
-        movement_type=BranchCashMovement.TYPE_OUT,
-        source=BranchCashMovement.SOURCE_PAYROLL,
-    ).aggregate(total=Sum("amount"))["total"] or 0
-    honorarium_paid = report_movements.filter(
-        movement_type=BranchCashMovement.TYPE_OUT,
-        source=BranchCashMovement.SOURCE_HONORARIUM,
-    ).aggregate(total=Sum("amount"))["total"] or 0
-    expenses_paid = report_movements.filter(
-        movement_type=BranchCashMovement.TYPE_OUT,
-        source=BranchCashMovement.SOURCE_EXPENSE,
-    ).aggregate(total=Sum("amount"))["total"] or 0
-    result_amount = total_entries - total_exits
+    # Cumul du mois tenu a jour par chaque mouvement, confronte au recalcul.
+    month_totals, _ = verified_month_totals(request.branch, period_month)
     transfer_form = BranchBankTransferForm(request.POST, request.FILES)
     transfer_is_valid = True
     if transfer_amount > 0:
@@ -210,14 +181,7 @@ def monthly_closure_create(request: HttpRequest) -> HttpResponse:
             branch=request.branch,
             period_month=period_month,
             defaults={
-                "total_entries": total_entries,
-                "total_exits": total_exits,
-                "student_revenue": student_revenue,
-                "shop_revenue": shop_revenue,
-                "salary_paid": salary_paid,
-                "honorarium_paid": honorarium_paid,
-                "expenses_paid": expenses_paid,
-                "result_amount": result_amount,
+                **month_totals,
                 "bank_transfer_amount": transfer_amount,
                 "status": BranchMonthlyClosure.STATUS_DRAFT,
                 "notes": closure_form.cleaned_data.get("notes", ""),
@@ -266,9 +230,8 @@ def monthly_closure_close(request: HttpRequest, pk: int) -> HttpResponse:
     if closure.status != BranchMonthlyClosure.STATUS_VALIDATED:
         return manager_section_notice_redirect_response("cloture", "cloture_non_validee")
 
-    closure.status = BranchMonthlyClosure.STATUS_CLOSED
-    closure.closed_at = timezone.now()
-    closure.save(update_fields=["status", "closed_at", "updated_at"])
+    # Les mouvements dates du mois et saisis depuis le brouillon sont repris.
+    freeze_monthly_closure(closure)
 
     return manager_closure_redirect_response(closure.period_month)
 
@@ -20,6 +20,7 @@ from django.db import transaction, models
 from django.db.models import Sum, Count, Q
 
 from payments.models import Payment, CashPaymentSession, PaymentAgent
+from payments.services.rollups import rollup_totals
 from inscriptions.models import Inscription
 
 from .permissions import check_finance_access
@@ -697,37 +698,18 @@ def refresh_stats_htmx(request):
     Utilisé pour la mise à jour automatique des compteurs.
     """
 
-    payments = get_base_queryset(request.user, "payment")
+    rollups = get_base_queryset(request.user, "payment_rollup")
 
     today = timezone.now().date()
     week = today - timedelta(days=7)
 
-    stats_today = payments.filter(
-        paid_at__date=today,
-        status="validated"
-    ).aggregate(
-        total=Sum("amount"),
-        count=Count("id")
-    )
-
-    stats_week = payments.filter(
-        paid_at__date__gte=week,
-        status="validated"
-    ).aggregate(
-        total=Sum("amount"),
-        count=Count("id")
-    )
-
-    stats_global = payments.filter(
-        status="validated"
-    ).aggregate(
-        total=Sum("amount"),
-        count=Count("id")
-    )
+    # Lecture des agregats journaliers : le cout ne depend plus
+    # du volume total de paiements.
+    stats_today = rollup_totals(rollups, start=today, end=today)
+    stats_week = rollup_totals(rollups, start=week)
+    stats_global = rollup_totals(rollups)
 
-    pending_count = payments.filter(
-        status="pending"
-    ).count()
+    pending_count = stats_global["pending_count"]
 
     html = render_to_string(
         "accounts/dashboard/partials/finance_stats.html",
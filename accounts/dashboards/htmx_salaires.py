@@ -17,6 +17,7 @@ from accounts.services.manager_intelligence import (
     payroll_cash_reference,
     prepare_missing_payroll_entries,
 )
+from accounts.services.payroll_engine import build_monthly_payroll_preview
 from accounts.services.sensitive_actions import (
     SensitiveActionError,
     confirm_sensitive_action,
@@ -401,6 +402,30 @@ def salary_prepare_all(request: HttpRequest) -> HttpResponse:
     )
 
 
+@manager_required
+@require_GET
+def payroll_month_preview(request: HttpRequest) -> HttpResponse:
+    payroll_month = get_salary_period_from_request(request)
+    scope = (request.GET.get("scope") or "payroll").strip()
+    if scope not in {"payroll", "honoraria"}:
+        scope = "payroll"
+    preview = build_monthly_payroll_preview(
+        request.branch,
+        payroll_month,
+        include_payroll=scope == "payroll",
+        include_honoraria=scope == "honoraria",
+    )
+    return render(
+        request,
+        "accounts/dashboard/partials/payroll_month_preview.html",
+        {
+            "preview": preview,
+            "scope": scope,
+            "payroll_month": payroll_month,
+        },
+    )
+
+
 @manager_required
 @require_POST
 def salary_pay_ready_all(request: HttpRequest) -> HttpResponse:
@@ -1,53 +1,77 @@
-from datetime import date, timedelta
+"""
+Widgets HTMX du tableau de bord gestionnaire, interroges en continu.
 
-from django.db.models import Q, Sum
-from django.http import HttpRequest, HttpResponse
-from django.shortcuts import render
+Chaque widget est un fragment (core.fragments) : un chargeur minimal, mis
+en cache par annexe, purge par les evenements HX-Trigger qu'il ecoute et
+servi en 304 quand il n'a pas change.
+"""
+
+from typing import Any
+
+from django.db.models import Count, Q, Sum
+from django.http import HttpRequest
 from django.utils import timezone
 from django.views.decorators.http import require_GET
 
 from admissions.models import Candidature
-from accounts.models import BranchCashMovement, BranchExpense, PayrollEntry, Profile, TeacherHonorariumEntry
+from accounts.models import BranchExpense, PayrollEntry, Profile, TeacherHonorariumEntry
+from accounts.services.cash_ledger import get_month_totals
 from accounts.services.manager_intelligence import build_manager_intelligence_context, get_branch_cash_balance
+from core.fragments import htmx_fragment
 from inscriptions.models import Inscription
 from payments.models import Payment
 from students.models import Student
 
 from accounts.dashboards.htmx_utils import manager_required
 
+PARTIALS = "accounts/dashboard/partials"
+
+
+def _by_branch(request: HttpRequest) -> tuple:
+    return (request.branch.pk,)
+
+
+def _by_branch_and_day(request: HttpRequest) -> tuple:
+    return (request.branch.pk, timezone.now().date())
+
 
 @manager_required
 @require_GET
-def widget_cash_balance(request: HttpRequest) -> HttpResponse:
+@htmx_fragment(
+    "manager:cash-balance",
+    f"{PARTIALS}/widget_cash_balance.html",
+    vary=_by_branch_and_day,
+    dependencies=("accounts.BranchCashMovement",),
+    triggers=("cashBalanceUpdated",),
+)
+def widget_cash_balance(request: HttpRequest) -> dict[str, Any]:
     branch = request.branch
-    balance = get_branch_cash_balance(branch)
-    today = timezone.now().date()
-    start_of_month = today.replace(day=1)
-    cash_in_month = BranchCashMovement.objects.filter(
-        branch=branch, movement_date__gte=start_of_month,
-        movement_type=BranchCashMovement.TYPE_IN,
-    ).aggregate(total=Sum("amount"))["total"] or 0
-    cash_out_month = BranchCashMovement.objects.filter(
-        branch=branch, movement_date__gte=start_of_month,
-        movement_type=BranchCashMovement.TYPE_OUT,
-    ).aggregate(total=Sum("amount"))["total"] or 0
-    return render(
-        request,
-        "accounts/dashboard/partials/widget_cash_balance.html",
-        {
-            "balance": balance,
-            "cash_in_month": cash_in_month,
-            "cash_out_month": cash_out_month,
-            "net_month": cash_in_month - cash_out_month,
-        },
-    )
+    month = get_month_totals(branch, timezone.now().date())
+    return {
+        "balance": get_branch_cash_balance(branch),
+        "cash_in_month": month["total_entries"],
+        "cash_out_month": month["total_exits"],
+        "net_month": month["result_amount"],
+    }
 
 
 @manager_required
 @require_GET
-def widget_scope_bar(request: HttpRequest) -> HttpResponse:
+@htmx_fragment(
+    "manager:scope-bar",
+    f"{PARTIALS}/widget_scope_bar.html",
+    vary=_by_branch,
+    dependencies=(
+        "students.Student",
+        "admissions.Candidature",
+        "inscriptions.Inscription",
+        "payments.Payment",
+        "accounts.BranchCashMovement",
+    ),
+    triggers=("dashboardStatsUpdated", "cashBalanceUpdated", "candidatureUpdated", "paymentUpdated"),
+)
+def widget_scope_bar(request: HttpRequest) -> dict[str, Any]:
     branch = request.branch
-    today = timezone.now().date()
     total_students = Student.objects.filter(
         inscription__candidature__branch=branch,
         inscription__candidature__is_deleted=False,
@@ -64,26 +88,35 @@ def widget_scope_bar(request: HttpRequest) -> HttpResponse:
         inscription__is_archived=False,
         status=Payment.STATUS_PENDING,
     ).count()
-    balance = get_branch_cash_balance(branch)
-    return render(
-        request,
-        "accounts/dashboard/partials/widget_scope_bar.html",
-        {
-            "branch": branch,
-            "total_students": total_students,
-            "candidatures_pending": candidatures_pending,
-            "pending_payments": pending_payments,
-            "cash_balance": balance,
-        },
-    )
+    return {
+        "branch": branch,
+        "total_students": total_students,
+        "candidatures_pending": candidatures_pending,
+        "pending_payments": pending_payments,
+        "cash_balance": get_branch_cash_balance(branch),
+    }
 
 
 @manager_required
 @require_GET
-def widget_alerts_badge(request: HttpRequest) -> HttpResponse:
+@htmx_fragment(
+    "manager:alerts-badge",
+    f"{PARTIALS}/widget_alerts_badge.html",
+    vary=_by_branch_and_day,
+    dependencies=(
+        "payments.Payment",
+        "inscriptions.Inscription",
+        "accounts.Profile",
+        "accounts.PayrollEntry",
+        "accounts.TeacherHonorariumEntry",
+        "accounts.BranchExpense",
+        "accounts.BranchCashMovement",
+    ),
+    triggers=("dashboardStatsUpdated",),
+)
+def widget_alerts_badge(request: HttpRequest) -> dict[str, Any]:
     branch = request.branch
     payroll_month = timezone.now().date().replace(day=1)
-    today = timezone.now().date()
     base_payments = Payment.objects.filter(
         inscription__candidature__branch=branch,
         inscription__candidature__is_deleted=False,
@@ -122,70 +155,71 @@ def widget_alerts_badge(request: HttpRequest) -> HttpResponse:
         branch_staff_user_ids=branch_staff_user_ids,
         branch_teacher_user_ids=branch_teacher_user_ids,
     )
-    return render(
-        request,
-        "accounts/dashboard/partials/widget_alerts_badge.html",
-        {"alerts_count": len(intelligence.get("alerts", [])), "priorities_count": len(intelligence.get("priorities", []))},
-    )
+    return {"alerts_count": len(intelligence.get("alerts", [])), "priorities_count": len(intelligence.get("priorities", []))}
 
 
 @manager_required
 @require_GET
-def widget_today_payments(request: HttpRequest) -> HttpResponse:
-    branch = request.branch
+@htmx_fragment(
+    "manager:today-payments",
+    f"{PARTIALS}/widget_today_payments.html",
+    vary=_by_branch_and_day,
+    dependencies=("payments.Payment",),
+    triggers=("paymentUpdated", "dashboardStatsUpdated"),
+)
+def widget_today_payments(request: HttpRequest) -> dict[str, Any]:
     today = timezone.now().date()
-    start_of_month = today.replace(day=1)
-    base_payments = Payment.objects.filter(
-        inscription__candidature__branch=branch,
+    validated_today = Q(status=Payment.STATUS_VALIDATED, paid_at__date=today)
+    validated_month = Q(status=Payment.STATUS_VALIDATED, paid_at__date__gte=today.replace(day=1))
+    pending = Q(status=Payment.STATUS_PENDING)
+    totals = Payment.objects.filter(
+        inscription__candidature__branch=request.branch,
         inscription__candidature__is_deleted=False,
         inscription__is_archived=False,
+    ).aggregate(
+        today_count=Count("id", filter=validated_today),
+        today_total=Sum("amount", filter=validated_today),
+        month_total=Sum("amount", filter=validated_month),
+        pending_count=Count("id", filter=pending),
+        pending_amount=Sum("amount", filter=pending),
     )
-    today_count = base_payments.filter(
-        status=Payment.STATUS_VALIDATED, paid_at__date=today,
-    ).count()
-    today_total = base_payments.filter(
-        status=Payment.STATUS_VALIDATED, paid_at__date=today,
-    ).aggregate(total=Sum("amount"))["total"] or 0
-    month_total = base_payments.filter(
-        status=Payment.STATUS_VALIDATED, paid_at__date__gte=start_of_month,
-    ).aggregate(total=Sum("amount"))["total"] or 0
-    pending_count = base_payments.filter(status=Payment.STATUS_PENDING).count()
-    pending_amount = base_payments.filter(status=Payment.STATUS_PENDING).aggregate(total=Sum("amount"))["total"] or 0
-    return render(
-        request,
-        "accounts/dashboard/partials/widget_today_payments.html",
-        {
-            "today_count": today_count,
-            "today_total": today_total,
-            "month_total": month_total,
-            "pending_count": pending_count,
-            "pending_amount": pending_amount,
-        },
-    )
+    return {name: value or 0 for name, value in totals.items()}
 
 
 @manager_required
 @require_GET
-def widget_active_sessions(request: HttpRequest) -> HttpResponse:
+@htmx_fragment(
+    "manager:active-sessions",
+    f"{PARTIALS}/widget_active_sessions.html",
+    vary=lambda request: (request.branch.pk, request.user.pk),
+    dependencies=("payments.CashPaymentSession", "payments.PaymentAgent"),
+    triggers=("cashBalanceUpdated",),
+    # Les sessions expirent d'elles-memes : entree courte.
+    timeout=15,
+)
+def widget_active_sessions(request: HttpRequest) -> dict[str, Any]:
     branch = request.branch
     from payments.models import CashPaymentSession, PaymentAgent
     now = timezone.now()
     agent = PaymentAgent.objects.filter(user=request.user, branch=branch, is_active=True).first()
     sessions = []
     if agent:
-        sessions = CashPaymentSession.objects.filter(
+        sessions = list(CashPaymentSession.objects.filter(
             agent=agent, is_used=False, expires_at__gt=now,
-        ).select_related("inscription", "inscription__candidature").order_by("-created_at")[:5]
-    return render(
-        request,
-        "accounts/dashboard/partials/widget_active_sessions.html",
-        {"sessions": sessions, "count": len(sessions)},
-    )
+        ).select_related("inscription", "inscription__candidature").order_by("-created_at")[:5])
+    return {"sessions": sessions, "count": len(sessions)}
 
 
 @manager_required
 @require_GET
-def widget_sidebar_badges(request: HttpRequest) -> HttpResponse:
+@htmx_fragment(
+    "manager:sidebar-badges",
+    f"{PARTIALS}/widget_sidebar_badges.html",
+    vary=_by_branch,
+    dependencies=("admissions.Candidature", "payments.Payment"),
+    triggers=("candidatureUpdated", "paymentUpdated"),
+)
+def widget_sidebar_badges(request: HttpRequest) -> dict[str, Any]:
     branch = request.branch
     candidatures_pending = Candidature.objects.filter(
         branch=branch, is_deleted=False,
@@ -197,11 +231,7 @@ def widget_sidebar_badges(request: HttpRequest) -> HttpResponse:
         inscription__is_archived=False,
         status=Payment.STATUS_PENDING,
     ).count()
-    return render(
-        request,
-        "accounts/dashboard/partials/widget_sidebar_badges.html",
-        {
-            "candidatures_pending": candidatures_pending,
-            "pending_payments": pending_payments,
-        },
-    )
+    return {
+        "candidatures_pending": candidatures_pending,
+        "pending_payments": pending_payments,
+    }
@@ -10,6 +10,7 @@ from django.utils import timezone
 from admissions.models import Candidature
 from accounts.forms import BranchBankTransferForm, BranchCashMovementForm, BranchExpenseForm, BranchMonthlyClosureForm, DonationForm
 from accounts.models import BranchBankTransfer, BranchCashMovement, BranchExpense, BranchMonthlyClosure, Donation, PayrollEntry, Profile, TeacherHonorariumEntry
+from accounts.services.cash_ledger import get_month_totals
 from accounts.services.manager_intelligence import build_manager_intelligence_context
 from accounts.services.manager_intelligence import get_branch_cash_balance
 from shop.forms import ShopCounterOrderForm, ShopProductForm, ShopStockInForm
@@ -863,6 +864,7 @@ def _manager_context(request, active_section="overview"):
             "bank_transfer_amount": max(get_branch_cash_balance(branch) - branch.cash_reserve_target, 0),
         }),
         "available_cash_balance": get_branch_cash_balance(branch),
+        "closure_preview": get_month_totals(branch, payroll_month),
         "cash_reserve_target": branch.cash_reserve_target,
         "suggested_transfer_amount": max(get_branch_cash_balance(branch) - branch.cash_reserve_target, 0),
         "transfer_form": BranchBankTransferForm(initial={
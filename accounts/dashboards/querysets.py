@@ -10,7 +10,7 @@ Objectifs :
 
 from admissions.models import Candidature
 from inscriptions.models import Inscription
-from payments.models import Payment
+from payments.models import Payment, PaymentDailyRollup
 
 from .helpers import get_user_branch
 from .permissions import is_global_viewer
@@ -34,6 +34,7 @@ def get_base_queryset(user, model_type):
         - "candidature"
         - "inscription"
         - "payment"
+        - "payment_rollup"
     """
 
     branch = get_user_branch(user)
@@ -128,6 +129,24 @@ def get_base_queryset(user, model_type):
         return qs
 
 
+    # ==========================================================
+    # ROLLUPS PAIEMENTS (AGREGATS JOURNALIERS)
+    # ==========================================================
+
+    if model_type == "payment_rollup":
+
+        qs = PaymentDailyRollup.objects.all()
+
+        if not is_global:
+
+            if not branch:
+                return qs.none()
+
+            qs = qs.filter(branch=branch)
+
+        return qs
+
+
     # ==========================================================
     # ERREUR
     # ==========================================================
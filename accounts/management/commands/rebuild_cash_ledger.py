@@ -0,0 +1,55 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import TruncMonth
+
+from accounts.models import BranchCashMonthTotal, BranchCashMovement
+from accounts.services.cash_ledger import get_month_totals, rebuild_month_totals
+from branches.models import Branch
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les cumuls mensuels de caisse depuis les mouvements et signale les ecarts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch", help="Code de l'annexe (toutes par defaut).")
+        parser.add_argument("--month", help="Mois AAAA-MM (tous les mois ayant des mouvements par defaut).")
+
+    def handle(self, *args, **options):
+        branches = Branch.objects.all()
+        if options.get("branch"):
+            branches = branches.filter(code=options["branch"])
+            if not branches.exists():
+                raise CommandError(f"Annexe introuvable : {options['branch']}")
+
+        month = None
+        if options.get("month"):
+            try:
+                month = date.fromisoformat(f"{options['month']}-01")
+            except ValueError as exc:
+                raise CommandError("Mois attendu au format AAAA-MM.") from exc
+
+        rebuilt = 0
+        drifted = 0
+        for branch in branches:
+            if month:
+                months = {month}
+            else:
+                months = set(
+                    BranchCashMovement.objects.filter(branch=branch)
+                    .annotate(period_month=TruncMonth("movement_date"))
+                    .values_list("period_month", flat=True)
+                    .distinct()
+                )
+                months |= set(
+                    BranchCashMonthTotal.objects.filter(branch=branch).values_list("period_month", flat=True)
+                )
+            for period_month in sorted(months):
+                before = get_month_totals(branch, period_month)
+                rebuild_month_totals(branch, period_month)
+                if get_month_totals(branch, period_month) != before:
+                    drifted += 1
+                    self.stdout.write(self.style.WARNING(f"Ecart corrige : {branch.code} {period_month:%Y-%m}"))
+                rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{rebuilt} mois reconstruit(s), {drifted} ecart(s) corrige(s)."))
@@ -0,0 +1,14 @@
+from django.utils.functional import SimpleLazyObject
+
+from accounts.access import get_access_context
+
+
+class AccessContextMiddleware:
+    """Expose request.access : AccessContext de request.user, resolu au premier usage."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.access = SimpleLazyObject(lambda: get_access_context(request.user))
+        return self.get_response(request)
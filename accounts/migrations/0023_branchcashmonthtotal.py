@@ -0,0 +1,62 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def build_cash_month_totals(apps, schema_editor):
+    BranchCashMovement = apps.get_model("accounts", "BranchCashMovement")
+    BranchCashMonthTotal = apps.get_model("accounts", "BranchCashMonthTotal")
+    rows = (
+        BranchCashMovement.objects
+        .annotate(period_month=TruncMonth("movement_date"))
+        .order_by()
+        .values("branch_id", "period_month", "movement_type", "source")
+        .annotate(total=Sum("amount"), count=Count("id"))
+    )
+    BranchCashMonthTotal.objects.bulk_create(
+        [
+            BranchCashMonthTotal(
+                branch_id=row["branch_id"],
+                period_month=row["period_month"],
+                movement_type=row["movement_type"],
+                source=row["source"],
+                amount=row["total"] or 0,
+                movements_count=row["count"],
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0022_alter_sensitiveactionrequest_action_type"),
+        ("branches", "0003_branch_cash_reserve_target"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BranchCashMonthTotal",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("period_month", models.DateField()),
+                ("movement_type", models.CharField(choices=[("in", "Entree"), ("out", "Sortie")], max_length=10)),
+                ("source", models.CharField(choices=[("manual", "Saisie manuelle"), ("expense", "Depense"), ("payroll", "Salaire"), ("honorarium", "Honoraire enseignant"), ("student_payment", "Paiement etudiant"), ("shop", "Boutique"), ("adjustment", "Ajustement caisse"), ("donation", "Don / Donation")], max_length=30)),
+                ("amount", models.BigIntegerField(default=0)),
+                ("movements_count", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("branch", models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name="cash_month_totals", to="branches.branch")),
+            ],
+            options={
+                "verbose_name": "Cumul mensuel de caisse",
+                "verbose_name_plural": "Cumuls mensuels de caisse",
+                "ordering": ["-period_month", "movement_type", "source"],
+                "constraints": [models.UniqueConstraint(fields=("branch", "period_month", "movement_type", "source"), name="unique_branch_cash_month_total")],
+            },
+        ),
+        migrations.RunPython(build_cash_month_totals, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.templatetags.static import static
 from django.utils import timezone
 
@@ -653,6 +653,56 @@ class BranchCashMovement(models.Model):
     def __str__(self):
         return f"{self.get_movement_type_display()} {self.amount} FCFA - {self.label}"
 
+    def save(self, *args, **kwargs):
+        from accounts.services.cash_ledger import LEDGER_FIELDS, record_movement_change
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not {field.removesuffix("_id") for field in LEDGER_FIELDS} & set(update_fields):
+            # Numero de recu, reference... : les cumuls mensuels ne bougent pas.
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = BranchCashMovement.objects.filter(pk=self.pk).values(*LEDGER_FIELDS).first()
+            super().save(*args, **kwargs)
+            record_movement_change(previous, self)
+
+
+class BranchCashMonthTotal(models.Model):
+    """
+    Cumul mensuel des mouvements de caisse d'une annexe, par type et source.
+
+    Tenu a jour dans la transaction de chaque mouvement
+    (accounts.services.cash_ledger) : cloture, apercu du mois et solde de
+    caisse lisent ces quelques lignes au lieu d'agreger les mouvements.
+    """
+
+    branch = models.ForeignKey(
+        Branch,
+        on_delete=models.PROTECT,
+        related_name="cash_month_totals",
+    )
+    period_month = models.DateField()
+    movement_type = models.CharField(max_length=10, choices=BranchCashMovement.TYPE_CHOICES)
+    source = models.CharField(max_length=30, choices=BranchCashMovement.SOURCE_CHOICES)
+    amount = models.BigIntegerField(default=0)
+    movements_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-period_month", "movement_type", "source"]
+        verbose_name = "Cumul mensuel de caisse"
+        verbose_name_plural = "Cumuls mensuels de caisse"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["branch", "period_month", "movement_type", "source"],
+                name="unique_branch_cash_month_total",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.branch} {self.period_month:%Y-%m} {self.movement_type}/{self.source} : {self.amount} FCFA"
+
 
 class AccountingDocumentSequence(models.Model):
     DOCUMENT_EXPENSE = "expense"
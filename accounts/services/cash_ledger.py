@@ -0,0 +1,212 @@
+"""
+Cumuls mensuels de caisse par annexe (BranchCashMonthTotal).
+
+Chaque BranchCashMovement cree, modifie ou supprime ajuste, dans la meme
+transaction, la ligne (annexe, mois, type, source) correspondante. Lire
+un mois revient donc a lire une quinzaine de lignes au plus, quel que
+soit le nombre de paiements, depenses, salaires ou honoraires :
+
+- l'apercu de cloture est disponible en direct tout le mois ;
+- cloturer fige le cumul apres l'avoir confronte a un recalcul depuis les
+  mouvements (verified_month_totals) ; un ecart, qui ne peut venir que
+  d'une ecriture hors ORM, est journalise et le cumul reconstruit ;
+- le solde de caisse additionne les cumuls de tous les mois.
+
+La commande rebuild_cash_ledger reconstruit les cumuls d'une annexe.
+"""
+
+import logging
+from calendar import monthrange
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from accounts.models import BranchCashMonthTotal, BranchCashMovement, BranchMonthlyClosure
+
+logger = logging.getLogger(__name__)
+
+LEDGER_FIELDS = ("branch_id", "movement_date", "movement_type", "source", "amount")
+
+# Rubriques de BranchMonthlyClosure -> (type, source) du mouvement.
+CLOSURE_SOURCES = {
+    "student_revenue": (BranchCashMovement.TYPE_IN, BranchCashMovement.SOURCE_STUDENT_PAYMENT),
+    "shop_revenue": (BranchCashMovement.TYPE_IN, BranchCashMovement.SOURCE_SHOP),
+    "salary_paid": (BranchCashMovement.TYPE_OUT, BranchCashMovement.SOURCE_PAYROLL),
+    "honorarium_paid": (BranchCashMovement.TYPE_OUT, BranchCashMovement.SOURCE_HONORARIUM),
+    "expenses_paid": (BranchCashMovement.TYPE_OUT, BranchCashMovement.SOURCE_EXPENSE),
+}
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def month_end(period_month):
+    return date(period_month.year, period_month.month, monthrange(period_month.year, period_month.month)[1])
+
+
+# ==========================================================
+# ECRITURE
+# ==========================================================
+
+def _ledger_key(values):
+    return (
+        values["branch_id"],
+        month_start(values["movement_date"]),
+        values["movement_type"],
+        values["source"],
+    )
+
+
+def _apply(key, amount, count):
+    branch_id, period_month, movement_type, source = key
+    total, _ = BranchCashMonthTotal.objects.get_or_create(
+        branch_id=branch_id,
+        period_month=period_month,
+        movement_type=movement_type,
+        source=source,
+    )
+    # F() : deux mouvements simultanes ne s'ecrasent pas.
+    BranchCashMonthTotal.objects.filter(pk=total.pk).update(
+        amount=F("amount") + amount,
+        movements_count=F("movements_count") + count,
+        updated_at=timezone.now(),
+    )
+
+
+def record_movement_change(previous, movement):
+    """previous : valeurs LEDGER_FIELDS avant enregistrement (None a la creation)."""
+    current = {field: getattr(movement, field) for field in LEDGER_FIELDS}
+    if previous is None:
+        _apply(_ledger_key(current), current["amount"], 1)
+        return
+    if _ledger_key(previous) == _ledger_key(current):
+        if previous["amount"] != current["amount"]:
+            _apply(_ledger_key(current), current["amount"] - previous["amount"], 0)
+        return
+    _apply(_ledger_key(previous), -previous["amount"], -1)
+    _apply(_ledger_key(current), current["amount"], 1)
+
+
+def record_movement_deleted(movement):
+    values = {field: getattr(movement, field) for field in LEDGER_FIELDS}
+    _apply(_ledger_key(values), -values["amount"], -1)
+
+
+# ==========================================================
+# LECTURE
+# ==========================================================
+
+def _summarize(rows):
+    """rows : [(type, source, montant)] -> rubriques de cloture."""
+    totals = {"total_entries": 0, "total_exits": 0, **{name: 0 for name in CLOSURE_SOURCES}}
+    by_source = {}
+    for movement_type, source, amount in rows:
+        amount = amount or 0
+        by_source[(movement_type, source)] = by_source.get((movement_type, source), 0) + amount
+        if movement_type == BranchCashMovement.TYPE_IN:
+            totals["total_entries"] += amount
+        else:
+            totals["total_exits"] += amount
+    for name, key in CLOSURE_SOURCES.items():
+        totals[name] = by_source.get(key, 0)
+    totals["result_amount"] = totals["total_entries"] - totals["total_exits"]
+    return totals
+
+
+def get_month_totals(branch, period_month):
+    """Rubriques du mois depuis les cumuls (une requete)."""
+    rows = BranchCashMonthTotal.objects.filter(
+        branch=branch,
+        period_month=month_start(period_month),
+    ).values_list("movement_type", "source", "amount")
+    return _summarize(rows)
+
+
+def _grouped_movements(branch, period_month):
+    period_month = month_start(period_month)
+    return (
+        BranchCashMovement.objects
+        .filter(branch=branch, movement_date__gte=period_month, movement_date__lte=month_end(period_month))
+        .order_by()
+        .values("movement_type", "source")
+        .annotate(total=Sum("amount"), count=Count("id"))
+    )
+
+
+def recompute_month_totals(branch, period_month):
+    """Memes rubriques, recalculees depuis les mouvements (controle)."""
+    return _summarize(
+        (row["movement_type"], row["source"], row["total"])
+        for row in _grouped_movements(branch, period_month)
+    )
+
+
+def get_branch_cash_balance(branch):
+    totals = dict(
+        BranchCashMonthTotal.objects
+        .filter(branch=branch)
+        .order_by()
+        .values("movement_type")
+        .annotate(total=Sum("amount"))
+        .values_list("movement_type", "total")
+    )
+    return max((totals.get(BranchCashMovement.TYPE_IN) or 0) - (totals.get(BranchCashMovement.TYPE_OUT) or 0), 0)
+
+
+# ==========================================================
+# CONTROLE ET CLOTURE
+# ==========================================================
+
+def rebuild_month_totals(branch, period_month):
+    period_month = month_start(period_month)
+    with transaction.atomic():
+        BranchCashMonthTotal.objects.filter(branch=branch, period_month=period_month).delete()
+        BranchCashMonthTotal.objects.bulk_create([
+            BranchCashMonthTotal(
+                branch=branch,
+                period_month=period_month,
+                movement_type=row["movement_type"],
+                source=row["source"],
+                amount=row["total"] or 0,
+                movements_count=row["count"],
+            )
+            for row in _grouped_movements(branch, period_month)
+        ])
+
+
+def verified_month_totals(branch, period_month):
+    """
+    (rubriques, concordant) : le cumul du mois confronte au recalcul. En
+    cas d'ecart, le recalcul fait foi et le cumul est reconstruit.
+    """
+    with transaction.atomic():
+        # Verrouille les cumuls du mois : aucun mouvement ne s'intercale entre les deux lectures.
+        list(
+            BranchCashMonthTotal.objects
+            .select_for_update()
+            .filter(branch=branch, period_month=month_start(period_month))
+        )
+        ledger = get_month_totals(branch, period_month)
+        recomputed = recompute_month_totals(branch, period_month)
+        if ledger == recomputed:
+            return ledger, True
+        logger.warning(
+            "Cumul de caisse divergent (annexe %s, %s) : %s != %s ; reconstruction.",
+            branch.pk, month_start(period_month), ledger, recomputed,
+        )
+        rebuild_month_totals(branch, period_month)
+    return recomputed, False
+
+
+def freeze_monthly_closure(closure):
+    """Fige sur la cloture le cumul verifie du mois, puis la passe a l'etat cloture."""
+    totals, consistent = verified_month_totals(closure.branch, closure.period_month)
+    for name, value in totals.items():
+        setattr(closure, name, value)
+    closure.status = BranchMonthlyClosure.STATUS_CLOSED
+    closure.closed_at = timezone.now()
+    closure.save(update_fields=[*totals, "status", "closed_at", "updated_at"])
+    return consistent
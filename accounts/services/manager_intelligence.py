@@ -1,20 +1,23 @@
-from datetime import datetime
 from decimal import Decimal
 from django.db import transaction
 from django.db.models import Sum
 from django.utils import timezone
 
-from academics.models import LessonLog
 from accounts.models import (
     BranchBankTransfer,
     BranchCashMovement,
     BranchExpense,
     BranchMonthlyClosure,
     PayrollEntry,
-    Profile,
     TeacherHonorariumEntry,
 )
 from accounts.services.accounting_documents import create_cash_movement
+from accounts.services.cash_ledger import get_branch_cash_balance as get_ledger_cash_balance
+from accounts.services.payroll_engine import (
+    apply_monthly_payroll_preview,
+    build_monthly_payroll_preview,
+    get_teacher_hours_by_teacher,
+)
 from communication.models import CommunicationNotification
 from communication.services import NotificationService
 from inscriptions.models import Inscription
@@ -37,14 +40,8 @@ def payroll_cash_reference(payroll_entry, amount=None):
 
 
 def get_branch_cash_balance(branch):
-    movements = BranchCashMovement.objects.filter(branch=branch)
-    cash_in = movements.filter(
-        movement_type=BranchCashMovement.TYPE_IN,
-    ).aggregate(total=Sum("amount"))["total"] or 0
-    cash_out = movements.filter(
-        movement_type=BranchCashMovement.TYPE_OUT,
-    ).aggregate(total=Sum("amount"))["total"] or 0
-    return max(cash_in - cash_out, 0)
+    # Somme des cumuls mensuels (accounts.services.cash_ledger), pas des mouvements.
+    return get_ledger_cash_balance(branch)
 
 
 def sync_student_payment_cash_movements(branch, user):
@@ -84,104 +81,26 @@ def sync_student_payment_cash_movements(branch, user):
 
 
 def prepare_missing_payroll_entries(branch, period_month, user):
-    staff_profiles = (
-        Profile.objects
-        .select_related("user")
-        .filter(branch=branch, user__is_active=True, employment_status="active")
-        .exclude(position="student")
-        .exclude(position="teacher")
-        .exclude(user_type="public")
-    )
-    created = 0
-    skipped_without_salary = 0
-    for profile in staff_profiles:
-        if profile.salary_base <= 0:
-            skipped_without_salary += 1
-            continue
-        _, was_created = PayrollEntry.objects.get_or_create(
-            branch=branch,
-            employee=profile.user,
-            period_month=period_month,
-            defaults={
-                "base_salary": profile.salary_base,
-                "allowances": 0,
-                "deductions": 0,
-                "advances": 0,
-                "paid_amount": 0,
-                "status": PayrollEntry.STATUS_DRAFT,
-                "created_by": user,
-                "updated_by": user,
-                "notes": "Paie pre-calculee automatiquement depuis le profil employe.",
-            },
-        )
-        if was_created:
-            created += 1
-    return {"created": created, "skipped_without_salary": skipped_without_salary}
+    preview = build_monthly_payroll_preview(branch, period_month, include_honoraria=False)
+    result = apply_monthly_payroll_preview(preview, user)
+    return {
+        "created": result["payroll_created"],
+        "skipped_without_salary": result["skipped_without_salary"],
+    }
 
 
 def _teacher_honorarium_hours(branch, teacher, period_month):
-    logs = LessonLog.objects.filter(
-        branch=branch,
-        teacher=teacher,
-        date__year=period_month.year,
-        date__month=period_month.month,
-        status=LessonLog.STATUS_DONE,
-        validated_by__isnull=False,
-    )
-    total_minutes = 0
-    for log in logs:
-        start = datetime.combine(period_month, log.start_time)
-        end = datetime.combine(period_month, log.end_time)
-        if end <= start:
-            continue
-        total_minutes += int((end - start).total_seconds() // 60)
-    return Decimal(total_minutes) / Decimal(60)
+    hours = get_teacher_hours_by_teacher(branch, period_month, teacher_ids=[teacher.pk])
+    return hours.get(teacher.pk, Decimal("0"))
 
 
 def prepare_missing_teacher_honorarium_entries(branch, period_month, user):
-    teacher_profiles = (
-        Profile.objects
-        .select_related("user")
-        .filter(
-            branch=branch,
-            user__is_active=True,
-            employment_status="active",
-            position="teacher",
-        )
-        .exclude(user_type="public")
-    )
-    created = 0
-    skipped_without_rate = 0
-    for profile in teacher_profiles:
-        if profile.teacher_hourly_rate <= 0:
-            skipped_without_rate += 1
-            continue
-        validated_hours = _teacher_honorarium_hours(branch, profile.user, period_month)
-        entry, was_created = TeacherHonorariumEntry.objects.get_or_create(
-            branch=branch,
-            teacher=profile.user,
-            period_month=period_month,
-            defaults={
-                "hourly_rate": profile.teacher_hourly_rate,
-                "validated_hours": validated_hours,
-                "adjustments": 0,
-                "deductions": 0,
-                "advances": 0,
-                "paid_amount": 0,
-                "status": TeacherHonorariumEntry.STATUS_DRAFT,
-                "created_by": user,
-                "updated_by": user,
-                "notes": "Honoraire pre-calcule automatiquement depuis les cours valides.",
-            },
-        )
-        if not was_created:
-            entry.hourly_rate = profile.teacher_hourly_rate
-            entry.validated_hours = validated_hours
-            entry.updated_by = user
-            entry.save()
-        else:
-            created += 1
-    return {"created": created, "skipped_without_rate": skipped_without_rate}
+    preview = build_monthly_payroll_preview(branch, period_month, include_payroll=False)
+    result = apply_monthly_payroll_preview(preview, user)
+    return {
+        "created": result["honorarium_created"],
+        "skipped_without_rate": result["skipped_without_rate"],
+    }
 
 
 def notify_teacher_honorarium_available(entry, actor):
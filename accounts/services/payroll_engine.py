@@ -0,0 +1,284 @@
+"""
+Moteur de preparation mensuelle des paies et honoraires d'une annexe.
+
+Remplace les get_or_create unitaires par un traitement ensembliste :
+- heures enseignants agregees cote base (une requete pour toute l'annexe)
+- fiches manquantes determinees par anti-jointure (NOT EXISTS)
+- creation par bulk_create, mise a jour des honoraires par bulk_update
+
+build_monthly_payroll_preview() ne modifie rien et permet d'afficher
+l'apercu ; apply_monthly_payroll_preview() l'enregistre.
+"""
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DurationField, Exists, ExpressionWrapper, F, OuterRef, Sum
+from django.utils import timezone
+
+from academics.models import LessonLog
+from accounts.models import PayrollEntry, Profile, TeacherHonorariumEntry
+from core.cache import invalidate_tags
+
+
+PAYROLL_AUTO_NOTE = "Paie pre-calculee automatiquement depuis le profil employe."
+HONORARIUM_AUTO_NOTE = "Honoraire pre-calcule automatiquement depuis les cours valides."
+
+
+@dataclass(frozen=True)
+class PayrollPreviewRow:
+    user_id: int
+    full_name: str
+    amount: int
+    hourly_rate: int | None = None
+    hours: Decimal | None = None
+    existing_entry_id: int | None = None
+
+
+@dataclass
+class MonthlyPayrollPreview:
+    branch: object
+    period_month: object
+    payroll_to_create: list[PayrollPreviewRow] = field(default_factory=list)
+    honorarium_to_create: list[PayrollPreviewRow] = field(default_factory=list)
+    honorarium_to_update: list[PayrollPreviewRow] = field(default_factory=list)
+    skipped_without_salary: list[PayrollPreviewRow] = field(default_factory=list)
+    skipped_without_rate: list[PayrollPreviewRow] = field(default_factory=list)
+
+    @property
+    def payroll_total(self):
+        return sum(row.amount for row in self.payroll_to_create)
+
+    @property
+    def honorarium_total(self):
+        return sum(row.amount for row in self.honorarium_to_create + self.honorarium_to_update)
+
+    def as_dict(self):
+        return {
+            "period_month": self.period_month,
+            "payroll_to_create": len(self.payroll_to_create),
+            "honorarium_to_create": len(self.honorarium_to_create),
+            "honorarium_to_update": len(self.honorarium_to_update),
+            "skipped_without_salary": len(self.skipped_without_salary),
+            "skipped_without_rate": len(self.skipped_without_rate),
+            "payroll_total": self.payroll_total,
+            "honorarium_total": self.honorarium_total,
+        }
+
+
+def _full_name(profile):
+    return profile.user.get_full_name() or profile.user.username
+
+
+def _active_profiles(branch):
+    return (
+        Profile.objects
+        .select_related("user")
+        .filter(branch=branch, user__is_active=True, employment_status="active")
+        .exclude(user_type="public")
+    )
+
+
+def get_teacher_hours_by_teacher(branch, period_month, teacher_ids=None):
+    """
+    Heures validees par enseignant sur le mois, calculees en une seule
+    agregation SQL : {teacher_id: Decimal(heures)}.
+    """
+    logs = LessonLog.objects.filter(
+        branch=branch,
+        date__year=period_month.year,
+        date__month=period_month.month,
+        status=LessonLog.STATUS_DONE,
+        validated_by__isnull=False,
+        end_time__gt=F("start_time"),
+    )
+    if teacher_ids is not None:
+        logs = logs.filter(teacher_id__in=teacher_ids)
+    rows = (
+        logs
+        .values("teacher_id")
+        .annotate(
+            duration=Sum(
+                ExpressionWrapper(F("end_time") - F("start_time"), output_field=DurationField())
+            )
+        )
+        .order_by()
+    )
+    hours = {}
+    for row in rows:
+        duration = row["duration"] or timedelta()
+        total_minutes = int(duration.total_seconds() // 60)
+        hours[row["teacher_id"]] = Decimal(total_minutes) / Decimal(60)
+    return hours
+
+
+def build_monthly_payroll_preview(branch, period_month, *, include_payroll=True, include_honoraria=True):
+    """
+    Calcule, sans ecrire en base, les fiches de paie et d'honoraires
+    a creer (ou a recalculer pour les honoraires) pour le mois.
+    """
+    preview = MonthlyPayrollPreview(branch=branch, period_month=period_month)
+    profiles = _active_profiles(branch)
+    if include_payroll:
+        _preview_payroll(preview, profiles)
+    if include_honoraria:
+        _preview_honoraria(preview, profiles)
+    return preview
+
+
+def _preview_payroll(preview, profiles):
+    branch = preview.branch
+    period_month = preview.period_month
+    missing_payroll = (
+        profiles
+        .exclude(position__in=["student", "teacher"])
+        .annotate(
+            has_payroll=Exists(
+                PayrollEntry.objects.filter(
+                    branch=branch,
+                    period_month=period_month,
+                    employee_id=OuterRef("user_id"),
+                )
+            )
+        )
+        .filter(has_payroll=False)
+    )
+    for profile in missing_payroll:
+        row = PayrollPreviewRow(
+            user_id=profile.user_id,
+            full_name=_full_name(profile),
+            amount=profile.salary_base,
+        )
+        if profile.salary_base <= 0:
+            preview.skipped_without_salary.append(row)
+        else:
+            preview.payroll_to_create.append(row)
+
+
+def _preview_honoraria(preview, profiles):
+    branch = preview.branch
+    period_month = preview.period_month
+    teacher_profiles = list(profiles.filter(position="teacher"))
+    payable_teachers = [profile for profile in teacher_profiles if profile.teacher_hourly_rate > 0]
+    hours_by_teacher = get_teacher_hours_by_teacher(
+        branch,
+        period_month,
+        teacher_ids=[profile.user_id for profile in payable_teachers],
+    )
+    existing_entries = dict(
+        TeacherHonorariumEntry.objects
+        .filter(
+            branch=branch,
+            period_month=period_month,
+            teacher_id__in=[profile.user_id for profile in payable_teachers],
+        )
+        .values_list("teacher_id", "id")
+    )
+    for profile in teacher_profiles:
+        hours = hours_by_teacher.get(profile.user_id, Decimal("0"))
+        row = PayrollPreviewRow(
+            user_id=profile.user_id,
+            full_name=_full_name(profile),
+            amount=int(hours * profile.teacher_hourly_rate),
+            hourly_rate=profile.teacher_hourly_rate,
+            hours=hours,
+            existing_entry_id=existing_entries.get(profile.user_id),
+        )
+        if profile.teacher_hourly_rate <= 0:
+            preview.skipped_without_rate.append(row)
+        elif row.existing_entry_id:
+            preview.honorarium_to_update.append(row)
+        else:
+            preview.honorarium_to_create.append(row)
+
+
+def apply_monthly_payroll_preview(preview, user):
+    """
+    Enregistre un apercu : bulk_create des fiches manquantes et
+    recalcul groupe des honoraires existants.
+    """
+    branch = preview.branch
+    period_month = preview.period_month
+
+    payroll_entries = [
+        PayrollEntry(
+            branch=branch,
+            employee_id=row.user_id,
+            period_month=period_month,
+            base_salary=row.amount,
+            status=PayrollEntry.STATUS_DRAFT,
+            created_by=user,
+            updated_by=user,
+            notes=PAYROLL_AUTO_NOTE,
+        )
+        for row in preview.payroll_to_create
+    ]
+    honorarium_entries = [
+        TeacherHonorariumEntry(
+            branch=branch,
+            teacher_id=row.user_id,
+            period_month=period_month,
+            hourly_rate=row.hourly_rate,
+            validated_hours=row.hours,
+            status=TeacherHonorariumEntry.STATUS_DRAFT,
+            created_by=user,
+            updated_by=user,
+            notes=HONORARIUM_AUTO_NOTE,
+        )
+        for row in preview.honorarium_to_create
+    ]
+
+    with transaction.atomic():
+        # L'apercu a pu vieillir : les fiches creees entre-temps sont ecartees
+        # avant l'insertion pour que les compteurs retournes restent exacts.
+        existing_employees = set(
+            PayrollEntry.objects
+            .filter(branch=branch, period_month=period_month, employee_id__in=[entry.employee_id for entry in payroll_entries])
+            .values_list("employee_id", flat=True)
+        )
+        payroll_entries = [entry for entry in payroll_entries if entry.employee_id not in existing_employees]
+        existing_teachers = set(
+            TeacherHonorariumEntry.objects
+            .filter(branch=branch, period_month=period_month, teacher_id__in=[entry.teacher_id for entry in honorarium_entries])
+            .values_list("teacher_id", flat=True)
+        )
+        honorarium_entries = [entry for entry in honorarium_entries if entry.teacher_id not in existing_teachers]
+
+        PayrollEntry.objects.bulk_create(payroll_entries, batch_size=200, ignore_conflicts=True)
+        TeacherHonorariumEntry.objects.bulk_create(honorarium_entries, batch_size=200, ignore_conflicts=True)
+
+        rows_by_entry = {row.existing_entry_id: row for row in preview.honorarium_to_update}
+        entries_to_update = list(
+            TeacherHonorariumEntry.objects
+            .select_for_update()
+            .filter(pk__in=rows_by_entry)
+        )
+        now = timezone.now()
+        for entry in entries_to_update:
+            row = rows_by_entry[entry.pk]
+            entry.hourly_rate = row.hourly_rate
+            entry.validated_hours = row.hours
+            entry.updated_by = user
+            entry.updated_at = now
+            entry.refresh_status()
+        TeacherHonorariumEntry.objects.bulk_update(
+            entries_to_update,
+            ["hourly_rate", "validated_hours", "updated_by", "updated_at", "status", "paid_at"],
+            batch_size=200,
+        )
+        # Ecritures groupees sans post_save : panneau honoraires du dashboard enseignant.
+        invalidate_tags(*{
+            f"teacher:{teacher_id}"
+            for teacher_id in [entry.teacher_id for entry in honorarium_entries]
+            + [entry.teacher_id for entry in entries_to_update]
+        })
+
+    return {
+        "payroll_created": len(payroll_entries),
+        "honorarium_created": len(honorarium_entries),
+        "honorarium_updated": len(entries_to_update),
+        "skipped_without_salary": len(preview.skipped_without_salary),
+        "skipped_without_rate": len(preview.skipped_without_rate),
+    }
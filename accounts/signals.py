@@ -1,11 +1,16 @@
 from datetime import date
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 import logging
 
-from .models import Profile, PayrollEntry, TeacherHonorariumEntry
+from branches.models import Branch
+from payments.models import PaymentAgent
+
+from .access import clear_access_context
+from .models import BranchCashMovement, Profile, PayrollEntry, TeacherHonorariumEntry
+from .services.cash_ledger import record_movement_deleted
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -170,4 +175,48 @@ def auto_prepare_honorarium_on_rate_change(sender, instance, **kwargs):
         entry.hourly_rate = instance.teacher_hourly_rate
         entry.updated_by = instance.user
         entry.notes += " [tarif mis à jour automatiquement]"
-        entry.save(update_fields=["hourly_rate", "updated_by", "notes"])
\ No newline at end of file
+        entry.save(update_fields=["hourly_rate", "updated_by", "notes"])
+
+
+# ==========================================================
+# CUMULS MENSUELS DE CAISSE
+# ==========================================================
+@receiver(post_delete, sender=BranchCashMovement)
+def remove_cash_movement_from_ledger(sender, instance, **kwargs):
+    """
+    Retire le mouvement de son cumul mensuel (creation et modification :
+    BranchCashMovement.save). Emis dans la transaction de la suppression.
+    """
+    record_movement_deleted(instance)
+
+
+# ==========================================================
+# CONTEXTE D'ACCES MEMORISE (accounts.access)
+# ==========================================================
+def _clear_related_access_context(instance, field_name):
+    # Seul l'objet utilisateur deja charge porte un contexte a vider.
+    descriptor = getattr(type(instance), field_name)
+    if descriptor.is_cached(instance):
+        clear_access_context(getattr(instance, field_name))
+
+
+@receiver(post_save, sender=User)
+def clear_user_access_context(sender, instance, **kwargs):
+    clear_access_context(instance)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def clear_access_context_on_groups_change(sender, instance, action, reverse, **kwargs):
+    if not reverse and action in {"post_add", "post_remove", "post_clear"}:
+        clear_access_context(instance)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+@receiver([post_save, post_delete], sender=PaymentAgent)
+def clear_access_context_on_user_link_change(sender, instance, **kwargs):
+    _clear_related_access_context(instance, "user")
+
+
+@receiver([post_save, post_delete], sender=Branch)
+def clear_access_context_on_branch_manager_change(sender, instance, **kwargs):
+    _clear_related_access_context(instance, "manager")
@@ -1,11 +1,14 @@
 """Tests critiques pour le dashboard gestionnaire — workflows métier."""
 
+import json
 from datetime import date, timedelta
 from decimal import Decimal
 from typing import Any, cast
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
@@ -15,6 +18,7 @@ from admissions.models import Candidature
 from inscriptions.models import Inscription
 from formations.models import Programme, Cycle, Diploma, Filiere
 from accounts.models import (
+    BranchCashMonthTotal,
     BranchCashMovement,
     BranchExpense,
     BranchMonthlyClosure,
@@ -23,6 +27,15 @@ from accounts.models import (
     TeacherHonorariumEntry,
     Profile,
 )
+from accounts.services.cash_ledger import (
+    freeze_monthly_closure,
+    get_branch_cash_balance,
+    get_month_totals,
+    recompute_month_totals,
+    verified_month_totals,
+)
+from accounts.services.payroll_engine import apply_monthly_payroll_preview, build_monthly_payroll_preview
+from core.fragments import invalidate_triggered_fragments
 from payments.models import CashPaymentSession, Payment, PaymentAgent
 
 
@@ -416,6 +429,49 @@ class ManagerSalaryWorkflowTests(TestCase):
         self.assertEqual(entry.base_salary, 300000)
         self.assertEqual(entry.status, PayrollEntry.STATUS_DRAFT)
 
+    def test_payroll_preview_lists_missing_entries_without_writing(self):
+        previous_month = (self.period_month - timedelta(days=1)).replace(day=1)
+        url = reverse("accounts:htmx_manager_payroll_month_preview")
+        response = self.client.get(
+            url,
+            {"scope": "payroll", "salary_month": previous_month.strftime("%Y-%m")},
+            HTTP_HX_REQUEST="true",
+        )
+        self.assertEqual(response.status_code, 200)
+        preview = response.context["preview"]
+        self.assertEqual([row.user_id for row in preview.payroll_to_create], [self.manager.id])
+        self.assertEqual(preview.payroll_total, 300000)
+        self.assertFalse(
+            PayrollEntry.objects.filter(branch=self.branch, period_month=previous_month).exists()
+        )
+
+        self.client.post(
+            reverse("accounts:htmx_manager_salary_prepare_all"),
+            {"period_month": previous_month.isoformat()},
+            HTTP_HX_REQUEST="true",
+        )
+        entry = PayrollEntry.objects.get(branch=self.branch, employee=self.manager, period_month=previous_month)
+        self.assertEqual(entry.base_salary, 300000)
+
+    def test_apply_stale_payroll_preview_counts_only_inserted_entries(self):
+        previous_month = (self.period_month - timedelta(days=1)).replace(day=1)
+        preview = build_monthly_payroll_preview(self.branch, previous_month)
+        self.assertEqual([row.user_id for row in preview.payroll_to_create], [self.manager.id])
+        PayrollEntry.objects.create(
+            branch=self.branch,
+            employee=self.manager,
+            period_month=previous_month,
+            base_salary=250000,
+            created_by=self.manager,
+            updated_by=self.manager,
+        )
+
+        result = apply_monthly_payroll_preview(preview, self.manager)
+
+        self.assertEqual(result["payroll_created"], 0)
+        entry = PayrollEntry.objects.get(branch=self.branch, employee=self.manager, period_month=previous_month)
+        self.assertEqual(entry.base_salary, 250000)
+
     def test_salary_pay_creates_cash_movement(self):
         self._seed_cash(500000)
         entry = PayrollEntry.objects.get(
@@ -623,6 +679,70 @@ class ManagerMonthlyClosureWorkflowTests(TestCase):
         self.assertEqual(response.status_code, 400)
 
 
+class CashLedgerTests(TestCase):
+    """Cumuls mensuels de caisse tenus a jour par les mouvements."""
+
+    def setUp(self):
+        self.branch = _create_branch()
+        self.manager = _create_user("mgr_ledger", groups=["gestionnaire"], branch=self.branch)
+        self.period_month = date.today().replace(day=1)
+
+    def _movement(self, amount, movement_type=BranchCashMovement.TYPE_IN, source=BranchCashMovement.SOURCE_STUDENT_PAYMENT, **kw):
+        return BranchCashMovement.objects.create(
+            branch=self.branch,
+            movement_type=movement_type,
+            source=source,
+            amount=amount,
+            label="Mouvement",
+            movement_date=kw.pop("movement_date", self.period_month),
+            **kw,
+        )
+
+    def test_create_update_delete_keep_ledger_in_sync(self):
+        payment = self._movement(50000)
+        expense = self._movement(20000, BranchCashMovement.TYPE_OUT, BranchCashMovement.SOURCE_EXPENSE)
+        payment.amount = 60000
+        payment.save()
+        expense.movement_date = self.period_month - timedelta(days=1)
+        expense.save()
+        self._movement(5000, BranchCashMovement.TYPE_OUT, BranchCashMovement.SOURCE_PAYROLL).delete()
+
+        totals = get_month_totals(self.branch, self.period_month)
+        self.assertEqual(totals, recompute_month_totals(self.branch, self.period_month))
+        self.assertEqual(totals["student_revenue"], 60000)
+        self.assertEqual(totals["total_exits"], 0)
+        self.assertEqual(get_month_totals(self.branch, expense.movement_date)["expenses_paid"], 20000)
+        self.assertEqual(get_branch_cash_balance(self.branch), 40000)
+
+    def test_close_freezes_movements_recorded_after_draft(self):
+        self._movement(30000)
+        closure = BranchMonthlyClosure.objects.create(
+            branch=self.branch,
+            period_month=self.period_month,
+            total_entries=30000,
+            result_amount=30000,
+            status=BranchMonthlyClosure.STATUS_VALIDATED,
+        )
+        self._movement(10000, BranchCashMovement.TYPE_OUT, BranchCashMovement.SOURCE_HONORARIUM)
+
+        self.assertTrue(freeze_monthly_closure(closure))
+
+        closure.refresh_from_db()
+        self.assertEqual(closure.status, BranchMonthlyClosure.STATUS_CLOSED)
+        self.assertEqual(closure.honorarium_paid, 10000)
+        self.assertEqual(closure.result_amount, 20000)
+
+    def test_verification_rebuilds_a_drifted_ledger(self):
+        self._movement(15000)
+        BranchCashMonthTotal.objects.filter(branch=self.branch).update(amount=999)
+
+        totals, consistent = verified_month_totals(self.branch, self.period_month)
+
+        self.assertFalse(consistent)
+        self.assertEqual(totals["total_entries"], 15000)
+        self.assertEqual(get_month_totals(self.branch, self.period_month)["total_entries"], 15000)
+
+
 @override_settings(
     CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
     PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
@@ -690,3 +810,48 @@ class ManagerCashSessionWorkflowTests(TestCase):
         self.assertEqual(response.status_code, 200)
         session.refresh_from_db()
         self.assertTrue(session.is_used)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    HTMX_FRAGMENT_CACHE_ENABLED=True,
+)
+class ManagerWidgetFragmentTests(TestCase):
+    """Widgets HTMX : fragment en cache, 304 conditionnel, purge par modele ou HX-Trigger."""
+
+    def setUp(self):
+        cache.clear()
+        self.branch = _create_branch()
+        self.manager = _create_user("mgr_widget", groups=["gestionnaire"], branch=self.branch)
+        self.programme = _create_programme()
+        self.url = reverse("accounts:widget_sidebar_badges")
+        _login(self.client, self.manager)
+
+    def test_unchanged_widget_is_answered_with_304(self):
+        first = self.client.get(self.url, HTTP_HX_REQUEST="true")
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first["ETag"].startswith('W/"'))
+
+        second = self.client.get(self.url, HTTP_HX_REQUEST="true", HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.content, b"")
+
+    def test_model_change_and_hx_trigger_event_purge_the_widget(self):
+        first = self.client.get(self.url)
+        _create_candidature(self.programme, self.branch, status="submitted")
+
+        refreshed = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertContains(refreshed, 'data-badge="candidatures"')
+
+        # update() n'emet aucun signal : seul l'evenement HX-Trigger purge le fragment.
+        Candidature.objects.filter(branch=self.branch).update(status="accepted")
+        self.assertContains(self.client.get(self.url), 'data-badge="candidatures"')
+        mutation = HttpResponse()
+        mutation["HX-Trigger"] = json.dumps({"candidatureUpdated": True, "showToast": {"message": "ok"}})
+
+        self.assertEqual(invalidate_triggered_fragments(mutation), {"candidatureUpdated"})
+        self.assertNotContains(self.client.get(self.url), 'data-badge="candidatures"')
@@ -5,8 +5,12 @@ from typing import Any, cast
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
 from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
@@ -20,6 +24,7 @@ from academics.models import AcademicClass, AcademicDebt, AcademicEnrollment, Ac
 
 from accounts.access import (
 	can_access,
+	get_access_context,
 	get_user_annexe,
 	get_user_groups,
 	get_user_position,
@@ -41,8 +46,13 @@ from accounts.services.sensitive_actions import (
 )
 from unittest.mock import patch
 from communication.models import CommunicationNotification
+from core.cache import get_tag_versions
 from portal.permissions import get_user_role as get_portal_user_role
 from portal.permissions import get_post_login_portal_url
+from portal.services.supervisor_dashboard_service import build_supervisor_today_panel_context
+from portal.services.supervisor_day_snapshot import branch_day_tag
+from portal.student.services import get_student_courses_context
+from portal.student.snapshot import notifications_tag
 from portal.models import AccountSupportState, ArchiveBatch, DirectorTeacherAssignment, SupportAuditLog, TeacherDashboardPreference
 
 
@@ -204,6 +214,33 @@ class AccessCompatibilityTests(TestCase):
 		self.assertTrue(can_access(manager_user, "view_dashboard", "manager"))
 		self.assertFalse(can_access(manager_user, "view_dashboard", "executive"))
 
+	def test_access_context_is_resolved_once_per_user(self):
+		user = self._create_user("memo_user", groups=["finance_agents"], branch=self.branch_agent)
+		get_user_scope(user)
+
+		with self.assertNumQueries(0):
+			for _ in range(20):
+				can_access(user, "view_dashboard", "finance")
+				get_user_role(user)
+				get_user_position(user)
+				get_user_annexe(user)
+				get_user_scope(user)
+
+		self.assertIs(get_access_context(user), get_access_context(user))
+
+	def test_access_context_follows_changes_made_on_the_same_user(self):
+		user = self._create_user("memo_agent", role="")
+		self.assertIsNone(get_user_position(user))
+
+		PaymentAgent.objects.create(user=user, branch=self.branch_agent, is_active=True)
+		self.assertEqual(get_user_position(user), "payment_agent")
+		self.assertEqual(get_user_annexe(user), self.branch_agent)
+
+		group, _ = Group.objects.get_or_create(name="executive_director")
+		user.groups.add(group)
+		self.assertTrue(can_access(user, "view_dashboard", "executive"))
+		self.assertTrue(get_user_scope(user)["is_global"])
+
 
 class DashboardRedirectCompatibilityTests(TestCase):
 	def setUp(self):
@@ -887,6 +924,59 @@ class PortalPhaseOneTests(TestCase):
 		self.assertContains(response, academic_class.display_name)
 		self.assertContains(response, ec.title)
 
+	def test_teacher_dashboard_defers_lazy_panels_to_htmx_endpoints(self):
+		teacher = self._create_user("portal_teacher_panels", role="teacher", position="teacher")
+		director = self._create_user("portal_director_panels", role="staff_admin", position="director_of_studies")
+		academic_year, academic_class, ec = self._create_academic_class_bundle("P1")
+		DirectorTeacherAssignment.objects.create(
+			branch=academic_class.branch,
+			teacher=teacher,
+			academic_class=academic_class,
+			ec=ec,
+			room_label="P-01",
+			planned_hours="12.00",
+			created_by=director,
+		)
+		self.client.force_login(teacher)
+
+		response = self.client.get(reverse("accounts_portal:portal_teacher"))
+
+		self.assertEqual(response.status_code, 200)
+		self.assertContains(response, academic_class.display_name)
+		self.assertContains(response, reverse("accounts_portal:teacher_dashboard_panel", args=["schedule"]))
+		self.assertNotContains(response, "Mon emploi du temps")
+
+		schedule_response = self.client.get(reverse("accounts_portal:teacher_dashboard_panel", args=["schedule"]))
+		self.assertEqual(schedule_response.status_code, 200)
+		self.assertContains(schedule_response, "Mon emploi du temps")
+
+		# Nouvelle affectation : le tag enseignant invalide le panneau en cache.
+		other_class = AcademicClass.objects.create(
+			programme=self.programme,
+			branch=self.branch,
+			academic_year=academic_year,
+			level="P2",
+			study_level="LICENCE",
+			is_active=True,
+		)
+		other_semester = Semester.objects.create(academic_class=other_class, number=1)
+		other_ue = UE.objects.create(semester=other_semester, code="UE-P2", title="UE P2")
+		other_ec = EC.objects.create(ue=other_ue, title="EC P2", credit_required=3, coefficient=2)
+		DirectorTeacherAssignment.objects.create(
+			branch=other_class.branch,
+			teacher=teacher,
+			academic_class=other_class,
+			ec=other_ec,
+			room_label="P-02",
+			planned_hours="8.00",
+			created_by=director,
+		)
+		classes_response = self.client.get(reverse("accounts_portal:teacher_dashboard_panel", args=["classes"]))
+		self.assertContains(classes_response, other_class.display_name)
+
+		missing_response = self.client.get(reverse("accounts_portal:teacher_dashboard_panel", args=["unknown"]))
+		self.assertEqual(missing_response.status_code, 404)
+
 	def test_teacher_support_workspace_lists_director_assigned_class_without_schedule(self):
 		teacher = self._create_user("portal_teacher_assignment_support", role="teacher", position="teacher")
 		director = self._create_user("portal_director_assignment_support", role="staff_admin", position="director_of_studies")
@@ -1056,6 +1146,33 @@ class PortalPhaseOneTests(TestCase):
 		self.assertContains(response, "Affecte")
 		self.assertContains(response, "2025-2026")
 
+	def test_student_section_cache_is_invalidated_by_grade_changes(self):
+		student_user = self._create_user("student_snapshot_cache", role="student")
+		student = self._create_student_record(student_user)
+		academic_year, academic_class, ec = self._create_academic_class_bundle("L1C")
+		enrollment = AcademicEnrollment.objects.create(
+			inscription=student.inscription,
+			student=student_user,
+			programme=self.programme,
+			branch=self.branch,
+			academic_year=academic_year,
+			academic_class=academic_class,
+		)
+
+		first = get_student_courses_context(student_user)
+		self.assertEqual(first["courses"][0]["final_score"], "En attente")
+		with CaptureQueriesContext(connection) as cold:
+			cache.clear()
+			get_student_courses_context(student_user)
+		with CaptureQueriesContext(connection) as warm:
+			get_student_courses_context(student_user)
+		self.assertLess(len(warm.captured_queries), len(cold.captured_queries))
+
+		ECGrade.objects.create(enrollment=enrollment, ec=ec, normal_score=Decimal("15.00"))
+
+		refreshed = get_student_courses_context(student_user)
+		self.assertEqual(refreshed["courses"][0]["final_score"], "15/20")
+
 	def test_student_dashboard_shows_pending_message_without_enrollment(self):
 		student_user = self._create_user("student_dashboard_pending", role="student")
 		self._create_student_record(student_user)
@@ -2149,6 +2266,21 @@ class PortalPhaseOneTests(TestCase):
 			).exists()
 		)
 
+	def test_it_notifications_mark_all_read_invalidates_cached_unread_count(self):
+		it_user = self._create_user("portal_it_notifications", position="it_support")
+		CommunicationNotification.objects.create(recipient=it_user, title="Alerte", body="Sauvegarde echouee")
+		tag = notifications_tag(it_user.pk)
+		version = get_tag_versions([tag])[tag]
+		self.client.force_login(it_user)
+
+		# Seule la mise a jour groupee est testee ici, pas le re-rendu de l'espace.
+		with patch("portal.views.it_workflows.it_notifications_workspace", return_value=HttpResponse("ok")):
+			response = self.client.post(reverse("accounts_portal:it_notifications_action"), {"action": "mark_all_read"})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertFalse(CommunicationNotification.objects.filter(recipient=it_user, read_at__isnull=True).exists())
+		self.assertNotEqual(get_tag_versions([tag])[tag], version)
+
 	def test_legacy_supervisor_route_redirects_to_single_entry(self):
 		supervisor = self._create_user("portal_supervisor_legacy", position="academic_supervisor")
 		self.client.force_login(supervisor)
@@ -2250,6 +2382,52 @@ class PortalPhaseOneTests(TestCase):
 		self.assertEqual(lesson_log.created_by, supervisor)
 		self.assertEqual(lesson_log.content, "Fonctions et derives.")
 
+	def test_supervisor_today_panel_serves_patched_branch_day_snapshot(self):
+		supervisor = self._create_user("portal_supervisor_snapshot", position="academic_supervisor")
+		teacher = self._create_user("portal_teacher_snapshot", role="teacher", position="teacher")
+		academic_year, academic_class, ec = self._create_academic_class_bundle("L1D")
+		schedule_event = self._create_course_event(academic_class, academic_year, ec, teacher, hour=9)
+		today = timezone.localtime(schedule_event.start_datetime).date()
+		cache.clear()
+
+		build_supervisor_today_panel_context(branch=self.branch, today=today)
+		with self.assertNumQueries(0):
+			panel = build_supervisor_today_panel_context(branch=self.branch, today=today)
+		self.assertEqual([row["event_id"] for row in panel["today_live_courses"]], [schedule_event.id])
+		self.assertIsNone(panel["today_live_courses"][0]["teacher_present_code"])
+
+		# Presence saisie : l'instantane est corrige en place, pas recalcule.
+		TeacherAttendance.objects.create(
+			teacher=teacher,
+			schedule_event=schedule_event,
+			date=today,
+			status=TeacherAttendance.STATUS_ABSENT,
+			recorded_by=supervisor,
+			branch=self.branch,
+		)
+		with self.assertNumQueries(0):
+			panel = build_supervisor_today_panel_context(branch=self.branch, today=today)
+		self.assertEqual(panel["today_live_courses"][0]["teacher_present_code"], TeacherAttendance.STATUS_ABSENT)
+
+	def test_day_record_moved_to_another_day_invalidates_previous_snapshot(self):
+		supervisor = self._create_user("portal_supervisor_moved", position="academic_supervisor")
+		teacher = self._create_user("portal_teacher_moved", role="teacher", position="teacher")
+		today = timezone.localdate()
+		attendance = TeacherAttendance.objects.create(
+			teacher=teacher,
+			date=today,
+			status=TeacherAttendance.STATUS_ABSENT,
+			recorded_by=supervisor,
+			branch=self.branch,
+		)
+		tag = branch_day_tag(self.branch.id, today)
+		version = get_tag_versions([tag])[tag]
+
+		attendance.date = today - timezone.timedelta(days=1)
+		attendance.save()
+
+		self.assertNotEqual(get_tag_versions([tag])[tag], version)
+
 
 class BackfillUserRoleTypeCommandTests(TestCase):
 	def setUp(self):
@@ -428,6 +428,7 @@ urlpatterns = [
     path("htmx/manager/salary/<int:pk>/advance/", salary_advance, name="htmx_manager_salary_advance"),
     path("htmx/manager/payroll/<int:pk>/pay/", salary_pay, name="htmx_manager_salary_pay"),
     path("htmx/manager/payroll/prepare-all/", salary_prepare_all, name="htmx_manager_salary_prepare_all"),
+    path("htmx/manager/payroll/preview/", payroll_month_preview, name="htmx_manager_payroll_month_preview"),
     path("htmx/manager/payroll/pay-ready-all/", salary_pay_ready_all, name="htmx_manager_salary_pay_ready_all"),
     path("htmx/manager/honorarium/<int:pk>/detail/", teacher_honorarium_detail, name="htmx_manager_teacher_honorarium_detail"),
     path("htmx/manager/honorarium/<int:pk>/save/", teacher_honorarium_upsert, name="htmx_manager_teacher_honorarium_upsert"),
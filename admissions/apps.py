@@ -6,4 +6,5 @@ class AdmissionsConfig(AppConfig):
     name = "admissions"
 
     def ready(self):
-        import admissions.signals
\ No newline at end of file
+        import admissions.signals
+        from admissions.services import catalog  # noqa: F401
\ No newline at end of file
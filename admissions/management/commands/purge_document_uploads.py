@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from admissions.services.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Supprime les televersements de documents abandonnes (jamais rattaches a une candidature)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-hours",
+            type=int,
+            default=None,
+            help="Age minimal (defaut : ADMISSIONS_UPLOAD_TTL_HOURS).",
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_stale_uploads(older_than_hours=options.get("older_than_hours"))
+        self.stdout.write(self.style.SUCCESS(f"{purged} televersement(s) supprime(s)."))
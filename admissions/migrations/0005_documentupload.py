@@ -0,0 +1,32 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admissions', '0004_candidature_completion_message_and_more'),
+        ('formations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(editable=False, unique=True)),
+                ('original_name', models.CharField(max_length=255)),
+                ('total_size', models.PositiveBigIntegerField()),
+                ('received_bytes', models.PositiveBigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('uploading', "En cours d'envoi"), ('processing', 'En cours de traitement'), ('ready', 'Pret'), ('failed', 'Refuse')], db_index=True, default='uploading', max_length=20)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('file', models.FileField(blank=True, upload_to='candidatures/documents/')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('document_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_uploads', to='formations.requireddocument')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -347,4 +347,83 @@ class CandidatureDocument(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.document_type.name} – {self.candidature.full_name}"
\ No newline at end of file
+        return f"{self.document_type.name} – {self.candidature.full_name}"
+
+class DocumentUpload(models.Model):
+    """
+    Televersement fractionne d'un document de candidature.
+
+    Les morceaux sont ajoutes a un fichier temporaire prive
+    (admissions.services.uploads) ; une fois le fichier complet, un worker
+    le controle et l'optimise, puis le rattache a la candidature lors de
+    sa finalisation.
+    """
+
+    STATUS_UPLOADING = "uploading"
+    STATUS_PROCESSING = "processing"
+    STATUS_READY = "ready"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = (
+        (STATUS_UPLOADING, "En cours d'envoi"),
+        (STATUS_PROCESSING, "En cours de traitement"),
+        (STATUS_READY, "Pret"),
+        (STATUS_FAILED, "Refuse"),
+    )
+
+    token = models.UUIDField(
+        unique=True,
+        editable=False
+    )
+
+    document_type = models.ForeignKey(
+        RequiredDocument,
+        on_delete=models.CASCADE,
+        related_name="pending_uploads"
+    )
+
+    original_name = models.CharField(
+        max_length=255
+    )
+
+    total_size = models.PositiveBigIntegerField()
+
+    received_bytes = models.PositiveBigIntegerField(
+        default=0
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_UPLOADING,
+        db_index=True
+    )
+
+    error = models.CharField(
+        max_length=255,
+        blank=True
+    )
+
+    # Version controlee et optimisee, reprise telle quelle par CandidatureDocument.
+    file = models.FileField(
+        upload_to="candidatures/documents/",
+        blank=True
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True
+    )
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.original_name} ({self.get_status_display()})"
+
+    @property
+    def is_complete(self):
+        return self.received_bytes >= self.total_size
@@ -0,0 +1,113 @@
+"""
+Catalogue des formations du tunnel d'admission (etape 3).
+
+Les cartes (titre, duree, cout de la premiere annee, lien de detail) sont
+calculees une fois pour toutes les formations actives, rangees par cycle,
+avec la liste des campus ouverts a l'inscription en ligne. L'instantane
+est partage par tous les candidats (core.cache) et invalide des qu'une
+formation, une annee, un frais, un cycle ou un campus change : le cout
+affiche suit donc la grille de frais sans attendre l'expiration.
+
+Les formations ne dependent pas du campus : celui-ci ne fait que filtrer
+(campus inconnu ou ferme aux inscriptions = aucune carte).
+"""
+
+from django.conf import settings
+from django.db.models import Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from branches.models import Branch
+from core.cache import get_or_compute, invalidate_tags
+from formations.models import Cycle, Fee, Programme, ProgrammeYear
+
+CATALOG_KEY = "admissions:catalog:v1"
+CATALOG_TAG = "admissions-catalog"
+ALL_CYCLES = "all"
+FILTERABLE_CYCLES = {"licence", "master"}
+
+
+def catalog_timeout():
+    return getattr(settings, "ADMISSIONS_CATALOG_CACHE_TIMEOUT", 3600)
+
+
+def _first_year_costs():
+    """{programme_id: total des frais de la premiere annee}, en une requete."""
+    costs = {}
+    rows = (
+        ProgrammeYear.objects.filter(programme__is_active=True)
+        .annotate(total=Sum("fees__amount"))
+        .values_list("programme_id", "total")
+        .order_by("programme_id", "year_number")
+    )
+    for programme_id, total in rows:
+        costs.setdefault(programme_id, total or 0)
+    return costs
+
+
+def build_admissions_catalog():
+    costs = _first_year_costs()
+    programmes = (
+        Programme.objects.filter(is_active=True)
+        .select_related("cycle")
+        .only("id", "title", "slug", "duration_years", "cycle__slug")
+        .order_by("title")
+    )
+    cards = {ALL_CYCLES: []}
+    for programme in programmes:
+        card = {
+            "title": programme.title,
+            "slug": programme.slug,
+            "duration_years": programme.duration_years,
+            "first_year_cost": costs.get(programme.id, 0),
+            "details_url": programme.get_absolute_url(),
+        }
+        cards[ALL_CYCLES].append(card)
+        cards.setdefault(programme.cycle.slug.lower(), []).append(card)
+
+    branches = {
+        branch["id"]: branch
+        for branch in Branch.objects.filter(is_active=True, accepts_online_registration=True)
+        .order_by("name")
+        .values("id", "name", "city")
+    }
+    return {"cards": cards, "branches": branches}
+
+
+def get_admissions_catalog():
+    return get_or_compute(
+        CATALOG_KEY,
+        build_admissions_catalog,
+        timeout=catalog_timeout(),
+        tags=[CATALOG_TAG],
+        namespace="admissions:catalog",
+    )
+
+
+def get_registration_branch(branch_id):
+    """Campus ouvert a l'inscription en ligne ({id, name, city}) ou None."""
+    if not branch_id:
+        return None
+    return get_admissions_catalog()["branches"].get(branch_id)
+
+
+def get_formation_cards(cycle_slug=ALL_CYCLES, branch_id=None):
+    catalog = get_admissions_catalog()
+    if branch_id and branch_id not in catalog["branches"]:
+        return []
+    if cycle_slug not in FILTERABLE_CYCLES:
+        cycle_slug = ALL_CYCLES
+    return list(catalog["cards"].get(cycle_slug, []))
+
+
+# ==========================================================
+# INVALIDATION
+# ==========================================================
+
+@receiver([post_save, post_delete], sender=Programme)
+@receiver([post_save, post_delete], sender=ProgrammeYear)
+@receiver([post_save, post_delete], sender=Fee)
+@receiver([post_save, post_delete], sender=Cycle)
+@receiver([post_save, post_delete], sender=Branch)
+def _catalog_changed(sender, instance, **kwargs):
+    invalidate_tags(CATALOG_TAG)
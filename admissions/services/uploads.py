@@ -0,0 +1,330 @@
+"""
+Televersement fractionne et reprenable des documents de candidature.
+
+Sur une connexion mobile lente, un formulaire multipart unique echoue
+en bloc et repart de zero. Le navigateur (admissions/js/chunked_upload.js)
+envoie desormais chaque document a part, par morceaux :
+
+1. start_upload() ouvre un DocumentUpload (jeton UUID) ;
+2. append_chunk() ajoute un morceau au fichier temporaire prive, a
+   l'offset annonce (en-tete Upload-Offset). Apres une coupure, le client
+   relit l'offset recu et reprend ; un morceau rejoue est reecrit au meme
+   endroit ;
+3. le fichier complet est controle et optimise sur le pool "media" de
+   core.background : images redressees, reduites et reencodees en JPEG
+   (Pillow), PDF ouverts, verifies et reecrits compactes (PyMuPDF) ;
+4. a la soumission, collect_candidature_documents() n'accepte que des
+   documents prets : la candidature n'est finalisee qu'une fois chaque
+   document traite.
+
+Sans JavaScript, le champ fichier classique reste accepte tel quel.
+purge_document_uploads supprime les televersements abandonnes.
+"""
+
+import logging
+import os
+import uuid
+from datetime import timedelta
+from io import BytesIO
+from pathlib import Path
+
+import fitz
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from admissions.models import CandidatureDocument, DocumentUpload
+from core.background import run_after_commit
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_TASK_POOL = "media"
+PDF_MAGIC_BYTES = b"%PDF-"
+# Documents bureautiques : acceptes sans transformation.
+OFFICE_MAGIC_BYTES = {
+    ".doc": b"\xd0\xcf\x11\xe0",
+    ".docx": b"PK\x03\x04",
+}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+ALLOWED_EXTENSIONS = IMAGE_EXTENSIONS | {".pdf"} | set(OFFICE_MAGIC_BYTES)
+
+
+class UploadRejected(ValueError):
+    """Document refuse ; le message est affiche au candidat."""
+
+
+def upload_max_size():
+    return getattr(settings, "ADMISSIONS_UPLOAD_MAX_MB", 20) * 1024 * 1024
+
+
+def upload_chunk_size():
+    return getattr(settings, "ADMISSIONS_UPLOAD_CHUNK_SIZE", 512 * 1024)
+
+
+def upload_temp_root():
+    return Path(getattr(settings, "ADMISSIONS_UPLOAD_TEMP_ROOT", Path(settings.BASE_DIR) / "private_media" / "admissions"))
+
+
+def temp_path(upload):
+    return upload_temp_root() / f"{upload.token}.part"
+
+
+def _extension(name):
+    return os.path.splitext(name)[1].lower()
+
+
+# ==========================================================
+# RECEPTION
+# ==========================================================
+
+def start_upload(document_type, filename, total_size):
+    filename = os.path.basename(filename or "").strip()[:255]
+    if not filename or _extension(filename) not in ALLOWED_EXTENSIONS:
+        raise UploadRejected("Format non pris en charge (PDF, JPG, PNG, DOC ou DOCX).")
+    if total_size <= 0:
+        raise UploadRejected("Le fichier est vide.")
+    if total_size > upload_max_size():
+        raise UploadRejected(f"Le fichier depasse {upload_max_size() // (1024 * 1024)} Mo.")
+
+    upload = DocumentUpload.objects.create(
+        token=uuid.uuid4(),
+        document_type=document_type,
+        original_name=filename,
+        total_size=total_size,
+    )
+    path = temp_path(upload)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    return upload
+
+
+def append_chunk(token, offset, data):
+    """
+    Ecrit le morceau a l'offset donne et retourne le televersement a jour.
+    Un offset autre que celui deja recu leve UploadRejected ; l'appelant
+    renvoie alors l'offset attendu pour que le client se recale.
+    """
+    with transaction.atomic():
+        upload = DocumentUpload.objects.select_for_update().get(token=token)
+        if upload.status != DocumentUpload.STATUS_UPLOADING:
+            return upload
+        if offset != upload.received_bytes:
+            raise UploadRejected("Offset inattendu.")
+        if not data or offset + len(data) > upload.total_size or len(data) > upload_chunk_size():
+            raise UploadRejected("Morceau invalide.")
+
+        with open(temp_path(upload), "r+b") as handle:
+            # Ecriture precedente interrompue apres coup : on repart de l'offset enregistre.
+            handle.seek(offset)
+            handle.truncate()
+            handle.write(data)
+
+        upload.received_bytes = offset + len(data)
+        fields = ["received_bytes", "updated_at"]
+        if upload.is_complete:
+            upload.status = DocumentUpload.STATUS_PROCESSING
+            fields.append("status")
+        upload.save(update_fields=fields)
+        if upload.is_complete:
+            schedule_upload_processing(upload)
+    return upload
+
+
+def upload_state(upload):
+    return {
+        "token": str(upload.token),
+        "offset": upload.received_bytes,
+        "size": upload.total_size,
+        "status": upload.status,
+        "error": upload.error,
+    }
+
+
+# ==========================================================
+# TRAITEMENT
+# ==========================================================
+
+def optimize_image(source):
+    """Image redressee, reduite a ADMISSIONS_UPLOAD_IMAGE_MAX_SIDE et reencodee en JPEG."""
+    max_side = getattr(settings, "ADMISSIONS_UPLOAD_IMAGE_MAX_SIDE", 2480)
+    try:
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+                rgba = img.convert("RGBA")
+                background = Image.new("RGB", rgba.size, (255, 255, 255))
+                background.paste(rgba, mask=rgba.split()[-1])
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+            buffer = BytesIO()
+            img.save(
+                buffer,
+                format="JPEG",
+                quality=getattr(settings, "ADMISSIONS_UPLOAD_IMAGE_QUALITY", 85),
+                optimize=True,
+                progressive=True,
+            )
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise UploadRejected("Image illisible ou corrompue.") from exc
+    return buffer.getvalue()
+
+
+def normalize_pdf(path):
+    """PDF verifie (ouvrable, non protege, nombre de pages borne) puis reecrit compacte."""
+    with open(path, "rb") as handle:
+        if handle.read(len(PDF_MAGIC_BYTES)) != PDF_MAGIC_BYTES:
+            raise UploadRejected("Le fichier n'est pas un PDF valide.")
+    try:
+        document = fitz.open(path)
+    except (RuntimeError, ValueError) as exc:
+        raise UploadRejected("PDF illisible ou corrompu.") from exc
+    try:
+        if document.needs_pass:
+            raise UploadRejected("Le PDF est protege par un mot de passe.")
+        if document.page_count == 0:
+            raise UploadRejected("Le PDF ne contient aucune page.")
+        max_pages = getattr(settings, "ADMISSIONS_UPLOAD_MAX_PDF_PAGES", 30)
+        if document.page_count > max_pages:
+            raise UploadRejected(f"Le PDF depasse {max_pages} pages.")
+        return document.tobytes(garbage=3, deflate=True, clean=True)
+    finally:
+        document.close()
+
+
+def _check_office_document(path, extension):
+    with open(path, "rb") as handle:
+        if handle.read(len(OFFICE_MAGIC_BYTES[extension])) != OFFICE_MAGIC_BYTES[extension]:
+            raise UploadRejected("Le document Word est illisible ou corrompu.")
+        handle.seek(0)
+        return handle.read()
+
+
+def render_processed_document(path, original_name):
+    """(extension, octets) de la version a conserver."""
+    extension = _extension(original_name)
+    if extension in IMAGE_EXTENSIONS:
+        with open(path, "rb") as handle:
+            return ".jpg", optimize_image(handle)
+    if extension == ".pdf":
+        return ".pdf", normalize_pdf(path)
+    if extension in OFFICE_MAGIC_BYTES:
+        return extension, _check_office_document(path, extension)
+    raise UploadRejected("Format non pris en charge.")
+
+
+def _set_status(upload, **fields):
+    for name, value in fields.items():
+        setattr(upload, name, value)
+    DocumentUpload.objects.filter(pk=upload.pk).update(updated_at=timezone.now(), **fields)
+
+
+def process_upload(upload_id):
+    upload = DocumentUpload.objects.filter(pk=upload_id, status=DocumentUpload.STATUS_PROCESSING).first()
+    if upload is None:
+        return None
+    path = temp_path(upload)
+    try:
+        extension, content = render_processed_document(path, upload.original_name)
+        stem = os.path.splitext(upload.original_name)[0][:80] or "document"
+        upload.file.save(f"{stem}{extension}", ContentFile(content), save=False)
+    except UploadRejected as exc:
+        _set_status(upload, status=DocumentUpload.STATUS_FAILED, error=str(exc))
+    except Exception:
+        logger.exception("Traitement du document %s impossible", upload.token)
+        _set_status(upload, status=DocumentUpload.STATUS_FAILED, error="Traitement impossible, renvoyez le fichier.")
+    else:
+        _set_status(upload, status=DocumentUpload.STATUS_READY, error="", file=upload.file.name)
+    finally:
+        path.unlink(missing_ok=True)
+    return upload
+
+
+def schedule_upload_processing(upload):
+    run_after_commit(
+        process_upload,
+        upload.pk,
+        pool=UPLOAD_TASK_POOL,
+        name=f"admission_upload:{upload.pk}",
+    )
+
+
+# ==========================================================
+# FINALISATION
+# ==========================================================
+
+def collect_candidature_documents(request, programme_documents):
+    """
+    ([(document_type, televersement ou fichier)], [erreurs]) pour les
+    documents requis. Un document televerse par morceaux doit etre pret ;
+    a defaut, le fichier du formulaire multipart est repris.
+    """
+    tokens = {}
+    for programme_document in programme_documents:
+        raw_token = request.POST.get(f"upload_{programme_document.document.id}", "").strip()
+        try:
+            tokens[programme_document.document.id] = uuid.UUID(raw_token)
+        except ValueError:
+            continue
+    uploads = {
+        upload.token: upload
+        for upload in DocumentUpload.objects.filter(token__in=tokens.values())
+    }
+
+    documents = []
+    errors = []
+    for programme_document in programme_documents:
+        document_type = programme_document.document
+        upload = uploads.get(tokens.get(document_type.id))
+        if upload is not None and upload.document_type_id == document_type.id:
+            if upload.status == DocumentUpload.STATUS_READY:
+                documents.append((document_type, upload))
+            elif upload.status == DocumentUpload.STATUS_FAILED:
+                errors.append(f"{document_type.name} : {upload.error}")
+            else:
+                errors.append(f"{document_type.name} : traitement en cours, patientez quelques secondes.")
+            continue
+        uploaded_file = request.FILES.get(f"document_{document_type.id}")
+        if uploaded_file:
+            documents.append((document_type, uploaded_file))
+    return documents, errors
+
+
+def attach_candidature_documents(candidature, documents):
+    """Rattache les documents ; les televersements consommes sont supprimes (pas leur fichier)."""
+    for document_type, source in documents:
+        if isinstance(source, DocumentUpload):
+            CandidatureDocument.objects.create(
+                candidature=candidature,
+                document_type=document_type,
+                file=source.file.name,
+            )
+            source.delete()
+        else:
+            CandidatureDocument.objects.create(
+                candidature=candidature,
+                document_type=document_type,
+                file=source,
+            )
+
+
+# ==========================================================
+# NETTOYAGE
+# ==========================================================
+
+def purge_stale_uploads(*, older_than_hours=None):
+    """Supprime les televersements abandonnes (fichier temporaire et version traitee)."""
+    if older_than_hours is None:
+        older_than_hours = getattr(settings, "ADMISSIONS_UPLOAD_TTL_HOURS", 48)
+    cutoff = timezone.now() - timedelta(hours=older_than_hours)
+    purged = 0
+    for upload in DocumentUpload.objects.filter(updated_at__lt=cutoff).iterator():
+        temp_path(upload).unlink(missing_ok=True)
+        if upload.file:
+            upload.file.delete(save=False)
+        upload.delete()
+        purged += 1
+    return purged
@@ -1,14 +1,32 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import uuid
+from io import BytesIO
+
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
-from admissions.models import Candidature
+from PIL import Image
+
+from academics.models import AcademicYear
+from admissions.models import Candidature, DocumentUpload
+from admissions.services.catalog import get_formation_cards, get_registration_branch
 from branches.models import Branch
 from communication.models import CommunicationNotification
-from formations.models import Cycle, Diploma, Filiere, Programme, ProgrammeRequiredDocument, RequiredDocument
+from formations.models import (
+	Cycle,
+	Diploma,
+	Fee,
+	Filiere,
+	Programme,
+	ProgrammeRequiredDocument,
+	ProgrammeYear,
+	RequiredDocument,
+)
 
 
-class AdmissionTunnelValidationTests(TestCase):
+class AdmissionTunnelFixturesMixin:
 	def setUp(self):
 		self.url = reverse("admissions:admission_tunnel")
 
@@ -68,6 +86,8 @@ class AdmissionTunnelValidationTests(TestCase):
 		payload.update(overrides)
 		return payload
 
+
+class AdmissionTunnelValidationTests(AdmissionTunnelFixturesMixin, TestCase):
 	def test_submission_without_documents_is_allowed(self):
 		response = self.client.post(self.url, data=self._valid_payload(), follow=False)
 
@@ -139,3 +159,176 @@ class AdmissionTunnelValidationTests(TestCase):
 			notification.metadata["context"]["candidate_name"],
 			candidature.full_name,
 		)
+
+
+class AdmissionCatalogTests(TestCase):
+	def setUp(self):
+		self.branch = Branch.objects.create(
+			name="Annexe Sikasso",
+			code="ASK",
+			slug="annexe-sikasso",
+			city="Sikasso",
+			is_active=True,
+			accepts_online_registration=True,
+		)
+		licence = Cycle.objects.create(name="Licence", slug="licence", min_duration_years=3, max_duration_years=3)
+		master = Cycle.objects.create(name="Master", slug="master", min_duration_years=2, max_duration_years=2)
+		diploma = Diploma.objects.create(name="Diplome d'Etat", level="superieur")
+		filiere = Filiere.objects.create(name="Sante", is_active=True)
+		self.licence = Programme.objects.create(
+			title="Licence Sage-femme",
+			slug="licence-sage-femme",
+			filiere=filiere,
+			cycle=licence,
+			diploma_awarded=diploma,
+			duration_years=3,
+			short_description="Formation",
+			description="Description",
+			is_active=True,
+		)
+		Programme.objects.create(
+			title="Master Sante publique",
+			slug="master-sante-publique",
+			filiere=filiere,
+			cycle=master,
+			diploma_awarded=diploma,
+			duration_years=2,
+			short_description="Formation",
+			description="Description",
+			is_active=True,
+		)
+		first_year = ProgrammeYear.objects.create(programme=self.licence, year_number=1)
+		second_year = ProgrammeYear.objects.create(programme=self.licence, year_number=2)
+		Fee.objects.create(programme_year=first_year, label="Inscription", amount=50000, due_month="Octobre")
+		Fee.objects.create(programme_year=first_year, label="Scolarite", amount=300000, due_month="Novembre")
+		Fee.objects.create(programme_year=second_year, label="Scolarite", amount=400000, due_month="Novembre")
+		self.first_year = first_year
+
+	def test_cards_are_filtered_by_cycle_and_total_first_year_fees(self):
+		cards = get_formation_cards("licence", branch_id=self.branch.id)
+
+		self.assertEqual([card["slug"] for card in cards], ["licence-sage-femme"])
+		self.assertEqual(cards[0]["first_year_cost"], 350000)
+		self.assertEqual(cards[0]["details_url"], self.licence.get_absolute_url())
+		self.assertEqual(len(get_formation_cards("all")), 2)
+		self.assertEqual(get_registration_branch(self.branch.id)["name"], "Annexe Sikasso")
+
+	def test_warm_catalog_is_served_without_queries(self):
+		get_formation_cards("all", branch_id=self.branch.id)
+
+		with self.assertNumQueries(0):
+			get_formation_cards("master", branch_id=self.branch.id)
+			get_registration_branch(self.branch.id)
+
+	def test_fee_and_branch_changes_refresh_the_catalog(self):
+		get_formation_cards("licence", branch_id=self.branch.id)
+
+		Fee.objects.create(programme_year=self.first_year, label="Assurance", amount=10000, due_month="Octobre")
+		self.assertEqual(get_formation_cards("licence")[0]["first_year_cost"], 360000)
+
+		self.branch.accepts_online_registration = False
+		self.branch.save(update_fields=["accepts_online_registration"])
+		self.assertEqual(get_formation_cards("licence", branch_id=self.branch.id), [])
+		self.assertIsNone(get_registration_branch(self.branch.id))
+
+
+class ChunkedDocumentUploadTests(AdmissionTunnelFixturesMixin, TestCase):
+	def setUp(self):
+		super().setUp()
+		root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+		settings_override = override_settings(
+			MEDIA_ROOT=f"{root}/media",
+			ADMISSIONS_UPLOAD_TEMP_ROOT=f"{root}/tmp",
+			ADMISSIONS_UPLOAD_CHUNK_SIZE=1024,
+			BACKGROUND_TASKS_EAGER=True,
+		)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+		# La candidature exige une annee academique active.
+		current_year = timezone.now().year
+		AcademicYear.objects.create(
+			name=f"{current_year}-{current_year + 1}",
+			start_date=f"{current_year}-01-01",
+			end_date=f"{current_year}-12-31",
+			is_active=True,
+		)
+		self.document_type = self.programme.required_documents.first().document
+
+	def _png_bytes(self):
+		buffer = BytesIO()
+		Image.effect_noise((120, 80), 64).convert("RGBA").save(buffer, format="PNG")
+		return buffer.getvalue()
+
+	def _start(self, content, filename="scan.png"):
+		response = self.client.post(
+			reverse("admissions:document_upload_start"),
+			{"document_id": self.document_type.id, "filename": filename, "size": len(content)},
+		)
+		self.assertEqual(response.status_code, 201)
+		return response.json()
+
+	def _send(self, token, offset, chunk):
+		return self.client.post(
+			reverse("admissions:document_upload_chunk", args=[token]),
+			data=chunk,
+			content_type="application/octet-stream",
+			HTTP_UPLOAD_OFFSET=str(offset),
+		)
+
+	def _upload(self, content, filename="scan.png"):
+		upload = self._start(content, filename)
+		with self.captureOnCommitCallbacks(execute=True):
+			for offset in range(0, len(content), upload["chunk_size"]):
+				response = self._send(upload["token"], offset, content[offset:offset + upload["chunk_size"]])
+				self.assertEqual(response.status_code, 200)
+		return DocumentUpload.objects.get(token=upload["token"])
+
+	def test_chunks_are_assembled_and_image_is_optimized(self):
+		upload = self._upload(self._png_bytes())
+
+		self.assertEqual(upload.status, DocumentUpload.STATUS_READY)
+		self.assertTrue(upload.file.name.endswith(".jpg"))
+		with upload.file.open("rb") as handle:
+			self.assertEqual(Image.open(handle).format, "JPEG")
+
+	def test_wrong_offset_returns_expected_offset_for_resume(self):
+		content = self._png_bytes()
+		upload = self._start(content)
+		self._send(upload["token"], 0, content[:1024])
+
+		response = self._send(upload["token"], 0, content[:1024])
+
+		self.assertEqual(response.status_code, 409)
+		self.assertEqual(response.json()["offset"], 1024)
+
+	def test_invalid_pdf_is_rejected_with_message(self):
+		upload = self._upload(b"pas un pdf", filename="releve.pdf")
+
+		self.assertEqual(upload.status, DocumentUpload.STATUS_FAILED)
+		self.assertIn("PDF", upload.error)
+
+	def test_candidature_waits_for_processing_then_takes_the_processed_file(self):
+		pending = DocumentUpload.objects.create(
+			token=uuid.uuid4(),
+			document_type=self.document_type,
+			original_name="scan.png",
+			total_size=10,
+			received_bytes=10,
+			status=DocumentUpload.STATUS_PROCESSING,
+		)
+		field = f"upload_{self.document_type.id}"
+
+		response = self.client.post(self.url, data=self._valid_payload(**{field: str(pending.token)}))
+
+		self.assertEqual(response.status_code, 200)
+		self.assertContains(response, "traitement en cours")
+		self.assertEqual(Candidature.objects.count(), 0)
+
+		ready = self._upload(self._png_bytes())
+		response = self.client.post(self.url, data=self._valid_payload(**{field: str(ready.token)}))
+
+		self.assertEqual(response.status_code, 302)
+		document = Candidature.objects.get().documents.get()
+		self.assertEqual(document.file.name, ready.file.name)
+		self.assertFalse(DocumentUpload.objects.filter(pk=ready.pk).exists())
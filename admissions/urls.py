@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, views_uploads
 
 app_name = "admissions"
 
@@ -19,6 +19,16 @@ urlpatterns = [
         views.admission_step3_documents,
         name="admission_step3_documents",
     ),
+    path(
+        "televersements/",
+        views_uploads.document_upload_start,
+        name="document_upload_start",
+    ),
+    path(
+        "televersements/<uuid:token>/",
+        views_uploads.document_upload_chunk,
+        name="document_upload_chunk",
+    ),
     path(
         "done/<int:candidature_id>/",
         views.admission_done,
@@ -12,47 +12,14 @@ from branches.models import Branch
 from formations.models import Programme
 from academics.services.academic_years import get_current_academic_year_name
 from .forms import CandidatureForm
-from .models import CandidatureDocument, Candidature
+from .services.catalog import get_formation_cards, get_registration_branch
+from .services.uploads import attach_candidature_documents, collect_candidature_documents
+from .models import Candidature
 
 
 def _build_formation_cards(cycle_slug="all", branch_id=None):
-    formations_qs = (
-        Programme.objects.filter(is_active=True)
-        .select_related("cycle")
-        .prefetch_related("years__fees")
-        .order_by("title")
-    )
-    if cycle_slug in {"licence", "master"}:
-        formations_qs = formations_qs.filter(cycle__slug__iexact=cycle_slug)
-
-    selected_branch = None
-    if branch_id:
-        selected_branch = (
-            Branch.objects.filter(id=branch_id, is_active=True, accepts_online_registration=True)
-            .only("id")
-            .first()
-        )
-        if not selected_branch:
-            return []
-
-    cards = []
-    for formation in formations_qs:
-        first_year = next(iter(formation.years.all()), None)
-        first_year_cost = 0
-        if first_year:
-            first_year_cost = sum(fee.amount for fee in first_year.fees.all())
-
-        cards.append(
-            {
-                "title": formation.title,
-                "slug": formation.slug,
-                "duration_years": formation.duration_years,
-                "first_year_cost": first_year_cost,
-                "details_url": formation.get_absolute_url(),
-            }
-        )
-
-    return cards
+    # Instantane partage, invalide a chaque changement de formation ou de frais.
+    return get_formation_cards(cycle_slug, branch_id=branch_id)
 
 
 def _default_form_data():
@@ -213,53 +180,50 @@ def admission_tunnel(request):
                         },
                     )
 
-                programme_documents = programme.required_documents.select_related("document")
-                uploaded_documents = []
-
-                for programme_document in programme_documents:
-                    file_key = f"document_{programme_document.document.id}"
-                    uploaded_file = request.FILES.get(file_key)
-                    if uploaded_file:
-                        uploaded_documents.append((programme_document.document, uploaded_file))
-
-                try:
-                    with transaction.atomic():
-                        candidature = Candidature.objects.create(
-                            programme=programme,
-                            branch=branch,
-                            academic_year=academic_year_name,
-                            entry_year=entry_year,
-                            first_name=form_data["first_name"],
-                            last_name=form_data["last_name"],
-                            birth_date=form_data["birth_date"],
-                            birth_place=form_data["birth_place"] or form_data["city"],
-                            gender=form_data["gender"] if form_data["gender"] in {"male", "female"} else "male",
-                            phone=form_data["phone"],
-                            email=form_data["email"],
-                            city=form_data["city"],
-                            country="Mali",
-                        )
-
-                        for document_type, uploaded_file in uploaded_documents:
-                            CandidatureDocument.objects.create(
-                                candidature=candidature,
-                                document_type=document_type,
-                                file=uploaded_file,
-                            )
+                programme_documents = list(programme.required_documents.select_related("document"))
+                # Documents televerses par morceaux : la candidature attend qu'ils soient traites.
+                uploaded_documents, upload_errors = collect_candidature_documents(request, programme_documents)
 
-                    messages.success(request, "Votre candidature a ete enregistree avec succes.")
-                    return redirect("admissions:done", candidature_id=candidature.id)
-                except IntegrityError:
-                    backend_errors["email"] = "Cette adresse email est deja utilisee pour cette formation cette annee."
-                    backend_error = f"Etape 2 : {backend_errors['email']}"
-                    backend_error_step = 2
-                    backend_error_field = "email"
-                    initial_step = 2
-                    initial_step3_phase = "program"
-                except Exception:
-                    backend_error = "Une erreur technique est survenue. Reessayez dans un instant."
+                if upload_errors:
+                    backend_error = f"Etape 3 : {upload_errors[0]}"
+                    backend_error_step = 3
+                    backend_error_field = "documents"
                     initial_step = 3
                     initial_step3_phase = "documents"
+                else:
+                    try:
+                        with transaction.atomic():
+                            candidature = Candidature.objects.create(
+                                programme=programme,
+                                branch=branch,
+                                academic_year=academic_year_name,
+                                entry_year=entry_year,
+                                first_name=form_data["first_name"],
+                                last_name=form_data["last_name"],
+                                birth_date=form_data["birth_date"],
+                                birth_place=form_data["birth_place"] or form_data["city"],
+                                gender=form_data["gender"] if form_data["gender"] in {"male", "female"} else "male",
+                                phone=form_data["phone"],
+                                email=form_data["email"],
+                                city=form_data["city"],
+                                country="Mali",
+                            )
+
+                            attach_candidature_documents(candidature, uploaded_documents)
+
+                        messages.success(request, "Votre candidature a ete enregistree avec succes.")
+                        return redirect("admissions:done", candidature_id=candidature.id)
+                    except IntegrityError:
+                        backend_errors["email"] = "Cette adresse email est deja utilisee pour cette formation cette annee."
+                        backend_error = f"Etape 2 : {backend_errors['email']}"
+                        backend_error_step = 2
+                        backend_error_field = "email"
+                        initial_step = 2
+                        initial_step3_phase = "program"
+                    except Exception:
+                        backend_error = "Une erreur technique est survenue. Reessayez dans un instant."
+                        initial_step = 3
+                        initial_step3_phase = "documents"
 
     formation_cards = []
     return render(
@@ -291,14 +255,7 @@ def admission_step3_formations(request):
     if branch_id_raw.isdigit():
         branch_id = int(branch_id_raw)
 
-    selected_branch = None
-    if branch_id:
-        selected_branch = Branch.objects.filter(
-            id=branch_id,
-            is_active=True,
-            accepts_online_registration=True,
-        ).first()
-
+    selected_branch = get_registration_branch(branch_id)
     formation_cards = _build_formation_cards(cycle_filter, branch_id=branch_id)
     return render(
         request,
@@ -400,6 +357,10 @@ def apply_to_programme(request, slug):
                 academic_year=candidature.academic_year
             ).exists()
 
+            uploaded_documents, upload_errors = collect_candidature_documents(request, required_documents)
+            for upload_error in upload_errors:
+                form.add_error(None, upload_error)
+
             if existing:
 
                 form.add_error(
@@ -412,7 +373,7 @@ def apply_to_programme(request, slug):
                     "Une candidature avec cette adresse email existe déjà."
                 )
 
-            else:
+            elif not upload_errors:
 
                 # ==============================
                 # ENREGISTREMENT CANDIDATURE
@@ -424,19 +385,7 @@ def apply_to_programme(request, slug):
                 # TRAITEMENT DES DOCUMENTS
                 # ==============================
 
-                for prd in required_documents:
-
-                    uploaded_file = request.FILES.get(
-                        f"document_{prd.document.id}"
-                    )
-
-                    if uploaded_file:
-
-                        CandidatureDocument.objects.create(
-                            candidature=candidature,
-                            document_type=prd.document,
-                            file=uploaded_file
-                        )
+                attach_candidature_documents(candidature, uploaded_documents)
 
                 messages.success(
                     request,
@@ -0,0 +1,51 @@
+# admissions/views_uploads.py
+"""
+Points d'entree JSON du televersement fractionne (admissions.services.uploads).
+"""
+
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods, require_POST
+
+from formations.models import RequiredDocument
+from .models import DocumentUpload
+from .services.uploads import UploadRejected, append_chunk, start_upload, upload_chunk_size, upload_state
+
+
+@require_POST
+def document_upload_start(request):
+    document_id = request.POST.get("document_id", "").strip()
+    size = request.POST.get("size", "").strip()
+    if not document_id.isdigit() or not size.isdigit():
+        return JsonResponse({"error": "Document ou taille du fichier manquant."}, status=400)
+    document_type = get_object_or_404(RequiredDocument, id=int(document_id))
+    total_size = int(size)
+
+    try:
+        upload = start_upload(document_type, request.POST.get("filename", ""), total_size)
+    except UploadRejected as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return JsonResponse({**upload_state(upload), "chunk_size": upload_chunk_size()}, status=201)
+
+
+@require_http_methods(["GET", "POST"])
+def document_upload_chunk(request, token):
+    """GET : etat (offset recu) pour reprendre. POST : morceau brut, en-tete Upload-Offset."""
+    upload = get_object_or_404(DocumentUpload, token=token)
+    if request.method == "GET":
+        return JsonResponse(upload_state(upload))
+
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+    except ValueError:
+        return JsonResponse({"error": "En-tete Upload-Offset manquant."}, status=400)
+
+    try:
+        upload = append_chunk(token, offset, request.body)
+    except UploadRejected as exc:
+        upload.refresh_from_db()
+        # 409 : le client reprend a l'offset renvoye.
+        return JsonResponse({**upload_state(upload), "error": str(exc)}, status=409)
+    return JsonResponse(upload_state(upload))
+
@@ -0,0 +1,17 @@
+from communication.realtime.publisher import buffered_realtime
+
+
+class RealtimeBufferMiddleware:
+    """
+    Regroupe les notifications temps reel emises pendant la requete.
+
+    Les group_send sont envoyes en une fois apres la reponse de la vue
+    (callbacks on_commit compris) au lieu d'un aller-retour par notification.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered_realtime():
+            return self.get_response(request)
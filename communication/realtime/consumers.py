@@ -27,3 +27,8 @@ class CommunicationNotificationConsumer(AsyncWebsocketConsumer):
 
     async def communication_notification(self, event):
         await self.send(text_data=json.dumps(event["payload"]))
+
+    async def communication_notification_batch(self, event):
+        # Plusieurs notifications du meme utilisateur regroupees par RealtimePublisher.
+        for message in event["messages"]:
+            await self.send(text_data=json.dumps(message["payload"]))
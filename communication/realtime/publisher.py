@@ -0,0 +1,145 @@
+"""
+Publication groupee vers le channel layer.
+
+Chaque group_send lance depuis du code synchrone paie le pont
+async_to_sync et un aller-retour Redis. Pendant une requete (cf.
+communication.middleware.RealtimeBufferMiddleware) ou un traitement
+enveloppe par buffered_realtime(), les messages sont mis en tampon puis
+envoyes en une seule tache async : un message par groupe (les messages
+multiples d'un meme groupe sont regroupes), envois concurrents bornes.
+
+Contre-pression : concurrence limitee, delai maximal par envoi, une
+nouvelle tentative si le canal est plein (ChannelFull) puis abandon
+compte et journalise. Le temps reel n'est qu'un signal : la notification
+reste en base et le widget la relit a son prochain rafraichissement.
+"""
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from asgiref.sync import async_to_sync
+from channels.exceptions import ChannelFull
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BATCH_MESSAGE_TYPE = "communication_notification_batch"
+
+_current_publisher = ContextVar("communication_realtime_publisher", default=None)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+@dataclass
+class FlushResult:
+    groups: int = 0
+    messages: int = 0
+    sent: int = 0
+    dropped: int = 0
+
+
+class RealtimePublisher:
+    def __init__(self, channel_layer=None, *, concurrency=None, send_timeout=None, max_pending=None, retry_delay=0.05):
+        self.channel_layer = channel_layer
+        self.concurrency = max(1, concurrency or _setting("REALTIME_PUBLISH_CONCURRENCY", 32))
+        self.send_timeout = send_timeout or _setting("REALTIME_PUBLISH_TIMEOUT", 2.0)
+        self.max_pending = max(1, max_pending or _setting("REALTIME_PUBLISH_MAX_PENDING", 5000))
+        self.retry_delay = retry_delay
+        self._pending = {}
+        self._pending_count = 0
+
+    def publish(self, group, message):
+        """Met le message en tampon ; vide le tampon s'il atteint max_pending."""
+        self._pending.setdefault(group, []).append(message)
+        self._pending_count += 1
+        if self._pending_count >= self.max_pending:
+            self.flush()
+
+    def flush(self):
+        pending, self._pending, self._pending_count = self._pending, {}, 0
+        if not pending:
+            return FlushResult()
+        channel_layer = self.channel_layer or get_channel_layer()
+        if not channel_layer:
+            return FlushResult(groups=len(pending), messages=sum(len(items) for items in pending.values()))
+        result = async_to_sync(self._flush_async)(channel_layer, pending)
+        if result.dropped:
+            logger.warning(
+                "Temps reel : %s message(s) abandonne(s) sur %s (%s groupe(s))",
+                result.dropped,
+                result.messages,
+                result.groups,
+            )
+        return result
+
+    async def _flush_async(self, channel_layer, pending):
+        result = FlushResult(groups=len(pending), messages=sum(len(items) for items in pending.values()))
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _send(group, messages):
+            message = messages[0] if len(messages) == 1 else {
+                "type": BATCH_MESSAGE_TYPE,
+                "messages": messages,
+            }
+            async with semaphore:
+                for attempt in range(2):
+                    try:
+                        await asyncio.wait_for(channel_layer.group_send(group, message), self.send_timeout)
+                        return len(messages)
+                    except ChannelFull:
+                        if attempt == 0:
+                            await asyncio.sleep(self.retry_delay)
+                    except asyncio.TimeoutError:
+                        break
+                    except Exception:
+                        logger.exception("Temps reel : envoi au groupe %s en echec", group)
+                        break
+            result.dropped += len(messages)
+            return 0
+
+        sent_counts = await asyncio.gather(*(_send(group, messages) for group, messages in pending.items()))
+        result.sent = sum(sent_counts)
+        return result
+
+
+def get_current_publisher():
+    return _current_publisher.get()
+
+
+@contextmanager
+def buffered_realtime(channel_layer=None, **options):
+    """
+    Met en tampon les publications temps reel du bloc et les envoie a la sortie.
+
+    Imbricable : un bloc interieur reutilise le tampon du bloc exterieur,
+    qui reste seul a vider.
+    """
+    publisher = _current_publisher.get()
+    if publisher is not None:
+        yield publisher
+        return
+    publisher = RealtimePublisher(channel_layer, **options)
+    token = _current_publisher.set(publisher)
+    try:
+        yield publisher
+    finally:
+        _current_publisher.reset(token)
+        publisher.flush()
+
+
+def publish_to_group(group, message):
+    """group_send differe si un tampon est actif, immediat sinon."""
+    publisher = _current_publisher.get()
+    if publisher is not None:
+        publisher.publish(group, message)
+        return
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    async_to_sync(channel_layer.group_send)(group, message)
@@ -1,5 +1,4 @@
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from .publisher import publish_to_group
 
 
 def user_group_name(user_id):
@@ -7,10 +6,8 @@ def user_group_name(user_id):
 
 
 def send_notification_to_user(user_id, payload):
-    channel_layer = get_channel_layer()
-    if not channel_layer:
-        return
-    async_to_sync(channel_layer.group_send)(
+    # Mis en tampon pendant une requete ou un buffered_realtime() (cf. publisher).
+    publish_to_group(
         user_group_name(user_id),
         {
             "type": "communication_notification",
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q
 
 from academics.models import AcademicEnrollment
@@ -68,3 +69,86 @@ def resolve_platform_users(
         recipient_ids.update(enrollments.values_list("student_id", flat=True))
 
     return users.filter(id__in=recipient_ids).distinct()
+
+
+# ==========================================================
+# RESOLUTION A LA LECTURE
+# ==========================================================
+# Meme regle que resolve_platform_users, evaluee pour un seul utilisateur
+# a partir de son segment (profil + inscriptions actives) : sert aux
+# contenus stockes une fois et filtres a l'affichage.
+
+def compile_audience_predicate(
+    *,
+    audience_scope="all",
+    branch_ids=None,
+    programme_ids=None,
+    cycle_ids=None,
+    class_ids=None,
+    role_tokens=None,
+    user_types=None,
+):
+    """Criteres de resolve_platform_users normalises en dict JSON (ids tries, sans vides)."""
+    return {
+        "audience_scope": audience_scope,
+        "branch_ids": sorted({item for item in (branch_ids or []) if item}),
+        "programme_ids": sorted({item for item in (programme_ids or []) if item}),
+        "cycle_ids": sorted({item for item in (cycle_ids or []) if item}),
+        "class_ids": sorted({item for item in (class_ids or []) if item}),
+        "role_tokens": sorted({str(item).strip() for item in (role_tokens or []) if str(item).strip()}),
+        "user_types": sorted({str(item).strip() for item in (user_types or []) if str(item).strip()}),
+    }
+
+
+def build_user_audience_segment(user):
+    """Attributs d'un utilisateur utilises par le ciblage (deux requetes)."""
+    try:
+        profile = user.profile
+    except ObjectDoesNotExist:
+        profile = None
+    enrollments = AcademicEnrollment.objects.filter(
+        student=user,
+        is_active=True,
+        is_archived=False,
+        status=AcademicEnrollment.STATUS_ACTIVE,
+    ).order_by("pk").values_list("branch_id", "programme_id", "programme__cycle_id", "academic_class_id")
+    return {
+        "has_profile": profile is not None,
+        "branch_id": getattr(profile, "branch_id", None),
+        "roles": sorted({value for value in (getattr(profile, "role", ""), getattr(profile, "position", "")) if value}),
+        "user_type": getattr(profile, "user_type", ""),
+        "enrollments": [list(row) for row in enrollments] if user.is_active else [],
+    }
+
+
+def audience_matches(predicate, segment):
+    """Vrai si l'utilisateur du segment ferait partie de resolve_platform_users(**predicate)."""
+    branch_ids = set(predicate.get("branch_ids") or [])
+    programme_ids = set(predicate.get("programme_ids") or [])
+    cycle_ids = set(predicate.get("cycle_ids") or [])
+    class_ids = set(predicate.get("class_ids") or [])
+    role_tokens = set(predicate.get("role_tokens") or [])
+    user_types = set(predicate.get("user_types") or [])
+    role_ok = not role_tokens or bool(role_tokens.intersection(segment["roles"]))
+    type_ok = not user_types or segment["user_type"] in user_types
+
+    if predicate.get("audience_scope", "all") == "all":
+        return role_ok and type_ok
+
+    if not any([branch_ids, programme_ids, cycle_ids, class_ids, role_tokens, user_types]):
+        return False
+
+    if segment["has_profile"] and (branch_ids or role_tokens or user_types):
+        if role_ok and type_ok and (not branch_ids or segment["branch_id"] in branch_ids):
+            return True
+
+    wants_students = not role_tokens or bool(STUDENT_ROLE_TOKENS.intersection(role_tokens))
+    if not wants_students or not any([branch_ids, programme_ids, cycle_ids, class_ids]):
+        return False
+    return any(
+        (not branch_ids or branch_id in branch_ids)
+        and (not programme_ids or programme_id in programme_ids)
+        and (not cycle_ids or cycle_id in cycle_ids)
+        and (not class_ids or class_id in class_ids)
+        for branch_id, programme_id, cycle_id, class_id in segment["enrollments"]
+    )
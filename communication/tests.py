@@ -1,6 +1,10 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer
+from django.test import SimpleTestCase, TestCase
 
 from communication.models import CommunicationNotification
+from communication.realtime.publisher import BATCH_MESSAGE_TYPE, buffered_realtime
+from communication.realtime.service import send_notification_to_user, user_group_name
 from communication.services import EmailService
 from communication.services.channel_policy import resolve_channel_policy
 
@@ -51,3 +55,33 @@ class EmailTemplateIntegrationTests(TestCase):
         self.assertEqual(policy["priority"], CommunicationNotification.PRIORITY_HIGH)
         self.assertEqual(policy["metadata"]["channel_family"], "notification_in_app")
         self.assertEqual(policy["metadata"]["realtime_behavior"], "silent")
+
+
+class RealtimePublisherTests(SimpleTestCase):
+    def _subscribe(self, layer, user_id):
+        async def _add():
+            channel = await layer.new_channel()
+            await layer.group_add(user_group_name(user_id), channel)
+            return channel
+
+        return async_to_sync(_add)()
+
+    def test_buffered_notifications_are_flushed_once_and_grouped_per_user(self):
+        layer = InMemoryChannelLayer()
+        first_channel = self._subscribe(layer, 1)
+        second_channel = self._subscribe(layer, 2)
+
+        with buffered_realtime(layer) as publisher:
+            send_notification_to_user(1, {"id": 10})
+            send_notification_to_user(1, {"id": 11})
+            with buffered_realtime() as nested:
+                self.assertIs(nested, publisher)
+                send_notification_to_user(2, {"id": 12})
+            self.assertEqual(publisher._pending_count, 3)
+
+        batch = async_to_sync(layer.receive)(first_channel)
+        self.assertEqual(batch["type"], BATCH_MESSAGE_TYPE)
+        self.assertEqual([message["payload"]["id"] for message in batch["messages"]], [10, 11])
+        single = async_to_sync(layer.receive)(second_channel)
+        self.assertEqual(single["type"], "communication_notification")
+        self.assertEqual(single["payload"], {"id": 12})
@@ -6,6 +6,7 @@ from django.utils import timezone
 from django.views.decorators.http import require_POST
 
 from communication.models import CommunicationNotification
+from core.cache import invalidate_tags
 from communication.selectors import (
     get_notification_center_queryset,
     get_notification_center_stats,
@@ -146,6 +147,8 @@ def mark_all_notifications_read(request):
         status=CommunicationNotification.STATUS_READ,
         updated_at=now,
     )
+    # update() ne declenche pas post_save : caches dependant des notifications.
+    invalidate_tags(f"notifications:{request.user.pk}")
     if request.headers.get("HX-Request"):
         context = {
             "communication_recent_notifications": get_user_notifications(request.user, limit=6),
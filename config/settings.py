@@ -30,6 +30,7 @@ def env_bool(name: str, default: bool = False) -> bool:
 def env_list(name: str, default: str = "") -> list[str]:
     return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
 
+
 # ==================================================
 # SECURITY
 # ==================================================
@@ -116,9 +117,13 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "accounts.middleware.AccessContextMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
+    "core.middleware.FragmentInvalidationMiddleware",
+    "communication.middleware.RealtimeBufferMiddleware",
+    "core.middleware.QueryBudgetMiddleware",
 ]
 
 if ENABLE_BROWSER_RELOAD and importlib.util.find_spec("django_browser_reload"):
@@ -193,6 +198,10 @@ WSGI_APPLICATION = "config.wsgi.application"
 # ASGI (WebSockets / temps réel)
 ASGI_APPLICATION = "config.asgi.application"
 
+# `manage.py test` : cache local, taches immediates, caches de pages et de
+# fragments coupes (core/test_runner.py), quel que soit le module de settings.
+TEST_RUNNER = "core.test_runner.TestRunner"
+
 # ==================================================
 # TEMPLATES
 # ==================================================
@@ -210,6 +219,8 @@ TEMPLATES = [
                 "django.contrib.messages.context_processors.messages",
                 "core.context_processors.seo_defaults",
                 "communication.context_processors.notification_widget",
+                "marketing.context_processors.announcement_feed",
+                "core.context_processors.public_page_csrf",
             ],
         },
     },
@@ -329,6 +340,113 @@ MEMOIRES_PRIVATE_ROOT = BASE_DIR / "private_media" / "memoires"
 MEMOIRE_UPLOAD_MAX_MB = int(os.getenv("MEMOIRE_UPLOAD_MAX_MB", "50"))
 MEMOIRE_RENDER_DPI = int(os.getenv("MEMOIRE_RENDER_DPI", "130"))
 
+MEMOIRE_THUMBNAIL_WIDTH = int(os.getenv("MEMOIRE_THUMBNAIL_WIDTH", "240"))
+MEMOIRE_RENDER_WORKERS = int(os.getenv("MEMOIRE_RENDER_WORKERS", str(min(os.cpu_count() or 1, 4))))
+MEMOIRE_RENDER_CHUNK_PAGES = int(os.getenv("MEMOIRE_RENDER_CHUNK_PAGES", "10"))
+
+# ==================================================
+# TACHES EN ARRIERE-PLAN (core.background)
+# ==================================================
+# Pas de Celery/RQ : pools de threads bornes dans le processus web.
+# BACKGROUND_TASKS_EAGER execute les taches immediatement (tests, scripts).
+# Force par le lanceur de tests (core/test_runner.py) : les threads ne
+# verraient pas les donnees non commitees des TestCase.
+
+BACKGROUND_TASKS_EAGER = env_bool("BACKGROUND_TASKS_EAGER", False)
+BACKGROUND_TASK_WORKERS = {
+    "default": int(os.getenv("BACKGROUND_TASK_WORKERS", "2")),
+    "memoires": int(os.getenv("BACKGROUND_MEMOIRE_WORKERS", "1")),
+    "media": int(os.getenv("BACKGROUND_MEDIA_WORKERS", "2")),
+}
+
+# ==================================================
+# CACHE APPLICATIF
+# ==================================================
+# Redis partage entre workers gunicorn/uvicorn (CACHE_URL, a defaut
+# REDIS_URL). Sans Redis, cache memoire local au processus ; les tests
+# l'utilisent toujours (core/test_runner.py). Tags, metriques et verrous :
+# core/cache.py.
+
+CACHE_URL = os.getenv("CACHE_URL", REDIS_URL).strip()
+HAS_REDIS_CLIENT = importlib.util.find_spec("redis") is not None
+CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", "300"))
+
+if CACHE_URL and HAS_REDIS_CLIENT:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+            "KEY_PREFIX": os.getenv("CACHE_KEY_PREFIX", "esfe"),
+            "TIMEOUT": CACHE_DEFAULT_TIMEOUT,
+        }
+    }
+else:
+    if CACHE_URL and not HAS_REDIS_CLIENT and not DEBUG:
+        raise ImproperlyConfigured(
+            "CACHE_URL/REDIS_URL is configured but the redis client is not installed."
+        )
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "esfe-default",
+            "TIMEOUT": CACHE_DEFAULT_TIMEOUT,
+        }
+    }
+
+CACHE_METRICS_ENABLED = env_bool("CACHE_METRICS_ENABLED", True)
+
+# Sections du dashboard etudiant (portal/student/snapshot.py), en secondes.
+STUDENT_SNAPSHOT_CACHE_TIMEOUT = int(os.getenv("STUDENT_SNAPSHOT_CACHE_TIMEOUT", "600"))
+
+# Panneaux du dashboard enseignant (portal/services/teacher_panel_cache.py).
+TEACHER_PANEL_CACHE_TIMEOUT = int(os.getenv("TEACHER_PANEL_CACHE_TIMEOUT", "600"))
+
+# Instantane du jour du surveillant (portal/services/supervisor_day_snapshot.py).
+SUPERVISOR_DAY_SNAPSHOT_TIMEOUT = int(os.getenv("SUPERVISOR_DAY_SNAPSHOT_TIMEOUT", "900"))
+
+# Publication temps reel groupee (communication/realtime/publisher.py) :
+# envois simultanes, delai par envoi (s) et taille maximale du tampon.
+REALTIME_PUBLISH_CONCURRENCY = int(os.getenv("REALTIME_PUBLISH_CONCURRENCY", "32"))
+REALTIME_PUBLISH_TIMEOUT = float(os.getenv("REALTIME_PUBLISH_TIMEOUT", "2.0"))
+REALTIME_PUBLISH_MAX_PENDING = int(os.getenv("REALTIME_PUBLISH_MAX_PENDING", "5000"))
+
+# Annonces marketing resolues a la lecture (marketing/services/announcement_feed.py).
+ANNOUNCEMENT_FEED_CACHE_TIMEOUT = int(os.getenv("ANNOUNCEMENT_FEED_CACHE_TIMEOUT", "300"))
+
+# Pages publiques mises en cache pour les anonymes (core/page_cache.py).
+# Desactive par le lanceur de tests : un rollback de TestCase n'emet pas
+# les signaux de purge.
+PUBLIC_PAGE_CACHE_ENABLED = env_bool("PUBLIC_PAGE_CACHE_ENABLED", True)
+PUBLIC_PAGE_CACHE_TIMEOUT = int(os.getenv("PUBLIC_PAGE_CACHE_TIMEOUT", "300"))
+
+# Declinaisons srcset des images (core/images/variants.py).
+IMAGE_VARIANTS_CACHE_TIMEOUT = int(os.getenv("IMAGE_VARIANTS_CACHE_TIMEOUT", "86400"))
+
+# Catalogue des formations du tunnel d'admission (admissions/services/catalog.py).
+ADMISSIONS_CATALOG_CACHE_TIMEOUT = int(os.getenv("ADMISSIONS_CATALOG_CACHE_TIMEOUT", "3600"))
+
+# Televersement fractionne des documents de candidature
+# (admissions/services/uploads.py). Morceaux ecrits hors MEDIA_ROOT.
+ADMISSIONS_UPLOAD_TEMP_ROOT = BASE_DIR / "private_media" / "admissions"
+ADMISSIONS_UPLOAD_MAX_MB = int(os.getenv("ADMISSIONS_UPLOAD_MAX_MB", "20"))
+ADMISSIONS_UPLOAD_CHUNK_SIZE = int(os.getenv("ADMISSIONS_UPLOAD_CHUNK_SIZE", str(512 * 1024)))
+ADMISSIONS_UPLOAD_MAX_PDF_PAGES = int(os.getenv("ADMISSIONS_UPLOAD_MAX_PDF_PAGES", "30"))
+ADMISSIONS_UPLOAD_IMAGE_MAX_SIDE = int(os.getenv("ADMISSIONS_UPLOAD_IMAGE_MAX_SIDE", "2480"))
+ADMISSIONS_UPLOAD_IMAGE_QUALITY = int(os.getenv("ADMISSIONS_UPLOAD_IMAGE_QUALITY", "85"))
+ADMISSIONS_UPLOAD_TTL_HOURS = int(os.getenv("ADMISSIONS_UPLOAD_TTL_HOURS", "48"))
+
+# Fragments HTMX mis en cache (core/fragments.py). Desactive par le
+# lanceur de tests comme les pages publiques ; l'ETag reste emis.
+HTMX_FRAGMENT_CACHE_ENABLED = env_bool("HTMX_FRAGMENT_CACHE_ENABLED", True)
+HTMX_FRAGMENT_CACHE_TIMEOUT = int(os.getenv("HTMX_FRAGMENT_CACHE_TIMEOUT", "120"))
+
+# Budget de requetes par vue (core/profiling.py) : part des requetes
+# mesurees, echantillons conserves par vue et seuil d'alerte N+1.
+QUERY_BUDGET_ENABLED = env_bool("QUERY_BUDGET_ENABLED", False)
+QUERY_BUDGET_SAMPLE_RATE = float(os.getenv("QUERY_BUDGET_SAMPLE_RATE", "1.0"))
+QUERY_BUDGET_WINDOW = int(os.getenv("QUERY_BUDGET_WINDOW", "200"))
+QUERY_BUDGET_DUPLICATE_THRESHOLD = int(os.getenv("QUERY_BUDGET_DUPLICATE_THRESHOLD", "10"))
+
 # ==================================================
 # DEFAULT PK
 # ==================================================
@@ -395,6 +513,10 @@ CKEDITOR_5_CONFIGS = {
 
 STUDENT_LOGIN_URL = os.getenv("STUDENT_LOGIN_URL", f"{BASE_URL}/student/login/")
 FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+# Traitement des medias de galerie (news.media_processing, pool "media").
+EVENT_VIDEO_PRESET = os.getenv("EVENT_VIDEO_PRESET", "medium")
+EVENT_VIDEO_CRF = int(os.getenv("EVENT_VIDEO_CRF", "23"))
+EVENT_VIDEO_TIMEOUT = int(os.getenv("EVENT_VIDEO_TIMEOUT", "1800"))
 
 # Clé dédiée à la signature HMAC des cartes étudiantes.
 # Distincte de SECRET_KEY pour rotation indépendante.
@@ -18,7 +18,23 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Cache memoire local : pas de Redis partage entre executions de tests.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "esfe-tests",
+    }
+}
+
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
 
+
+# Background tasks run inline so tests see their effects immediately.
+BACKGROUND_TASKS_EAGER = True
+
+# Caches de pages publiques et de fragments coupes : un rollback de
+# TestCase n'emet pas les signaux de purge (cf. core/test_runner.py).
+PUBLIC_PAGE_CACHE_ENABLED = False
+HTMX_FRAGMENT_CACHE_ENABLED = False
@@ -16,4 +16,10 @@ class CoreConfig(AppConfig):
         import ui.components.about.about_values
         import ui.components.about.about_stats
         import ui.components.about.about_cta
-        import ui.components.grades.maquette.maquette
\ No newline at end of file
+        import ui.components.grades.maquette.maquette
+
+        from core.images.variants import connect_variant_signals
+        from core.page_cache import connect_page_cache_signals
+
+        connect_variant_signals()
+        connect_page_cache_signals()
@@ -0,0 +1,85 @@
+"""
+Execution en arriere-plan des traitements lourds.
+
+Le projet n'embarque ni Celery ni RQ : les taches sont confiees a des
+pools de threads bornes, propres au processus web, une fois la
+transaction courante validee. Chaque traitement persiste son propre
+statut en base (rendu de memoire, recu, media...) afin de pouvoir etre
+rejoue par une commande de management si le processus s'arrete.
+
+Avec BACKGROUND_TASKS_EAGER=True (tests, scripts), les taches sont
+executees immediatement dans le thread appelant.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL = "default"
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _pool_size(pool):
+    sizes = getattr(settings, "BACKGROUND_TASK_WORKERS", {}) or {}
+    return max(int(sizes.get(pool, sizes.get(DEFAULT_POOL, 2))), 1)
+
+
+def get_executor(pool=DEFAULT_POOL):
+    with _executors_lock:
+        executor = _executors.get(pool)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=_pool_size(pool),
+                thread_name_prefix=f"esfe-{pool}",
+            )
+            _executors[pool] = executor
+        return executor
+
+
+def is_eager():
+    return bool(getattr(settings, "BACKGROUND_TASKS_EAGER", False))
+
+
+def _run_task(func, args, kwargs, name):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("Tache arriere-plan en echec: %s", name)
+        return None
+    finally:
+        connections.close_all()
+
+
+def submit_background_task(func, *args, pool=DEFAULT_POOL, name="", **kwargs):
+    """
+    Soumet func(*args, **kwargs) au pool `pool`.
+
+    Les erreurs sont journalisees, jamais propagees a l'appelant : la
+    tache doit enregistrer elle-meme son statut d'echec.
+    """
+    name = name or getattr(func, "__qualname__", repr(func))
+    if is_eager():
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            logger.exception("Tache arriere-plan en echec: %s", name)
+            return None
+    return get_executor(pool).submit(_run_task, func, args, kwargs, name)
+
+
+def run_after_commit(func, *args, pool=DEFAULT_POOL, name="", **kwargs):
+    """
+    Planifie la tache apres le commit de la transaction courante (ou
+    immediatement hors transaction), pour qu'elle lise des donnees validees.
+    """
+    transaction.on_commit(
+        lambda: submit_background_task(func, *args, pool=pool, name=name, **kwargs)
+    )
@@ -0,0 +1,33 @@
+"""
+Suite de benchmarks (requetes SQL + temps) des dashboards et rapports lourds.
+
+Usage : python manage.py run_benchmarks --scale small [--update-baseline]
+"""
+
+from .dataset import SCALES, SchoolScale, SyntheticSchool, build_synthetic_school
+from .runner import (
+    DEFAULT_BASELINE_PATH,
+    Regression,
+    ScenarioResult,
+    compare_with_baseline,
+    load_baseline,
+    run_scenarios,
+    save_baseline,
+)
+from .scenarios import SCENARIOS, BenchmarkError
+
+__all__ = [
+    "BenchmarkError",
+    "DEFAULT_BASELINE_PATH",
+    "Regression",
+    "SCALES",
+    "SCENARIOS",
+    "ScenarioResult",
+    "SchoolScale",
+    "SyntheticSchool",
+    "build_synthetic_school",
+    "compare_with_baseline",
+    "load_baseline",
+    "run_scenarios",
+    "save_baseline",
+]
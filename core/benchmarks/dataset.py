@@ -0,0 +1,331 @@
+"""
+Generateur d'ecole synthetique pour la suite de benchmarks.
+
+Construit, via l'ORM, une ecole realiste : annexes x classes x etudiants x
+EC x notes x paiements, plus les comptes (DG, surveillant, informaticien)
+necessaires aux scenarios. Les inscriptions et inscriptions academiques
+passent par les save() du projet pour respecter leurs invariants ; les
+notes et les paiements sont en revanche inseres en masse : les effets de
+bord de Payment.save() (recu PDF, e-mails) et des signaux ECGrade n'ont
+pas leur place dans un jeu de mesure. Les rollups de paiements sont
+reconstruits a la fin, et l'emploi du temps reutilise la commande
+seed_week_schedule_all_classes.
+"""
+
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client
+from django.utils import timezone
+
+from academic_cycle.models import BranchAcademicCycle
+from academics.models import AcademicClass, AcademicEnrollment, AcademicYear, EC, ECGrade, Semester, UE
+from academics.services.academic_years import get_current_academic_year
+from academics.services.grading import apply_ec_grade
+from admissions.models import Candidature
+from branches.models import Branch
+from formations.models import Cycle, Diploma, Filiere, Programme
+from inscriptions.models import Inscription
+from payments.models import Payment
+from payments.services.rollups import rebuild_payment_rollups
+from students.models import Student
+
+User = get_user_model()
+
+LEVELS = ("L1", "L2", "L3")
+AMOUNT_DUE = 300000
+BENCH_PREFIX = "bench"
+
+
+@dataclass(frozen=True)
+class SchoolScale:
+    branches: int
+    classes_per_branch: int
+    students_per_class: int
+    ues_per_semester: int
+    ecs_per_ue: int
+    payments_per_student: int
+
+
+SCALES = {
+    "tiny": SchoolScale(branches=1, classes_per_branch=1, students_per_class=3, ues_per_semester=1, ecs_per_ue=2, payments_per_student=1),
+    "small": SchoolScale(branches=2, classes_per_branch=2, students_per_class=10, ues_per_semester=2, ecs_per_ue=2, payments_per_student=2),
+    "medium": SchoolScale(branches=3, classes_per_branch=4, students_per_class=25, ues_per_semester=2, ecs_per_ue=3, payments_per_student=3),
+    "large": SchoolScale(branches=5, classes_per_branch=6, students_per_class=40, ues_per_semester=3, ecs_per_ue=3, payments_per_student=4),
+}
+
+
+@dataclass
+class SyntheticSchool:
+    scale: SchoolScale
+    academic_year: AcademicYear
+    next_year: AcademicYear
+    branches: list = field(default_factory=list)
+    classes: list = field(default_factory=list)
+    branch_cycles: list = field(default_factory=list)
+    users: dict = field(default_factory=dict)
+    _clients: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def main_branch(self):
+        return self.branches[0]
+
+    @property
+    def main_class(self):
+        return self.classes[0]
+
+    def client_for(self, role):
+        """Client de test deja authentifie pour le compte `role` (dg, supervisor, it, teacher)."""
+        client = self._clients.get(role)
+        if client is None:
+            client = Client()
+            client.force_login(self.users[role])
+            self._clients[role] = client
+        return client
+
+
+def _ensure_academic_years():
+    current = get_current_academic_year()
+    if current is None:
+        today = timezone.localdate()
+        start_year = today.year if today.month >= 9 else today.year - 1
+        current, _ = AcademicYear.objects.get_or_create(
+            name=f"{start_year}-{start_year + 1}",
+            defaults={
+                "start_date": date(start_year, 9, 1),
+                "end_date": date(start_year + 1, 7, 31),
+                "is_active": True,
+            },
+        )
+    start_year = current.start_date.year
+    next_year, _ = AcademicYear.objects.get_or_create(
+        name=f"{start_year + 1}-{start_year + 2}",
+        defaults={
+            "start_date": date(start_year + 1, 9, 1),
+            "end_date": date(start_year + 2, 7, 31),
+            "is_active": False,
+        },
+    )
+    return current, next_year
+
+
+def _ensure_programmes(count):
+    cycle, _ = Cycle.objects.get_or_create(
+        name="Licence Benchmark",
+        defaults={"theme": "accent", "min_duration_years": 3, "max_duration_years": 4},
+    )
+    diploma, _ = Diploma.objects.get_or_create(name="Licence Benchmark", defaults={"level": "superieur"})
+    programmes = []
+    for index in range(1, count + 1):
+        filiere, _ = Filiere.objects.get_or_create(name=f"Filiere Benchmark {index}")
+        programme, _ = Programme.objects.get_or_create(
+            title=f"Programme Benchmark {index}",
+            defaults={
+                "filiere": filiere,
+                "cycle": cycle,
+                "diploma_awarded": diploma,
+                "duration_years": 3,
+                "short_description": "Programme synthetique (benchmarks)",
+                "description": "Programme synthetique (benchmarks)",
+            },
+        )
+        programmes.append(programme)
+    return programmes
+
+
+def _create_staff_user(username, *, position, role="", branch=None):
+    user = User(username=username, email=f"{username}@esfe.local", is_staff=True)
+    user.set_unusable_password()
+    user.save()
+    profile = user.profile
+    profile.role = role
+    profile.position = position
+    profile.branch = branch
+    profile.save(update_fields=["role", "position", "branch", "updated_at"])
+    return user
+
+
+def _create_class_structure(academic_class, scale):
+    ecs_by_semester = {}
+    for number in (1, 2):
+        semester = Semester.objects.create(academic_class=academic_class, number=number)
+        ecs = []
+        for ue_index in range(1, scale.ues_per_semester + 1):
+            ue = UE.objects.create(
+                semester=semester,
+                code=f"UE{number}{ue_index:02d}-{academic_class.pk}",
+                title=f"UE {number}.{ue_index}",
+            )
+            ecs.extend(
+                EC.objects.create(
+                    ue=ue,
+                    title=f"EC {number}.{ue_index}.{ec_index}",
+                    credit_required=Decimal("3"),
+                    coefficient=Decimal("2"),
+                )
+                for ec_index in range(1, scale.ecs_per_ue + 1)
+            )
+        ecs_by_semester[semester] = ecs
+    return ecs_by_semester
+
+
+def _create_student(academic_class, index, rng, scale):
+    slug = f"{BENCH_PREFIX}.c{academic_class.pk}.s{index}"
+    programme = academic_class.programme
+    candidature = Candidature.objects.create(
+        programme=programme,
+        branch=academic_class.branch,
+        academic_year=academic_class.academic_year.name,
+        entry_year=LEVELS.index(academic_class.level) + 1 if academic_class.level in LEVELS else 1,
+        first_name=f"Etudiant{index}",
+        last_name=f"Classe{academic_class.pk}",
+        birth_date="2003-01-01",
+        birth_place="Bamako",
+        gender="female" if index % 2 else "male",
+        phone=f"7{academic_class.pk:03d}{index:04d}"[:8],
+        email=f"{slug}@esfe.local",
+        status="accepted",
+    )
+
+    share = AMOUNT_DUE // scale.payments_per_student
+    amounts = [share] * (scale.payments_per_student - 1) + [AMOUNT_DUE - share * (scale.payments_per_student - 1)]
+    # Un etudiant sur quatre laisse son dernier versement en attente.
+    pending = index % 4 == 0
+    validated_total = sum(amounts[:-1]) if pending else AMOUNT_DUE
+    if validated_total >= AMOUNT_DUE:
+        status = Inscription.STATUS_ACTIVE
+    elif validated_total:
+        status = Inscription.STATUS_PARTIAL
+    else:
+        status = Inscription.STATUS_AWAITING_PAYMENT
+    inscription = Inscription.objects.create(
+        candidature=candidature,
+        academic_class=academic_class,
+        amount_due=AMOUNT_DUE,
+        amount_paid=validated_total,
+        status=status,
+    )
+
+    user = User(username=slug, email=f"{slug}@esfe.local", first_name=candidature.first_name, last_name=candidature.last_name)
+    user.set_unusable_password()
+    user.save()
+    student = Student.objects.create(
+        user=user,
+        inscription=inscription,
+        matricule=f"BENCH-{academic_class.pk:04d}-{index:04d}",
+    )
+    enrollment = AcademicEnrollment.objects.create(
+        inscription=inscription,
+        student=user,
+        programme=programme,
+        branch=academic_class.branch,
+        academic_year=academic_class.academic_year,
+        academic_class=academic_class,
+    )
+    student.current_academic_enrollment = enrollment
+    student.save(update_fields=["current_academic_enrollment"])
+
+    now = timezone.now()
+    payments = [
+        Payment(
+            inscription=inscription,
+            amount=amount,
+            method=Payment.METHOD_CASH if number % 2 else Payment.METHOD_ORANGE,
+            status=Payment.STATUS_PENDING if pending and number == len(amounts) else Payment.STATUS_VALIDATED,
+            reference=f"BENCH-{inscription.pk}-{number}",
+            paid_at=now - timedelta(days=rng.randint(0, 120), hours=rng.randint(0, 8)),
+        )
+        for number, amount in enumerate(amounts, start=1)
+    ]
+    return enrollment, payments
+
+
+def _build_grades(enrollments, ecs_by_semester, rng):
+    grades = []
+    for enrollment in enrollments:
+        for ecs in ecs_by_semester.values():
+            for ec in ecs:
+                grade = ECGrade(
+                    enrollment=enrollment,
+                    ec=ec,
+                    normal_score=Decimal(rng.randint(40, 190)) / Decimal("10"),
+                )
+                apply_ec_grade(grade)
+                grades.append(grade)
+    return grades
+
+
+def build_synthetic_school(scale, *, seed=2026):
+    """Cree l'ecole synthetique correspondant a `scale` et la renvoie (SyntheticSchool)."""
+    if isinstance(scale, str):
+        scale = SCALES[scale]
+    rng = random.Random(seed)
+    academic_year, next_year = _ensure_academic_years()
+    programmes = _ensure_programmes(-(-scale.classes_per_branch // len(LEVELS)))
+    school = SyntheticSchool(scale=scale, academic_year=academic_year, next_year=next_year)
+
+    run_tag = rng.randint(100, 999)
+    for branch_index in range(1, scale.branches + 1):
+        branch = Branch.objects.create(
+            name=f"Annexe Benchmark {run_tag}-{branch_index}",
+            code=f"B{run_tag}{branch_index}",
+            slug=f"{BENCH_PREFIX}-{run_tag}-{branch_index}",
+        )
+        school.branches.append(branch)
+        school.branch_cycles.append(BranchAcademicCycle.objects.create(branch=branch, academic_year=academic_year))
+
+        for class_index in range(scale.classes_per_branch):
+            programme = programmes[class_index // len(LEVELS)]
+            level = LEVELS[class_index % len(LEVELS)]
+            academic_class = AcademicClass.objects.create(
+                programme=programme,
+                branch=branch,
+                academic_year=academic_year,
+                level=level,
+                study_level="LICENCE",
+                validation_threshold=Decimal("10.00"),
+            )
+            # Classe d'accueil de l'annee suivante (reinscriptions / passages).
+            AcademicClass.objects.get_or_create(
+                programme=programme,
+                branch=branch,
+                academic_year=next_year,
+                level=LEVELS[min(class_index % len(LEVELS) + 1, len(LEVELS) - 1)],
+                defaults={"study_level": "LICENCE", "validation_threshold": Decimal("10.00")},
+            )
+            school.classes.append(academic_class)
+
+            ecs_by_semester = _create_class_structure(academic_class, scale)
+            enrollments, payments = [], []
+            for student_index in range(1, scale.students_per_class + 1):
+                enrollment, student_payments = _create_student(academic_class, student_index, rng, scale)
+                enrollments.append(enrollment)
+                payments.extend(student_payments)
+            Payment.objects.bulk_create(payments)
+            ECGrade.objects.bulk_create(_build_grades(enrollments, ecs_by_semester, rng))
+            # Notes completes et publiees : les releves annuels sont accessibles.
+            Semester.objects.filter(pk__in=[semester.pk for semester in ecs_by_semester]).update(
+                status=Semester.STATUS_PUBLISHED
+            )
+
+    rebuild_payment_rollups(branch_ids=[branch.pk for branch in school.branches])
+
+    week_start = timezone.localdate() - timedelta(days=timezone.localdate().weekday())
+    call_command("seed_week_schedule_all_classes", week_start=week_start.isoformat(), stdout=StringIO())
+
+    main_branch = school.main_branch
+    school.users["dg"] = _create_staff_user(f"{BENCH_PREFIX}.dg.{run_tag}", position="executive_director", role="executive")
+    school.users["supervisor"] = _create_staff_user(
+        f"{BENCH_PREFIX}.supervisor.{run_tag}", position="academic_supervisor", branch=main_branch
+    )
+    school.users["it"] = _create_staff_user(f"{BENCH_PREFIX}.it.{run_tag}", position="it_support", branch=main_branch)
+    school.users["teacher"] = (
+        User.objects.filter(teaching_schedule_events__academic_class=school.main_class).order_by("pk").first()
+        or _create_staff_user(f"{BENCH_PREFIX}.teacher.{run_tag}", position="teacher", role="teacher", branch=main_branch)
+    )
+    return school
@@ -0,0 +1,73 @@
+"""
+Comparaison des modes de diffusion websocket (sans requete SQL).
+
+Un message par destinataire vers un InMemoryChannelLayer (le layer de dev),
+envoye soit par un async_to_sync(group_send) par message, soit via le
+tampon RealtimePublisher vide en une seule tache. Ces mesures ne touchent
+pas la base : elles restent hors du registre SCENARIOS, dont la reference
+porte sur le nombre de requetes.
+"""
+
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer
+
+from communication.realtime.publisher import RealtimePublisher
+from communication.realtime.service import user_group_name
+
+from .runner import ScenarioResult
+from .scenarios import BenchmarkError
+
+PAYLOAD = {"type": "communication_notification", "payload": {"title": "Annonce", "unread_count": 1}}
+
+
+def realtime_recipients(scale):
+    """Dix messages par etudiant de l'ecole synthetique."""
+    return scale.branches * scale.classes_per_branch * scale.students_per_class * 10
+
+
+def _subscribed_layer(recipients):
+    layer = InMemoryChannelLayer(capacity=1000)
+
+    async def _subscribe():
+        for user_id in range(recipients):
+            await layer.group_add(user_group_name(user_id), await layer.new_channel())
+
+    async_to_sync(_subscribe)()
+    return layer
+
+
+def publish_direct(layer, recipients):
+    for user_id in range(recipients):
+        async_to_sync(layer.group_send)(user_group_name(user_id), PAYLOAD)
+
+
+def publish_batched(layer, recipients):
+    publisher = RealtimePublisher(layer, max_pending=recipients + 1)
+    for user_id in range(recipients):
+        publisher.publish(user_group_name(user_id), PAYLOAD)
+    result = publisher.flush()
+    if result.sent != recipients:
+        raise BenchmarkError(f"{result.dropped} message(s) temps reel abandonne(s)")
+
+
+MODES = {
+    "realtime_publish_direct": publish_direct,
+    "realtime_publish_batched": publish_batched,
+}
+
+
+def run_realtime_comparison(recipients, *, repeat=3):
+    """Meilleur temps de chaque mode sur `repeat` passages (queries toujours 0)."""
+    results = []
+    for name, publish in MODES.items():
+        best = None
+        for _ in range(max(repeat, 1)):
+            layer = _subscribed_layer(recipients)
+            started = time.perf_counter()
+            publish(layer, recipients)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results.append(ScenarioResult(name=name, queries=0, seconds=round(best, 4)))
+    return results
@@ -0,0 +1,117 @@
+"""
+Execution des scenarios et comparaison avec la reference enregistree.
+
+Pour chaque scenario on retient le nombre de requetes SQL du premier
+passage (caches froids) et le meilleur temps sur `repeat` passages. La
+reference (baseline.json) est indexee par echelle ; une mesure regresse
+quand elle depasse la reference au-dela de la tolerance relative.
+"""
+
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .scenarios import SCENARIOS, BenchmarkError
+
+DEFAULT_BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_QUERY_TOLERANCE = 0.05
+DEFAULT_TIME_TOLERANCE = 0.50
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    queries: int
+    seconds: float
+
+
+@dataclass
+class Regression:
+    name: str
+    metric: str
+    baseline: float
+    measured: float
+    allowed: float
+
+    def __str__(self):
+        return (
+            f"{self.name}: {self.metric} {self.measured:g} > {self.allowed:g} "
+            f"(reference {self.baseline:g})"
+        )
+
+
+def run_scenario(scenario, school, *, repeat=3):
+    client = school.client_for(scenario.role) if scenario.role else None
+    queries = None
+    best = None
+    for _ in range(max(repeat, 1)):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            scenario.func(school, client)
+            elapsed = time.perf_counter() - started
+        if queries is None:
+            queries = len(captured.captured_queries)
+        best = elapsed if best is None else min(best, elapsed)
+    return ScenarioResult(name=scenario.name, queries=queries, seconds=round(best, 4))
+
+
+def run_scenarios(school, *, names=None, repeat=3):
+    unknown = set(names or []) - set(SCENARIOS)
+    if unknown:
+        raise BenchmarkError(f"Scenario(s) inconnu(s) : {', '.join(sorted(unknown))}")
+    selected = [SCENARIOS[name] for name in (names or SCENARIOS)]
+    return [run_scenario(scenario, school, repeat=repeat) for scenario in selected]
+
+
+def load_baseline(path=DEFAULT_BASELINE_PATH):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_baseline(results, scale_name, path=DEFAULT_BASELINE_PATH):
+    path = Path(path)
+    baseline = load_baseline(path)
+    scale_baseline = baseline.setdefault(scale_name, {})
+    for result in results:
+        scale_baseline[result.name] = {"queries": result.queries, "seconds": result.seconds}
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return baseline
+
+
+def compare_with_baseline(
+    results,
+    baseline,
+    *,
+    query_tolerance=DEFAULT_QUERY_TOLERANCE,
+    time_tolerance=DEFAULT_TIME_TOLERANCE,
+):
+    """
+    Compare les mesures a la reference d'une echelle ({scenario: {queries, seconds}}).
+
+    Les scenarios sans reference sont ignores ; time_tolerance=None desactive
+    le controle du temps (utile en CI, ou l'horloge est bruitee).
+    """
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.name)
+        if not reference:
+            continue
+        allowed_queries = int(reference["queries"] * (1 + query_tolerance))
+        if result.queries > allowed_queries:
+            regressions.append(Regression(result.name, "queries", reference["queries"], result.queries, allowed_queries))
+        if time_tolerance is None:
+            continue
+        allowed_seconds = round(reference["seconds"] * (1 + time_tolerance), 4)
+        if result.seconds > allowed_seconds:
+            regressions.append(Regression(result.name, "seconds", reference["seconds"], result.seconds, allowed_seconds))
+    return regressions
+
+
+def results_as_dict(results):
+    return {result.name: asdict(result) for result in results}
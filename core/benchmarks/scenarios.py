@@ -0,0 +1,87 @@
+"""
+Scenarios mesures par la suite de benchmarks.
+
+Chaque scenario recoit l'ecole synthetique et, s'il declare un `role`, un
+client de test deja authentifie pour ce compte. Les vues sont appelees via
+le client (rendu de template compris), les services directement.
+"""
+
+from dataclasses import dataclass
+
+from django.urls import reverse
+
+from academic_cycle.services.readiness_service import check_branch_readiness
+from academics.services.reporting import build_annual_class_report
+from portal.services.reenrollment_service import build_reenrollment_candidates
+
+
+class BenchmarkError(Exception):
+    """Un scenario n'a pas pu s'executer (reponse HTTP inattendue, donnees absentes...)."""
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    func: object
+    role: str = ""
+    description: str = ""
+
+
+SCENARIOS = {}
+
+
+def scenario(name, *, role="", description=""):
+    def decorator(func):
+        SCENARIOS[name] = Scenario(name=name, func=func, role=role, description=description)
+        return func
+
+    return decorator
+
+
+def _get_ok(client, url, params=None):
+    response = client.get(url, params or {})
+    if response.status_code != 200:
+        raise BenchmarkError(f"GET {url} -> HTTP {response.status_code}")
+    if getattr(response, "streaming", False):
+        b"".join(response.streaming_content)
+    return response
+
+
+@scenario("dg_dashboard", role="dg", description="Dashboard Directeur General (toutes annexes).")
+def dg_dashboard(school, client):
+    _get_ok(client, reverse("accounts_portal:portal_dg"))
+
+
+@scenario("annual_class_report", description="Rapport annuel de la classe principale.")
+def annual_class_report(school, client):
+    build_annual_class_report(school.main_class.pk)
+
+
+@scenario("reenrollment_candidates", description="Candidats a la reinscription de la classe principale.")
+def reenrollment_candidates(school, client):
+    build_reenrollment_candidates(source_year=school.academic_year, source_class=school.main_class)
+
+
+@scenario("branch_readiness", description="Controle de cloture de l'annexe principale.")
+def branch_readiness(school, client):
+    check_branch_readiness(school.branch_cycles[0])
+
+
+@scenario("it_export_notes_excel", role="it", description="Export Excel des notes (classe + semestre 1).")
+def it_export_notes_excel(school, client):
+    semester = school.main_class.semesters.order_by("number").first()
+    _get_ok(
+        client,
+        reverse("accounts_portal:it_export_notes_excel"),
+        {"class_id": school.main_class.pk, "semester_id": semester.pk},
+    )
+
+
+@scenario("teacher_dashboard", role="teacher", description="Dashboard enseignant (vue d'ensemble).")
+def teacher_dashboard(school, client):
+    _get_ok(client, reverse("accounts_portal:portal_teacher"))
+
+
+@scenario("supervisor_dashboard", role="supervisor", description="Dashboard Surveillant General.")
+def supervisor_dashboard(school, client):
+    _get_ok(client, reverse("accounts_portal:portal_dashboard"))
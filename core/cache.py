@@ -0,0 +1,251 @@
+"""
+Couche de cache commune (backend Redis partage, cf. settings.CACHES).
+
+Invalidation par tags versionnes : une entree declare les tags dont elle
+depend ("student:12", "branch:3"...). Chaque tag porte une version stockee
+dans le cache ; la cle effective de l'entree integre les versions courantes
+de ses tags. Invalider un tag revient a changer sa version : les entrees
+qui en dependent ne sont plus relues et expirent d'elles-memes.
+
+get_or_compute ajoute les compteurs hit/miss par espace de noms et une
+protection contre l'effet de meute : un seul processus recalcule une cle
+expiree pendant que les autres attendent brievement son resultat.
+
+patch_cached corrige une entree en place (instantanes mis a jour a chaque
+ecriture plutot que recalcules) et signale les cas ou il faut invalider.
+"""
+
+import hashlib
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.profiling import note_cache_access
+
+logger = logging.getLogger(__name__)
+
+TAG_VERSION_PREFIX = "tagv:"
+LOCK_PREFIX = "lock:"
+METRICS_PREFIX = "cache-metrics:"
+METRICS_INDEX_KEY = "cache-metrics:namespaces"
+
+DEFAULT_LOCK_TIMEOUT = 30
+DEFAULT_LOCK_WAIT = 5.0
+LOCK_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+# Espaces deja inscrits dans l'index partage par ce processus.
+_indexed_namespaces = set()
+
+
+def _tag_key(tag):
+    return f"{TAG_VERSION_PREFIX}{tag}"
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def get_tag_versions(tags):
+    """Versions courantes des tags (un seul aller-retour vers le cache)."""
+    keys = {tag: _tag_key(tag) for tag in tags}
+    found = cache.get_many(list(keys.values()))
+    missing = {key: _new_version() for key in keys.values() if key not in found}
+    if missing:
+        # Pas d'expiration : une version perdue invaliderait tout le tag.
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {tag: found[key] for tag, key in keys.items()}
+
+
+def tagged_key(base_key, tags):
+    """Cle de cache dependant de la version courante de chacun des tags."""
+    tags = sorted(set(tags))
+    if not tags:
+        return base_key
+    versions = get_tag_versions(tags)
+    signature = "|".join(f"{tag}={versions[tag]}" for tag in tags)
+    digest = hashlib.md5(signature.encode("utf-8")).hexdigest()[:16]
+    return f"{base_key}:{digest}"
+
+
+def invalidate_tags(*tags):
+    """
+    Invalide les tags immediatement, puis de nouveau apres commit.
+
+    Le second passage couvre la lecture concurrente qui aurait recalcule
+    l'entree avec les donnees d'avant commit entre les deux instants.
+    """
+    tags = {tag for tag in tags if tag}
+    if not tags:
+        return
+
+    def _bump():
+        cache.set_many({_tag_key(tag): _new_version() for tag in tags}, None)
+
+    _bump()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(_bump)
+
+
+def invalidate_tag(tag):
+    invalidate_tags(tag)
+
+
+# ==========================================================
+# METRIQUES
+# ==========================================================
+
+def _metrics_enabled():
+    return getattr(settings, "CACHE_METRICS_ENABLED", True)
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Cle absente (premier acces ou expiree) : add evite d'ecraser un
+        # compteur cree entre-temps par un autre processus.
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def record_cache_access(namespace, hit):
+    note_cache_access(hit)
+    if not namespace or not _metrics_enabled():
+        return
+    try:
+        _incr(f"{METRICS_PREFIX}{namespace}:{'hits' if hit else 'misses'}")
+        if namespace not in _indexed_namespaces:
+            namespaces = cache.get(METRICS_INDEX_KEY) or set()
+            if namespace not in namespaces:
+                cache.set(METRICS_INDEX_KEY, set(namespaces) | {namespace}, None)
+            _indexed_namespaces.add(namespace)
+    except Exception:
+        # Les metriques ne doivent jamais casser une lecture.
+        logger.warning("Compteur de cache indisponible (%s)", namespace, exc_info=True)
+
+
+def get_cache_metrics(namespaces=None):
+    """{namespace: {"hits", "misses", "hit_rate"}} pour les espaces suivis."""
+    namespaces = sorted(namespaces or cache.get(METRICS_INDEX_KEY) or [])
+    keys = [
+        f"{METRICS_PREFIX}{namespace}:{kind}"
+        for namespace in namespaces
+        for kind in ("hits", "misses")
+    ]
+    values = cache.get_many(keys)
+    metrics = {}
+    for namespace in namespaces:
+        hits = values.get(f"{METRICS_PREFIX}{namespace}:hits", 0)
+        misses = values.get(f"{METRICS_PREFIX}{namespace}:misses", 0)
+        total = hits + misses
+        metrics[namespace] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else None,
+        }
+    return metrics
+
+
+def reset_cache_metrics():
+    _indexed_namespaces.clear()
+    namespaces = cache.get(METRICS_INDEX_KEY) or []
+    cache.delete_many([
+        f"{METRICS_PREFIX}{namespace}:{kind}"
+        for namespace in namespaces
+        for kind in ("hits", "misses")
+    ] + [METRICS_INDEX_KEY])
+
+
+# ==========================================================
+# CALCUL PROTEGE (SINGLE-FLIGHT)
+# ==========================================================
+
+def get_or_compute(
+    key,
+    builder,
+    *,
+    timeout=None,
+    tags=(),
+    namespace="",
+    lock_timeout=DEFAULT_LOCK_TIMEOUT,
+    lock_wait=DEFAULT_LOCK_WAIT,
+):
+    """
+    Lit `key` (versionnee par `tags`) ou la calcule via builder().
+
+    Sur un miss, seul le detenteur du verrou (cache.add) recalcule ; les
+    autres interrogent le cache jusqu'a `lock_wait` secondes puis, faute de
+    resultat, calculent eux-memes plutot que d'echouer. `timeout=None`
+    reprend le TIMEOUT par defaut du backend.
+    """
+    key = tagged_key(key, tags)
+    set_kwargs = {} if timeout is None else {"timeout": timeout}
+
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        record_cache_access(namespace, hit=True)
+        return value
+
+    record_cache_access(namespace, hit=False)
+    lock_key = f"{LOCK_PREFIX}{key}"
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, lock_timeout):
+        try:
+            value = builder()
+            cache.set(key, value, **set_kwargs)
+            return value
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    deadline = time.monotonic() + lock_wait
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if cache.get(lock_key) is None:
+            break
+
+    value = builder()
+    cache.set(key, value, **set_kwargs)
+    return value
+
+
+# ==========================================================
+# MISE A JOUR EN PLACE
+# ==========================================================
+
+def patch_cached(key, updater, *, tags=(), timeout=None, lock_timeout=DEFAULT_LOCK_TIMEOUT):
+    """
+    Applique updater(value) a l'entree `key` (versionnee par `tags`) sans la recalculer.
+
+    Retourne False quand la mise a jour n'a pas pu etre garantie : une autre
+    mise a jour tient le verrou, ou l'entree est absente pendant qu'un
+    get_or_compute la recalcule (sur des donnees peut-etre anterieures).
+    L'appelant invalide alors ses tags. Une entree absente sans recalcul en
+    cours n'a rien a corriger : la prochaine lecture la reconstruit.
+    """
+    key = tagged_key(key, tags)
+    set_kwargs = {} if timeout is None else {"timeout": timeout}
+    patch_lock_key = f"{LOCK_PREFIX}patch:{key}"
+    token = uuid.uuid4().hex
+    if not cache.add(patch_lock_key, token, lock_timeout):
+        return False
+    try:
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            return cache.get(f"{LOCK_PREFIX}{key}") is None
+        updater(value)
+        cache.set(key, value, **set_kwargs)
+        return True
+    finally:
+        if cache.get(patch_lock_key) == token:
+            cache.delete(patch_lock_key)
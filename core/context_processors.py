@@ -4,6 +4,7 @@ from django.conf import settings
 from django.db.utils import OperationalError, ProgrammingError
 
 from core.models import Institution, SiteConfiguration
+from core.page_cache import CSRF_PLACEHOLDER
 
 
 def _absolute_media_url(path: str) -> str:
@@ -77,3 +78,12 @@ def seo_defaults(request):
         "website_schema_json": json.dumps(website_schema, ensure_ascii=True),
     }
 
+
+def public_page_csrf(request):
+    """
+    Page publique en cours de mise en cache (core.page_cache) : le jeton
+    CSRF est rendu sous forme de marqueur, remplace a chaque service.
+    """
+    if getattr(request, "public_page_cache", False):
+        return {"csrf_token": CSRF_PLACEHOLDER}
+    return {}
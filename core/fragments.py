@@ -0,0 +1,186 @@
+"""
+Fragments HTMX legers, mis en cache et conditionnels.
+
+Un widget interroge toutes les 15 a 45 secondes n'a pas a reconstruire le
+contexte du tableau de bord qui l'a affiche. @htmx_fragment declare le
+fragment avec le seul chargeur de donnees dont il a besoin :
+
+    @htmx_fragment(
+        "manager:cash-balance",
+        "accounts/dashboard/partials/widget_cash_balance.html",
+        vary=lambda request: (request.branch.pk,),
+        dependencies=("accounts.BranchCashMovement",),
+        triggers=("cashBalanceUpdated",),
+    )
+    def widget_cash_balance(request):
+        return {...}
+
+- le HTML rendu est mis en cache (core.cache) par fragment et par valeur
+  de `vary` ; le jeton CSRF est rendu sous forme de marqueur et remplace a
+  chaque service (meme mecanisme que core.page_cache) ;
+- chaque reponse porte un ETag : si le navigateur renvoie le meme
+  (If-None-Match), la reponse est un 304 sans corps et, fragment en cache,
+  sans aucune requete SQL pour les donnees ;
+- purge : un post_save / post_delete sur un modele de `dependencies`, ou
+  une reponse qui emet un evenement de `triggers` dans HX-Trigger
+  (FragmentInvalidationMiddleware) invalide le fragment. Le navigateur,
+  qui ecoute ce meme evenement, recharge alors une version a jour.
+  HTMX_FRAGMENT_CACHE_TIMEOUT borne les donnees dependant de l'heure.
+
+Les requetes autres que GET / HEAD recalculent toujours le fragment et
+rafraichissent l'entree. Taux de succes : espace de noms "htmx-fragments"
+de get_cache_metrics().
+"""
+
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse, HttpResponseNotModified
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.http import parse_etags
+
+from core.cache import invalidate_tags, record_cache_access, tagged_key
+from core.page_cache import CSRF_PLACEHOLDER
+
+FRAGMENT_KEY_PREFIX = "htmx-fragment:v1"
+METRICS_NAMESPACE = "htmx-fragments"
+TRIGGER_HEADERS = ("HX-Trigger", "HX-Trigger-After-Swap", "HX-Trigger-After-Settle")
+
+# Evenements HX-Trigger ecoutes par au moins un fragment.
+_trigger_events = set()
+
+
+def fragment_cache_enabled():
+    return getattr(settings, "HTMX_FRAGMENT_CACHE_ENABLED", True)
+
+
+def fragment_cache_timeout():
+    return getattr(settings, "HTMX_FRAGMENT_CACHE_TIMEOUT", 120)
+
+
+def fragment_tag(name):
+    return f"htmx-fragment:{name}"
+
+
+def trigger_tag(event):
+    return f"htmx-event:{event}"
+
+
+def _fragment_key(name, parts):
+    raw = "|".join(str(part) for part in parts)
+    return f"{FRAGMENT_KEY_PREFIX}:{name}:{hashlib.md5(raw.encode('utf-8')).hexdigest()}"
+
+
+def _render_entry(request, template, context):
+    content = render_to_string(template, {**context, "csrf_token": CSRF_PLACEHOLDER}, request)
+    return {"content": content, "etag": f'"{hashlib.md5(content.encode("utf-8")).hexdigest()}"'}
+
+
+def _matches(request, etag):
+    header = request.headers.get("If-None-Match", "")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Comparaison faible : l'ETag emis est W/ (corps variable par jeton CSRF).
+    return any(tag.removeprefix("W/") == etag for tag in parse_etags(header))
+
+
+def _respond(request, entry):
+    if request.method in ("GET", "HEAD") and _matches(request, entry["etag"]):
+        response = HttpResponseNotModified()
+    else:
+        content = entry["content"]
+        if CSRF_PLACEHOLDER in content:
+            content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+        response = HttpResponse(content)
+    response["ETag"] = f"W/{entry['etag']}"
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _connect_dependency(name, label, tags):
+    def _purge(sender, **kwargs):
+        invalidate_tags(*tags)
+
+    # Reference paresseuse "app.Model" : resolue une fois le registre charge.
+    post_save.connect(_purge, sender=label, weak=False, dispatch_uid=f"htmx_fragment:save:{name}:{label}")
+    post_delete.connect(_purge, sender=label, weak=False, dispatch_uid=f"htmx_fragment:delete:{name}:{label}")
+
+
+def htmx_fragment(name, template, *, vary=None, dependencies=(), triggers=(), timeout=None):
+    """
+    Sert `template` avec le contexte retourne par le chargeur decore.
+
+    vary(request, *args, **kwargs) -> tuple distinguant les entrees (annexe,
+    utilisateur, jour...). Le chargeur peut retourner une HttpResponse pour
+    court-circuiter le rendu (erreur, redirection) : elle n'est pas cachee.
+    """
+    tags = [fragment_tag(name), *(trigger_tag(event) for event in triggers)]
+    _trigger_events.update(triggers)
+    for label in dependencies:
+        _connect_dependency(name, label, tags)
+
+    def decorator(loader):
+        @wraps(loader)
+        def view(request, *args, **kwargs):
+            cacheable = fragment_cache_enabled()
+            key = None
+            entry = None
+            if cacheable:
+                parts = vary(request, *args, **kwargs) if vary else ()
+                key = tagged_key(_fragment_key(name, parts), tags)
+                if request.method in ("GET", "HEAD"):
+                    entry = cache.get(key)
+                    record_cache_access(METRICS_NAMESPACE, hit=entry is not None)
+
+            if entry is None:
+                context = loader(request, *args, **kwargs)
+                if isinstance(context, HttpResponse):
+                    return context
+                entry = _render_entry(request, template, context)
+                if cacheable:
+                    cache.set(key, entry, timeout or fragment_cache_timeout())
+            return _respond(request, entry)
+
+        view.fragment_name = name
+        return view
+
+    return decorator
+
+
+# ==========================================================
+# PURGE
+# ==========================================================
+
+def invalidate_fragments(*names):
+    invalidate_tags(*(fragment_tag(name) for name in names))
+
+
+def triggered_events(response):
+    """Noms d'evenements emis par la reponse (HX-Trigger en JSON ou liste separee par des virgules)."""
+    events = set()
+    for header in TRIGGER_HEADERS:
+        value = response.get(header, "").strip()
+        if not value:
+            continue
+        if value.startswith("{"):
+            try:
+                events.update(json.loads(value))
+            except ValueError:
+                continue
+        else:
+            events.update(event.strip() for event in value.split(",") if event.strip())
+    return events
+
+
+def invalidate_triggered_fragments(response):
+    events = triggered_events(response) & _trigger_events
+    if events:
+        invalidate_tags(*(trigger_tag(event) for event in sorted(events)))
+    return events
@@ -0,0 +1,275 @@
+"""
+Declinaisons responsives des images televersees (srcset).
+
+Chaque champ image declare dans IMAGE_VARIANT_FIELDS recoit un jeu de
+largeurs et de formats (AVIF si Pillow sait l'encoder, WebP, puis un
+format de repli JPEG ou PNG). Les declinaisons sont produites en une
+passe (un seul decodage de la source) sur le pool "media" de
+core.background et enregistrees dans core.models.ImageVariant, indexees
+par le chemin du fichier source.
+
+Une source remplacee change de chemin : elle n'a donc plus de
+declinaisons, le gabarit sert l'original et la generation est relancee
+(post_save, ou a la premiere demande du tag {% responsive_image %}).
+La commande build_image_variants rattrape les medias existants.
+"""
+
+import hashlib
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps
+
+from core.background import run_after_commit
+from core.cache import get_or_compute, invalidate_tags
+
+VARIANT_TASK_POOL = "media"
+VARIANTS_KEY_PREFIX = "images:variants:v1"
+PENDING_KEY_PREFIX = "images:variants:pending"
+PENDING_TIMEOUT = 600
+
+# format -> (format Pillow, extension, type MIME)
+FORMATS = {
+    "avif": ("AVIF", "avif", "image/avif"),
+    "webp": ("WEBP", "webp", "image/webp"),
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "png": ("PNG", "png", "image/png"),
+}
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    widths: tuple
+    formats: tuple = ("avif", "webp", "jpeg")
+    quality: int = 80
+
+    @property
+    def fallback_format(self):
+        return self.formats[-1]
+
+
+PHOTO_VARIANTS = VariantSpec(widths=(480, 800, 1200, 1600))
+GALLERY_VARIANTS = VariantSpec(widths=(320, 640, 960, 1600, 2400))
+# Logos : transparence conservee, repli PNG.
+LOGO_VARIANTS = VariantSpec(widths=(160, 320), formats=("webp", "png"), quality=90)
+
+IMAGE_VARIANT_FIELDS = {
+    "news.News": {"image": PHOTO_VARIANTS},
+    "news.NewsImage": {"image": PHOTO_VARIANTS},
+    "news.MediaItem": {"image": GALLERY_VARIANTS},
+    "blog.Article": {"featured_image": PHOTO_VARIANTS},
+    "community.Topic": {"cover_image": PHOTO_VARIANTS},
+    "core.Partner": {"logo": LOGO_VARIANTS},
+}
+
+
+def variants_timeout():
+    return getattr(settings, "IMAGE_VARIANTS_CACHE_TIMEOUT", 86400)
+
+
+def get_variant_spec(model, field_name):
+    return IMAGE_VARIANT_FIELDS.get(model._meta.label, {}).get(field_name)
+
+
+@lru_cache(maxsize=1)
+def avif_supported():
+    try:
+        import pillow_avif  # noqa: F401 - greffon AVIF pour Pillow < 11.2
+    except ImportError:
+        pass
+    Image.init()
+    return "AVIF" in Image.SAVE
+
+
+def _source_digest(source_name):
+    return hashlib.md5(source_name.encode("utf-8")).hexdigest()
+
+
+def variants_tag(source_name):
+    return f"image-variants:{_source_digest(source_name)}"
+
+
+# ==========================================================
+# LECTURE
+# ==========================================================
+
+def get_image_variants(source_name):
+    """
+    {format: [(largeur, url), ...]} pour la source, largeurs croissantes ;
+    {} tant que rien n'a ete genere. Une lecture de cache par image.
+    """
+    from core.models import ImageVariant
+
+    def _build():
+        variants = {}
+        rows = ImageVariant.objects.filter(source_name=source_name).order_by("format", "width")
+        for row in rows:
+            variants.setdefault(row.format, []).append((row.width, row.file.url))
+        return variants
+
+    if not source_name:
+        return {}
+    return get_or_compute(
+        f"{VARIANTS_KEY_PREFIX}:{_source_digest(source_name)}",
+        _build,
+        timeout=variants_timeout(),
+        tags=[variants_tag(source_name)],
+        namespace="images:variants",
+    )
+
+
+def build_srcset(entries):
+    return ", ".join(f"{url} {width}w" for width, url in entries)
+
+
+def variants_for_field(field_file, *, schedule_missing=True):
+    """
+    Declinaisons du fichier ; si le champ est declare et qu'il n'en a pas
+    encore (nouvelle source), la generation est planifiee.
+    """
+    if not field_file:
+        return {}
+    variants = get_image_variants(field_file.name)
+    if not variants and schedule_missing:
+        instance = getattr(field_file, "instance", None)
+        field = getattr(field_file, "field", None)
+        if instance is not None and field is not None and get_variant_spec(type(instance), field.name):
+            schedule_image_variants(instance, field.name)
+    return variants
+
+
+# ==========================================================
+# GENERATION
+# ==========================================================
+
+def _prepare(image, target_format):
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    if target_format == "jpeg":
+        if has_alpha:
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image.convert("RGBA"), mask=image.convert("RGBA").split()[-1])
+            return background
+        return image.convert("RGB")
+    if has_alpha:
+        return image.convert("RGBA")
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def render_variants(source, spec):
+    """
+    Un decodage de la source, puis chaque largeur reduite depuis la
+    precedente (de la plus grande a la plus petite) et encodee dans chaque
+    format. Retourne [(format, largeur, hauteur, octets)].
+    """
+    formats = [name for name in spec.formats if name != "avif" or avif_supported()]
+    rendered = []
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        widths = sorted((width for width in spec.widths if width < img.width), reverse=True)
+        # Source plus etroite que la plus grande largeur : sa largeur native en tete.
+        if img.width <= max(spec.widths):
+            widths.insert(0, img.width)
+        current = img
+        for width in widths:
+            if current.width != width:
+                height = max(round(current.height * width / current.width), 1)
+                current = current.resize((width, height), Image.LANCZOS)
+            for name in formats:
+                pillow_format = FORMATS[name][0]
+                buffer = BytesIO()
+                options = {"quality": spec.quality}
+                if name in ("jpeg", "png"):
+                    options["optimize"] = True
+                if name == "jpeg":
+                    options["progressive"] = True
+                _prepare(current, name).save(buffer, format=pillow_format, **options)
+                rendered.append((name, current.width, current.height, buffer.getvalue()))
+    return rendered
+
+
+def generate_image_variants(field_file, spec):
+    """(Re)genere les declinaisons du fichier ; idempotent. Retourne leur nombre."""
+    from core.models import ImageVariant
+
+    source_name = field_file.name
+    try:
+        with field_file.open("rb") as source:
+            rendered = render_variants(source, spec)
+
+        root = os.path.splitext(os.path.basename(source_name))[0]
+        for variant in ImageVariant.objects.filter(source_name=source_name):
+            variant.file.delete(save=False)
+            variant.delete()
+
+        variants = []
+        for name, width, height, content in rendered:
+            variant = ImageVariant(source_name=source_name, width=width, height=height, format=name)
+            variant.file.save(f"{root}_{width}w.{FORMATS[name][1]}", ContentFile(content), save=False)
+            variants.append(variant)
+        ImageVariant.objects.bulk_create(variants)
+    finally:
+        cache.delete(f"{PENDING_KEY_PREFIX}:{_source_digest(source_name)}")
+    invalidate_tags(variants_tag(source_name))
+    return len(variants)
+
+
+def generate_variants_for(model_label, pk, field_name):
+    model = apps.get_model(model_label)
+    spec = get_variant_spec(model, field_name)
+    instance = model._default_manager.filter(pk=pk).first()
+    if spec is None or instance is None:
+        return 0
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return 0
+    return generate_image_variants(field_file, spec)
+
+
+def schedule_image_variants(instance, field_name):
+    """Planifie la generation apres commit ; une seule demande en vol par source."""
+    field_file = getattr(instance, field_name)
+    if not field_file or instance.pk is None:
+        return False
+    if not cache.add(f"{PENDING_KEY_PREFIX}:{_source_digest(field_file.name)}", 1, PENDING_TIMEOUT):
+        return False
+    run_after_commit(
+        generate_variants_for,
+        instance._meta.label,
+        instance.pk,
+        field_name,
+        pool=VARIANT_TASK_POOL,
+        name=f"image_variants:{instance._meta.label}:{instance.pk}:{field_name}",
+    )
+    return True
+
+
+# ==========================================================
+# DECLENCHEMENT
+# ==========================================================
+
+def _source_saved(sender, instance, update_fields=None, raw=False, **kwargs):
+    # Media encore brut (news.media_processing) : on attend sa version traitee.
+    if raw or getattr(instance, "is_processing", False):
+        return
+    for field_name in IMAGE_VARIANT_FIELDS.get(sender._meta.label, {}):
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        field_file = getattr(instance, field_name)
+        if field_file and not get_image_variants(field_file.name):
+            schedule_image_variants(instance, field_name)
+
+
+def connect_variant_signals():
+    for model_label in IMAGE_VARIANT_FIELDS:
+        post_save.connect(
+            _source_saved,
+            sender=apps.get_model(model_label),
+            dispatch_uid=f"image_variants:{model_label}",
+        )
@@ -0,0 +1,71 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from core.images.variants import IMAGE_VARIANT_FIELDS, generate_image_variants, get_image_variants
+from core.models import ImageVariant
+
+
+class Command(BaseCommand):
+    help = (
+        "Genere les declinaisons srcset des images existantes (champs declares "
+        "dans core.images.variants.IMAGE_VARIANT_FIELDS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            dest="models",
+            help="Limite a un modele (ex. news.News, option repetable).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenere aussi les images qui ont deja leurs declinaisons.",
+        )
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Supprime les declinaisons dont l'image source n'est plus referencee.",
+        )
+
+    def handle(self, *args, **options):
+        labels = options["models"] or list(IMAGE_VARIANT_FIELDS)
+        unknown = [label for label in labels if label not in IMAGE_VARIANT_FIELDS]
+        if unknown:
+            raise CommandError(f"Modele(s) sans declinaisons declarees : {', '.join(unknown)}")
+        if options["prune"] and options["models"]:
+            raise CommandError("--prune s'applique a tous les modeles : retirez --model.")
+
+        generes, ignores, echecs = 0, 0, 0
+        referenced = set()
+        for label in labels:
+            model = apps.get_model(label)
+            for field_name, spec in IMAGE_VARIANT_FIELDS[label].items():
+                queryset = model._default_manager.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True})
+                for instance in queryset.only("pk", field_name).iterator():
+                    field_file = getattr(instance, field_name)
+                    referenced.add(field_file.name)
+                    if not options["force"] and get_image_variants(field_file.name):
+                        ignores += 1
+                        continue
+                    try:
+                        count = generate_image_variants(field_file, spec)
+                    except Exception as exc:  # noqa: BLE001 - on continue avec les suivantes
+                        echecs += 1
+                        self.stdout.write(self.style.ERROR(f"  ! {label}#{instance.pk} {field_name} : {exc}"))
+                    else:
+                        generes += 1
+                        self.stdout.write(f"  + {label}#{instance.pk} {field_name} ({count} fichier(s))")
+
+        supprimes = 0
+        if options["prune"]:
+            for variant in ImageVariant.objects.exclude(source_name__in=referenced).iterator():
+                variant.file.delete(save=False)
+                variant.delete()
+                supprimes += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Declinaisons : {generes} image(s) traitee(s), {ignores} deja a jour, "
+            f"{echecs} echec(s), {supprimes} declinaison(s) orpheline(s) supprimee(s)."
+        ))
@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.cache import get_cache_metrics, reset_cache_metrics
+
+
+class Command(BaseCommand):
+    help = "Affiche les compteurs hit/miss du cache applicatif par espace de noms."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Remet les compteurs a zero apres affichage.")
+        parser.add_argument("--json", action="store_true", help="Affiche les compteurs au format JSON.")
+
+    def handle(self, *args, **options):
+        metrics = get_cache_metrics()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(metrics, indent=2))
+        elif not metrics:
+            self.stdout.write("Aucun compteur de cache enregistre.")
+        else:
+            for namespace, counters in metrics.items():
+                rate = counters["hit_rate"]
+                rate_label = f"{rate * 100:5.1f} %" if rate is not None else "    -"
+                self.stdout.write(
+                    f"  {namespace:<40} {counters['hits']:>8} hit(s) {counters['misses']:>8} miss  {rate_label}"
+                )
+
+        if options["reset"]:
+            reset_cache_metrics()
+            self.stdout.write(self.style.SUCCESS("Compteurs remis a zero."))
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.profiling import get_query_budget_report, reset_query_budget_report
+
+
+class Command(BaseCommand):
+    help = "Affiche le budget de requetes mesure par vue (QueryBudgetMiddleware)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Efface les echantillons apres affichage.")
+        parser.add_argument("--json", action="store_true", help="Affiche le rapport au format JSON.")
+
+    def handle(self, *args, **options):
+        report = get_query_budget_report()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        elif not report:
+            self.stdout.write("Aucun echantillon enregistre.")
+        else:
+            for row in report:
+                queries = row["queries"]
+                self.stdout.write(
+                    f"  {row['view']:<40} {row['samples']:>5} ech. "
+                    f"requetes p50 {queries['p50']:>4} p95 {queries['p95']:>4} max {queries['max']:>4}  "
+                    f"repetees max {row['duplicates']['max']:>4}  total p95 {row['total_ms']['p95']:>8} ms"
+                )
+                for fingerprint, count in row["top_duplicates"]:
+                    self.stdout.write(f"      {count:>4}x {fingerprint}")
+
+        if options["reset"]:
+            reset_query_budget_report()
+            self.stdout.write(self.style.SUCCESS("Echantillons effaces."))
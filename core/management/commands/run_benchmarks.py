@@ -0,0 +1,118 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmarks import (
+    DEFAULT_BASELINE_PATH,
+    SCALES,
+    SCENARIOS,
+    BenchmarkError,
+    build_synthetic_school,
+    compare_with_baseline,
+    load_baseline,
+    run_scenarios,
+    save_baseline,
+)
+from core.benchmarks.realtime import realtime_recipients, run_realtime_comparison
+from core.benchmarks.runner import DEFAULT_QUERY_TOLERANCE, DEFAULT_TIME_TOLERANCE, results_as_dict
+
+
+class Command(BaseCommand):
+    help = (
+        "Genere une ecole synthetique (dans une transaction annulee a la fin), mesure "
+        "requetes SQL et temps des dashboards/rapports lourds et echoue en cas de "
+        "regression par rapport a la reference enregistree."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="Taille de l'ecole synthetique.")
+        parser.add_argument(
+            "--only",
+            action="append",
+            dest="names",
+            choices=sorted(SCENARIOS),
+            help="Limite la mesure a un scenario (option repetable).",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Nombre de passages par scenario (meilleur temps retenu).")
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH), help="Fichier de reference JSON.")
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Enregistre les mesures comme nouvelle reference au lieu de comparer.",
+        )
+        parser.add_argument("--query-tolerance", type=float, default=DEFAULT_QUERY_TOLERANCE)
+        parser.add_argument("--time-tolerance", type=float, default=DEFAULT_TIME_TOLERANCE)
+        parser.add_argument("--no-time-check", action="store_true", help="Ne compare que le nombre de requetes.")
+        parser.add_argument("--json", action="store_true", help="Affiche les mesures au format JSON.")
+        parser.add_argument(
+            "--realtime",
+            action="store_true",
+            help="Compare aussi les modes de diffusion websocket (temps seul, hors reference).",
+        )
+
+    def handle(self, *args, **options):
+        scale_name = options["scale"]
+        # Client de test (ALLOWED_HOSTS "testserver"), e-mails en memoire.
+        try:
+            setup_test_environment()
+            owns_test_environment = True
+        except RuntimeError:
+            # Deja en place (commande appelee depuis la suite de tests).
+            owns_test_environment = False
+        try:
+            with transaction.atomic():
+                school = build_synthetic_school(SCALES[scale_name])
+                try:
+                    results = run_scenarios(school, names=options["names"], repeat=options["repeat"])
+                except BenchmarkError as exc:
+                    raise CommandError(str(exc)) from exc
+                finally:
+                    # Rien de ce qui a ete genere ne doit rester en base.
+                    transaction.set_rollback(True)
+        finally:
+            if owns_test_environment:
+                teardown_test_environment()
+
+        realtime_results = []
+        if options["realtime"]:
+            try:
+                realtime_results = run_realtime_comparison(
+                    realtime_recipients(SCALES[scale_name]), repeat=options["repeat"]
+                )
+            except BenchmarkError as exc:
+                raise CommandError(str(exc)) from exc
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results_as_dict(results + realtime_results), indent=2))
+        else:
+            for result in results:
+                self.stdout.write(f"  {result.name:<28} {result.queries:>5} requete(s)  {result.seconds * 1000:>9.1f} ms")
+            for result in realtime_results:
+                self.stdout.write(f"  {result.name:<28} {'-':>5}             {result.seconds * 1000:>9.1f} ms")
+
+        if options["update_baseline"]:
+            save_baseline(results, scale_name, options["baseline"])
+            self.stdout.write(self.style.SUCCESS(f"Reference '{scale_name}' mise a jour : {options['baseline']}"))
+            return
+
+        baseline = load_baseline(options["baseline"]).get(scale_name, {})
+        missing = [result.name for result in results if result.name not in baseline]
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f"Sans reference pour '{scale_name}' : {', '.join(missing)} (lancer avec --update-baseline)."
+            ))
+
+        regressions = compare_with_baseline(
+            results,
+            baseline,
+            query_tolerance=options["query_tolerance"],
+            time_tolerance=None if options["no_time_check"] else options["time_tolerance"],
+        )
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f"  ! {regression}"))
+            raise CommandError(f"{len(regressions)} regression(s) de performance detectee(s).")
+
+        self.stdout.write(self.style.SUCCESS("Aucune regression par rapport a la reference."))
@@ -1,5 +1,11 @@
+from django.conf import settings
 from django.http import Http404
 import logging
+import random
+import time
+
+from core.fragments import invalidate_triggered_fragments
+from core.profiling import profile_block, profiling_enabled, record_view_profile, sample_rate
 
 logger = logging.getLogger(__name__)
 
@@ -41,4 +47,41 @@ class SecurityShieldMiddleware:
                     raise Http404()
 
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
+
+
+class FragmentInvalidationMiddleware:
+    """Purge les fragments HTMX abonnes aux evenements HX-Trigger de la reponse (core/fragments.py)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        invalidate_triggered_fragments(response)
+        return response
+
+
+class QueryBudgetMiddleware:
+    """Echantillonne requetes SQL, gabarits et cache par vue (core/profiling.py)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling_enabled() or random.random() >= sample_rate():
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with profile_block() as profile:
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            record_view_profile(match.view_name or match._func_path, profile, duration)
+
+        user = getattr(request, "user", None)
+        if settings.DEBUG or (user is not None and user.is_staff):
+            response["Server-Timing"] = profile.server_timing(duration)
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_alter_siteconfiguration_home_hero_title'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(db_index=True, max_length=255)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('format', models.CharField(max_length=10)),
+                ('file', models.FileField(max_length=255, upload_to='variants/%Y/%m/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': "Déclinaison d'image",
+                'verbose_name_plural': "Déclinaisons d'images",
+                'ordering': ['source_name', 'format', 'width'],
+                'constraints': [models.UniqueConstraint(fields=('source_name', 'format', 'width'), name='core_image_variant_unique')],
+            },
+        ),
+    ]
@@ -971,3 +971,36 @@ class StatusHistory(models.Model):
 
     def __str__(self):
         return f"{self.candidature.full_name}: {self.old_status} -> {self.new_status}"
+
+
+# ==========================================================
+# DECLINAISONS D'IMAGES (SRCSET)
+# ==========================================================
+
+class ImageVariant(models.Model):
+    """
+    Declinaison (largeur, format) d'une image televersee, generee en
+    arriere-plan par core.images.variants. Rattachee au chemin du fichier
+    source : une nouvelle image n'a pas encore de declinaisons.
+    """
+    source_name = models.CharField(max_length=255, db_index=True)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    format = models.CharField(max_length=10)
+    file = models.FileField(upload_to="variants/%Y/%m/", max_length=255)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["source_name", "format", "width"]
+        verbose_name = "Déclinaison d'image"
+        verbose_name_plural = "Déclinaisons d'images"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source_name", "format", "width"],
+                name="core_image_variant_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source_name} ({self.format}, {self.width}w)"
@@ -0,0 +1,247 @@
+"""
+Cache de pages publiques pour les visiteurs anonymes.
+
+Les pages vitrine (accueil, a propos, formations, actualites, plan du
+site) sont servies presque uniquement a des anonymes, surtout pendant les
+campagnes d'admission. @public_page_cache("home") met en cache la reponse
+HTML complete, par chemin + parametres de requete (tries) et par variante
+HTMX (HX-Request / HX-Target) : un fragment n'ecrase jamais la page.
+
+Purge : PUBLIC_PAGE_DEPENDENCIES declare les modeles qui alimentent chaque
+page ; un post_save / post_delete sur l'un d'eux invalide le tag de la
+page (core.cache). Les modeles de la mise en page commune (configuration
+du site, menu des formations...) invalident toutes les pages. Les donnees
+volatiles non declarees (membres actifs sur 30 jours de l'accueil)
+suivent PUBLIC_PAGE_CACHE_TIMEOUT.
+
+Ne sont jamais mises en cache : les requetes authentifiees ou portant une
+session / des messages, les reponses autres que 200, celles qui posent un
+cookie ou qui ont deja consomme un jeton CSRF reel. Le jeton CSRF des
+gabarits est rendu sous forme de marqueur (context processor
+public_page_csrf) puis remplace a chaque service par un jeton propre au
+visiteur. Le consentement cookies est applique cote navigateur
+(cookie_consent.js) : le HTML en cache n'en depend pas.
+
+Taux de succes : espace de noms "public-pages" de get_cache_metrics()
+(commande cache_stats).
+"""
+
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from core.cache import invalidate_tags, record_cache_access, tagged_key
+
+PAGE_KEY_PREFIX = "public-page:v1"
+METRICS_NAMESPACE = "public-pages"
+ALL_PAGES_TAG = "public-pages"
+CSRF_PLACEHOLDER = "__PUBLIC_PAGE_CSRF_TOKEN__"
+MAX_QUERY_LENGTH = 256
+
+# Mise en page commune (navbar, pied de page, SEO) : toutes les pages.
+LAYOUT_DEPENDENCIES = (
+    "core.Institution",
+    "core.SiteConfiguration",
+    "formations.Cycle",
+    "formations.Programme",
+    "branches.Branch",
+    "news.Category",
+    "blog.Category",
+)
+
+PUBLIC_PAGE_DEPENDENCIES = {
+    "home": (
+        "core.InstitutionPresentation",
+        "core.InstitutionStat",
+        "core.Value",
+        "core.Partner",
+        "core.Testimonial",
+        "news.News",
+        "news.ResultSession",
+        "news.Event",
+        "news.MediaItem",
+        "blog.Article",
+    ),
+    "about": (
+        "core.InstitutionPresentation",
+        "core.InstitutionStat",
+        "core.Value",
+        "core.Infrastructure",
+        "core.Staff",
+        "core.Partner",
+        "core.Testimonial",
+    ),
+    "formations": (
+        "formations.Diploma",
+        "formations.Filiere",
+        "formations.ProgrammeYear",
+        "formations.Fee",
+        "formations.ProgrammeQuickFact",
+        "formations.ProgrammeTab",
+        "formations.ProgrammeSection",
+        "formations.CompetenceBlock",
+        "formations.CompetenceItem",
+        "formations.RequiredDocument",
+        "formations.ProgrammeRequiredDocument",
+        "core.Testimonial",
+    ),
+    "news": (
+        "news.News",
+        "news.Program",
+    ),
+    "sitemap": (
+        "news.News",
+        "news.ResultSession",
+    ),
+}
+
+
+def page_cache_enabled():
+    return getattr(settings, "PUBLIC_PAGE_CACHE_ENABLED", True)
+
+
+def page_cache_timeout():
+    return getattr(settings, "PUBLIC_PAGE_CACHE_TIMEOUT", 300)
+
+
+def page_tag(page):
+    return f"public-page:{page}"
+
+
+# ==========================================================
+# CLE ET ELIGIBILITE
+# ==========================================================
+
+def _is_cacheable_request(request):
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Session ou messages flash en attente : la page peut differer.
+    if settings.SESSION_COOKIE_NAME in request.COOKIES or "messages" in request.COOKIES:
+        return False
+    return len(request.META.get("QUERY_STRING", "")) <= MAX_QUERY_LENGTH
+
+
+def _page_key(page, request):
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    variant = "page"
+    if request.headers.get("HX-Request"):
+        variant = "|".join((
+            "hx",
+            request.headers.get("HX-Target", ""),
+            "boosted" if request.headers.get("HX-Boosted") else "",
+        ))
+    raw = f"{request.path}?{query}|{variant}"
+    return f"{PAGE_KEY_PREFIX}:{page}:{hashlib.md5(raw.encode('utf-8')).hexdigest()}"
+
+
+def _is_cacheable_response(request, response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    if "private" in response.get("Cache-Control", "") or "no-store" in response.get("Cache-Control", ""):
+        return False
+    # Un get_token() reel (hors marqueur) a ete appele : jeton propre a ce visiteur.
+    return not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+
+
+# ==========================================================
+# SERVICE
+# ==========================================================
+
+def _with_csrf_token(request, response):
+    if response.streaming:
+        return response
+    placeholder = CSRF_PLACEHOLDER.encode("ascii")
+    if placeholder in response.content:
+        response.content = response.content.replace(placeholder, get_token(request).encode("ascii"))
+    return response
+
+
+def _response_from_entry(entry):
+    response = HttpResponse(entry["content"], status=entry["status"])
+    for header, value in entry["headers"].items():
+        response[header] = value
+    return response
+
+
+def public_page_cache(page):
+    """Met en cache la page pour les anonymes ; purge via PUBLIC_PAGE_DEPENDENCIES[page]."""
+
+    if page not in PUBLIC_PAGE_DEPENDENCIES:
+        raise ValueError(f"Page publique non declaree : {page}")
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not page_cache_enabled() or not _is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+
+            key = tagged_key(_page_key(page, request), [ALL_PAGES_TAG, page_tag(page)])
+            entry = cache.get(key)
+            if entry is not None:
+                record_cache_access(METRICS_NAMESPACE, hit=True)
+                response = _response_from_entry(entry)
+                response["X-Page-Cache"] = "hit"
+                return _with_csrf_token(request, response)
+
+            record_cache_access(METRICS_NAMESPACE, hit=False)
+            request.public_page_cache = True
+            response = view(request, *args, **kwargs)
+            if hasattr(response, "render") and callable(response.render):
+                response = response.render()
+            if _is_cacheable_response(request, response):
+                headers = {
+                    header: response[header]
+                    for header in ("Content-Type", "Content-Language", "Vary")
+                    if header in response
+                }
+                cache.set(
+                    key,
+                    {"content": response.content, "status": response.status_code, "headers": headers},
+                    page_cache_timeout(),
+                )
+                response["X-Page-Cache"] = "miss"
+            return _with_csrf_token(request, response)
+
+        return wrapper
+
+    return decorator
+
+
+# ==========================================================
+# PURGE
+# ==========================================================
+
+def purge_public_pages(*pages):
+    """Purge les pages donnees, ou toutes les pages sans argument."""
+    invalidate_tags(*([page_tag(page) for page in pages] or [ALL_PAGES_TAG]))
+
+
+def _model_tags():
+    tags = {}
+    for label in LAYOUT_DEPENDENCIES:
+        tags.setdefault(label, set()).add(ALL_PAGES_TAG)
+    for page, labels in PUBLIC_PAGE_DEPENDENCIES.items():
+        for label in labels:
+            tags.setdefault(label, set()).add(page_tag(page))
+    return tags
+
+
+def connect_page_cache_signals():
+    for label, tags in _model_tags().items():
+        tags = sorted(tags)
+
+        def _purge(sender, tags=tags, **kwargs):
+            invalidate_tags(*tags)
+
+        model = apps.get_model(label)
+        post_save.connect(_purge, sender=model, weak=False, dispatch_uid=f"public_page_cache:save:{label}")
+        post_delete.connect(_purge, sender=model, weak=False, dispatch_uid=f"public_page_cache:delete:{label}")
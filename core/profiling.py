@@ -0,0 +1,281 @@
+"""
+Budget de requetes par vue (instrumentation des requetes HTTP).
+
+QueryBudgetMiddleware (active par QUERY_BUDGET_ENABLED, echantillonne par
+QUERY_BUDGET_SAMPLE_RATE) mesure pour chaque requete :
+
+- le nombre de requetes SQL et leur duree cumulee (execute_wrapper pose
+  sur chaque connexion le temps de la requete) ;
+- les empreintes SQL repetees (litteraux remplaces par "?") : une meme
+  empreinte executee plusieurs fois signale le plus souvent un N+1 ;
+- le temps de rendu des gabarits (rendu de plus haut niveau uniquement) ;
+- les hits / miss de core.cache (record_cache_access).
+
+Les mesures sont agregees par nom d'URL dans le cache partage, sur une
+fenetre glissante des QUERY_BUDGET_WINDOW derniers echantillons. Le
+rapport (p50 / p95 / max, empreintes les plus repetees) est servi aux
+membres du staff par core:query_budget_report et par la commande
+query_budget_report. Au-dela de QUERY_BUDGET_DUPLICATE_THRESHOLD
+requetes repetees, un avertissement est journalise.
+
+Dans les tests, query_budget() borne les requetes d'un bloc :
+
+    with query_budget(12, max_duplicates=0):
+        self.client.get(url)
+
+et leve AssertionError (unittest comme pytest) en listant les empreintes
+repetees.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+STORE_PREFIX = "query-budget:view:"
+STORE_INDEX_KEY = "query-budget:views"
+STORE_TIMEOUT = 7 * 24 * 3600
+MAX_FINGERPRINT_LENGTH = 300
+TOP_DUPLICATES = 5
+
+_active_profiles = ContextVar("query_budget_profiles", default=())
+_rendering_template = ContextVar("query_budget_rendering", default=False)
+_template_timing_installed = False
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def profiling_enabled():
+    return getattr(settings, "QUERY_BUDGET_ENABLED", False)
+
+
+def sample_rate():
+    return getattr(settings, "QUERY_BUDGET_SAMPLE_RATE", 1.0)
+
+
+def store_window():
+    return getattr(settings, "QUERY_BUDGET_WINDOW", 200)
+
+
+def duplicate_threshold():
+    return getattr(settings, "QUERY_BUDGET_DUPLICATE_THRESHOLD", 10)
+
+
+def fingerprint_sql(sql):
+    """Empreinte d'une requete : litteraux et listes IN (...) normalises."""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()[:MAX_FINGERPRINT_LENGTH]
+
+
+# ==========================================================
+# MESURE
+# ==========================================================
+
+@dataclass
+class RequestProfile:
+    query_count: int = 0
+    db_time: float = 0.0
+    template_time: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    fingerprints: Counter = field(default_factory=Counter)
+
+    @property
+    def duplicate_count(self):
+        """Executions en trop : chaque empreinte au-dela de sa premiere execution."""
+        return sum(count - 1 for count in self.fingerprints.values() if count > 1)
+
+    def top_duplicates(self, limit=TOP_DUPLICATES):
+        return [
+            (fingerprint, count)
+            for fingerprint, count in self.fingerprints.most_common(limit)
+            if count > 1
+        ]
+
+    def as_sample(self, duration):
+        return {
+            "queries": self.query_count,
+            "duplicates": self.duplicate_count,
+            "db_ms": round(self.db_time * 1000, 2),
+            "template_ms": round(self.template_time * 1000, 2),
+            "total_ms": round(duration * 1000, 2),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "top_duplicates": self.top_duplicates(),
+        }
+
+    def server_timing(self, duration):
+        return ", ".join((
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.query_count} requetes"',
+            f"tpl;dur={self.template_time * 1000:.1f}",
+            f"total;dur={duration * 1000:.1f}",
+        ))
+
+
+def _record_query(profile, execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.db_time += time.perf_counter() - started
+        profile.query_count += 1
+        profile.fingerprints[fingerprint_sql(sql)] += 1
+
+
+def _install_template_timing():
+    """Chronometre Template.render du backend Django (une seule fois par processus)."""
+    global _template_timing_installed
+    if _template_timing_installed:
+        return
+    from django.template.backends.django import Template
+
+    original_render = Template.render
+
+    def render(self, context=None, request=None):
+        profiles = _active_profiles.get()
+        if not profiles or _rendering_template.get():
+            # Gabarit rendu depuis un autre gabarit : deja compte par le parent.
+            return original_render(self, context, request)
+        token = _rendering_template.set(True)
+        started = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            elapsed = time.perf_counter() - started
+            _rendering_template.reset(token)
+            for profile in profiles:
+                profile.template_time += elapsed
+
+    Template.render = render
+    _template_timing_installed = True
+
+
+def note_cache_access(hit):
+    """Appele par core.cache.record_cache_access pour les mesures en cours."""
+    for profile in _active_profiles.get():
+        if hit:
+            profile.cache_hits += 1
+        else:
+            profile.cache_misses += 1
+
+
+@contextmanager
+def profile_block():
+    """Mesure le bloc (requetes, gabarits, cache) ; les mesures peuvent s'imbriquer."""
+    profile = RequestProfile()
+    _install_template_timing()
+    token = _active_profiles.set(_active_profiles.get() + (profile,))
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(partial(_record_query, profile)))
+            yield profile
+    finally:
+        _active_profiles.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries, *, max_duplicates=None):
+    """Echoue (AssertionError) si le bloc depasse le budget de requetes ou de doublons."""
+    with profile_block() as profile:
+        yield profile
+
+    problems = []
+    if profile.query_count > max_queries:
+        problems.append(f"{profile.query_count} requetes pour un budget de {max_queries}")
+    if max_duplicates is not None and profile.duplicate_count > max_duplicates:
+        problems.append(f"{profile.duplicate_count} requetes repetees (maximum {max_duplicates})")
+    if problems:
+        details = "".join(
+            f"\n  {count}x {fingerprint}" for fingerprint, count in profile.top_duplicates()
+        )
+        raise AssertionError("Budget de requetes depasse : " + " ; ".join(problems) + details)
+
+
+# ==========================================================
+# AGREGATION PAR VUE
+# ==========================================================
+
+def record_view_profile(view_name, profile, duration):
+    sample = profile.as_sample(duration)
+    if profile.duplicate_count >= duplicate_threshold():
+        logger.warning(
+            "Requetes repetees sur %s (%s en trop) : %s",
+            view_name, profile.duplicate_count, profile.top_duplicates(1),
+        )
+    try:
+        # Lecture-ecriture non atomique : un echantillon perdu sous forte
+        # concurrence ne fausse pas les percentiles.
+        key = f"{STORE_PREFIX}{view_name}"
+        samples = cache.get(key) or []
+        samples.append(sample)
+        cache.set(key, samples[-store_window():], STORE_TIMEOUT)
+        views = cache.get(STORE_INDEX_KEY) or set()
+        if view_name not in views:
+            cache.set(STORE_INDEX_KEY, set(views) | {view_name}, STORE_TIMEOUT)
+    except Exception:
+        logger.warning("Echantillon de requetes non enregistre (%s)", view_name, exc_info=True)
+
+
+def _percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(ratio * (len(ordered) - 1))))]
+
+
+def _summary(values):
+    return {
+        "p50": _percentile(values, 0.5),
+        "p95": _percentile(values, 0.95),
+        "max": max(values),
+    }
+
+
+def get_query_budget_report():
+    """Une ligne par vue, les plus gourmandes (p95 des requetes) en tete."""
+    views = sorted(cache.get(STORE_INDEX_KEY) or [])
+    stored = cache.get_many([f"{STORE_PREFIX}{view_name}" for view_name in views])
+    report = []
+    for view_name in views:
+        samples = stored.get(f"{STORE_PREFIX}{view_name}")
+        if not samples:
+            continue
+        duplicates = Counter()
+        for sample in samples:
+            for fingerprint, count in sample["top_duplicates"]:
+                duplicates[fingerprint] = max(duplicates[fingerprint], count)
+        hits = sum(sample["cache_hits"] for sample in samples)
+        lookups = hits + sum(sample["cache_misses"] for sample in samples)
+        report.append({
+            "view": view_name,
+            "samples": len(samples),
+            "queries": _summary([sample["queries"] for sample in samples]),
+            "duplicates": _summary([sample["duplicates"] for sample in samples]),
+            "db_ms": _summary([sample["db_ms"] for sample in samples]),
+            "template_ms": _summary([sample["template_ms"] for sample in samples]),
+            "total_ms": _summary([sample["total_ms"] for sample in samples]),
+            "cache_hit_rate": round(hits / lookups, 4) if lookups else None,
+            "top_duplicates": duplicates.most_common(TOP_DUPLICATES),
+        })
+    report.sort(key=lambda row: (-row["queries"]["p95"], row["view"]))
+    return report
+
+
+def reset_query_budget_report():
+    views = cache.get(STORE_INDEX_KEY) or []
+    cache.delete_many([f"{STORE_PREFIX}{view_name}" for view_name in views] + [STORE_INDEX_KEY])
@@ -0,0 +1,61 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from core.images.variants import FORMATS, build_srcset, get_variant_spec, variants_for_field
+
+register = template.Library()
+
+
+def _fallback_format(field_file, variants):
+    instance = getattr(field_file, "instance", None)
+    field = getattr(field_file, "field", None)
+    spec = get_variant_spec(type(instance), field.name) if instance is not None and field is not None else None
+    if spec and spec.fallback_format in variants:
+        return spec.fallback_format
+    return next((name for name in ("jpeg", "png", "webp") if name in variants), None)
+
+
+@register.simple_tag
+def srcset(field_file, image_format="webp"):
+    """srcset d'un format : {% srcset article.featured_image "webp" %} ("" tant que rien n'est genere)."""
+    return build_srcset(variants_for_field(field_file).get(image_format, []))
+
+
+@register.simple_tag
+def responsive_image(field_file, alt="", sizes="100vw", **attrs):
+    """
+    <picture> avec une <source> par format moderne et une <img> de repli :
+
+        {% responsive_image news.image alt=news.titre sizes="(min-width: 768px) 50vw, 100vw" class="..." %}
+
+    Sans declinaisons (image recente), sert l'original et planifie leur generation.
+    """
+    if not field_file:
+        return ""
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+    variants = variants_for_field(field_file)
+    fallback = _fallback_format(field_file, variants)
+    if not fallback:
+        return format_html('<img src="{}" alt="{}"{}>', field_file.url, alt, flatatt(attrs))
+
+    fallback_entries = variants[fallback]
+    sources = format_html_join(
+        "",
+        '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (FORMATS[name][2], build_srcset(entries), sizes)
+            for name, entries in sorted(variants.items(), key=lambda item: list(FORMATS).index(item[0]))
+            if name != fallback
+        ),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}"{}></picture>',
+        sources,
+        fallback_entries[-1][1],
+        build_srcset(fallback_entries),
+        sizes,
+        alt,
+        flatatt(attrs),
+    )
@@ -0,0 +1,37 @@
+"""
+Lanceur de tests du projet (TEST_RUNNER).
+
+Les reglages propres aux tests sont appliques ici plutot que devines dans
+config/settings.py : ils valent quel que soit le module de settings ou le
+lanceur qui l'appelle. config/settings_test_local.py reprend les memes
+valeurs pour pytest et --settings.
+"""
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_SETTINGS = {
+    # Pas de Redis partage entre executions de tests.
+    "CACHES": {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "esfe-tests",
+        }
+    },
+    # Les threads ne verraient pas les donnees non commitees des TestCase.
+    "BACKGROUND_TASKS_EAGER": True,
+    # Un rollback de TestCase n'emet pas les signaux de purge.
+    "PUBLIC_PAGE_CACHE_ENABLED": False,
+    "HTMX_FRAGMENT_CACHE_ENABLED": False,
+}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_settings = override_settings(**TEST_SETTINGS)
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,8 +1,26 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
 from django.urls import reverse
-from unittest.mock import patch
+from PIL import Image
+from unittest.mock import Mock, patch
 
-from core.models import ContactMessage, LegalPage, LegalSection
+from core.benchmarks import SCALES, SCENARIOS, ScenarioResult, build_synthetic_school, compare_with_baseline, load_baseline, run_scenarios
+from core.benchmarks.realtime import MODES, run_realtime_comparison
+from core.cache import get_cache_metrics, get_or_compute, invalidate_tag, reset_cache_metrics, tagged_key
+from core.fragments import triggered_events
+from core.images.variants import get_image_variants
+from core.models import ContactMessage, ImageVariant, LegalPage, LegalSection, Partner, Value
+from core.page_cache import CSRF_PLACEHOLDER
+from core.profiling import fingerprint_sql, get_query_budget_report, query_budget
 
 
 class LegalPagesTests(TestCase):
@@ -98,3 +116,199 @@ class ContactFormTests(TestCase):
 		self.assertContains(response, "Votre message a bien ete transmis", html=False)
 		self.assertEqual(mock_send.call_count, 2)
 
+
+class BenchmarkSuiteTests(TestCase):
+	def test_compare_with_baseline_flags_query_and_time_regressions(self):
+		baseline = {
+			"dg_dashboard": {"queries": 100, "seconds": 0.2},
+			"annual_class_report": {"queries": 20, "seconds": 0.1},
+		}
+		results = [
+			ScenarioResult(name="dg_dashboard", queries=104, seconds=0.5),
+			ScenarioResult(name="annual_class_report", queries=30, seconds=0.1),
+			ScenarioResult(name="teacher_dashboard", queries=999, seconds=9.0),
+		]
+
+		regressions = compare_with_baseline(results, baseline, query_tolerance=0.05, time_tolerance=0.5)
+
+		self.assertEqual(
+			{(regression.name, regression.metric) for regression in regressions},
+			{("dg_dashboard", "seconds"), ("annual_class_report", "queries")},
+		)
+		self.assertEqual(compare_with_baseline(results[:1], baseline, time_tolerance=None), [])
+
+	def test_tiny_synthetic_school_stays_within_query_baseline(self):
+		baseline = load_baseline().get("tiny", {})
+		self.assertEqual(set(baseline), set(SCENARIOS), "Reference 'tiny' incomplete : run_benchmarks --scale tiny --update-baseline")
+		school = build_synthetic_school(SCALES["tiny"])
+
+		self.assertEqual(school.main_class.enrollments.count(), SCALES["tiny"].students_per_class)
+		cache.clear()
+		results = run_scenarios(school, repeat=1)
+
+		self.assertEqual([result.name for result in results], list(SCENARIOS))
+		self.assertEqual([str(regression) for regression in compare_with_baseline(results, baseline, time_tolerance=None)], [])
+
+	def test_realtime_comparison_runs_outside_query_scenarios(self):
+		self.assertFalse(set(MODES) & set(SCENARIOS))
+
+		results = run_realtime_comparison(20, repeat=1)
+
+		self.assertEqual([result.name for result in results], list(MODES))
+		self.assertEqual({result.queries for result in results}, {0})
+
+
+class CacheLayerTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		reset_cache_metrics()
+
+	def test_get_or_compute_counts_hits_and_follows_tag_versions(self):
+		builder = Mock(side_effect=["v1", "v2"])
+
+		self.assertEqual(get_or_compute("block", builder, tags=["branch:3"], namespace="tests"), "v1")
+		self.assertEqual(get_or_compute("block", builder, tags=["branch:3"], namespace="tests"), "v1")
+		invalidate_tag("branch:3")
+		self.assertEqual(get_or_compute("block", builder, tags=["branch:3"], namespace="tests"), "v2")
+
+		self.assertEqual(builder.call_count, 2)
+		self.assertEqual(get_cache_metrics()["tests"], {"hits": 1, "misses": 2, "hit_rate": 0.3333})
+
+	def test_get_or_compute_waits_for_the_lock_holder(self):
+		key = tagged_key("slow-block", [])
+		cache.set(f"lock:{key}", "other-process", 30)
+		builder = Mock(return_value="fresh")
+
+		with patch("core.cache.time.sleep", side_effect=lambda _seconds: cache.set(key, "from-holder")):
+			value = get_or_compute("slow-block", builder)
+
+		self.assertEqual(value, "from-holder")
+		builder.assert_not_called()
+
+
+class ImageVariantTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+		settings_override = override_settings(MEDIA_ROOT=self.media_root, BACKGROUND_TASKS_EAGER=True)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+
+	def _logo(self, width=400):
+		buffer = BytesIO()
+		Image.new("RGBA", (width, 200), (10, 80, 160, 128)).save(buffer, format="PNG")
+		return SimpleUploadedFile("logo.png", buffer.getvalue(), content_type="image/png")
+
+	def test_variants_are_generated_after_commit_for_declared_fields(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			partner = Partner.objects.create(name="Ministere", logo=self._logo())
+
+		variants = get_image_variants(partner.logo.name)
+		self.assertEqual(sorted(variants), ["png", "webp"])
+		self.assertEqual([width for width, _url in variants["webp"]], [160, 320])
+		self.assertEqual(ImageVariant.objects.filter(source_name=partner.logo.name).count(), 4)
+
+	def test_responsive_image_tag_falls_back_then_emits_srcset(self):
+		with self.captureOnCommitCallbacks(execute=False):
+			partner = Partner.objects.create(name="Ministere", logo=self._logo(width=240))
+		# Demande initiale perdue (processus redemarre, marqueur expire).
+		cache.clear()
+		template = Template('{% load image_variants %}{% responsive_image partner.logo alt=partner.name sizes="160px" %}')
+
+		with self.captureOnCommitCallbacks(execute=True):
+			first = template.render(Context({"partner": partner}))
+		second = template.render(Context({"partner": partner}))
+
+		self.assertNotIn("<picture>", first)
+		self.assertIn(partner.logo.url, first)
+		self.assertIn('<source type="image/webp"', second)
+		self.assertIn("160w", second)
+		self.assertIn("240w", second)
+
+
+@override_settings(PUBLIC_PAGE_CACHE_ENABLED=True)
+class PublicPageCacheTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		reset_cache_metrics()
+
+	def test_anonymous_page_is_served_from_cache_until_a_dependency_changes(self):
+		first = self.client.get(reverse("core:home"))
+		second = self.client.get(reverse("core:home"))
+
+		self.assertEqual(first["X-Page-Cache"], "miss")
+		self.assertEqual(second["X-Page-Cache"], "hit")
+		self.assertNotIn(CSRF_PLACEHOLDER.encode(), second.content)
+		self.assertEqual(get_cache_metrics(["public-pages"])["public-pages"]["hits"], 1)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			Value.objects.create(title="Excellence", description="Rigueur")
+		third = self.client.get(reverse("core:home"))
+
+		self.assertEqual(third["X-Page-Cache"], "miss")
+
+	def test_htmx_fragment_and_full_page_have_distinct_entries(self):
+		self.client.get(reverse("formations:list"))
+		fragment = self.client.get(reverse("formations:list"), HTTP_HX_REQUEST="true")
+
+		self.assertEqual(fragment["X-Page-Cache"], "miss")
+
+	def test_authenticated_requests_bypass_the_cache(self):
+		user = get_user_model().objects.create_user(username="visiteur", password="secret1234")
+		self.client.force_login(user)
+
+		response = self.client.get(reverse("core:sitemap"))
+
+		self.assertNotIn("X-Page-Cache", response)
+
+
+class QueryBudgetTests(TestCase):
+	def setUp(self):
+		cache.clear()
+
+	def test_fingerprint_normalizes_literals_and_in_lists(self):
+		self.assertEqual(
+			fingerprint_sql("SELECT *  FROM t WHERE id = 12 AND name = 'x' AND k IN (%s, %s, %s)"),
+			"SELECT * FROM t WHERE id = ? AND name = ? AND k IN (...)",
+		)
+
+	def test_query_budget_reports_repeated_fingerprints(self):
+		values = [Value.objects.create(title=f"Valeur {index}", description="Rigueur") for index in range(3)]
+
+		with query_budget(1, max_duplicates=0):
+			list(Value.objects.filter(pk__in=[value.pk for value in values]))
+
+		with self.assertRaisesRegex(AssertionError, "3x SELECT"):
+			with query_budget(5, max_duplicates=0):
+				for value in values:
+					Value.objects.get(pk=value.pk)
+
+	@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_SAMPLE_RATE=1.0, PUBLIC_PAGE_CACHE_ENABLED=False)
+	def test_middleware_aggregates_samples_per_view_for_the_staff_report(self):
+		self.client.get(reverse("core:home"))
+		response = self.client.get(reverse("core:home"))
+
+		self.assertNotIn("Server-Timing", response)
+		row = next(row for row in get_query_budget_report() if row["view"] == "core:home")
+		self.assertEqual(row["samples"], 2)
+		self.assertGreater(row["queries"]["max"], 0)
+
+		report_url = reverse("core:query_budget_report")
+		self.assertEqual(self.client.get(report_url).status_code, 302)
+		staff = get_user_model().objects.create_user(username="equipe", password="secret1234", is_staff=True)
+		self.client.force_login(staff)
+		report = self.client.get(report_url)
+
+		self.assertContains(report, "core:home")
+		self.assertIn("Server-Timing", report)
+
+
+class HtmxFragmentTests(TestCase):
+	def test_triggered_events_reads_json_and_comma_separated_headers(self):
+		response = HttpResponse()
+		response["HX-Trigger"] = "paymentUpdated, cashBalanceUpdated"
+		response["HX-Trigger-After-Settle"] = json.dumps({"showToast": {"message": "ok"}})
+
+		self.assertEqual(triggered_events(response), {"paymentUpdated", "cashBalanceUpdated", "showToast"})
+		self.assertEqual(triggered_events(HttpResponse()), set())
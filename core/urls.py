@@ -3,6 +3,7 @@
 from django.conf import settings
 from django.urls import path
 from . import views
+from . import views_profiling
 
 
 app_name = "core"
@@ -40,6 +41,7 @@ urlpatterns = [
     # INTERNAL / SUPERADMIN
     # =====================================================
 
+    path("interne/budget-requetes/", views_profiling.query_budget_report, name="query_budget_report"),
 
 ]
 
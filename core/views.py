@@ -42,6 +42,7 @@ from .models import (
 )
 
 from .forms import ContactForm
+from .page_cache import public_page_cache
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -130,6 +131,7 @@ def _clean_links(raw_links):
     return [item for item in raw_links if item]
 
 
+@public_page_cache("sitemap")
 def sitemap(request):
     sitemap_sections = [
         {
@@ -247,6 +249,7 @@ def set_cookie_preferences(request):
 # ABOUT
 # ==========================================================
 
+@public_page_cache("about")
 def about(request):
     institution = Institution.objects.filter(is_active=True).first()
     presentation = InstitutionPresentation.objects.first()
@@ -323,6 +326,7 @@ def about(request):
 # HOME
 # ==========================================================
 
+@public_page_cache("home")
 def home(request):
     institution = Institution.objects.filter(is_active=True).first()
     presentation = InstitutionPresentation.objects.first()
@@ -0,0 +1,31 @@
+# core/views_profiling.py
+"""
+Rapport du budget de requetes par vue (core/profiling.py), reserve au staff.
+"""
+
+from django.contrib.auth.decorators import user_passes_test
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_http_methods
+
+from .profiling import (
+    duplicate_threshold,
+    get_query_budget_report,
+    profiling_enabled,
+    reset_query_budget_report,
+    sample_rate,
+)
+
+
+@user_passes_test(lambda user: user.is_staff)
+@require_http_methods(["GET", "POST"])
+def query_budget_report(request):
+    if request.method == "POST":
+        reset_query_budget_report()
+        return redirect("core:query_budget_report")
+
+    return render(request, "core/query_budget_report.html", {
+        "report": get_query_budget_report(),
+        "profiling_enabled": profiling_enabled(),
+        "sample_rate": sample_rate(),
+        "duplicate_threshold": duplicate_threshold(),
+    })
@@ -4,6 +4,7 @@ from django.core.paginator import Paginator
 from django_htmx.middleware import HtmxDetails
 from branches.models import Branch
 from core.models import Testimonial
+from core.page_cache import public_page_cache
 
 from .models import (
     Programme,
@@ -15,6 +16,7 @@ from .models import (
 # ==================================================
 # LISTE DES FORMATIONS (HTMX + PAGE COMPLETE)
 # ==================================================
+@public_page_cache("formations")
 def formation_list(request):
     # Récupération des paramètres
     cycle_slug = request.GET.get("cycle") or None
@@ -91,6 +93,7 @@ import json  # ← AJOUTE EN HAUT DU FICHIER
 # ==================================================
 # DÉTAIL D'UNE FORMATION
 # ==================================================
+@public_page_cache("formations")
 def formation_detail(request, slug):
     programme = get_object_or_404(
         Programme.objects
@@ -218,16 +218,17 @@ class Inscription(models.Model):
         )
 
         self.amount_paid = total_paid
-
-        if total_paid == 0:
-            self.status = self.STATUS_AWAITING_PAYMENT
-        elif total_paid < self.amount_due:
-            self.status = self.STATUS_PARTIAL
-        else:
-            self.status = self.STATUS_ACTIVE
+        self.status = self.financial_status_for(total_paid)
 
         self.save(update_fields=["amount_paid", "status"])
 
+    def financial_status_for(self, total_paid):
+        if total_paid == 0:
+            return self.STATUS_AWAITING_PAYMENT
+        if total_paid < self.amount_due:
+            return self.STATUS_PARTIAL
+        return self.STATUS_ACTIVE
+
     @property
     def balance(self):
         return max(self.amount_due - self.amount_paid, 0)
@@ -6,3 +6,5 @@ class MarketingConfig(AppConfig):
     name = "marketing"
     verbose_name = "Marketing digital"
 
+    def ready(self):
+        from marketing.services import announcement_feed  # noqa: F401
@@ -0,0 +1,11 @@
+from django.utils.functional import SimpleLazyObject
+
+from marketing.services.announcement_feed import build_announcement_feed_context
+
+
+def announcement_feed(request):
+    user = getattr(request, "user", None)
+    if not getattr(user, "is_authenticated", False):
+        return {"marketing_announcement_feed": {"items": [], "unread_count": 0, "popup": None}}
+    # Paresseux : calcule seulement si le gabarit affiche le fil.
+    return {"marketing_announcement_feed": SimpleLazyObject(lambda: build_announcement_feed_context(user))}
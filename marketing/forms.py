@@ -47,6 +47,7 @@ class AnnouncementForm(MarketingFormMixin, forms.ModelForm):
             "formations",
             "cycles",
             "classes",
+            "delivery_mode",
             "show_popup",
             "is_blocking_popup",
             "starts_at",
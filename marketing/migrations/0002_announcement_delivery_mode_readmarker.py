@@ -0,0 +1,54 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketing', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Les annonces existantes ont deja ete diffusees par notification
+        # individuelle : elles restent en per_user, seul le defaut change.
+        migrations.AddField(
+            model_name='announcement',
+            name='delivery_mode',
+            field=models.CharField(choices=[('on_read', 'Fil partage (resolu a la lecture)'), ('per_user', 'Notification individuelle')], db_index=True, default='per_user', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='announcement',
+            name='delivery_mode',
+            field=models.CharField(choices=[('on_read', 'Fil partage (resolu a la lecture)'), ('per_user', 'Notification individuelle')], db_index=True, default='on_read', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='audience_predicate',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['delivery_mode', 'status'], name='marketing_a_deliver_3c1f0e_idx'),
+        ),
+        migrations.CreateModel(
+            name='AnnouncementReadMarker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('popup_dismissed_at', models.DateTimeField(blank=True, null=True)),
+                ('announcement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_markers', to='marketing.announcement')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='announcement_read_markers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'announcement'], name='marketing_a_user_id_8d2b41_idx')],
+                'constraints': [models.UniqueConstraint(fields=('announcement', 'user'), name='marketing_announcement_marker_unique')],
+            },
+        ),
+    ]
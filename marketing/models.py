@@ -80,6 +80,16 @@ class Announcement(MarketingAudienceMixin):
         (STATUS_ARCHIVED, "Archivee"),
     ]
 
+    # per_user : une notification par destinataire a la publication.
+    # on_read : l'annonce est stockee une fois avec son audience compilee et
+    # resolue a la lecture (cf. services.announcement_feed).
+    DELIVERY_PER_USER = "per_user"
+    DELIVERY_ON_READ = "on_read"
+    DELIVERY_CHOICES = [
+        (DELIVERY_ON_READ, "Fil partage (resolu a la lecture)"),
+        (DELIVERY_PER_USER, "Notification individuelle"),
+    ]
+
     title = models.CharField(max_length=180, db_index=True)
     announcement_type = models.CharField(max_length=30, choices=TYPE_CHOICES, default=TYPE_GENERAL, db_index=True)
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default=PRIORITY_NORMAL, db_index=True)
@@ -92,6 +102,9 @@ class Announcement(MarketingAudienceMixin):
     starts_at = models.DateTimeField(default=timezone.now, db_index=True)
     ends_at = models.DateTimeField(null=True, blank=True, db_index=True)
     scheduled_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    delivery_mode = models.CharField(max_length=20, choices=DELIVERY_CHOICES, default=DELIVERY_ON_READ, db_index=True)
+    audience_predicate = models.JSONField(default=dict, blank=True)
+    published_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -100,12 +113,31 @@ class Announcement(MarketingAudienceMixin):
         indexes = [
             models.Index(fields=["status", "priority", "starts_at"]),
             models.Index(fields=["announcement_type", "status"]),
+            models.Index(fields=["delivery_mode", "status"], name="marketing_a_deliver_3c1f0e_idx"),
         ]
 
     def __str__(self):
         return self.title
 
 
+class AnnouncementReadMarker(models.Model):
+    """Etat lu / popup fermee d'une annonce "on_read" pour un utilisateur (cree a la premiere action)."""
+
+    announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name="read_markers")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="announcement_read_markers")
+    read_at = models.DateTimeField(null=True, blank=True)
+    popup_dismissed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["announcement", "user"], name="marketing_announcement_marker_unique"),
+        ]
+        indexes = [models.Index(fields=["user", "announcement"], name="marketing_a_user_id_8d2b41_idx")]
+
+    def __str__(self):
+        return f"{self.announcement_id} - {self.user_id}"
+
+
 class Campaign(MarketingAudienceMixin):
     STATUS_DRAFT = "draft"
     STATUS_SCHEDULED = "scheduled"
@@ -0,0 +1,204 @@
+"""
+Annonces diffusees a la lecture (delivery_mode = on_read).
+
+Une annonce est stockee une fois avec son audience compilee
+(audience_predicate). A l'affichage, le segment de l'utilisateur (profil
+et inscriptions actives, en cache par utilisateur) est confronte aux
+annonces actives (en cache global) ; la liste des annonces retenues est
+elle-meme mise en cache par segment, partagee par tous les utilisateurs
+d'une meme classe ou d'un meme poste. L'etat lu / popup fermee vient de
+AnnouncementReadMarker, cree seulement quand l'utilisateur agit.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from academics.models import AcademicEnrollment
+from accounts.models import Profile
+from communication.services.audience import audience_matches, build_user_audience_segment
+from core.cache import get_or_compute, invalidate_tags
+from marketing.models import Announcement, AnnouncementReadMarker
+
+FEED_KEY_PREFIX = "marketing:announcements:v1"
+ANNOUNCEMENTS_TAG = "marketing-announcements"
+FEED_LIMIT = 10
+
+
+def feed_timeout():
+    return getattr(settings, "ANNOUNCEMENT_FEED_CACHE_TIMEOUT", 300)
+
+
+def audience_user_tag(user_id):
+    return f"audience-user:{user_id}"
+
+
+def _serialize_announcement(announcement):
+    return {
+        "id": announcement.id,
+        "title": announcement.title,
+        "content": announcement.content,
+        "announcement_type": announcement.announcement_type,
+        "priority": announcement.priority,
+        "priority_label": announcement.get_priority_display(),
+        "show_popup": announcement.show_popup,
+        "is_blocking_popup": announcement.is_blocking_popup,
+        "starts_at": announcement.starts_at,
+        "ends_at": announcement.ends_at,
+        "published_at": announcement.published_at or announcement.starts_at,
+        "audience_predicate": announcement.audience_predicate or {},
+    }
+
+
+def get_active_feed_announcements():
+    """Annonces on_read actives ou a venir, toutes audiences confondues (une entree partagee)."""
+
+    def _build():
+        now = timezone.now()
+        queryset = Announcement.objects.filter(
+            delivery_mode=Announcement.DELIVERY_ON_READ,
+            status=Announcement.STATUS_ACTIVE,
+            published_at__isnull=False,
+        ).exclude(ends_at__lt=now).order_by("-starts_at", "-id")
+        return [_serialize_announcement(announcement) for announcement in queryset]
+
+    return get_or_compute(
+        f"{FEED_KEY_PREFIX}:active",
+        _build,
+        timeout=feed_timeout(),
+        tags=[ANNOUNCEMENTS_TAG],
+        namespace="marketing:announcements",
+    )
+
+
+def get_user_segment(user):
+    return get_or_compute(
+        f"{FEED_KEY_PREFIX}:segment:user:{user.pk}",
+        lambda: build_user_audience_segment(user),
+        timeout=feed_timeout(),
+        tags=[audience_user_tag(user.pk)],
+        namespace="marketing:segment",
+    )
+
+
+def _segment_announcement_ids(segment):
+    """Identifiants des annonces actives visant ce segment (en cache par segment)."""
+    signature = hashlib.md5(json.dumps(segment, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return get_or_compute(
+        f"{FEED_KEY_PREFIX}:segment-feed:{signature}",
+        lambda: [
+            item["id"]
+            for item in get_active_feed_announcements()
+            if audience_matches(item["audience_predicate"], segment)
+        ],
+        timeout=feed_timeout(),
+        tags=[ANNOUNCEMENTS_TAG],
+        namespace="marketing:segment-feed",
+    )
+
+
+def get_user_announcements(user, *, limit=FEED_LIMIT):
+    """
+    Annonces visibles par l'utilisateur, les plus recentes d'abord, avec
+    leur etat (is_read, popup_pending). Aucune requete quand rien ne le vise.
+    """
+    if not getattr(user, "is_authenticated", False) or not user.is_active:
+        return []
+    announcement_ids = set(_segment_announcement_ids(get_user_segment(user)))
+    if not announcement_ids:
+        return []
+    now = timezone.now()
+    visible = [
+        item
+        for item in get_active_feed_announcements()
+        if item["id"] in announcement_ids
+        and item["starts_at"] <= now
+        and (item["ends_at"] is None or item["ends_at"] >= now)
+    ][:limit]
+    if not visible:
+        return []
+
+    markers = {
+        marker["announcement_id"]: marker
+        for marker in AnnouncementReadMarker.objects.filter(
+            user=user,
+            announcement_id__in=[item["id"] for item in visible],
+        ).values("announcement_id", "read_at", "popup_dismissed_at")
+    }
+    feed = []
+    for item in visible:
+        marker = markers.get(item["id"], {})
+        feed.append(
+            {
+                **item,
+                "is_read": bool(marker.get("read_at")),
+                "popup_pending": item["show_popup"] and not marker.get("popup_dismissed_at"),
+            }
+        )
+    return feed
+
+
+def build_announcement_feed_context(user):
+    feed = get_user_announcements(user)
+    return {
+        "items": feed,
+        "unread_count": sum(1 for item in feed if not item["is_read"]),
+        "popup": next((item for item in feed if item["popup_pending"]), None),
+    }
+
+
+def mark_announcement_read(user, announcement, *, dismiss_popup=False):
+    now = timezone.now()
+    marker, _created = AnnouncementReadMarker.objects.get_or_create(
+        announcement=announcement,
+        user=user,
+        defaults={"read_at": now, "popup_dismissed_at": now if dismiss_popup else None},
+    )
+    update_fields = []
+    if marker.read_at is None:
+        marker.read_at = now
+        update_fields.append("read_at")
+    if dismiss_popup and marker.popup_dismissed_at is None:
+        marker.popup_dismissed_at = now
+        update_fields.append("popup_dismissed_at")
+    if update_fields:
+        marker.save(update_fields=update_fields)
+    return marker
+
+
+def mark_all_announcements_read(user):
+    now = timezone.now()
+    for item in get_user_announcements(user):
+        if item["is_read"]:
+            continue
+        marker, created = AnnouncementReadMarker.objects.get_or_create(
+            announcement_id=item["id"],
+            user=user,
+            defaults={"read_at": now},
+        )
+        if not created and marker.read_at is None:
+            marker.read_at = now
+            marker.save(update_fields=["read_at"])
+
+
+# ==========================================================
+# INVALIDATION
+# ==========================================================
+
+@receiver([post_save, post_delete], sender=Announcement)
+def _announcement_changed(sender, instance, **kwargs):
+    invalidate_tags(ANNOUNCEMENTS_TAG)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def _profile_changed(sender, instance, **kwargs):
+    invalidate_tags(audience_user_tag(instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=AcademicEnrollment)
+def _enrollment_changed(sender, instance, **kwargs):
+    invalidate_tags(audience_user_tag(instance.student_id))
@@ -1,13 +1,17 @@
+from django.utils import timezone
+
 from communication.models import CommunicationNotification
-from communication.services.audience import resolve_platform_users
+from communication.realtime.publisher import buffered_realtime
+from communication.services.audience import compile_audience_predicate, resolve_platform_users
 from communication.services.notification_service import NotificationService
 
 from marketing.models import Announcement, DispatchLog
 from .campaign_service import create_dispatch_log
 
 
-def resolve_announcement_recipients(announcement):
-    return resolve_platform_users(
+def compile_announcement_audience(announcement):
+    """Audience de l'annonce en criteres figes (les quatre M2M lus une seule fois)."""
+    return compile_audience_predicate(
         audience_scope=announcement.audience_scope,
         branch_ids=list(announcement.branches.values_list("id", flat=True)),
         programme_ids=list(announcement.formations.values_list("id", flat=True)),
@@ -18,44 +22,92 @@ def resolve_announcement_recipients(announcement):
     )
 
 
-def publish_announcement(announcement, *, actor=None):
-    recipients = resolve_announcement_recipients(announcement)
-    channels = [CommunicationNotification.CHANNEL_IN_APP, CommunicationNotification.CHANNEL_WEBSOCKET]
-    if "email" in (announcement.channels or []):
-        channels.append(CommunicationNotification.CHANNEL_EMAIL_MARKETING)
+def resolve_announcement_recipients(announcement, *, predicate=None):
+    predicate = predicate or compile_announcement_audience(announcement)
+    return resolve_platform_users(**predicate)
+
+
+def _announcement_metadata(announcement, predicate):
+    return {
+        "announcement_id": announcement.id,
+        "show_popup": announcement.show_popup,
+        "is_blocking_popup": announcement.is_blocking_popup,
+        "audience": announcement.audience_label,
+        "audience_scope": predicate["audience_scope"],
+        "branch_ids": predicate["branch_ids"],
+        "programme_ids": predicate["programme_ids"],
+        "cycle_ids": predicate["cycle_ids"],
+        "class_ids": predicate["class_ids"],
+    }
 
+
+def _notify_recipients(announcement, recipients, *, channels, metadata, actor):
     created_count = 0
-    for recipient in recipients.iterator():
-        NotificationService.notify_user(
-            recipient=recipient,
-            actor=actor,
-            event_type="marketing.announcement",
-            title=announcement.title,
-            body=announcement.content,
-            source_app="marketing",
-            priority=announcement.priority,
+    # Les envois websocket de la diffusion partent en un seul lot (cf. communication.realtime.publisher).
+    with buffered_realtime():
+        for recipient in recipients.iterator():
+            NotificationService.notify_user(
+                recipient=recipient,
+                actor=actor,
+                event_type="marketing.announcement",
+                title=announcement.title,
+                body=announcement.content,
+                source_app="marketing",
+                priority=announcement.priority,
+                channels=channels,
+                metadata=dict(metadata),
+                legacy_source="marketing_announcement",
+                legacy_object_id=str(announcement.id),
+            )
+            created_count += 1
+    return created_count
+
+
+def publish_announcement(announcement, *, actor=None):
+    """
+    Diffuse l'annonce selon son mode de livraison ; retourne le nombre de destinataires.
+
+    per_user : une notification (in-app, websocket, email eventuel) par
+    destinataire. on_read : l'audience compilee est enregistree sur
+    l'annonce, qui apparait a la lecture (services.announcement_feed) ;
+    seul l'email, s'il est demande, cree des lignes par destinataire.
+    """
+    predicate = compile_announcement_audience(announcement)
+    metadata = _announcement_metadata(announcement, predicate)
+    recipients = resolve_announcement_recipients(announcement, predicate=predicate)
+    wants_email = "email" in (announcement.channels or [])
+
+    if announcement.delivery_mode == Announcement.DELIVERY_ON_READ:
+        announcement.audience_predicate = predicate
+        announcement.published_at = timezone.now()
+        announcement.save(update_fields=["audience_predicate", "published_at", "updated_at"])
+        if wants_email:
+            recipients_count = _notify_recipients(
+                announcement,
+                recipients,
+                channels=(CommunicationNotification.CHANNEL_EMAIL_MARKETING,),
+                metadata=metadata,
+                actor=actor,
+            )
+        else:
+            recipients_count = recipients.count()
+    else:
+        channels = [CommunicationNotification.CHANNEL_IN_APP, CommunicationNotification.CHANNEL_WEBSOCKET]
+        if wants_email:
+            channels.append(CommunicationNotification.CHANNEL_EMAIL_MARKETING)
+        recipients_count = _notify_recipients(
+            announcement,
+            recipients,
             channels=tuple(channels),
-            metadata={
-                "announcement_id": announcement.id,
-                "show_popup": announcement.show_popup,
-                "is_blocking_popup": announcement.is_blocking_popup,
-                "audience": announcement.audience_label,
-                "audience_scope": announcement.audience_scope,
-                "branch_ids": list(announcement.branches.values_list("id", flat=True)),
-                "programme_ids": list(announcement.formations.values_list("id", flat=True)),
-                "cycle_ids": list(announcement.cycles.values_list("id", flat=True)),
-                "class_ids": list(announcement.classes.values_list("id", flat=True)),
-            },
-            legacy_source="marketing_announcement",
-            legacy_object_id=str(announcement.id),
+            metadata=metadata,
+            actor=actor,
         )
-        created_count += 1
 
     create_dispatch_log(
         announcement=announcement,
         channel="dashboard_popup" if announcement.show_popup else "dashboard_notification",
         actor=actor,
         status=DispatchLog.STATUS_SENT,
-        recipients_count=created_count,
+        recipients_count=recipients_count,
     )
-    return created_count
+    return recipients_count
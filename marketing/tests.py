@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from branches.models import Branch
+from communication.models import CommunicationNotification
+from marketing.models import Announcement, AnnouncementReadMarker
+from marketing.services.announcement_feed import build_announcement_feed_context, get_user_announcements
+from marketing.services.notification_service import publish_announcement
+
+
+User = get_user_model()
+
+
+class AnnouncementOnReadDeliveryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(name="Annexe Nord", code="AN", slug="annexe-nord")
+        other_branch = Branch.objects.create(name="Annexe Sud", code="AS", slug="annexe-sud")
+        self.author = User.objects.create_superuser(username="mk_admin", email="mk@example.com", password="pass1234")
+        self.reader = self._staff("agent_nord", self.branch)
+        self.outsider = self._staff("agent_sud", other_branch)
+
+    def _staff(self, username, branch):
+        user = User.objects.create_user(username=username, email=f"{username}@example.com", password="pass1234")
+        user.profile.branch = branch
+        user.profile.role = "admissions"
+        user.profile.save()
+        return user
+
+    def _announcement(self, **kwargs):
+        announcement = Announcement.objects.create(
+            title="Fermeture exceptionnelle",
+            content="L'annexe sera fermee vendredi.",
+            author=self.author,
+            status=Announcement.STATUS_ACTIVE,
+            audience_scope=Announcement.SCOPE_BRANCHES,
+            show_popup=True,
+            **kwargs,
+        )
+        announcement.branches.add(self.branch)
+        return announcement
+
+    def test_on_read_announcement_is_stored_once_and_resolved_per_segment(self):
+        announcement = self._announcement()
+
+        recipients_count = publish_announcement(announcement, actor=self.author)
+
+        self.assertEqual(recipients_count, 1)
+        self.assertFalse(CommunicationNotification.objects.filter(legacy_source="marketing_announcement").exists())
+        announcement.refresh_from_db()
+        self.assertEqual(announcement.audience_predicate["branch_ids"], [self.branch.pk])
+        self.assertEqual([item["id"] for item in get_user_announcements(self.reader)], [announcement.pk])
+        self.assertEqual(get_user_announcements(self.outsider), [])
+
+        feed = build_announcement_feed_context(self.reader)
+        self.assertEqual(feed["unread_count"], 1)
+        self.assertEqual(feed["popup"]["id"], announcement.pk)
+
+    def test_read_marker_clears_unread_and_popup(self):
+        announcement = self._announcement()
+        publish_announcement(announcement, actor=self.author)
+        self.client.force_login(self.reader)
+
+        response = self.client.post(
+            reverse("marketing:announcement_mark_read", args=[announcement.pk]),
+            {"dismiss_popup": "1"},
+        )
+
+        self.assertEqual(response.status_code, 204)
+        marker = AnnouncementReadMarker.objects.get(announcement=announcement, user=self.reader)
+        self.assertIsNotNone(marker.popup_dismissed_at)
+        feed = build_announcement_feed_context(self.reader)
+        self.assertEqual(feed["unread_count"], 0)
+        self.assertIsNone(feed["popup"])
+
+    def test_per_user_mode_still_creates_notifications(self):
+        announcement = self._announcement(delivery_mode=Announcement.DELIVERY_PER_USER)
+
+        publish_announcement(announcement, actor=self.author)
+
+        self.assertTrue(
+            CommunicationNotification.objects.filter(
+                recipient=self.reader,
+                legacy_source="marketing_announcement",
+                legacy_object_id=str(announcement.pk),
+            ).exists()
+        )
+        self.assertEqual(get_user_announcements(self.reader), [])
@@ -17,6 +17,8 @@ urlpatterns = [
     path("announcements/<int:pk>/drawer/", views.announcement_drawer, name="announcement_drawer"),
     path("announcements/create/", views.announcement_create, name="announcement_create"),
     path("announcements/<int:pk>/publish/", views.announcement_publish, name="announcement_publish"),
+    path("announcements/<int:pk>/read/", views.announcement_mark_read, name="announcement_mark_read"),
+    path("announcements/read-all/", views.announcement_mark_all_read, name="announcement_mark_all_read"),
     path("campaigns/create/", views.campaign_create, name="campaign_create"),
     path("campaigns/<int:pk>/prepare-brevo/", views.campaign_prepare_brevo, name="campaign_prepare_brevo"),
     path("prospects/create/", views.prospect_create, name="prospect_create"),
@@ -1,6 +1,7 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_POST
 
@@ -15,6 +16,7 @@ from .permissions import marketing_required
 from .selectors import build_marketing_dashboard_context
 from .services.brevo_service import prepare_brevo_campaign
 from .services.campaign_service import prepare_campaign
+from .services.announcement_feed import mark_all_announcements_read, mark_announcement_read
 from .services.notification_service import publish_announcement
 from .services.intelligence import build_audience_estimate, get_object_guidance
 
@@ -259,6 +261,27 @@ def announcement_publish(request, pk):
     return redirect("marketing:dashboard")
 
 
+def _announcement_feed_response(request):
+    if request.headers.get("HX-Request"):
+        return render(request, "communication/partials/dashboard_widget.html")
+    return HttpResponse(status=204)
+
+
+@login_required
+@require_POST
+def announcement_mark_read(request, pk):
+    announcement = get_object_or_404(Announcement, pk=pk, delivery_mode=Announcement.DELIVERY_ON_READ)
+    mark_announcement_read(request.user, announcement, dismiss_popup=request.POST.get("dismiss_popup") == "1")
+    return _announcement_feed_response(request)
+
+
+@login_required
+@require_POST
+def announcement_mark_all_read(request):
+    mark_all_announcements_read(request.user)
+    return _announcement_feed_response(request)
+
+
 @login_required
 @marketing_required
 def campaign_create(request):
@@ -2,13 +2,13 @@ from django.contrib import admin, messages
 
 from .forms import MemoireForm
 from .models import ConsultationLog, Memoire, PageMemoire
-from .services.rendering import render_memoire_pages
+from .services.rendering import schedule_memoire_rendering
 
 
 class PageMemoireInline(admin.TabularInline):
     model = PageMemoire
     extra = 0
-    readonly_fields = ["numero", "image"]
+    readonly_fields = ["numero", "image", "miniature"]
     can_delete = False
 
     def has_add_permission(self, request, obj=None):
@@ -20,12 +20,15 @@ class MemoireAdmin(admin.ModelAdmin):
     form = MemoireForm
     list_display = [
         "titre", "auteurs", "filiere", "niveau", "annee",
-        "statut", "est_mis_en_avant", "nombre_vues", "nb_pages",
+        "statut", "est_mis_en_avant", "nombre_vues", "nb_pages", "rendu_statut",
     ]
-    list_filter = ["statut", "niveau", "filiere", "annee", "est_mis_en_avant"]
+    list_filter = ["statut", "rendu_statut", "niveau", "filiere", "annee", "est_mis_en_avant"]
     search_fields = ["titre", "auteurs", "mots_cles"]
     prepopulated_fields = {"slug": ("titre",)}
-    readonly_fields = ["nb_pages", "nombre_vues", "date_publication"]
+    readonly_fields = [
+        "nb_pages", "nombre_vues", "date_publication",
+        "rendu_statut", "rendu_pages_faites", "rendu_pages_total", "rendu_erreur", "rendu_maj_le",
+    ]
     inlines = [PageMemoireInline]
     actions = ["regenerer_pages"]
 
@@ -39,20 +42,12 @@ class MemoireAdmin(admin.ModelAdmin):
             self._generer_pages(request, obj)
 
     def _generer_pages(self, request, memoire):
-        try:
-            nb_pages = render_memoire_pages(memoire)
-        except Exception as exc:  # noqa: BLE001 - on veut un message clair en admin
-            self.message_user(
-                request,
-                f"Échec de la génération des pages pour « {memoire.titre} » : {exc}",
-                level=messages.ERROR,
-            )
-        else:
-            self.message_user(
-                request,
-                f"{nb_pages} page(s) générée(s) pour « {memoire.titre} ».",
-                level=messages.SUCCESS,
-            )
+        schedule_memoire_rendering(memoire)
+        self.message_user(
+            request,
+            f"Génération des pages lancée en arrière-plan pour « {memoire.titre} ».",
+            level=messages.INFO,
+        )
 
     @admin.action(description="(Re)générer les images de pages")
     def regenerer_pages(self, request, queryset):
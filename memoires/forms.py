@@ -14,7 +14,10 @@ class MemoireForm(forms.ModelForm):
 
     class Meta:
         model = Memoire
-        exclude = ["nb_pages", "nombre_vues", "date_publication", "cree_par", "date_depot"]
+        exclude = [
+            "nb_pages", "nombre_vues", "date_publication", "cree_par", "date_depot",
+            "rendu_statut", "rendu_pages_total", "rendu_pages_faites", "rendu_erreur", "rendu_maj_le",
+        ]
         widgets = {
             "titre": forms.TextInput(attrs={"class": _INPUT_CLASS}),
             "slug": forms.TextInput(attrs={"class": _INPUT_CLASS, "placeholder": "Auto depuis le titre"}),
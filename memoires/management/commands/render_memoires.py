@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from memoires.models import Memoire
+from memoires.services.rendering import render_memoire_pages
+
+
+class Command(BaseCommand):
+    help = (
+        "Rend (ou re-rend) les images de pages des memoires en attente ou en echec, "
+        "par exemple apres un redemarrage du serveur pendant un rendu en arriere-plan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--memoire",
+            type=int,
+            action="append",
+            dest="memoire_ids",
+            help="Limite le rendu a un memoire (option repetable).",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rend tous les memoires, quel que soit leur statut de rendu.",
+        )
+
+    def handle(self, *args, **options):
+        qs = Memoire.objects.order_by("pk")
+        if options["memoire_ids"]:
+            qs = qs.filter(pk__in=options["memoire_ids"])
+        elif not options["all"]:
+            qs = qs.exclude(rendu_statut=Memoire.RenduStatut.TERMINE)
+
+        rendus, echecs = 0, 0
+        for memoire in qs.iterator():
+            try:
+                nb_pages = render_memoire_pages(memoire)
+            except Exception as exc:  # noqa: BLE001 - on continue avec les suivants
+                echecs += 1
+                self.stdout.write(self.style.ERROR(f"  ! {memoire.titre} : {exc}"))
+            else:
+                rendus += 1
+                self.stdout.write(f"  + {memoire.titre} ({nb_pages} page(s))")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendu termine : {rendus} memoire(s) rendu(s), {echecs} echec(s)."
+        ))
@@ -0,0 +1,55 @@
+# Generated manually for the background page rendering pipeline.
+
+import memoires.storage
+from django.db import migrations, models
+
+
+def marquer_rendus_existants(apps, schema_editor):
+    Memoire = apps.get_model("memoires", "Memoire")
+    for memoire in Memoire.objects.filter(nb_pages__gt=0).only("id", "nb_pages"):
+        Memoire.objects.filter(pk=memoire.pk).update(
+            rendu_statut="termine",
+            rendu_pages_total=memoire.nb_pages,
+            rendu_pages_faites=memoire.nb_pages,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memoires', '0002_alter_memoire_resume'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memoire',
+            name='rendu_statut',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('echec', 'Échec')], db_index=True, default='en_attente', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='memoire',
+            name='rendu_pages_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='memoire',
+            name='rendu_pages_faites',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='memoire',
+            name='rendu_erreur',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='memoire',
+            name='rendu_maj_le',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pagememoire',
+            name='miniature',
+            field=models.ImageField(blank=True, storage=memoires.storage.memoire_private_storage, upload_to='memoires/miniatures/'),
+        ),
+        migrations.RunPython(marquer_rendus_existants, migrations.RunPython.noop),
+    ]
@@ -18,6 +18,12 @@ class Memoire(models.Model):
         BROUILLON = "brouillon", "Brouillon"
         PUBLIE = "publie", "Publié"
 
+    class RenduStatut(models.TextChoices):
+        EN_ATTENTE = "en_attente", "En attente"
+        EN_COURS = "en_cours", "En cours"
+        TERMINE = "termine", "Terminé"
+        ECHEC = "echec", "Échec"
+
     titre = models.CharField(max_length=300)
     slug = models.SlugField(max_length=320, unique=True)
     auteurs = models.CharField(max_length=300, help_text="Auteur(s) du mémoire")
@@ -40,6 +46,15 @@ class Memoire(models.Model):
     )
     nb_pages = models.PositiveIntegerField(default=0)
 
+    # Suivi du rendu des pages en arrière-plan (services/rendering.py).
+    rendu_statut = models.CharField(
+        max_length=20, choices=RenduStatut.choices, default=RenduStatut.EN_ATTENTE, db_index=True
+    )
+    rendu_pages_total = models.PositiveIntegerField(default=0)
+    rendu_pages_faites = models.PositiveIntegerField(default=0)
+    rendu_erreur = models.TextField(blank=True)
+    rendu_maj_le = models.DateTimeField(null=True, blank=True)
+
     est_mis_en_avant = models.BooleanField(default=False, db_index=True, verbose_name="Mis en avant")
     statut = models.CharField(
         max_length=20, choices=Statut.choices, default=Statut.BROUILLON, db_index=True
@@ -73,6 +88,16 @@ class Memoire(models.Model):
     def est_public(self):
         return self.statut == self.Statut.PUBLIE
 
+    @property
+    def rendu_en_cours(self):
+        return self.rendu_statut in {self.RenduStatut.EN_ATTENTE, self.RenduStatut.EN_COURS}
+
+    @property
+    def rendu_progression(self):
+        if not self.rendu_pages_total:
+            return 0
+        return min(round(self.rendu_pages_faites * 100 / self.rendu_pages_total), 100)
+
 
 class PageMemoire(models.Model):
     """Image pré-générée d'une page (corps protégé, non copiable)."""
@@ -80,6 +105,9 @@ class PageMemoire(models.Model):
     memoire = models.ForeignKey(Memoire, on_delete=models.CASCADE, related_name="pages")
     numero = models.PositiveIntegerField()
     image = models.ImageField(upload_to="memoires/pages/", storage=memoire_private_storage)
+    miniature = models.ImageField(
+        upload_to="memoires/miniatures/", storage=memoire_private_storage, blank=True
+    )
 
     class Meta:
         verbose_name = "Page de mémoire"
@@ -1,58 +1,198 @@
-"""Rendu PDF -> images de pages (pré-génération unique au dépôt)."""
+"""Rendu PDF -> images de pages (pré-génération unique au dépôt).
+
+Le rendu est découpé en tranches de pages réparties sur un pool de
+processus : chaque worker rouvre lui-même le PDF (copie temporaire locale)
+et renvoie, pour chaque page, l'image de lecture et sa miniature en WebP.
+Les PageMemoire sont insérées par lots et la progression est enregistrée
+sur le mémoire (rendu_statut, rendu_pages_faites).
+
+schedule_memoire_rendering() lance ce rendu en arrière-plan après commit
+(core.background) : l'admin et le superadmin ne bloquent plus la requête.
+"""
 
 import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from io import BytesIO
 
 import fitz
 from django.conf import settings
 from django.core.files.base import ContentFile
+from django.utils import timezone
 from PIL import Image
 
+from core.background import run_after_commit
+
 logger = logging.getLogger(__name__)
 
+MEMOIRE_TASK_POOL = "memoires"
 
-def _pixmap_to_webp(pixmap):
-    """PyMuPDF ne sait pas encoder en WebP nativement -> on repasse par Pillow."""
+
+def _pixmap_to_webp(pixmap, thumbnail_width):
+    """PyMuPDF ne sait pas encoder en WebP nativement -> on repasse par Pillow.
+
+    Retourne (image de lecture, miniature) produites depuis le même pixmap.
+    """
     mode = "RGBA" if pixmap.alpha else "RGB"
-    image = Image.frombytes(mode, [pixmap.width, pixmap.height], pixmap.samples)
+    image = Image.frombytes(mode, [pixmap.width, pixmap.height], pixmap.samples).convert("RGB")
+
     buffer = BytesIO()
-    image.convert("RGB").save(buffer, format="WEBP", quality=85)
-    return buffer.getvalue()
+    image.save(buffer, format="WEBP", quality=85)
+    lecture = buffer.getvalue()
 
+    ratio = thumbnail_width / image.width
+    miniature_image = image.resize(
+        (thumbnail_width, max(int(image.height * ratio), 1)), Image.Resampling.LANCZOS
+    ) if image.width > thumbnail_width else image
+    buffer = BytesIO()
+    miniature_image.save(buffer, format="WEBP", quality=75)
+    return lecture, buffer.getvalue()
 
-def render_memoire_pages(memoire):
-    """Rend chaque page du fichier source en image WebP et crée les PageMemoire.
 
-    Idempotent : supprime les pages existantes avant de régénérer, afin que
-    l'action admin "(Re)générer les images de pages" puisse être rejouée.
-    """
-    from ..models import PageMemoire
+def _render_page_range(pdf_path, debut, fin, dpi, thumbnail_width):
+    """Worker : rend les pages [debut, fin) et renvoie [(numero, lecture, miniature)].
 
-    dpi = settings.MEMOIRE_RENDER_DPI
+    Exécuté dans un processus séparé -> ne touche ni à l'ORM ni au stockage.
+    """
     zoom = dpi / 72
     matrix = fitz.Matrix(zoom, zoom)
+    document = fitz.open(pdf_path)
+    try:
+        rendus = []
+        for index in range(debut, fin):
+            pixmap = document[index].get_pixmap(matrix=matrix)
+            lecture, miniature = _pixmap_to_webp(pixmap, thumbnail_width)
+            rendus.append((index + 1, lecture, miniature))
+        return rendus
+    finally:
+        document.close()
+
+
+def _page_ranges(nb_pages, taille):
+    taille = max(taille, 1)
+    return [(debut, min(debut + taille, nb_pages)) for debut in range(0, nb_pages, taille)]
+
+
+def _iter_rendered_chunks(pdf_path, tranches, dpi, thumbnail_width, workers):
+    if workers <= 1 or len(tranches) <= 1:
+        for debut, fin in tranches:
+            yield _render_page_range(pdf_path, debut, fin, dpi, thumbnail_width)
+        return
+
+    # "spawn" : pas de fork d'un processus web multi-thread (connexions DB, locks).
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(tranches)), mp_context=context) as pool:
+        futures = [
+            pool.submit(_render_page_range, pdf_path, debut, fin, dpi, thumbnail_width)
+            for debut, fin in tranches
+        ]
+        for future in as_completed(futures):
+            yield future.result()
 
-    with memoire.fichier_source.open("rb") as source_file:
-        pdf_bytes = source_file.read()
 
-    document = fitz.open(stream=pdf_bytes, filetype="pdf")
+def _copy_source_to_tempfile(memoire):
+    """Le stockage peut être S3 : chaque worker a besoin d'un chemin local."""
+    handle = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    with handle, memoire.fichier_source.open("rb") as source_file:
+        for chunk in source_file.chunks():
+            handle.write(chunk)
+    return handle.name
+
+
+def _update_rendu(memoire, **fields):
+    from ..models import Memoire
+
+    fields["rendu_maj_le"] = timezone.now()
+    for name, value in fields.items():
+        setattr(memoire, name, value)
+    Memoire.objects.filter(pk=memoire.pk).update(**fields)
+
+
+def render_memoire_pages(memoire):
+    """Rend chaque page du fichier source en WebP (lecture + miniature) et crée les PageMemoire.
+
+    Idempotent : supprime les pages existantes avant de régénérer, afin que
+    l'action admin "(Re)générer les images de pages" puisse être rejouée.
+    """
+    from ..models import Memoire, PageMemoire
+
+    pdf_path = None
     try:
+        pdf_path = _copy_source_to_tempfile(memoire)
+        with fitz.open(pdf_path) as document:
+            nb_pages = document.page_count
+
+        _update_rendu(
+            memoire,
+            rendu_statut=Memoire.RenduStatut.EN_COURS,
+            rendu_pages_total=nb_pages,
+            rendu_pages_faites=0,
+            rendu_erreur="",
+        )
         memoire.pages.all().delete()
 
         pages_crees = 0
-        for numero, page in enumerate(document, start=1):
-            pixmap = page.get_pixmap(matrix=matrix)
-            webp_bytes = _pixmap_to_webp(pixmap)
-
-            page_memoire = PageMemoire(memoire=memoire, numero=numero)
-            page_memoire.image.save(
-                f"page_{numero:04d}.webp", ContentFile(webp_bytes), save=False
-            )
-            page_memoire.save()
-            pages_crees += 1
+        tranches = _page_ranges(nb_pages, settings.MEMOIRE_RENDER_CHUNK_PAGES)
+        for rendus in _iter_rendered_chunks(
+            pdf_path,
+            tranches,
+            settings.MEMOIRE_RENDER_DPI,
+            settings.MEMOIRE_THUMBNAIL_WIDTH,
+            settings.MEMOIRE_RENDER_WORKERS,
+        ):
+            pages = []
+            for numero, lecture, miniature in rendus:
+                page_memoire = PageMemoire(memoire=memoire, numero=numero)
+                page_memoire.image.save(
+                    f"page_{numero:04d}.webp", ContentFile(lecture), save=False
+                )
+                page_memoire.miniature.save(
+                    f"page_{numero:04d}_mini.webp", ContentFile(miniature), save=False
+                )
+                pages.append(page_memoire)
+            PageMemoire.objects.bulk_create(pages)
+            pages_crees += len(pages)
+            _update_rendu(memoire, rendu_pages_faites=pages_crees)
 
         memoire.nb_pages = pages_crees
         memoire.save(update_fields=["nb_pages"])
+        _update_rendu(memoire, rendu_statut=Memoire.RenduStatut.TERMINE)
         return pages_crees
+    except Exception as exc:
+        _update_rendu(memoire, rendu_statut=Memoire.RenduStatut.ECHEC, rendu_erreur=str(exc)[:2000])
+        raise
     finally:
-        document.close()
+        if pdf_path:
+            try:
+                os.unlink(pdf_path)
+            except OSError:
+                logger.warning("Fichier temporaire non supprime: %s", pdf_path)
+
+
+def render_memoire_pages_by_id(memoire_id):
+    from ..models import Memoire
+
+    memoire = Memoire.objects.filter(pk=memoire_id).first()
+    if memoire is None:
+        return 0
+    return render_memoire_pages(memoire)
+
+
+def schedule_memoire_rendering(memoire):
+    """Marque le mémoire « en attente » et lance le rendu en arrière-plan après commit."""
+    from ..models import Memoire
+
+    _update_rendu(
+        memoire,
+        rendu_statut=Memoire.RenduStatut.EN_ATTENTE,
+        rendu_pages_faites=0,
+        rendu_erreur="",
+    )
+    run_after_commit(
+        render_memoire_pages_by_id,
+        memoire.pk,
+        pool=MEMOIRE_TASK_POOL,
+        name=f"render_memoire_pages:{memoire.pk}",
+    )
@@ -14,8 +14,7 @@ def _marquer_passage_en_publie(sender, instance, **kwargs):
 
     Le rendu des pages n'est pas déclenché ici : il dépend du fichier déjà
     enregistré, donc il est lancé après la sauvegarde (admin.py / management),
-    avec un message clair en cas d'échec — pas de tâche asynchrone disponible
-    dans ce projet (pas de Celery/RQ).
+    en arrière-plan via services.rendering.schedule_memoire_rendering().
     """
     if not instance.pk:
         if instance.statut == Memoire.Statut.PUBLIE and not instance.date_publication:
@@ -41,6 +40,8 @@ def _supprimer_image_page(sender, instance, **kwargs):
     """Django ne supprime pas les fichiers d'un ImageField -> nettoyage explicite."""
     if instance.image:
         instance.image.delete(save=False)
+    if instance.miniature:
+        instance.miniature.delete(save=False)
 
 
 @receiver(post_delete, sender=Memoire)
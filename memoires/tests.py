@@ -2,13 +2,13 @@ import fitz
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from formations.models import Filiere
 
 from .forms import MemoireForm
 from .models import ConsultationLog, Memoire, PageMemoire
-from .services.rendering import render_memoire_pages
+from .services.rendering import render_memoire_pages, schedule_memoire_rendering
 
 
 def _pdf_bytes(nb_pages=2):
@@ -61,6 +61,20 @@ class MemoireModelTests(TestCase):
 
         self.assertEqual(PageMemoire.objects.filter(memoire=memoire).count(), 2)
 
+    @override_settings(BACKGROUND_TASKS_EAGER=True, MEMOIRE_RENDER_CHUNK_PAGES=1)
+    def test_rendu_planifie_genere_miniatures_et_suivi(self):
+        memoire = self._creer_memoire()
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_memoire_rendering(memoire)
+
+        memoire.refresh_from_db()
+        self.assertEqual(memoire.rendu_statut, Memoire.RenduStatut.TERMINE)
+        self.assertEqual(memoire.rendu_pages_faites, 2)
+        self.assertEqual(memoire.rendu_progression, 100)
+        pages = list(PageMemoire.objects.filter(memoire=memoire).order_by("numero"))
+        self.assertEqual([page.numero for page in pages], [1, 2])
+        self.assertTrue(all(page.miniature for page in pages))
+
 
 class MemoireAdminFormTests(TestCase):
     def setUp(self):
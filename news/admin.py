@@ -249,9 +249,10 @@ class MediaItemInline(admin.TabularInline):
         "video_url",
         "caption",
         "is_featured",
+        "processing_status",
     )
 
-    readonly_fields = ("thumbnail_preview",)
+    readonly_fields = ("thumbnail_preview", "processing_status")
     ordering = ("-created_at",)
     show_change_link = True
 
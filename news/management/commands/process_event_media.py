@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from news.models import MediaItem
+from news.media_processing import process_media_item
+
+
+class Command(BaseCommand):
+    help = (
+        "Traite (ou retraite) les medias de galerie en attente ou en echec, "
+        "par exemple apres un redemarrage du serveur pendant un traitement en arriere-plan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--media",
+            type=int,
+            action="append",
+            dest="media_ids",
+            help="Limite le traitement a un media (option repetable).",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Retraite tous les medias avec fichier, quel que soit leur statut.",
+        )
+
+    def handle(self, *args, **options):
+        qs = MediaItem.objects.filter(Q(image__gt="") | Q(video_file__gt="")).order_by("pk")
+        if options["media_ids"]:
+            qs = qs.filter(pk__in=options["media_ids"])
+        elif not options["all"]:
+            qs = qs.exclude(processing_status=MediaItem.STATUS_READY)
+
+        traites, echecs = 0, 0
+        for media_item in qs.iterator():
+            try:
+                process_media_item(media_item)
+            except Exception as exc:  # noqa: BLE001 - on continue avec les suivants
+                echecs += 1
+                self.stdout.write(self.style.ERROR(f"  ! media #{media_item.pk} : {exc}"))
+            else:
+                traites += 1
+                self.stdout.write(f"  + media #{media_item.pk} ({media_item.get_media_type_display()})")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Traitement termine : {traites} media(s) traite(s), {echecs} echec(s)."
+        ))
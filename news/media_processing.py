@@ -0,0 +1,233 @@
+"""Traitement des medias de galerie (images et videos d'evenements).
+
+A l'upload, MediaItem stocke le fichier brut, passe en "pending" et
+planifie schedule_media_processing() apres commit sur le pool "media"
+de core.background (BACKGROUND_TASK_WORKERS["media"] traitements en
+parallele au plus). Le worker :
+
+- image : un seul decodage Pillow, dont sont tirees la version pleine
+  (WebP, EVENT_IMAGE_MAX_SIZE) et la miniature de grille ;
+- video : un seul appel ffmpeg a deux sorties (transcodage H.264
+  "faststart" + image a 1 s pour la miniature), borne par
+  EVENT_VIDEO_TIMEOUT.
+
+Le statut (processing_status, processing_error) est enregistre sur le
+media, la page d'accueil en cache est purgee (galerie), puis les
+declinaisons srcset de l'image sont planifiees (core.images.variants).
+La commande process_event_media rejoue les medias restes en attente ou
+en echec.
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.background import run_after_commit
+from core.images.variants import schedule_image_variants
+from core.page_cache import purge_public_pages
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TASK_POOL = "media"
+VIDEO_THUMBNAIL_OFFSET = "00:00:01"
+
+
+def _update_processing(media_item, **fields):
+    from .models import MediaItem
+
+    for name, value in fields.items():
+        setattr(media_item, name, value)
+    # update() : pas de save(), donc pas de nouvelle planification.
+    MediaItem.objects.filter(pk=media_item.pk).update(**fields)
+
+
+def _file_root(name):
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+def _replace_source(field_file, new_name, content):
+    """Enregistre la version traitee et supprime le fichier brut qu'elle remplace."""
+    old_name = field_file.name
+    field_file.save(new_name, content, save=False)
+    if old_name and old_name != field_file.name:
+        try:
+            field_file.storage.delete(old_name)
+        except OSError:
+            logger.warning("Fichier brut non supprime: %s", old_name)
+
+
+# ==========================================================
+# IMAGES
+# ==========================================================
+
+def _encode_webp(image, quality):
+    buffer = BytesIO()
+    image.save(buffer, format="WEBP", quality=quality, method=6, optimize=True)
+    return buffer.getvalue()
+
+
+def render_image_variants(source):
+    """Un decodage, deux rendus : (pleine taille, miniature) en WebP."""
+    from .models import EVENT_FULL_QUALITY, EVENT_IMAGE_MAX_SIZE, EVENT_MEDIA_THUMB_SIZE, EVENT_THUMB_QUALITY
+
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+
+        full = img.copy()
+        full.thumbnail(EVENT_IMAGE_MAX_SIZE, Image.LANCZOS)
+        # La miniature part de la version deja reduite : moins de pixels a reechantillonner.
+        thumb = full.copy()
+        thumb.thumbnail(EVENT_MEDIA_THUMB_SIZE, Image.LANCZOS)
+        return _encode_webp(full, EVENT_FULL_QUALITY), _encode_webp(thumb, EVENT_THUMB_QUALITY)
+
+
+def process_image(media_item):
+    with media_item.image.open("rb") as source:
+        full, thumb = render_image_variants(source)
+
+    file_root = _file_root(media_item.image.name)
+    _replace_source(media_item.image, f"{file_root}.webp", ContentFile(full))
+    media_item.thumbnail.save(f"{file_root}_thumb.webp", ContentFile(thumb), save=False)
+    return {"image": media_item.image.name, "thumbnail": media_item.thumbnail.name}
+
+
+# ==========================================================
+# VIDEOS (FFMPEG)
+# ==========================================================
+
+def build_ffmpeg_command(input_path, video_path, thumbnail_path):
+    """Une seule lecture de la source pour les deux sorties."""
+    return [
+        getattr(settings, "FFMPEG_PATH", "ffmpeg"),
+        "-hide_banner", "-loglevel", "error", "-y",
+        "-i", input_path,
+        # Sortie 1 : video web (lecture progressive grace a faststart).
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c:v", "libx264",
+        "-preset", getattr(settings, "EVENT_VIDEO_PRESET", "medium"),
+        "-crf", str(getattr(settings, "EVENT_VIDEO_CRF", 23)),
+        "-pix_fmt", "yuv420p",
+        "-c:a", "aac",
+        "-movflags", "+faststart",
+        video_path,
+        # Sortie 2 : miniature.
+        "-map", "0:v:0",
+        "-ss", VIDEO_THUMBNAIL_OFFSET,
+        "-frames:v", "1",
+        thumbnail_path,
+    ]
+
+
+def _run_ffmpeg(command):
+    try:
+        completed = subprocess.run(
+            command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=getattr(settings, "EVENT_VIDEO_TIMEOUT", 1800),
+        )
+    except FileNotFoundError as exc:
+        raise RuntimeError(f"ffmpeg introuvable ({command[0]}).") from exc
+    except subprocess.TimeoutExpired as exc:
+        raise RuntimeError(f"ffmpeg a depasse {exc.timeout} s.") from exc
+    if completed.returncode != 0:
+        detail = completed.stderr.decode("utf-8", errors="replace").strip()[-1000:]
+        raise RuntimeError(f"ffmpeg a echoue (code {completed.returncode}) : {detail}")
+
+
+def process_video(media_item):
+    # Le stockage peut etre distant : ffmpeg travaille sur des copies locales.
+    workdir = tempfile.mkdtemp(prefix="esfe-media-")
+    try:
+        extension = os.path.splitext(media_item.video_file.name)[1] or ".bin"
+        input_path = os.path.join(workdir, f"source{extension}")
+        video_path = os.path.join(workdir, "video.mp4")
+        thumbnail_path = os.path.join(workdir, "thumb.jpg")
+
+        with media_item.video_file.open("rb") as source, open(input_path, "wb") as handle:
+            for chunk in source.chunks():
+                handle.write(chunk)
+
+        _run_ffmpeg(build_ffmpeg_command(input_path, video_path, thumbnail_path))
+
+        file_root = _file_root(media_item.video_file.name)
+        fields = {}
+        with open(video_path, "rb") as handle:
+            _replace_source(media_item.video_file, f"{file_root}.mp4", File(handle))
+        fields["video_file"] = media_item.video_file.name
+
+        # Video de moins d'une seconde : pas d'image a l'offset, la miniature reste vide.
+        if os.path.exists(thumbnail_path):
+            with open(thumbnail_path, "rb") as handle:
+                media_item.thumbnail.save(f"{file_root}_thumb.jpg", File(handle), save=False)
+            fields["thumbnail"] = media_item.thumbnail.name
+        return fields
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ==========================================================
+# ORCHESTRATION
+# ==========================================================
+
+def process_media_item(media_item):
+    """Traite le fichier brut du media et enregistre son statut ; rejouable."""
+    from .models import MediaItem
+
+    _update_processing(media_item, processing_status=MediaItem.STATUS_PROCESSING, processing_error="")
+    try:
+        if media_item.media_type == MediaItem.IMAGE and media_item.image:
+            fields = process_image(media_item)
+        elif media_item.media_type == MediaItem.VIDEO and media_item.video_file:
+            fields = process_video(media_item)
+        else:
+            fields = {}
+    except Exception as exc:
+        _update_processing(
+            media_item,
+            processing_status=MediaItem.STATUS_FAILED,
+            processing_error=str(exc)[:2000],
+        )
+        raise
+
+    _update_processing(
+        media_item,
+        processing_status=MediaItem.STATUS_READY,
+        processed_at=timezone.now(),
+        **fields,
+    )
+    # update() n'emet pas post_save : la galerie de l'accueil n'affiche que les medias prets.
+    purge_public_pages("home")
+    if media_item.media_type == MediaItem.IMAGE and media_item.image:
+        schedule_image_variants(media_item, "image")
+    return media_item
+
+
+def process_media_item_by_id(media_item_id):
+    from .models import MediaItem
+
+    media_item = MediaItem.objects.filter(pk=media_item_id).first()
+    if media_item is None:
+        return None
+    return process_media_item(media_item)
+
+
+def schedule_media_processing(media_item):
+    """Lance le traitement du media en arriere-plan apres commit."""
+    run_after_commit(
+        process_media_item_by_id,
+        media_item.pk,
+        pool=MEDIA_TASK_POOL,
+        name=f"process_media_item:{media_item.pk}",
+    )
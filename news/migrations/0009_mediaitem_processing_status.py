@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_alter_eventtype_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediaitem',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'En attente'), ('processing', 'En cours'), ('ready', 'Prêt'), ('failed', 'Échec')], db_index=True, default='ready', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='mediaitem',
+            name='processing_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='mediaitem',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -277,7 +277,6 @@ from django.core.exceptions import ValidationError
 from PIL import Image
 from io import BytesIO
 import os
-import subprocess
 from django.conf import settings
 
 
@@ -421,6 +420,18 @@ class MediaItem(models.Model):
         (VIDEO, "Vidéo"),
     )
 
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSING = "processing"
+    STATUS_READY = "ready"
+    STATUS_FAILED = "failed"
+
+    PROCESSING_STATUS_CHOICES = (
+        (STATUS_PENDING, "En attente"),
+        (STATUS_PROCESSING, "En cours"),
+        (STATUS_READY, "Prêt"),
+        (STATUS_FAILED, "Échec"),
+    )
+
     event = models.ForeignKey(
         Event,
         on_delete=models.CASCADE,
@@ -438,6 +449,16 @@ class MediaItem(models.Model):
     caption = models.CharField(max_length=255, blank=True)
     is_featured = models.BooleanField(default=False)
 
+    # Suivi du traitement en arriere-plan (news/media_processing.py).
+    processing_status = models.CharField(
+        max_length=20,
+        choices=PROCESSING_STATUS_CHOICES,
+        default=STATUS_READY,
+        db_index=True,
+    )
+    processing_error = models.TextField(blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -455,123 +476,32 @@ class MediaItem(models.Model):
     # SAVE
     # =========================
 
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-
-        if self.media_type == self.IMAGE and self.image and not self.thumbnail:
-            self._process_image()
-
-        # Evite une recompression video a chaque edition.
-        if self.media_type == self.VIDEO and self.video_file and not self.thumbnail:
-            self._process_video()
-
-    # =========================
-    # IMAGE PROCESSING
-    # =========================
-
-    def _process_image(self):
-
-        img = Image.open(self.image)
-
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGB")
-
-        original = img.copy()
-
-        base_name = os.path.basename(self.image.name)
-        file_root = os.path.splitext(base_name)[0]
-
-        # Full quality (lightbox/detail)
-        buffer_hd = BytesIO()
-        full = original.copy()
-        full.thumbnail(EVENT_IMAGE_MAX_SIZE, Image.LANCZOS)
-        full.save(
-            buffer_hd,
-            format="WEBP",
-            quality=EVENT_FULL_QUALITY,
-            method=6,
-            optimize=True,
-        )
-
-        self.image.save(
-            f"{file_root}.webp",
-            ContentFile(buffer_hd.getvalue()),
-            save=False
-        )
-
-        # Thumbnail premium (grilles galerie)
-        thumb = original.copy()
-        thumb.thumbnail(EVENT_MEDIA_THUMB_SIZE, Image.LANCZOS)
+    def _has_new_upload(self):
+        # Un fichier televerse n'est "committed" qu'apres son ecriture par pre_save.
+        source = self.image if self.media_type == self.IMAGE else self.video_file
+        return bool(source) and not source._committed
 
-        buffer_thumb = BytesIO()
-        thumb.save(
-            buffer_thumb,
-            format="WEBP",
-            quality=EVENT_THUMB_QUALITY,
-            method=6,
-            optimize=True,
-        )
+    def save(self, *args, **kwargs):
+        # Le fichier brut est stocke tel quel ; la conversion (WebP, miniature,
+        # transcodage ffmpeg) part en arriere-plan (news.media_processing).
+        needs_processing = self._has_new_upload()
+        if needs_processing:
+            self.processing_status = self.STATUS_PENDING
+            self.processing_error = ""
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "processing_status", "processing_error"}
 
-        self.thumbnail.save(
-            f"{file_root}_thumb.webp",
-            ContentFile(buffer_thumb.getvalue()),
-            save=False
-        )
+        super().save(*args, **kwargs)
 
-        super().save(update_fields=["image", "thumbnail"])
+        if needs_processing:
+            from .media_processing import schedule_media_processing
 
-    # =========================
-    # VIDEO PROCESSING (FFMPEG)
-    # =========================
+            schedule_media_processing(self)
 
-    def _process_video(self):
-
-        # Accepte un binaire present dans le PATH systeme (prod Linux/Windows).
-        ffmpeg_bin = FFMPEG_PATH
-
-        input_path = self.video_file.path
-        base = os.path.splitext(input_path)[0]
-
-        compressed_path = f"{base}_compressed.mp4"
-        thumbnail_path = f"{base}_thumb.jpg"
-
-        try:
-            # Compression vidéo
-            subprocess.run([
-                ffmpeg_bin,
-                "-i", input_path,
-                "-vcodec", "libx264",
-                "-crf", "23",
-                "-preset", "medium",
-                "-acodec", "aac",
-                compressed_path
-            ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-            # Génération thumbnail
-            subprocess.run([
-                ffmpeg_bin,
-                "-i", input_path,
-                "-ss", "00:00:01",
-                "-vframes", "1",
-                thumbnail_path
-            ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except FileNotFoundError:
-            return
-
-        if os.path.exists(compressed_path):
-            os.remove(input_path)
-            os.rename(compressed_path, input_path)
-
-        if os.path.exists(thumbnail_path):
-            with open(thumbnail_path, "rb") as f:
-                self.thumbnail.save(
-                    os.path.basename(thumbnail_path),
-                    ContentFile(f.read()),
-                    save=False
-                )
-            os.remove(thumbnail_path)
-
-        super().save(update_fields=["thumbnail"])
+    @property
+    def is_processing(self):
+        return self.processing_status in {self.STATUS_PENDING, self.STATUS_PROCESSING}
 
     # =========================
     # YOUTUBE EMBED SAFE
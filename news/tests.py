@@ -1,12 +1,20 @@
-from datetime import timedelta
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
+from PIL import Image
 
-from .models import Category, News, ResultSession
+from .media_processing import process_media_item_by_id
+from .models import Category, Event, EventType, MediaItem, News, ResultSession
+from .services import create_event_media_batch
 
 
 class NewsHtmxFlowTests(TestCase):
@@ -120,3 +128,97 @@ class ResultHtmxFlowTests(TestCase):
 		self.assertIn("HX-Trigger", response.headers)
 		self.assertIn("results:refresh", response.headers["HX-Trigger"])
 
+
+def _jpeg_upload(name="photo.jpg", size=(3000, 2000)):
+	buffer = BytesIO()
+	Image.new("RGB", size, (200, 40, 40)).save(buffer, format="JPEG")
+	return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+class MediaProcessingTests(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+		settings_override = override_settings(MEDIA_ROOT=self.media_root, BACKGROUND_TASKS_EAGER=True)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+
+		event_type = EventType.objects.create(name="Ceremonie", slug="ceremonie")
+		self.event = Event.objects.create(title="Remise des diplomes", event_type=event_type, event_date=date(2026, 7, 1))
+
+	def test_upload_is_stored_raw_then_processed_after_commit(self):
+		with self.captureOnCommitCallbacks(execute=False) as callbacks:
+			result = create_event_media_batch(self.event, [_jpeg_upload()])
+
+		media = result["created"][0]
+		media.refresh_from_db()
+		self.assertEqual(media.processing_status, MediaItem.STATUS_PENDING)
+		self.assertTrue(media.image.name.endswith(".jpg"))
+		self.assertFalse(media.thumbnail)
+
+		for callback in callbacks:
+			callback()
+
+		media.refresh_from_db()
+		self.assertEqual(media.processing_status, MediaItem.STATUS_READY)
+		self.assertIsNotNone(media.processed_at)
+		self.assertTrue(media.image.name.endswith(".webp"))
+		with Image.open(media.thumbnail) as thumb:
+			self.assertLessEqual(max(thumb.size), 960)
+
+	def test_editing_caption_does_not_reprocess(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			media = MediaItem.objects.create(event=self.event, media_type=MediaItem.IMAGE, image=_jpeg_upload())
+		media.refresh_from_db()
+
+		with patch("news.media_processing.schedule_media_processing") as schedule:
+			media.caption = "Nouvelle legende"
+			media.save(update_fields=["caption"])
+
+		schedule.assert_not_called()
+		media.refresh_from_db()
+		self.assertEqual(media.processing_status, MediaItem.STATUS_READY)
+
+	@override_settings(FFMPEG_PATH="/nonexistent/ffmpeg")
+	def test_video_failure_is_recorded(self):
+		upload = SimpleUploadedFile("clip.mp4", b"not really a video", content_type="video/mp4")
+		with self.captureOnCommitCallbacks(execute=True):
+			media = MediaItem.objects.create(event=self.event, media_type=MediaItem.VIDEO, video_file=upload)
+
+		media.refresh_from_db()
+		self.assertEqual(media.processing_status, MediaItem.STATUS_FAILED)
+		self.assertIn("ffmpeg introuvable", media.processing_error)
+		self.assertTrue(media.video_file)
+
+	def test_public_gallery_pages_skip_media_still_processing(self):
+		with self.captureOnCommitCallbacks(execute=False):
+			MediaItem.objects.create(event=self.event, media_type=MediaItem.IMAGE, image=_jpeg_upload())
+			MediaItem.objects.create(
+				event=self.event,
+				media_type=MediaItem.VIDEO,
+				video_file=SimpleUploadedFile("clip.mov", b"raw video", content_type="video/quicktime"),
+			)
+		self.assertEqual(MediaItem.objects.filter(processing_status=MediaItem.STATUS_PENDING).count(), 2)
+
+		response = self.client.get(reverse("news:event_detail", args=[self.event.slug]))
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.context["images"], [])
+		self.assertEqual(response.context["videos"], [])
+
+		response = self.client.get(reverse("news:event_list"), {"mode": "photos"})
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(list(response.context["photos"]), [])
+
+	@override_settings(PUBLIC_PAGE_CACHE_ENABLED=True)
+	def test_processed_media_purges_the_cached_home_page(self):
+		cache.clear()
+		with self.captureOnCommitCallbacks(execute=False):
+			media = MediaItem.objects.create(event=self.event, media_type=MediaItem.IMAGE, image=_jpeg_upload())
+		self.client.get(reverse("core:home"))
+		self.assertEqual(self.client.get(reverse("core:home"))["X-Page-Cache"], "hit")
+
+		# Le worker ecrit par update() : seule sa purge explicite invalide la page.
+		with self.captureOnCommitCallbacks(execute=True):
+			process_media_item_by_id(media.pk)
+
+		self.assertEqual(self.client.get(reverse("core:home"))["X-Page-Cache"], "miss")
@@ -1,4 +1,7 @@
 from django.urls import path
+
+from core.page_cache import public_page_cache
+
 from .views import (
     NewsListView,
     NewsListFragmentView,
@@ -18,12 +21,12 @@ app_name = "news"
 urlpatterns = [
 
     # HTMX NEWS (DOIT ETRE AVANT LE SLUG)
-    path("_htmx/list/", NewsListFragmentView.as_view(), name="list_fragment"),
-    path("_htmx/sidebar/", NewsSidebarFragmentView.as_view(), name="sidebar_fragment"),
+    path("_htmx/list/", public_page_cache("news")(NewsListFragmentView.as_view()), name="list_fragment"),
+    path("_htmx/sidebar/", public_page_cache("news")(NewsSidebarFragmentView.as_view()), name="sidebar_fragment"),
     path("_htmx/poll/", NewsPollingView.as_view(), name="poll"),
 
     # LISTE ACTUALITÉS
-    path("", NewsListView.as_view(), name="list"),
+    path("", public_page_cache("news")(NewsListView.as_view()), name="list"),
 
     # PORTAIL RÉSULTATS
     path("resultats/", ResultSessionListView.as_view(), name="result_list"),
@@ -2,7 +2,7 @@ import json
 
 from django.http import HttpResponse
 from django.shortcuts import render, get_object_or_404
-from django.views.generic import ListView, DetailView
+from django.views.generic import DetailView, ListView, TemplateView, View
 from django.core.paginator import Paginator
 from django.db.models import Q, Count, Prefetch
 from django.utils import timezone
@@ -25,6 +25,57 @@ from .filters import filter_news
 # =====================================================
 
 
+def _querystring_context(request):
+    params = request.GET.copy()
+    for key in ["page", "fragment", "_"]:
+        if key in params:
+            params.pop(key)
+
+    active_querystring = params.urlencode()
+    return {
+        "active_querystring": active_querystring,
+        "active_query_prefix": f"{active_querystring}&" if active_querystring else "",
+    }
+
+
+def _news_sidebar_context():
+    published_qs = (
+        News.published
+        .select_related("categorie", "program")
+        .order_by("-published_at")
+    )
+    return {
+        "last_updated_at": timezone.now(),
+        "featured_news": published_qs[:3],
+        "recent_news": published_qs[:5],
+    }
+
+
+def _latest_news_timestamp():
+    return (
+        News.published
+        .order_by("-updated_at")
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+
+
+def _poll_response(request, latest, event):
+    """204 ; HX-Trigger `event` quand `latest` est posterieur au parametre since."""
+    since_raw = request.GET.get("since")
+    since = parse_datetime(since_raw) if since_raw else None
+
+    if since and timezone.is_naive(since):
+        since = timezone.make_aware(since, timezone.get_current_timezone())
+
+    response = HttpResponse(status=204)
+    if latest and (since is None or latest > since):
+        response["HX-Trigger"] = json.dumps({
+            event: {"latest": latest.isoformat()}
+        })
+    return response
+
+
 class NewsListView(ListView):
     template_name = "news/list.html"
     context_object_name = "news"
@@ -40,37 +91,13 @@ class NewsListView(ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        params = self.request.GET.copy()
-        for key in ["page", "fragment", "_"]:
-            if key in params:
-                params.pop(key)
-
-        active_querystring = params.urlencode()
-
-        published_qs = (
-            News.published
-            .select_related("categorie", "program")
-            .order_by("-published_at")
-        )
-
-        latest_news = (
-            News.published
-            .order_by("-updated_at")
-            .only("updated_at")
-            .first()
-        )
-
         context.update({
             "categories": Category.objects.filter(is_active=True),
             "current_category": self.request.GET.get("category"),
             "current_search": self.request.GET.get("q", ""),
-            "active_querystring": active_querystring,
-            "active_query_prefix": f"{active_querystring}&" if active_querystring else "",
-            "last_updated_at": timezone.now(),
-
-            "featured_news": published_qs[:3],
-            "recent_news": published_qs[:5],
-            "latest_news_timestamp": latest_news.updated_at if latest_news else None,
+            **_querystring_context(self.request),
+            **_news_sidebar_context(),
+            "latest_news_timestamp": _latest_news_timestamp(),
         })
 
         return context
@@ -97,30 +124,33 @@ class NewsListView(ListView):
 
 
 class NewsListFragmentView(NewsListView):
+    """Liste paginee seule : ni categories, ni colonne laterale."""
+
     template_name = "news/fragments/news_list_fragment.html"
 
+    def get_context_data(self, **kwargs):
+        context = super(NewsListView, self).get_context_data(**kwargs)
+        context.update(_querystring_context(self.request))
+        return context
 
-class NewsSidebarFragmentView(NewsListView):
-    template_name = "news/fragments/news_right_sidebar_fragment.html"
 
+class NewsSidebarFragmentView(TemplateView):
+    """Colonne laterale seule : la liste filtree n'est pas recalculee."""
 
-class NewsPollingView(NewsListView):
-    def render_to_response(self, context, **response_kwargs):
-        since_raw = self.request.GET.get("since")
-        since = parse_datetime(since_raw) if since_raw else None
-        latest = context.get("latest_news_timestamp")
+    template_name = "news/fragments/news_right_sidebar_fragment.html"
 
-        if since and timezone.is_naive(since):
-            since = timezone.make_aware(since, timezone.get_current_timezone())
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update({
+            **_querystring_context(self.request),
+            **_news_sidebar_context(),
+        })
+        return context
 
-        if latest and (since is None or latest > since):
-            response = HttpResponse(status=204)
-            response["HX-Trigger"] = json.dumps({
-                "news:refresh": {"latest": latest.isoformat()}
-            })
-            return response
 
-        return HttpResponse(status=204)
+class NewsPollingView(View):
+    def get(self, request, *args, **kwargs):
+        return _poll_response(request, _latest_news_timestamp(), "news:refresh")
 
 
 # =====================================================
@@ -223,6 +253,16 @@ class ProgramDetailView(DetailView):
         return context
 
 
+def _latest_results_timestamp():
+    return (
+        ResultSession.objects
+        .filter(is_published=True)
+        .order_by("-created_at")
+        .values_list("created_at", flat=True)
+        .first()
+    )
+
+
 class ResultSessionListView(ListView):
     model = ResultSession
     template_name = "news/result_list.html"
@@ -309,13 +349,7 @@ class ResultSessionListView(ListView):
             "active_querystring": active_querystring,
             "active_query_prefix": f"{active_querystring}&" if active_querystring else "",
             "last_updated_at": timezone.now(),
-            "latest_results_timestamp": (
-                ResultSession.objects
-                .filter(is_published=True)
-                .order_by("-created_at")
-                .values_list("created_at", flat=True)
-                .first()
-            ),
+            "latest_results_timestamp": _latest_results_timestamp(),
         })
 
         return context
@@ -339,23 +373,9 @@ class ResultSessionListFragmentView(ResultSessionListView):
     template_name = "news/fragments/result_list_fragment.html"
 
 
-class ResultSessionPollingView(ResultSessionListView):
-    def render_to_response(self, context, **response_kwargs):
-        since_raw = self.request.GET.get("since")
-        since = parse_datetime(since_raw) if since_raw else None
-        latest = context.get("latest_results_timestamp")
-
-        if since and timezone.is_naive(since):
-            since = timezone.make_aware(since, timezone.get_current_timezone())
-
-        if latest and (since is None or latest > since):
-            response = HttpResponse(status=204)
-            response["HX-Trigger"] = json.dumps({
-                "results:refresh": {"latest": latest.isoformat()}
-            })
-            return response
-
-        return HttpResponse(status=204)
+class ResultSessionPollingView(View):
+    def get(self, request, *args, **kwargs):
+        return _poll_response(request, _latest_results_timestamp(), "results:refresh")
 
 
 # ==========================================================
@@ -434,6 +454,7 @@ def event_list_view(request):
             MediaItem.objects
             .filter(
                 media_type=MediaItem.IMAGE,
+                processing_status=MediaItem.STATUS_READY,
                 event__is_published=True
             )
             .select_related("event", "event__event_type")
@@ -472,7 +493,10 @@ def event_detail_view(request, slug):
         .prefetch_related(
             Prefetch(
                 "media_items",
-                queryset=MediaItem.objects.order_by("-is_featured", "-created_at")
+                # Medias en attente ou en echec de traitement : pas encore de miniature.
+                queryset=MediaItem.objects
+                .filter(processing_status=MediaItem.STATUS_READY)
+                .order_by("-is_featured", "-created_at")
             )
         ),
         slug=slug,
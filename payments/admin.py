@@ -5,6 +5,7 @@ from django.contrib import admin, messages
 from django.utils.html import format_html
 
 from .models import FinancialLog, Payment, PaymentCorrection
+from .services.validation import validate_payments_bulk
 
 
 @admin.register(Payment)
@@ -103,24 +104,16 @@ class PaymentAdmin(admin.ModelAdmin):
     def validate_payments(self, request, queryset):
         """
         Action admin minimale :
-        - passe le paiement à VALIDATED
-        - TOUT le reste est géré par Payment.save()
+        - passe les paiements à VALIDATED en un seul lot
+        - le reste (reçu, étudiant, e-mails) suit après commit
         """
 
-        validated_count = 0
+        report = validate_payments_bulk(queryset.values_list("pk", flat=True))
 
-        for payment in queryset:
-            if payment.status != "pending":
-                continue
-
-            payment.status = "validated"
-            payment.save(update_fields=["status"])
-            validated_count += 1
-
-        if validated_count:
+        if report.validated:
             self.message_user(
                 request,
-                f"{validated_count} paiement(s) validé(s) avec succès.",
+                f"{report.validated} paiement(s) validé(s) avec succès.",
                 level=messages.SUCCESS
             )
         else:
@@ -130,6 +123,14 @@ class PaymentAdmin(admin.ModelAdmin):
                 level=messages.WARNING
             )
 
+        for result in report.results:
+            if result.outcome == "failed":
+                self.message_user(
+                    request,
+                    f"Paiement #{result.payment_id} : {result.message}",
+                    level=messages.ERROR
+                )
+
     # ==================================================
     # MÉTHODES D’AFFICHAGE
     # ==================================================
@@ -186,6 +187,8 @@ class PaymentAdmin(admin.ModelAdmin):
                 'Télécharger</a>',
                 obj.receipt_pdf.url
             )
+        if obj.receipt_status != Payment.RECEIPT_NONE:
+            return obj.get_receipt_status_display()
         return "-"
 
 
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from payments.models import Payment
+from payments.services.validation import get_payments_needing_post_validation, process_validated_payment
+
+
+class Command(BaseCommand):
+    help = (
+        "Rejoue la phase post-validation des paiements (recu PDF, creation etudiant, "
+        "e-mails) restee en attente ou en echec, par exemple apres un redemarrage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset-processing",
+            action="store_true",
+            help="Remet en attente les recus bloques 'en cours' (a utiliser quand aucun worker ne tourne).",
+        )
+
+    def handle(self, *args, **options):
+        reset = 0
+        if options["reset_processing"]:
+            reset = Payment.objects.filter(
+                receipt_status=Payment.RECEIPT_PROCESSING,
+            ).update(receipt_status=Payment.RECEIPT_PENDING)
+
+        processed = 0
+        for payment_id in get_payments_needing_post_validation().values_list("pk", flat=True).iterator():
+            process_validated_payment(payment_id)
+            processed += 1
+
+        failed = Payment.objects.filter(receipt_status=Payment.RECEIPT_FAILED).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Paiements retraites : {processed} (dont {reset} recu(s) bloque(s) relance(s)) ; "
+            f"recus en echec restants : {failed}."
+        ))
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payments.services.rollups import rebuild_payment_rollups
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les rollups journaliers des paiements (par annexe) depuis la table Payment."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--branch",
+            type=int,
+            action="append",
+            dest="branch_ids",
+            help="Limite la reconstruction a une annexe (option repetable).",
+        )
+        parser.add_argument(
+            "--since",
+            help="Ne reconstruit que les jours a partir de cette date (AAAA-MM-JJ).",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = datetime.strptime(options["since"], "%Y-%m-%d").date()
+            except ValueError as exc:
+                raise CommandError("--since doit etre au format AAAA-MM-JJ.") from exc
+
+        written = rebuild_payment_rollups(
+            branch_ids=options["branch_ids"],
+            since=since,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollups paiements reconstruits : {written} ligne(s) annexe/jour."
+        ))
@@ -0,0 +1,44 @@
+# Generated manually for the per-branch daily payment rollup.
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("branches", "0003_branch_cash_reserve_target"),
+        ("payments", "0006_paymentcorrection_financiallog"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PaymentDailyRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField(db_index=True)),
+                ("validated_total", models.BigIntegerField(default=0)),
+                ("validated_count", models.IntegerField(default=0)),
+                ("pending_total", models.BigIntegerField(default=0)),
+                ("pending_count", models.IntegerField(default=0)),
+                ("cancelled_count", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "branch",
+                    models.ForeignKey(
+                        db_index=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="payment_rollups",
+                        to="branches.branch",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-day"],
+                "indexes": [models.Index(fields=["day", "branch"], name="payments_pa_day_c761e4_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("branch", "day"), name="payment_rollup_unique_branch_day"),
+                ],
+            },
+        ),
+    ]
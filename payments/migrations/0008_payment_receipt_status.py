@@ -0,0 +1,50 @@
+# Generated manually for the two-phase payment validation pipeline.
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_receipts(apps, schema_editor):
+    Payment = apps.get_model("payments", "Payment")
+    validated = Payment.objects.filter(status="validated")
+    # Paiements deja traites par l'ancien pipeline synchrone.
+    validated.update(post_validation_done_at=F("paid_at"))
+    validated.exclude(receipt_pdf="").exclude(receipt_pdf__isnull=True).update(receipt_status="ready")
+    validated.filter(models.Q(receipt_pdf="") | models.Q(receipt_pdf__isnull=True)).update(receipt_status="pending")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0007_paymentdailyrollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="receipt_status",
+            field=models.CharField(
+                choices=[
+                    ("none", "Non applicable"),
+                    ("pending", "En attente"),
+                    ("processing", "En cours de génération"),
+                    ("ready", "Disponible"),
+                    ("failed", "Échec"),
+                ],
+                db_index=True,
+                default="none",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="receipt_error",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="post_validation_done_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_receipts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0008_payment_receipt_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="post_validation_started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
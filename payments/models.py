@@ -1,6 +1,5 @@
 from django.db import models, transaction
 from django.utils import timezone
-from django.core.files.base import ContentFile
 from django.core.exceptions import ValidationError
 from django.db.models import Sum
 from django.contrib.auth import get_user_model
@@ -18,6 +17,7 @@ from students.services.email import (
     send_payment_confirmation_email
 )
 from payments.services.workflows import run_first_payment_validated_workflow
+from core.background import run_after_commit
 
 import secrets
 import random
@@ -159,6 +159,20 @@ class Payment(models.Model):
         (STATUS_CANCELLED, "Annulé"),
     )
 
+    RECEIPT_NONE = "none"
+    RECEIPT_PENDING = "pending"
+    RECEIPT_PROCESSING = "processing"
+    RECEIPT_READY = "ready"
+    RECEIPT_FAILED = "failed"
+
+    RECEIPT_STATUS_CHOICES = (
+        (RECEIPT_NONE, "Non applicable"),
+        (RECEIPT_PENDING, "En attente"),
+        (RECEIPT_PROCESSING, "En cours de génération"),
+        (RECEIPT_READY, "Disponible"),
+        (RECEIPT_FAILED, "Échec"),
+    )
+
     inscription = models.ForeignKey(
         Inscription,
         on_delete=models.CASCADE,
@@ -216,6 +230,21 @@ class Payment(models.Model):
         blank=True
     )
 
+    # Phase 2 (hors transaction) : rendu du reçu puis actions post-validation.
+    receipt_status = models.CharField(
+        max_length=20,
+        choices=RECEIPT_STATUS_CHOICES,
+        default=RECEIPT_NONE,
+        db_index=True
+    )
+
+    receipt_error = models.TextField(blank=True)
+
+    # Actions post-validation (étudiant, e-mails, workflow) : prise en charge
+    # par un job (started_at), puis terminées (done_at) une fois réussies.
+    post_validation_started_at = models.DateTimeField(null=True, blank=True)
+    post_validation_done_at = models.DateTimeField(null=True, blank=True)
+
     paid_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -284,15 +313,23 @@ class Payment(models.Model):
 
     def save(self, *args, **kwargs):
 
+        from payments.services.rollups import (
+            apply_payment_rollup_delta,
+            payment_rollup_state,
+        )
+        from payments.services.validation import process_validated_payment
+
         previous_status = None
+        previous_rollup_state = None
 
         if self.pk:
 
-            previous_status = (
-                Payment.objects.only("status")
+            previous = (
+                Payment.objects.only("status", "amount", "paid_at")
                 .get(pk=self.pk)
-                .status
             )
+            previous_status = previous.status
+            previous_rollup_state = payment_rollup_state(previous)
 
             if previous_status == self.STATUS_VALIDATED:
                 raise ValueError(
@@ -314,6 +351,12 @@ class Payment(models.Model):
 
             super().save(*args, **kwargs)
 
+            apply_payment_rollup_delta(
+                branch_id=inscription.candidature.branch_id,
+                before=previous_rollup_state,
+                after=payment_rollup_state(self),
+            )
+
             just_validated = (
                 self.status == self.STATUS_VALIDATED
                 and previous_status != self.STATUS_VALIDATED
@@ -329,57 +372,64 @@ class Payment(models.Model):
             inscription.update_financial_state()
 
             # ==================================================
-            # GÉNÉRATION REÇU
+            # NUMÉRO DE REÇU (le PDF est rendu après commit)
             # ==================================================
 
             if not self.receipt_number:
-
                 self.receipt_number = generate_receipt_number(self)
 
-                cand = inscription.candidature
-                programme = cand.programme
-
-                pdf_bytes = generate_esfe_pdf("esfe_receipt", {
-                    "receipt_number": self.receipt_number,
-                    "date": self.paid_at.strftime("%d %B %Y"),
-                    "academic_year": cand.academic_year,
-                    "student_name": f"{cand.last_name} {cand.first_name}",
-                    "student_matricule": f"CAND-{cand.academic_year[:4]}-{cand.id:05d}",
-                    "programme": programme.title if programme else "",
-                    "level": getattr(programme, "cycle", {}).name if programme and hasattr(programme, "cycle") else "",
-                    "items": [
-                        {
-                            "label": f"Frais d'inscription",
-                            "quantity": "1",
-                            "unit_price": f"{inscription.amount_due:,}".replace(",", " "),
-                            "total": f"{inscription.amount_due:,} FCFA".replace(",", " "),
-                        },
-                        {
-                            "label": "Paiement effectué",
-                            "quantity": "1",
-                            "unit_price": f"{self.amount:,}".replace(",", " "),
-                            "total": f"{self.amount:,} FCFA".replace(",", " "),
-                        },
-                    ],
-                    "total_amount": f"{self.amount:,}".replace(",", " "),
-                    "payment_method": self.get_method_display() if hasattr(self, "get_method_display") else "",
-                    "payment_reference": self.reference or "",
-                })
-
-                self.receipt_pdf.save(
-                    f"receipt-{self.receipt_number}.pdf",
-                    ContentFile(pdf_bytes),
-                    save=False
-                )
+            self.receipt_status = self.RECEIPT_PENDING
 
-                super().save(
-                    update_fields=["receipt_number", "receipt_pdf"]
-                )
+            super().save(
+                update_fields=["receipt_number", "receipt_status"]
+            )
 
-        transaction.on_commit(
-            lambda: self._post_commit_actions()
+        # Rendu du reçu, stockage, création étudiant et e-mails : hors du
+        # verrou sur l'inscription, en arrière-plan une fois la transaction
+        # validée (payments.services.validation).
+        run_after_commit(
+            process_validated_payment,
+            self.pk,
+            name=f"payment-validated:{self.pk}",
         )
 
+    # ==================================================
+    # REÇU PDF
+    # ==================================================
+
+    def build_receipt_pdf(self):
+
+        inscription = self.inscription
+        cand = inscription.candidature
+        programme = cand.programme
+
+        return generate_esfe_pdf("esfe_receipt", {
+            "receipt_number": self.receipt_number,
+            "date": self.paid_at.strftime("%d %B %Y"),
+            "academic_year": cand.academic_year,
+            "student_name": f"{cand.last_name} {cand.first_name}",
+            "student_matricule": f"CAND-{cand.academic_year[:4]}-{cand.id:05d}",
+            "programme": programme.title if programme else "",
+            "level": getattr(programme, "cycle", {}).name if programme and hasattr(programme, "cycle") else "",
+            "items": [
+                {
+                    "label": f"Frais d'inscription",
+                    "quantity": "1",
+                    "unit_price": f"{inscription.amount_due:,}".replace(",", " "),
+                    "total": f"{inscription.amount_due:,} FCFA".replace(",", " "),
+                },
+                {
+                    "label": "Paiement effectué",
+                    "quantity": "1",
+                    "unit_price": f"{self.amount:,}".replace(",", " "),
+                    "total": f"{self.amount:,} FCFA".replace(",", " "),
+                },
+            ],
+            "total_amount": f"{self.amount:,}".replace(",", " "),
+            "payment_method": self.get_method_display() if hasattr(self, "get_method_display") else "",
+            "payment_reference": self.reference or "",
+        })
+
     # ==================================================
     # ACTIONS APRÈS COMMIT
     # ==================================================
@@ -405,6 +455,55 @@ class Payment(models.Model):
         )
 
 
+# ==================================================
+# ROLLUP JOURNALIER (DASHBOARDS FINANCE)
+# ==================================================
+
+class PaymentDailyRollup(models.Model):
+    """
+    Agregat journalier des paiements par annexe.
+
+    Tenu a jour par payments.services.rollups a chaque transition de
+    statut ; reconstruit par la commande rebuild_payment_rollups.
+    """
+
+    branch = models.ForeignKey(
+        Branch,
+        on_delete=models.CASCADE,
+        related_name="payment_rollups",
+        db_index=True
+    )
+
+    day = models.DateField(db_index=True)
+
+    validated_total = models.BigIntegerField(default=0)
+    validated_count = models.IntegerField(default=0)
+
+    pending_total = models.BigIntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+
+    cancelled_count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-day"]
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["branch", "day"],
+                name="payment_rollup_unique_branch_day",
+            ),
+        ]
+
+        indexes = [
+            models.Index(fields=["day", "branch"]),
+        ]
+
+    def __str__(self):
+        return f"Rollup {self.branch_id} {self.day:%Y-%m-%d}"
+
+
 class PaymentCorrection(models.Model):
     payment = models.ForeignKey(
         Payment,
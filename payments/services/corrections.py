@@ -2,7 +2,9 @@ from django.core.exceptions import ValidationError
 from django.db import transaction
 
 from payments.models import FinancialLog, Payment, PaymentCorrection
+from payments.services.rollups import apply_payment_rollup_delta, payment_rollup_state
 from payments.services.workflows import sync_payment_finance_history
+from superadmin.search import index_payments
 
 
 def correct_validated_payment_amount(*, payment, new_amount, reason, actor=None):
@@ -43,8 +45,15 @@ def correct_validated_payment_amount(*, payment, new_amount, reason, actor=None)
             corrected_by=actor if getattr(actor, "is_authenticated", False) else None,
         )
 
+        previous_rollup_state = payment_rollup_state(locked_payment)
         Payment.objects.filter(pk=locked_payment.pk).update(amount=new_amount)
         locked_payment.amount = new_amount
+        index_payments([locked_payment])
+        apply_payment_rollup_delta(
+            branch_id=branch.pk,
+            before=previous_rollup_state,
+            after=payment_rollup_state(locked_payment),
+        )
 
         locked_payment.inscription.update_financial_state()
         movement = sync_payment_finance_history(payment=locked_payment, actor=actor)
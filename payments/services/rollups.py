@@ -0,0 +1,223 @@
+"""
+Rollup journalier des paiements par annexe.
+
+Les dashboards finance (refresh HTMX, DG, graphiques mensuels) lisent
+PaymentDailyRollup au lieu d'agreger la table Payment complete a chaque
+rafraichissement. Chaque transition de paiement applique un delta sur la
+ligne (annexe, jour) concernee ; rebuild_payment_rollups reconstruit
+l'historique a partir des paiements bruts.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.utils import timezone
+
+from inscriptions.models import Inscription
+from payments.models import Payment, PaymentDailyRollup
+
+
+_STATUS_FIELDS = {
+    Payment.STATUS_VALIDATED: ("validated_total", "validated_count"),
+    Payment.STATUS_PENDING: ("pending_total", "pending_count"),
+    Payment.STATUS_CANCELLED: (None, "cancelled_count"),
+}
+
+
+def payment_rollup_state(payment):
+    """
+    Etat d'un paiement tel que vu par le rollup : (statut, jour, montant).
+    """
+    if payment is None or not payment.paid_at:
+        return None
+    return (
+        payment.status,
+        timezone.localdate(payment.paid_at),
+        int(payment.amount or 0),
+    )
+
+
+def _add_state(deltas, state, sign):
+    if state is None:
+        return
+    status, day, amount = state
+    total_field, count_field = _STATUS_FIELDS.get(status, (None, None))
+    if count_field is None:
+        return
+    bucket = deltas[day]
+    bucket[count_field] += sign
+    if total_field:
+        bucket[total_field] += sign * amount
+
+
+def apply_payment_rollup_delta(*, branch_id, before=None, after=None):
+    """
+    Retire l'etat `before` et ajoute l'etat `after` dans les rollups.
+
+    `before` / `after` sont des tuples issus de payment_rollup_state
+    (None pour une creation ou une suppression).
+    """
+    apply_payment_rollup_deltas([(branch_id, before, after)])
+
+
+def apply_payment_rollup_deltas(changes):
+    """
+    Version groupee : `changes` est un iterable de (branch_id, before, after).
+
+    Les deltas sont cumules par (annexe, jour) avant ecriture, de sorte
+    qu'une validation de masse ne touche qu'une fois chaque ligne de rollup.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for branch_id, before, after in changes:
+        if not branch_id or before == after:
+            continue
+        per_day = defaultdict(lambda: defaultdict(int))
+        _add_state(per_day, before, -1)
+        _add_state(per_day, after, 1)
+        for day, fields in per_day.items():
+            bucket = deltas[(branch_id, day)]
+            for field, value in fields.items():
+                bucket[field] += value
+
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        for (branch_id, day), fields in sorted(deltas.items()):
+            updates = {
+                field: F(field) + value
+                for field, value in fields.items()
+                if value
+            }
+            if not updates:
+                continue
+            rollup, _created = PaymentDailyRollup.objects.get_or_create(
+                branch_id=branch_id,
+                day=day,
+            )
+            PaymentDailyRollup.objects.filter(pk=rollup.pk).update(
+                updated_at=timezone.now(),
+                **updates,
+            )
+
+
+def get_payment_branch_id(payment):
+    if Payment.inscription.is_cached(payment):
+        return payment.inscription.candidature.branch_id
+    return (
+        Inscription.objects
+        .filter(pk=payment.inscription_id)
+        .values_list("candidature__branch_id", flat=True)
+        .first()
+    )
+
+
+# ==========================================================
+# LECTURE
+# ==========================================================
+
+def get_rollup_queryset(branch_ids=None):
+    qs = PaymentDailyRollup.objects.all()
+    if branch_ids is not None:
+        qs = qs.filter(branch_id__in=branch_ids)
+    return qs
+
+
+def rollup_totals(qs, *, start=None, end=None):
+    """
+    Totaux valides / en attente sur une plage de jours (bornes incluses).
+    """
+    if start is not None:
+        qs = qs.filter(day__gte=start)
+    if end is not None:
+        qs = qs.filter(day__lte=end)
+    return qs.aggregate(
+        total=Coalesce(Sum("validated_total"), 0),
+        count=Coalesce(Sum("validated_count"), 0),
+        pending_total=Coalesce(Sum("pending_total"), 0),
+        pending_count=Coalesce(Sum("pending_count"), 0),
+    )
+
+
+def rollup_monthly(qs, *, start=None):
+    """
+    Revenus et nombre de paiements valides par mois :
+    {date(1er du mois): {"total": int, "count": int}}.
+    """
+    if start is not None:
+        qs = qs.filter(day__gte=start)
+    rows = (
+        qs.annotate(month=TruncMonth("day"))
+        .values("month")
+        .annotate(
+            total=Sum("validated_total"),
+            count=Sum("validated_count"),
+        )
+    )
+    return {
+        row["month"].replace(day=1): {
+            "total": int(row["total"] or 0),
+            "count": int(row["count"] or 0),
+        }
+        for row in rows
+        if row["month"]
+    }
+
+
+# ==========================================================
+# RECONSTRUCTION
+# ==========================================================
+
+def rebuild_payment_rollups(*, branch_ids=None, since=None):
+    """
+    Reconstruit les rollups depuis la table Payment.
+
+    Retourne le nombre de lignes (annexe, jour) ecrites.
+    """
+    payments = Payment.objects.all()
+    rollups = PaymentDailyRollup.objects.all()
+    if branch_ids is not None:
+        payments = payments.filter(inscription__candidature__branch_id__in=branch_ids)
+        rollups = rollups.filter(branch_id__in=branch_ids)
+    if since is not None:
+        payments = payments.filter(paid_at__date__gte=since)
+        rollups = rollups.filter(day__gte=since)
+
+    rows = (
+        payments
+        .annotate(
+            branch_key=F("inscription__candidature__branch_id"),
+            day_key=TruncDate("paid_at"),
+        )
+        .values("branch_key", "day_key")
+        .annotate(
+            validated_total=Coalesce(Sum("amount", filter=Q(status=Payment.STATUS_VALIDATED)), 0),
+            validated_count=Count("id", filter=Q(status=Payment.STATUS_VALIDATED)),
+            pending_total=Coalesce(Sum("amount", filter=Q(status=Payment.STATUS_PENDING)), 0),
+            pending_count=Count("id", filter=Q(status=Payment.STATUS_PENDING)),
+            cancelled_count=Count("id", filter=Q(status=Payment.STATUS_CANCELLED)),
+        )
+        .order_by()
+    )
+
+    objects = [
+        PaymentDailyRollup(
+            branch_id=row["branch_key"],
+            day=row["day_key"],
+            validated_total=row["validated_total"],
+            validated_count=row["validated_count"],
+            pending_total=row["pending_total"],
+            pending_count=row["pending_count"],
+            cancelled_count=row["cancelled_count"],
+        )
+        for row in rows
+        if row["branch_key"] and row["day_key"]
+    ]
+
+    with transaction.atomic():
+        rollups.delete()
+        PaymentDailyRollup.objects.bulk_create(objects, batch_size=500)
+
+    return len(objects)
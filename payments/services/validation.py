@@ -0,0 +1,317 @@
+"""
+Validation des paiements en deux phases.
+
+Phase 1 (Payment.save, sous verrou sur l'inscription) : statut, numéro de
+reçu, état financier. Rien d'autre ne doit allonger cette transaction.
+
+Phase 2 (ce module, après commit, en arrière-plan) : rendu du reçu PDF,
+stockage, création de l'étudiant, e-mails et workflow du premier paiement.
+Chaque étape est prise en charge par une mise à jour conditionnelle
+(receipt_status, post_validation_started_at) : rejouer le job — deux fois,
+ou via la commande process_payment_receipts — ne duplique rien. Les
+actions post-validation ne sont marquées terminées (post_validation_done_at)
+qu'après leur succès : un job interrompu en cours d'envoi est repris par
+la commande une fois sa prise en charge expirée.
+
+validate_payments_bulk applique la phase 1 à tout un lot (actions groupées
+superadmin et admin finance) : un verrou ordonné sur les inscriptions, un
+agrégat groupé, des écritures groupées, puis une phase 2 par paiement.
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from core.background import run_after_commit
+from core.cache import invalidate_tags
+from inscriptions.models import Inscription
+from payments.models import Payment
+from payments.services.receipt import generate_receipt_number
+from payments.services.rollups import apply_payment_rollup_deltas, payment_rollup_state
+from superadmin.search import index_payments
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_RECEIPT_STATUSES = (Payment.RECEIPT_PENDING, Payment.RECEIPT_FAILED)
+# Au-delà, une prise en charge sans fin est celle d'un job interrompu.
+POST_VALIDATION_CLAIM_TIMEOUT = timedelta(minutes=15)
+
+
+def render_payment_receipt(payment):
+    """Génère et stocke le PDF du reçu. Retourne True si ce job l'a produit."""
+    claimed = Payment.objects.filter(
+        pk=payment.pk,
+        status=Payment.STATUS_VALIDATED,
+        receipt_status__in=RETRYABLE_RECEIPT_STATUSES,
+    ).update(receipt_status=Payment.RECEIPT_PROCESSING, receipt_error="")
+    if not claimed:
+        return False
+
+    try:
+        pdf_bytes = payment.build_receipt_pdf()
+        payment.receipt_pdf.save(
+            f"receipt-{payment.receipt_number}.pdf",
+            ContentFile(pdf_bytes),
+            save=False,
+        )
+    except Exception as exc:
+        logger.exception("Rendu du recu en echec pour le paiement %s", payment.pk)
+        Payment.objects.filter(pk=payment.pk).update(
+            receipt_status=Payment.RECEIPT_FAILED,
+            receipt_error=str(exc)[:2000],
+        )
+        payment.receipt_status = Payment.RECEIPT_FAILED
+        return False
+
+    # update() et non save() : un paiement validé refuse toute modification.
+    Payment.objects.filter(pk=payment.pk).update(
+        receipt_pdf=payment.receipt_pdf.name,
+        receipt_status=Payment.RECEIPT_READY,
+    )
+    payment.receipt_status = Payment.RECEIPT_READY
+    return True
+
+
+def run_post_validation_actions(payment):
+    """Création étudiant, e-mails et workflow, une seule fois par paiement."""
+    now = timezone.now()
+    claimed = Payment.objects.filter(
+        Q(post_validation_started_at__isnull=True)
+        | Q(post_validation_started_at__lt=now - POST_VALIDATION_CLAIM_TIMEOUT),
+        pk=payment.pk,
+        post_validation_done_at__isnull=True,
+    ).update(post_validation_started_at=now)
+    if not claimed:
+        return False
+
+    try:
+        payment._post_commit_actions()
+    except Exception:
+        # Libère la prise en charge : le job pourra être rejoué.
+        Payment.objects.filter(pk=payment.pk).update(post_validation_started_at=None)
+        raise
+    Payment.objects.filter(pk=payment.pk).update(post_validation_done_at=timezone.now())
+    return True
+
+
+def process_validated_payment(payment_id):
+    payment = (
+        Payment.objects
+        .select_related("inscription__candidature__programme__cycle", "inscription__candidature__branch")
+        .filter(pk=payment_id, status=Payment.STATUS_VALIDATED)
+        .first()
+    )
+    if payment is None:
+        return None
+
+    # Le reçu d'abord : l'e-mail de confirmation le joint en pièce jointe.
+    render_payment_receipt(payment)
+    run_post_validation_actions(payment)
+    return payment
+
+
+def get_payments_needing_post_validation():
+    return Payment.objects.filter(status=Payment.STATUS_VALIDATED).filter(
+        Q(receipt_status__in=RETRYABLE_RECEIPT_STATUSES) | Q(post_validation_done_at__isnull=True)
+    )
+
+
+# ==================================================
+# VALIDATION GROUPÉE
+# ==================================================
+
+BULK_VALIDATED = "validated"
+BULK_SKIPPED = "skipped"
+BULK_FAILED = "failed"
+
+BLOCKED_INSCRIPTION_STATUSES = {
+    Inscription.STATUS_CANCELLED: "Impossible de payer une inscription annulée ou expirée.",
+    Inscription.STATUS_EXPIRED: "Impossible de payer une inscription annulée ou expirée.",
+    Inscription.STATUS_COMPLETED: "L'inscription est déjà terminée.",
+}
+MANUAL_METHODS = {Payment.METHOD_CASH, Payment.METHOD_BANK}
+
+
+@dataclass
+class BulkPaymentResult:
+    payment_id: int
+    outcome: str
+    message: str = ""
+    receipt_number: str = ""
+
+
+@dataclass
+class BulkValidationReport:
+    results: list = field(default_factory=list)
+
+    def _count(self, outcome):
+        return sum(1 for result in self.results if result.outcome == outcome)
+
+    @property
+    def validated(self):
+        return self._count(BULK_VALIDATED)
+
+    @property
+    def skipped(self):
+        return self._count(BULK_SKIPPED)
+
+    @property
+    def failed(self):
+        return self._count(BULK_FAILED)
+
+    def add(self, payment_id, outcome, message="", receipt_number=""):
+        self.results.append(BulkPaymentResult(payment_id, outcome, message, receipt_number or ""))
+
+
+def _check_agent(payment, resolve_agent):
+    if payment.method not in MANUAL_METHODS:
+        return ""
+    if not payment.agent_id and resolve_agent is not None:
+        agent = resolve_agent(payment)
+        if agent is not None:
+            payment.agent = agent
+    if not payment.agent_id:
+        return "Agent requis pour un paiement manuel."
+    branch_id = payment.inscription.candidature.branch_id
+    if branch_id and payment.agent.branch_id != branch_id:
+        return "L'agent n'appartient pas à l'annexe de l'inscription."
+    return ""
+
+
+def validate_payments_bulk(payment_ids, *, resolve_agent=None, require_agent=False):
+    """
+    Valide un lot de paiements en attente et retourne un rapport par paiement.
+
+    Mêmes règles que Payment.save/Payment.clean (statut de l'inscription,
+    protection surpaiement) mais appliquées au lot : les inscriptions sont
+    verrouillées en une requête dans l'ordre des clés (pas d'interblocage
+    entre deux lots concurrents), les montants payés recalculés par un seul
+    agrégat groupé. Reçus, création étudiant et e-mails partent en
+    arrière-plan après commit via process_validated_payment.
+
+    require_agent : les paiements espèces/virement doivent porter un agent
+    de l'annexe ; resolve_agent(payment) peut en fournir un à la volée.
+    """
+    report = BulkValidationReport()
+    payment_ids = sorted({int(pk) for pk in payment_ids})
+    if not payment_ids:
+        return report
+
+    with transaction.atomic():
+        inscription_ids = list(
+            Payment.objects.filter(pk__in=payment_ids)
+            .values_list("inscription_id", flat=True)
+            .distinct()
+        )
+        inscriptions = {
+            inscription.pk: inscription
+            for inscription in (
+                Inscription.objects
+                .select_for_update()
+                .filter(pk__in=inscription_ids)
+                .order_by("pk")
+            )
+        }
+
+        # Relu sous verrou : un Payment.save concurrent tient le même verrou.
+        payments = list(
+            Payment.objects
+            .select_related("inscription__candidature", "agent")
+            .filter(pk__in=payment_ids)
+            .order_by("pk")
+        )
+        found = {payment.pk for payment in payments}
+        for missing_id in payment_ids:
+            if missing_id not in found:
+                report.add(missing_id, BULK_FAILED, "Paiement introuvable.")
+
+        validated_totals = defaultdict(int)
+        validated_totals.update(
+            Payment.objects
+            .filter(inscription_id__in=inscriptions, status=Payment.STATUS_VALIDATED)
+            .values("inscription_id")
+            .annotate(total=Sum("amount"))
+            .values_list("inscription_id", "total")
+        )
+
+        accepted = []
+        for payment in payments:
+            if payment.status != Payment.STATUS_PENDING:
+                report.add(payment.pk, BULK_SKIPPED, "Statut non éligible.")
+                continue
+
+            inscription = inscriptions[payment.inscription_id]
+            error = BLOCKED_INSCRIPTION_STATUSES.get(inscription.status, "")
+            if not error and payment.amount <= 0:
+                error = "Le montant doit être supérieur à zéro."
+            if not error and require_agent:
+                error = _check_agent(payment, resolve_agent)
+            if not error:
+                future_total = validated_totals[inscription.pk] + payment.amount
+                if future_total > inscription.amount_due * 2:
+                    error = "Montant incohérent détecté."
+            if error:
+                report.add(payment.pk, BULK_FAILED, error)
+                continue
+
+            validated_totals[inscription.pk] += payment.amount
+            accepted.append(payment)
+
+        if not accepted:
+            report.results.sort(key=lambda result: result.payment_id)
+            return report
+
+        rollup_changes = []
+        for payment in accepted:
+            before = payment_rollup_state(payment)
+            payment.status = Payment.STATUS_VALIDATED
+            if not payment.receipt_number:
+                payment.receipt_number = generate_receipt_number(payment)
+            payment.receipt_status = Payment.RECEIPT_PENDING
+            rollup_changes.append(
+                (payment.inscription.candidature.branch_id, before, payment_rollup_state(payment))
+            )
+
+        Payment.objects.bulk_update(
+            accepted,
+            ["status", "agent", "receipt_number", "receipt_status"],
+        )
+        apply_payment_rollup_deltas(rollup_changes)
+        # bulk_update ne déclenche pas post_save : statut et numéro de reçu
+        # de la recherche globale.
+        index_payments(accepted)
+
+        amount_only = []
+        for inscription_id in {payment.inscription_id for payment in accepted}:
+            inscription = inscriptions[inscription_id]
+            total_paid = validated_totals[inscription_id]
+            new_status = inscription.financial_status_for(total_paid)
+            inscription.amount_paid = total_paid
+            if new_status != inscription.status:
+                # save() : historique, notification et création étudiant
+                # restent portés par les signaux de l'inscription.
+                inscription.status = new_status
+                inscription.save(update_fields=["amount_paid", "status"])
+            else:
+                amount_only.append(inscription)
+        if amount_only:
+            Inscription.objects.bulk_update(amount_only, ["amount_paid"])
+        # bulk_update ne déclenche pas post_save (cache du portail étudiant).
+        invalidate_tags(*(f"inscription:{payment.inscription_id}" for payment in accepted))
+
+        for payment in accepted:
+            report.add(payment.pk, BULK_VALIDATED, receipt_number=payment.receipt_number)
+            run_after_commit(
+                process_validated_payment,
+                payment.pk,
+                name=f"payment-validated:{payment.pk}",
+            )
+
+    report.results.sort(key=lambda result: result.payment_id)
+    return report
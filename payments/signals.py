@@ -1,9 +1,14 @@
 # payments/signals.py
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from .models import Payment
+from .services.rollups import (
+    apply_payment_rollup_delta,
+    get_payment_branch_id,
+    payment_rollup_state,
+)
 
 
 @receiver(post_save, sender=Payment)
@@ -20,3 +25,17 @@ def payment_post_save(sender, instance, created, **kwargs):
     # if instance.status == "validated":
     #     notify_accounting(instance)
     pass
+
+
+@receiver(post_delete, sender=Payment)
+def payment_post_delete(sender, instance, **kwargs):
+    """
+    Retire le paiement supprimé du rollup journalier de son annexe.
+    Les transitions de statut sont gérées dans Payment.save.
+    """
+
+    apply_payment_rollup_delta(
+        branch_id=get_payment_branch_id(instance),
+        before=payment_rollup_state(instance),
+        after=None,
+    )
@@ -1,8 +1,10 @@
+from datetime import timedelta
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 
 from accounts.models import BranchCashMovement
 from accounts.models import Profile
@@ -11,9 +13,19 @@ from branches.models import Branch
 from communication.models import CommunicationNotification
 from formations.models import Cycle, Diploma, Filiere, Programme
 from inscriptions.models import Inscription
-from payments.models import CashPaymentSession, FinancialLog, Payment, PaymentAgent
+from payments.models import CashPaymentSession, FinancialLog, Payment, PaymentAgent, PaymentDailyRollup
 from payments.services.corrections import correct_validated_payment_amount
+from payments.services.rollups import rebuild_payment_rollups
+from payments.services.validation import (
+    POST_VALIDATION_CLAIM_TIMEOUT,
+    get_payments_needing_post_validation,
+    process_validated_payment,
+    run_post_validation_actions,
+    validate_payments_bulk,
+)
 from students.models import Student
+from superadmin.models import SearchDocument
+from superadmin.search import search_documents
 
 
 User = get_user_model()
@@ -175,6 +187,137 @@ class StudentPaymentViewTests(TestCase):
         send_credentials.assert_called_once()
         send_confirmation.assert_not_called()
 
+    @patch("payments.models.send_payment_confirmation_email")
+    @patch("payments.models.send_student_credentials_email")
+    def test_post_validation_pipeline_renders_receipt_once(self, send_credentials, send_confirmation):
+        self.inscription.status = Inscription.STATUS_AWAITING_PAYMENT
+        self.inscription.save(update_fields=["status"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.create(
+                inscription=self.inscription,
+                amount=25000,
+                method=Payment.METHOD_CASH,
+                status=Payment.STATUS_VALIDATED,
+                reference="PIPELINE",
+            )
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.receipt_status, Payment.RECEIPT_READY)
+        self.assertTrue(payment.receipt_pdf)
+        self.assertIsNotNone(payment.post_validation_done_at)
+        send_credentials.assert_called_once()
+
+        # Rejouer le job (commande de reprise, double planification) ne duplique rien.
+        process_validated_payment(payment.pk)
+        self.assertEqual(Student.objects.filter(inscription=self.inscription).count(), 1)
+        send_credentials.assert_called_once()
+        self.assertFalse(get_payments_needing_post_validation().filter(pk=payment.pk).exists())
+
+    @patch("payments.models.send_payment_confirmation_email")
+    @patch("payments.models.send_student_credentials_email")
+    def test_post_validation_actions_are_only_done_once_they_succeed(self, send_credentials, send_confirmation):
+        self.inscription.status = Inscription.STATUS_AWAITING_PAYMENT
+        self.inscription.save(update_fields=["status"])
+        payment = Payment.objects.create(
+            inscription=self.inscription,
+            amount=25000,
+            method=Payment.METHOD_CASH,
+            status=Payment.STATUS_VALIDATED,
+            reference="CRASH",
+        )
+
+        send_credentials.side_effect = RuntimeError("SMTP indisponible")
+        with self.assertRaises(RuntimeError):
+            run_post_validation_actions(payment)
+        payment.refresh_from_db()
+        self.assertIsNone(payment.post_validation_started_at)
+        self.assertIsNone(payment.post_validation_done_at)
+        self.assertTrue(get_payments_needing_post_validation().filter(pk=payment.pk).exists())
+
+        # Job interrompu sans nettoyage : sa prise en charge expire puis est reprise.
+        send_credentials.side_effect = None
+        Payment.objects.filter(pk=payment.pk).update(post_validation_started_at=timezone.now())
+        self.assertFalse(run_post_validation_actions(payment))
+        Payment.objects.filter(pk=payment.pk).update(
+            post_validation_started_at=timezone.now() - POST_VALIDATION_CLAIM_TIMEOUT - timedelta(minutes=1)
+        )
+        self.assertTrue(run_post_validation_actions(payment))
+        payment.refresh_from_db()
+        self.assertIsNotNone(payment.post_validation_done_at)
+        self.assertFalse(run_post_validation_actions(payment))
+
+    @patch("payments.models.send_payment_confirmation_email")
+    @patch("payments.models.send_student_credentials_email")
+    def test_bulk_validation_locks_once_and_reports_each_payment(self, send_credentials, send_confirmation):
+        self.inscription.status = Inscription.STATUS_AWAITING_PAYMENT
+        self.inscription.save(update_fields=["status"])
+        first, second, oversized = [
+            Payment.objects.create(
+                inscription=self.inscription,
+                amount=amount,
+                method=Payment.METHOD_ORANGE,
+                status=Payment.STATUS_PENDING,
+            )
+            for amount in (40000, 60000, 150000)
+        ]
+        cancelled = Payment.objects.create(
+            inscription=self.inscription,
+            amount=10000,
+            method=Payment.METHOD_ORANGE,
+            status=Payment.STATUS_CANCELLED,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report = validate_payments_bulk([first.pk, second.pk, oversized.pk, cancelled.pk])
+
+        outcomes = {result.payment_id: result.outcome for result in report.results}
+        self.assertEqual(outcomes, {
+            first.pk: "validated",
+            second.pk: "validated",
+            oversized.pk: "failed",
+            cancelled.pk: "skipped",
+        })
+        self.inscription.refresh_from_db()
+        self.assertEqual(self.inscription.amount_paid, 100000)
+        self.assertEqual(self.inscription.status, Inscription.STATUS_ACTIVE)
+        first.refresh_from_db()
+        self.assertEqual(first.receipt_status, Payment.RECEIPT_READY)
+        rollup = PaymentDailyRollup.objects.get(branch=self.branch)
+        self.assertEqual(rollup.validated_total, 100000)
+        self.assertEqual(rollup.validated_count, 2)
+        self.assertEqual(Student.objects.filter(inscription=self.inscription).count(), 1)
+
+    @patch("payments.models.send_payment_confirmation_email")
+    @patch("payments.models.send_student_credentials_email")
+    def test_bulk_validated_and_corrected_payments_are_reindexed_for_search(self, send_credentials, send_confirmation):
+        self.inscription.status = Inscription.STATUS_AWAITING_PAYMENT
+        self.inscription.save(update_fields=["status"])
+        payment = Payment.objects.create(
+            inscription=self.inscription,
+            amount=40000,
+            method=Payment.METHOD_ORANGE,
+            status=Payment.STATUS_PENDING,
+        )
+
+        with self.captureOnCommitCallbacks(execute=False):
+            report = validate_payments_bulk([payment.pk])
+
+        receipt_number = report.results[0].receipt_number
+        results = search_documents(receipt_number, kinds=[SearchDocument.KIND_PAYMENT])
+        self.assertEqual([result["object_id"] for result in results], [payment.pk])
+        self.assertIn(receipt_number, results[0]["title"])
+        self.assertIn("40000 FCFA - Validé", results[0]["subtitle"])
+
+        payment.refresh_from_db()
+        correct_validated_payment_amount(
+            payment=payment,
+            new_amount=35000,
+            reason="Erreur de saisie, montant recu 35000 FCFA.",
+        )
+        results = search_documents(receipt_number, kinds=[SearchDocument.KIND_PAYMENT])
+        self.assertIn("35000 FCFA", results[0]["subtitle"])
+
     @patch("payments.models.send_payment_confirmation_email")
     @patch("payments.models.send_student_credentials_email")
     def test_first_validated_payment_creates_cash_history_and_official_notifications(self, send_credentials, send_confirmation):
@@ -319,3 +462,35 @@ class StudentPaymentViewTests(TestCase):
         payment.amount = 40000
         with self.assertRaises(ValueError):
             payment.save()
+
+    @patch("payments.models.send_payment_confirmation_email")
+    @patch("payments.models.send_student_credentials_email")
+    def test_daily_rollup_follows_payment_transitions_and_rebuild(self, send_credentials, send_confirmation):
+        pending = Payment.objects.create(
+            inscription=self.inscription,
+            amount=20000,
+            method=Payment.METHOD_ORANGE,
+            status=Payment.STATUS_PENDING,
+        )
+        rollup = PaymentDailyRollup.objects.get(branch=self.branch)
+        self.assertEqual((rollup.pending_count, rollup.pending_total), (1, 20000))
+        self.assertEqual(rollup.validated_count, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.status = Payment.STATUS_VALIDATED
+            pending.save()
+
+        correct_validated_payment_amount(
+            payment=pending,
+            new_amount=15000,
+            reason="Erreur de saisie sur le montant Orange Money.",
+        )
+
+        rollup.refresh_from_db()
+        self.assertEqual((rollup.pending_count, rollup.pending_total), (0, 0))
+        self.assertEqual((rollup.validated_count, rollup.validated_total), (1, 15000))
+
+        PaymentDailyRollup.objects.all().delete()
+        self.assertEqual(rebuild_payment_rollups(), 1)
+        rebuilt = PaymentDailyRollup.objects.get(branch=self.branch)
+        self.assertEqual((rebuilt.validated_count, rebuilt.validated_total), (1, 15000))
@@ -54,6 +54,13 @@ urlpatterns = [
         name="receipt_pdf",
     ),
 
+    # Statut de génération du reçu (fragment HTMX)
+    path(
+        "receipt/<str:receipt_number>/status/",
+        views.receipt_status,
+        name="receipt_status",
+    ),
+
     # ============================================
     # API
     # ============================================
@@ -7,7 +7,7 @@
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import FileResponse, Http404, JsonResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.views.decorators.http import require_GET, require_POST
 from django.db import transaction
 from django.db.models import Q
@@ -337,11 +337,32 @@ def receipt_pdf(request, receipt_number):
         raise Http404("Reçu introuvable.")
 
     if not payment.receipt_pdf:
+        if payment.receipt_status in {Payment.RECEIPT_PENDING, Payment.RECEIPT_PROCESSING}:
+            return HttpResponse("Le reçu PDF est en cours de génération, réessayez dans quelques instants.", status=202)
         raise Http404("Le reçu PDF n'est pas disponible.")
 
     return FileResponse(payment.receipt_pdf.open("rb"), as_attachment=True, filename=f"recu-{payment.receipt_number}.pdf")
 
 
+@require_GET
+@login_required
+def receipt_status(request, receipt_number):
+    """Fragment HTMX : lien du reçu, ou attente tant que le PDF est en génération."""
+    payment = get_object_or_404(
+        Payment.objects.select_related("inscription__student__user"),
+        receipt_number=receipt_number,
+        status="validated",
+    )
+
+    if not request.user.is_staff and payment.inscription.student.user != request.user:
+        raise Http404("Reçu introuvable.")
+
+    return render(request, "payments/partials/receipt_status.html", {
+        "payment": payment,
+        "link_class": request.GET.get("link_class", ""),
+    })
+
+
 # ==================================================
 # 6. API - LISTE AGENTS
 # ==================================================
@@ -7,4 +7,6 @@ class PortalConfig(AppConfig):
 
     def ready(self):
         from portal import signals
+        from portal.services import supervisor_day_snapshot, teacher_panel_cache
+        from portal.student import snapshot
 
@@ -8,7 +8,7 @@ from accounts.models import BranchExpense, BranchMonthlyClosure, Profile
 from admissions.models import Candidature
 from branches.models import Branch
 from inscriptions.models import Inscription
-from payments.models import Payment
+from payments.models import Payment, PaymentDailyRollup
 from students.models import AttendanceAlert, Student, StudentCase, StudentYearDecision
 
 
@@ -52,6 +52,9 @@ def get_dg_base_querysets(branch_ids):
             status=Payment.STATUS_PENDING,
             inscription__candidature__branch_id__in=branch_ids,
         ),
+        "payment_rollups": PaymentDailyRollup.objects.filter(
+            branch_id__in=branch_ids,
+        ),
         "expenses": BranchExpense.objects.filter(branch_id__in=branch_ids),
         "attendance_alerts": AttendanceAlert.objects.filter(
             is_resolved=False,
@@ -82,10 +85,9 @@ def get_recent_candidatures_count(branch_ids, days=30):
 
 def get_branch_finance(branch):
     revenue = (
-        Payment.objects.filter(
-            status=Payment.STATUS_VALIDATED,
-            inscription__candidature__branch=branch,
-        ).aggregate(total=Sum("amount"))["total"]
+        PaymentDailyRollup.objects.filter(
+            branch=branch,
+        ).aggregate(total=Sum("validated_total"))["total"]
         or 0
     )
     expenses = (
@@ -14,6 +14,7 @@ from academics.services.schedule_service import get_class_week_schedule_with_wee
 from accounts.access import get_user_position
 from accounts.models import BranchExpense, Profile
 from payments.models import Payment
+from payments.services.rollups import rollup_monthly, rollup_totals
 from portal.models import SupportAuditLog, SupportTicket
 from students.models import Student
 from students.models import AttendanceAlert, AttendanceRollSheet, StudentAttendance, StudentCase, StudentYearDecision, TeacherAttendance
@@ -277,7 +278,8 @@ def _build_branch_summaries(branches, base):
 
 
 def _build_finance(base, branch_summaries):
-    revenue = _money(base["payments"].aggregate(total=Sum("amount"))["total"])
+    payment_totals = rollup_totals(base["payment_rollups"])
+    revenue = _money(payment_totals["total"])
     expenses = _money(base["expenses"].filter(
         status__in={
             BranchExpense.STATUS_SUBMITTED,
@@ -294,8 +296,8 @@ def _build_finance(base, branch_summaries):
         "expenses": expenses,
         "balance": revenue - expenses,
         "balance_chart": abs(revenue - expenses),
-        "validated_payments": base["payments"].count(),
-        "pending_payments": base["pending_payments"].count(),
+        "validated_payments": payment_totals["count"],
+        "pending_payments": payment_totals["pending_count"],
         "cancelled_payments": Payment.objects.filter(
             status=Payment.STATUS_CANCELLED,
             inscription__candidature__branch_id__in=base["branch_filter"]["id__in"],
@@ -332,15 +334,6 @@ def _monthly_count(qs, date_field):
     return {row["month"].date().replace(day=1): row["total"] for row in rows if row["month"]}
 
 
-def _monthly_sum(qs, date_field, value_field):
-    rows = (
-        qs.annotate(month=TruncMonth(date_field))
-        .values("month")
-        .annotate(total=Sum(value_field))
-    )
-    return {row["month"].date().replace(day=1): _money(row["total"]) for row in rows if row["month"]}
-
-
 def _week_scope(request=None):
     today = timezone.localdate()
     week_start = today - timedelta(days=today.weekday())
@@ -528,7 +521,7 @@ def _build_schedule(request, branches, base):
         branch_past_count = past_course_events.filter(branch=branch).count()
         branch_missing_count = missing_lesson_logs_qs.filter(branch=branch).count()
         branch_teacher_absent = teacher_attendance_qs.filter(branch=branch, status=TeacherAttendance.STATUS_ABSENT).count()
-        branch_cancelled = sum(1 for event in branch_events if event.status == AcademicScheduleEvent.STATUS_CANCELLED)
+        branch_cancelled = sum(1 for event in branch_events if (event.get("status") if isinstance(event, dict) else event.status) == AcademicScheduleEvent.STATUS_CANCELLED)
         risk_score = branch_missing_count * 8 + branch_teacher_absent * 10 + branch_cancelled * 5
         branch_rows.append(
             {
@@ -607,10 +600,12 @@ def _build_analytics(base, branch_summaries):
     months = _last_12_month_keys()
     labels = [month.strftime("%b %Y") for month in months]
     candidature_counts = _monthly_count(base["candidatures"], "submitted_at")
-    payment_revenue = _monthly_sum(base["payments"], "paid_at", "amount")
-    payment_counts = _monthly_count(base["payments"], "paid_at")
+    payment_months = rollup_monthly(base["payment_rollups"], start=months[0])
+    payment_revenue = {month: row["total"] for month, row in payment_months.items()}
+    payment_counts = {month: row["count"] for month, row in payment_months.items()}
+    payment_totals = rollup_totals(base["payment_rollups"])
     risk_values = [
-        base["pending_payments"].count(),
+        payment_totals["pending_count"],
         base["student_cases"].exclude(status__in={StudentCase.STATUS_RESOLU, StudentCase.STATUS_ESCALADE}).count(),
         base["attendance_alerts"].count(),
         base["year_decisions"].exclude(
@@ -622,10 +617,10 @@ def _build_analytics(base, branch_summaries):
     rejected_candidatures = base["candidatures"].filter(status="rejected").count()
     to_complete_candidatures = base["candidatures"].filter(status="to_complete").count()
     active_inscriptions = base["inscriptions"].count()
-    validated_payments = base["payments"].count()
-    pending_payments = base["pending_payments"].count()
-    pending_payment_amount = _money(base["pending_payments"].aggregate(total=Sum("amount"))["total"])
-    revenue_total = _money(base["payments"].aggregate(total=Sum("amount"))["total"])
+    validated_payments = payment_totals["count"]
+    pending_payments = payment_totals["pending_count"]
+    pending_payment_amount = _money(payment_totals["pending_total"])
+    revenue_total = _money(payment_totals["total"])
     average_payment = int(revenue_total / validated_payments) if validated_payments else 0
     risk_labels = ["Finance", "Suivi etudiant", "Assiduite", "Workflow"]
     risk_tones = ["amber", "rose", "orange", "blue"]
@@ -711,10 +706,14 @@ def _build_analytics(base, branch_summaries):
         .filter(active_students__gt=0)
         .order_by("-active_students", "branch__name", "level")[:6]
     )
+    pending_by_branch = dict(
+        base["payment_rollups"]
+        .values("branch_id")
+        .annotate(total=Sum("pending_count"))
+        .values_list("branch_id", "total")
+    )
     for item in branch_summaries:
-        item["analytics_pending_payment_count"] = base["pending_payments"].filter(
-            inscription__candidature__branch=item["branch"]
-        ).count()
+        item["analytics_pending_payment_count"] = pending_by_branch.get(item["branch"].id) or 0
         item["analytics_risk_score"] = (
             item["open_alert_count"] * 10
             + item["analytics_pending_payment_count"] * 3
@@ -1006,7 +1005,7 @@ def build_dg_dashboard_context(request, base_context_builder):
             "executive_summary": executive_summary,
             "realtime": {
                 "today_inscriptions": base["candidatures"].filter(submitted_at__date__gte=period_start).count(),
-                "today_payments": base["payments"].filter(paid_at__date__gte=period_start).count(),
+                "today_payments": rollup_totals(base["payment_rollups"], start=period_start)["count"],
                 "today_courses": schedule["today_events_count"],
                 "system_status": "operationnel",
             },
@@ -4,6 +4,7 @@ from .teacher_dashboard_service import (
     build_teacher_class_detail_context,
     build_teacher_dashboard_context,
     build_teacher_lesson_log_context,
+    build_teacher_panel_context,
 )
 
 __all__ = [
@@ -12,4 +13,5 @@ __all__ = [
     "build_teacher_dashboard_context",
     "build_teacher_class_detail_context",
     "build_teacher_lesson_log_context",
+    "build_teacher_panel_context",
 ]
@@ -9,10 +9,15 @@ from django.utils import timezone
 from students.services.attendance_workflow import build_attendance_workflow_payload
 
 from academics.models import AcademicClass, AcademicScheduleEvent, LessonLog
-from academics.services.analytics_service import compute_branch_pedagogy_snapshot
-from academics.services.lesson_log_service import get_daily_lesson_status
 from academics.services.schedule_service import get_director_schedule_overview
-from academics.services.session_service import get_supervisor_today_course_rows
+from portal.services.supervisor_day_snapshot import (
+    daily_lesson_status as snapshot_daily_lesson_status,
+    get_branch_day_snapshot,
+    get_branch_pedagogy_snapshot,
+    snapshot_course_rows,
+    status_by_event,
+    student_attendance_counts,
+)
 from students.models import AttendanceAlert, Student, StudentAttendance, TeacherAttendance
 from students.services.attendance_service import get_branch_attendance_anomalies
 
@@ -27,12 +32,18 @@ ALERT_ORDER = {
 }
 
 
-def build_supervisor_today_panel_context(*, branch, today=None):
-    """Bloc « Aujourd'hui » + synthese pedagogique (memes clefs pour page complete ou fragment HTMX)."""
+def build_supervisor_today_panel_context(*, branch, today=None, snapshot=None):
+    """
+    Bloc « Aujourd'hui » + synthese pedagogique (memes clefs pour page complete ou fragment HTMX).
+
+    Servi depuis l'instantane du jour de l'annexe : aucune requete tant qu'il
+    est en cache, seule la phase des cours est recalculee a l'heure courante.
+    """
     today = today or timezone.localdate()
+    snapshot = snapshot or get_branch_day_snapshot(branch=branch, day=today)
     return {
-        "today_live_courses": get_supervisor_today_course_rows(branch=branch, target_date=today) if branch else [],
-        "pedagogy_snapshot": compute_branch_pedagogy_snapshot(branch=branch, days=30),
+        "today_live_courses": snapshot_course_rows(snapshot),
+        "pedagogy_snapshot": get_branch_pedagogy_snapshot(branch=branch, day=today),
     }
 
 
@@ -71,23 +82,23 @@ def _lesson_status_theme(item):
 
 
 def _serialize_today_event(event, *, teacher_attendance_map, lesson_log_map):
-    teacher_attendance = teacher_attendance_map.get(event.id)
-    lesson_log = lesson_log_map.get(event.id)
-    local_start = timezone.localtime(event.start_datetime)
-    local_end = timezone.localtime(event.end_datetime)
-    if teacher_attendance and teacher_attendance.status == TeacherAttendance.STATUS_ABSENT:
+    teacher_attendance = teacher_attendance_map.get(event["id"])
+    lesson_log = lesson_log_map.get(event["id"])
+    local_start = timezone.localtime(event["start_datetime"])
+    local_end = timezone.localtime(event["end_datetime"])
+    if teacher_attendance and teacher_attendance["status"] == TeacherAttendance.STATUS_ABSENT:
         supervision_status = "Enseignant absent"
         supervision_level = "critical"
-    elif lesson_log and lesson_log.status == LessonLog.STATUS_ABSENT_TEACHER:
+    elif lesson_log and lesson_log["status"] == LessonLog.STATUS_ABSENT_TEACHER:
         supervision_status = "Cours non tenu"
         supervision_level = "critical"
-    elif lesson_log and lesson_log.status == LessonLog.STATUS_DONE:
+    elif lesson_log and lesson_log["status"] == LessonLog.STATUS_DONE:
         supervision_status = "Cours trace"
         supervision_level = "good"
     elif lesson_log:
-        supervision_status = lesson_log.get_status_display()
+        supervision_status = lesson_log["status_label"]
         supervision_level = "warning"
-    elif event.status == AcademicScheduleEvent.STATUS_COMPLETED:
+    elif event["status"] == AcademicScheduleEvent.STATUS_COMPLETED:
         supervision_status = "Termine sans cahier"
         supervision_level = "warning"
     else:
@@ -95,32 +106,32 @@ def _serialize_today_event(event, *, teacher_attendance_map, lesson_log_map):
         supervision_level = "warning"
 
     return {
-        "id": event.id,
+        "id": event["id"],
         "time_range": f"{local_start.strftime('%H:%M')} - {local_end.strftime('%H:%M')}",
-        "class_name": event.academic_class.display_name,
-        "teacher_name": event.teacher.get_full_name() or event.teacher.username,
-        "subject_title": event.ec.title,
-        "event_status": event.get_status_display(),
+        "class_name": event["class_name"],
+        "teacher_name": event["teacher_name"],
+        "subject_title": event["subject_title"],
+        "event_status": event["status_label"],
         "supervision_status": supervision_status,
         "supervision_level": supervision_level,
-        "location": event.location or "Salle non precisee",
+        "location": event["location"] or "Salle non precisee",
     }
 
 
 def _build_event_action_options(events):
     options = []
     for event in events:
-        local_start = timezone.localtime(event.start_datetime)
+        local_start = timezone.localtime(event["start_datetime"])
         options.append(
             {
-                "id": event.id,
+                "id": event["id"],
                 "label": (
-                    f"{local_start.strftime('%H:%M')} - {event.academic_class.display_name} - "
-                    f"{event.ec.title} - {event.teacher.get_full_name() or event.teacher.username}"
+                    f"{local_start.strftime('%H:%M')} - {event['class_name']} - "
+                    f"{event['subject_title']} - {event['teacher_name']}"
                 ),
-                "class_name": event.academic_class.display_name,
-                "teacher_name": event.teacher.get_full_name() or event.teacher.username,
-                "subject_title": event.ec.title,
+                "class_name": event["class_name"],
+                "teacher_name": event["teacher_name"],
+                "subject_title": event["subject_title"],
             }
         )
     return options
@@ -190,9 +201,9 @@ def _serialize_lesson_log_row(lesson_log):
 def _build_class_watchlist(*, classes, today, attendance_by_class, lesson_issues_by_class):
     watchlist = []
     for academic_class in classes:
-        attendance_rows = attendance_by_class.get(academic_class.id, [])
-        absent_count = sum(1 for row in attendance_rows if row.status == StudentAttendance.STATUS_ABSENT)
-        late_count = sum(1 for row in attendance_rows if row.status == StudentAttendance.STATUS_LATE)
+        attendance_counts = attendance_by_class.get(academic_class.id) or {}
+        absent_count = attendance_counts.get(StudentAttendance.STATUS_ABSENT, 0)
+        late_count = attendance_counts.get(StudentAttendance.STATUS_LATE, 0)
         issue_count = lesson_issues_by_class.get(academic_class.id, 0)
         severity = ALERT_LEVEL_INFO
         if issue_count > 0:
@@ -277,16 +288,15 @@ def build_supervisor_dashboard_context(request, *, branch, page_title, page_kick
         else None
     )
 
-    roll_course_events_qs = AcademicScheduleEvent.objects.select_related("academic_class", "teacher", "ec", "branch").filter(
-        start_datetime__date=roll_date,
-        event_type=AcademicScheduleEvent.EVENT_TYPE_COURSE,
-        is_active=True,
-    ).exclude(status=AcademicScheduleEvent.STATUS_CANCELLED)
-    if branch:
-        roll_course_events_qs = roll_course_events_qs.filter(branch=branch)
-    if academic_class_for_roll:
-        roll_course_events_qs = roll_course_events_qs.filter(academic_class_id=academic_class_for_roll)
-    roll_course_action_options = _build_event_action_options(list(roll_course_events_qs.order_by("start_datetime", "id")))
+    snapshot = get_branch_day_snapshot(branch=branch, day=today)
+    roll_snapshot = snapshot if roll_date == today else get_branch_day_snapshot(branch=branch, day=roll_date)
+    roll_course_action_options = _build_event_action_options(
+        [
+            event
+            for event in roll_snapshot["events"]
+            if not academic_class_for_roll or event["academic_class_id"] == academic_class_for_roll
+        ]
+    )
 
     week_events_qs = AcademicScheduleEvent.objects.select_related("academic_class", "teacher", "ec", "branch").filter(
         start_datetime__date__gte=week_start,
@@ -296,70 +306,62 @@ def build_supervisor_dashboard_context(request, *, branch, page_title, page_kick
         week_events_qs = week_events_qs.filter(branch=branch)
     current_week_events = list(week_events_qs.order_by("start_datetime", "id")[:10])
 
-    today_events_qs = AcademicScheduleEvent.objects.select_related("academic_class", "teacher", "ec", "branch").filter(
-        start_datetime__date=today,
-        event_type=AcademicScheduleEvent.EVENT_TYPE_COURSE,
-        is_active=True,
-    ).exclude(status=AcademicScheduleEvent.STATUS_CANCELLED)
-    if branch:
-        today_events_qs = today_events_qs.filter(branch=branch)
-    today_events = list(today_events_qs.order_by("start_datetime", "id"))
-    today_event_ids = [event.id for event in today_events]
+    today_events = snapshot["events"]
 
     total_students = branch.academic_enrollments.count() if branch else 0
     total_classes = classes_qs.count()
     total_teachers = week_events_qs.values("teacher_id").distinct().count() if branch else 0
 
-    today_student_attendances = list(
-        StudentAttendance.objects.select_related("student__user", "academic_class", "schedule_event")
+    # Les totaux et statuts viennent de l'instantane ; seules les six dernieres
+    # lignes de chaque liste sont relues pour l'affichage detaille.
+    recent_student_attendances = list(
+        StudentAttendance.objects.select_related(
+            "student__inscription__candidature",
+            "academic_class__programme",
+            "academic_class__branch",
+            "schedule_event",
+            "recorded_by",
+        )
         .filter(branch=branch, date=today)
-        .order_by("schedule_event__start_datetime", "student__inscription__candidature__last_name")
+        .order_by("schedule_event__start_datetime", "student__inscription__candidature__last_name")[:6]
     ) if branch else []
-    today_teacher_attendances = list(
-        TeacherAttendance.objects.select_related("teacher", "schedule_event")
+    recent_teacher_attendances = list(
+        TeacherAttendance.objects.select_related(
+            "teacher",
+            "schedule_event__academic_class__programme",
+            "schedule_event__academic_class__branch",
+        )
         .filter(branch=branch, date=today)
-        .order_by("schedule_event__start_datetime")
+        .order_by("schedule_event__start_datetime")[:6]
     ) if branch else []
-    today_lesson_logs = list(
-        LessonLog.objects.select_related("teacher", "academic_class", "ec", "schedule_event")
+    recent_lesson_logs = list(
+        LessonLog.objects.select_related(
+            "teacher",
+            "academic_class__programme",
+            "academic_class__branch",
+            "ec",
+        )
         .filter(branch=branch, date=today)
-        .order_by("start_time", "id")
+        .order_by("start_time", "id")[:6]
     ) if branch else []
 
-    daily_lesson_status = get_daily_lesson_status(branch, today) if branch else {
-        "scheduled_courses": 0,
-        "lesson_logs_count": 0,
-        "missing_lesson_logs_count": 0,
-        "critical_count": 0,
-        "missing_lesson_logs": [],
-        "critical_items": [],
-        "lesson_logs": [],
-    }
+    daily_lesson_status = snapshot_daily_lesson_status(snapshot)
     attendance_anomalies = get_branch_attendance_anomalies(branch=branch, date=today) if branch else {
         "absent_teacher_event_count": 0,
         "active_absence_alerts_count": 0,
         "active_late_alerts_count": 0,
     }
 
-    teacher_attendance_map = {attendance.schedule_event_id: attendance for attendance in today_teacher_attendances if attendance.schedule_event_id}
-    lesson_log_map = {lesson_log.schedule_event_id: lesson_log for lesson_log in today_lesson_logs if lesson_log.schedule_event_id}
-
-    attendance_by_class = defaultdict(list)
-    for attendance in today_student_attendances:
-        attendance_by_class[attendance.academic_class_id].append(attendance)
+    teacher_attendance_map = status_by_event(snapshot["teacher_attendances"])
+    lesson_log_map = status_by_event(snapshot["lesson_logs"])
+    attendance_by_class, attendance_totals = student_attendance_counts(snapshot)
 
     lesson_issues_by_class = defaultdict(int)
-    for issue in daily_lesson_status["missing_lesson_logs"]:
-        event = next((event for event in today_events if event.id == issue["event_id"]), None)
-        if event:
-            lesson_issues_by_class[event.academic_class_id] += 1
-    for issue in daily_lesson_status["critical_items"]:
-        event = next((event for event in today_events if event.id == issue["event_id"]), None)
-        if event:
-            lesson_issues_by_class[event.academic_class_id] += 1
-
-    absent_students_count = sum(1 for row in today_student_attendances if row.status == StudentAttendance.STATUS_ABSENT)
-    late_students_count = sum(1 for row in today_student_attendances if row.status == StudentAttendance.STATUS_LATE)
+    for issue in daily_lesson_status["missing_lesson_logs"] + daily_lesson_status["critical_items"]:
+        lesson_issues_by_class[issue["academic_class_id"]] += 1
+
+    absent_students_count = attendance_totals[StudentAttendance.STATUS_ABSENT]
+    late_students_count = attendance_totals[StudentAttendance.STATUS_LATE]
     risk_students_count = (
         AttendanceAlert.objects.filter(branch=branch, is_resolved=False)
         .values("student_id")
@@ -453,7 +455,7 @@ def build_supervisor_dashboard_context(request, *, branch, page_title, page_kick
         "risk_students": risk_students_count,
     }
 
-    today_panel = build_supervisor_today_panel_context(branch=branch, today=today)
+    today_panel = build_supervisor_today_panel_context(branch=branch, today=today, snapshot=snapshot)
 
     return {
         **base_context_builder(
@@ -493,8 +495,8 @@ def build_supervisor_dashboard_context(request, *, branch, page_title, page_kick
         "selected_class_label": selected_class_label,
         "roll_date": roll_date,
         "attendance_workflow": attendance_workflow,
-        "today_attendance_total": len(today_student_attendances),
-        "today_teacher_attendance_total": len(today_teacher_attendances),
+        "today_attendance_total": len(snapshot["student_attendances"]),
+        "today_teacher_attendance_total": len(snapshot["teacher_attendances"]),
         "daily_lesson_status": daily_lesson_status,
         "attendance_anomalies": attendance_anomalies,
         "attention_actions": attention_actions,
@@ -503,13 +505,13 @@ def build_supervisor_dashboard_context(request, *, branch, page_title, page_kick
         "teacher_action_options": _build_event_action_options(today_events),
         "student_action_options": _build_student_action_options(branch) if branch else [],
         "recent_student_attendances": [
-            _serialize_student_attendance_row(attendance) for attendance in today_student_attendances[:6]
+            _serialize_student_attendance_row(attendance) for attendance in recent_student_attendances
         ],
         "recent_teacher_attendances": [
-            _serialize_teacher_attendance_row(attendance) for attendance in today_teacher_attendances[:6]
+            _serialize_teacher_attendance_row(attendance) for attendance in recent_teacher_attendances
         ],
         "recent_lesson_logs": [
-            _serialize_lesson_log_row(lesson_log) for lesson_log in today_lesson_logs[:6]
+            _serialize_lesson_log_row(lesson_log) for lesson_log in recent_lesson_logs
         ],
         **today_panel,
     }
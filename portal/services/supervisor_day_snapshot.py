@@ -0,0 +1,308 @@
+"""
+Instantane du jour d'une annexe pour le surveillant.
+
+Un seul objet par (annexe, jour) : cours du jour, presences enseignants,
+cahiers de texte et appels etudiants, indexes par identifiant. Il est
+construit une fois, puis corrige en place a chaque enregistrement de
+presence ou de cahier (core.cache.patch_cached) au lieu d'etre recalcule ;
+ce qui depend de l'heure (phase du cours) est derive a la lecture. Un cours
+cree, deplace ou annule invalide les instantanes de l'annexe (tag
+branch-schedule), une ecriture groupee ceux de la journee (tag branch-day).
+"""
+
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from academics.models import AcademicScheduleEvent, AcademicScheduleExecutionLog, LessonLog
+from academics.services.analytics_service import compute_branch_pedagogy_snapshot
+from academics.services.session_service import (
+    build_supervisor_course_row,
+    get_branch_day_course_events,
+    serialize_status_record,
+    serialize_supervised_event,
+)
+from core.cache import get_or_compute, invalidate_tags, patch_cached
+from students.models import StudentAttendance, TeacherAttendance
+
+SNAPSHOT_KEY_PREFIX = "portal_supervisor:day:v1"
+PEDAGOGY_KEY_PREFIX = "portal_supervisor:pedagogy:v1"
+PEDAGOGY_PERIOD_DAYS = 30
+
+
+def snapshot_timeout():
+    return getattr(settings, "SUPERVISOR_DAY_SNAPSHOT_TIMEOUT", 900)
+
+
+def branch_schedule_tag(branch_id):
+    return f"branch-schedule:{branch_id}"
+
+
+def branch_day_tag(branch_id, day):
+    return f"branch-day:{branch_id}:{day}"
+
+
+def _snapshot_key(branch_id, day):
+    return f"{SNAPSHOT_KEY_PREFIX}:branch:{branch_id}:day:{day}"
+
+
+def _snapshot_tags(branch_id, day):
+    return [branch_schedule_tag(branch_id), branch_day_tag(branch_id, day)]
+
+
+def _serialize_student_attendance(row):
+    return {
+        "id": row["id"],
+        "event_id": row["schedule_event_id"],
+        "academic_class_id": row["academic_class_id"],
+        "status": row["status"],
+    }
+
+
+def build_branch_day_snapshot(*, branch, day):
+    """Lecture complete de la journee (cinq requetes, quel que soit le volume)."""
+    events = get_branch_day_course_events(branch=branch, target_date=day)
+    return {
+        "branch_id": branch.id,
+        "date": day,
+        "events": [serialize_supervised_event(event) for event in events],
+        "teacher_attendances": {
+            attendance.id: serialize_status_record(attendance)
+            for attendance in TeacherAttendance.objects.filter(branch=branch, date=day)
+        },
+        "lesson_logs": {
+            lesson_log.id: serialize_status_record(lesson_log)
+            for lesson_log in LessonLog.objects.filter(branch=branch, date=day)
+        },
+        "student_attendances": {
+            row["id"]: _serialize_student_attendance(row)
+            for row in StudentAttendance.objects.filter(branch=branch, date=day).values(
+                "id", "schedule_event_id", "academic_class_id", "status"
+            )
+        },
+    }
+
+
+def get_branch_day_snapshot(*, branch, day=None):
+    day = day or timezone.localdate()
+    if branch is None:
+        return {
+            "branch_id": None,
+            "date": day,
+            "events": [],
+            "teacher_attendances": {},
+            "lesson_logs": {},
+            "student_attendances": {},
+        }
+    return get_or_compute(
+        _snapshot_key(branch.id, day),
+        lambda: build_branch_day_snapshot(branch=branch, day=day),
+        timeout=snapshot_timeout(),
+        tags=_snapshot_tags(branch.id, day),
+        namespace="portal_supervisor:day",
+    )
+
+
+def get_branch_pedagogy_snapshot(*, branch, day=None):
+    """Synthese sur 30 jours : non corrigee en place, elle expire avec le delai de l'instantane."""
+    day = day or timezone.localdate()
+    if branch is None:
+        return compute_branch_pedagogy_snapshot(branch=None, days=PEDAGOGY_PERIOD_DAYS)
+    return get_or_compute(
+        f"{PEDAGOGY_KEY_PREFIX}:branch:{branch.id}:day:{day}",
+        lambda: compute_branch_pedagogy_snapshot(branch=branch, days=PEDAGOGY_PERIOD_DAYS),
+        timeout=snapshot_timeout(),
+        tags=[branch_schedule_tag(branch.id)],
+        namespace="portal_supervisor:pedagogy",
+    )
+
+
+# ==========================================================
+# LECTURES DERIVEES
+# ==========================================================
+
+def status_by_event(records):
+    """{event_id: statut} pour les presences ou cahiers rattaches a un cours."""
+    return {record["event_id"]: record for record in records.values() if record["event_id"]}
+
+
+def snapshot_course_rows(snapshot, *, now=None):
+    now = now or timezone.now()
+    teacher_attendance_map = status_by_event(snapshot["teacher_attendances"])
+    lesson_log_map = status_by_event(snapshot["lesson_logs"])
+    return [
+        build_supervisor_course_row(
+            event,
+            teacher_attendance=teacher_attendance_map.get(event["id"]),
+            lesson_log=lesson_log_map.get(event["id"]),
+            now=now,
+        )
+        for event in snapshot["events"]
+    ]
+
+
+def student_attendance_counts(snapshot):
+    """({classe: Counter(statut)}, Counter(statut)) pour les appels du jour."""
+    by_class = defaultdict(Counter)
+    totals = Counter()
+    for row in snapshot["student_attendances"].values():
+        by_class[row["academic_class_id"]][row["status"]] += 1
+        totals[row["status"]] += 1
+    return by_class, totals
+
+
+def absent_teacher_event_count(snapshot):
+    return sum(
+        1
+        for record in snapshot["teacher_attendances"].values()
+        if record["event_id"] and record["status"] == TeacherAttendance.STATUS_ABSENT
+    )
+
+
+def daily_lesson_status(snapshot):
+    """Equivalent de get_daily_lesson_status calcule sur l'instantane."""
+    teacher_attendance_map = status_by_event(snapshot["teacher_attendances"])
+    lesson_log_map = status_by_event(snapshot["lesson_logs"])
+    missing_items = []
+    critical_items = []
+    for event in snapshot["events"]:
+        lesson_log = lesson_log_map.get(event["id"])
+        teacher_attendance = teacher_attendance_map.get(event["id"])
+        item = {
+            "event_id": event["id"],
+            "academic_class_id": event["academic_class_id"],
+            "classroom": event["class_name"],
+            "teacher": event["teacher_name"],
+            "subject": event["subject_title"],
+        }
+        if lesson_log is None:
+            missing_items.append(
+                {
+                    **item,
+                    "scheduled_time": timezone.localtime(event["start_datetime"]).strftime("%H:%M"),
+                    "status": "missing_lesson_log",
+                }
+            )
+        if teacher_attendance and teacher_attendance["status"] == TeacherAttendance.STATUS_ABSENT:
+            critical_items.append({**item, "status": "teacher_absent_with_planned_lesson"})
+        elif lesson_log and lesson_log["status"] == LessonLog.STATUS_ABSENT_TEACHER:
+            critical_items.append({**item, "status": "teacher_absent_with_lesson_log"})
+    return {
+        "branch_id": snapshot["branch_id"],
+        "date": snapshot["date"],
+        "scheduled_courses": len(snapshot["events"]),
+        "lesson_logs_count": len(snapshot["lesson_logs"]),
+        "missing_lesson_logs_count": len(missing_items),
+        "critical_count": len(critical_items),
+        "missing_lesson_logs": missing_items,
+        "critical_items": critical_items,
+    }
+
+
+# ==========================================================
+# MISE A JOUR INCREMENTALE
+# ==========================================================
+
+def _patch_snapshot(branch_id, day, section, record_id, payload):
+    """
+    Remplace (ou retire si payload est None) une ligne de l'instantane.
+
+    Applique tout de suite puis de nouveau apres commit, comme
+    invalidate_tags : le second passage corrige une reconstruction
+    concurrente faite sur les donnees d'avant commit.
+    """
+    if not branch_id or not day:
+        return
+
+    def _apply(snapshot):
+        if payload is None:
+            snapshot[section].pop(record_id, None)
+        else:
+            snapshot[section][record_id] = payload
+
+    def _run():
+        patched = patch_cached(
+            _snapshot_key(branch_id, day),
+            _apply,
+            tags=_snapshot_tags(branch_id, day),
+            timeout=snapshot_timeout(),
+        )
+        if not patched:
+            invalidate_tags(branch_day_tag(branch_id, day))
+
+    _run()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(_run)
+
+
+def _invalidate_previous_day(instance):
+    """Ligne deplacee vers un autre jour ou une autre annexe : l'ancien instantane la garderait."""
+    previous = getattr(instance, "_previous_branch_day", None)
+    if previous and previous[0] and previous != (instance.branch_id, instance.date):
+        invalidate_tags(branch_day_tag(*previous))
+
+
+@receiver(pre_save, sender=TeacherAttendance)
+@receiver(pre_save, sender=LessonLog)
+@receiver(pre_save, sender=StudentAttendance)
+def _day_record_track_previous_day(sender, instance, **kwargs):
+    instance._previous_branch_day = None
+    if instance.pk:
+        instance._previous_branch_day = (
+            sender.objects.filter(pk=instance.pk).values_list("branch_id", "date").first()
+        )
+
+
+@receiver(post_save, sender=TeacherAttendance)
+@receiver(post_save, sender=LessonLog)
+def _status_record_saved(sender, instance, **kwargs):
+    section = "teacher_attendances" if sender is TeacherAttendance else "lesson_logs"
+    _invalidate_previous_day(instance)
+    _patch_snapshot(instance.branch_id, instance.date, section, instance.pk, serialize_status_record(instance))
+
+
+@receiver(post_save, sender=StudentAttendance)
+def _student_attendance_saved(sender, instance, **kwargs):
+    _invalidate_previous_day(instance)
+    payload = _serialize_student_attendance(
+        {
+            "id": instance.pk,
+            "schedule_event_id": instance.schedule_event_id,
+            "academic_class_id": instance.academic_class_id,
+            "status": instance.status,
+        }
+    )
+    _patch_snapshot(instance.branch_id, instance.date, "student_attendances", instance.pk, payload)
+
+
+@receiver(post_delete, sender=TeacherAttendance)
+@receiver(post_delete, sender=LessonLog)
+@receiver(post_delete, sender=StudentAttendance)
+def _day_record_deleted(sender, instance, **kwargs):
+    section = {
+        TeacherAttendance: "teacher_attendances",
+        LessonLog: "lesson_logs",
+        StudentAttendance: "student_attendances",
+    }[sender]
+    _patch_snapshot(instance.branch_id, instance.date, section, instance.pk, None)
+
+
+@receiver([post_save, post_delete], sender=AcademicScheduleEvent)
+def _branch_schedule_changed(sender, instance, **kwargs):
+    # _previous_branch_id : pre_save de academics.signals (cours change d'annexe).
+    branch_ids = {instance.branch_id, getattr(instance, "_previous_branch_id", None)}
+    invalidate_tags(*(branch_schedule_tag(branch_id) for branch_id in branch_ids if branch_id))
+
+
+@receiver([post_save, post_delete], sender=AcademicScheduleExecutionLog)
+def _execution_changed(sender, instance, **kwargs):
+    branch_id = (
+        AcademicScheduleEvent.objects.filter(pk=instance.event_id).values_list("branch_id", flat=True).first()
+    )
+    if not branch_id:
+        return
+    invalidate_tags(branch_schedule_tag(branch_id))
@@ -1,4 +1,5 @@
 from datetime import timedelta
+from urllib.parse import urlencode
 
 from django.contrib.auth import get_user_model
 from django.db.models import Q
@@ -6,10 +7,16 @@ from django.utils import timezone
 
 from academics.models import AcademicClass, AcademicScheduleEvent, EC, LessonLog
 from academics.services.schedule_service import get_class_week_schedule
-from academics.services.session_service import get_supervisor_today_course_rows
 from academics.services.timetable_service import build_timetable_view_payload
+from portal.services.supervisor_day_snapshot import (
+    get_branch_day_snapshot,
+    snapshot_course_rows,
+    status_by_event,
+    student_attendance_counts,
+)
 from students.models import Student, StudentAttendance, TeacherAttendance
 from students.services.attendance_service import get_branch_attendance_anomalies, list_students_for_schedule_event
+from students.services.attendance_report import StudentAttendanceReport, teacher_regularity_rows
 from students.services.attendance_workflow import build_attendance_workflow_payload, is_roll_locked_for_event
 from students.services.case_service import count_open_cases
 
@@ -18,17 +25,17 @@ def build_home_section_context(*, branch, selected_class=None):
     """Vue d'ensemble du jour : presence, alertes utiles, seances du jour (donnees reelles)."""
     today = timezone.localdate()
     anomalies = get_branch_attendance_anomalies(branch=branch, date=today)
+    snapshot = get_branch_day_snapshot(branch=branch, day=today)
 
-    attendance_scope = StudentAttendance.objects.filter(branch=branch, date=today)
-    if selected_class:
-        attendance_scope = attendance_scope.filter(academic_class=selected_class)
-    total_marked = attendance_scope.count()
-    present_count = attendance_scope.filter(status=StudentAttendance.STATUS_PRESENT).count()
+    attendance_by_class, attendance_totals = student_attendance_counts(snapshot)
+    attendance_counts = attendance_by_class[selected_class.id] if selected_class else attendance_totals
+    total_marked = sum(attendance_counts.values())
+    present_count = attendance_counts[StudentAttendance.STATUS_PRESENT]
     presence_rate = round((present_count / total_marked) * 100) if total_marked else None
 
-    today_rows = get_supervisor_today_course_rows(branch=branch, target_date=today)
+    today_rows = snapshot_course_rows(snapshot)
     if selected_class:
-        today_rows = [row for row in today_rows if row["class_name"] == selected_class.display_name]
+        today_rows = [row for row in today_rows if row["academic_class_id"] == selected_class.id]
     pending_appel_rows = [row for row in today_rows if not row["course_started_flag"]]
 
     alerts = []
@@ -70,36 +77,17 @@ def build_home_section_context(*, branch, selected_class=None):
 
 def build_teachers_section_context(*, branch):
     """Vue du jour par enseignant : presence, ponctualite, appel fait/a faire (donnees reelles)."""
-    today = timezone.localdate()
-    events = list(
-        AcademicScheduleEvent.objects.select_related("teacher", "ec", "academic_class")
-        .filter(
-            branch=branch,
-            start_datetime__date=today,
-            event_type=AcademicScheduleEvent.EVENT_TYPE_COURSE,
-            is_active=True,
-        )
-        .exclude(status=AcademicScheduleEvent.STATUS_CANCELLED)
-        .order_by("start_datetime")
-    )
-    event_ids = [e.id for e in events]
-    attendance_map = {
-        row.schedule_event_id: row
-        for row in TeacherAttendance.objects.filter(branch=branch, date=today, schedule_event_id__in=event_ids)
-    }
-    lesson_map = {
-        row.schedule_event_id: row
-        for row in LessonLog.objects.filter(branch=branch, date=today, schedule_event_id__in=event_ids)
-    }
+    snapshot = get_branch_day_snapshot(branch=branch, day=timezone.localdate())
+    attendance_map = status_by_event(snapshot["teacher_attendances"])
+    lesson_map = status_by_event(snapshot["lesson_logs"])
 
     by_teacher = {}
-    for event in events:
-        teacher = event.teacher
+    for event in snapshot["events"]:
         entry = by_teacher.setdefault(
-            teacher.id,
+            event["teacher_id"],
             {
-                "id": teacher.id,
-                "name": teacher.get_full_name() or teacher.username,
+                "id": event["teacher_id"],
+                "name": event["teacher_name"],
                 "subjects": [],
                 "present": True,
                 "punctual": True,
@@ -108,19 +96,19 @@ def build_teachers_section_context(*, branch):
                 "current_event_id": None,
             },
         )
-        if event.ec.title not in entry["subjects"]:
-            entry["subjects"].append(event.ec.title)
-        entry["current_event_id"] = event.id
+        if event["subject_title"] not in entry["subjects"]:
+            entry["subjects"].append(event["subject_title"])
+        entry["current_event_id"] = event["id"]
 
-        attendance = attendance_map.get(event.id)
+        attendance = attendance_map.get(event["id"])
         if attendance:
-            if attendance.status == TeacherAttendance.STATUS_ABSENT:
+            if attendance["status"] == TeacherAttendance.STATUS_ABSENT:
                 entry["present"] = False
-            elif attendance.status == TeacherAttendance.STATUS_LATE:
+            elif attendance["status"] == TeacherAttendance.STATUS_LATE:
                 entry["punctual"] = False
 
-        lesson = lesson_map.get(event.id)
-        if lesson and lesson.status not in (LessonLog.STATUS_PLANNED, LessonLog.STATUS_CANCELLED):
+        lesson = lesson_map.get(event["id"])
+        if lesson and lesson["status"] not in (LessonLog.STATUS_PLANNED, LessonLog.STATUS_CANCELLED):
             entry["appel_done"] = True
         else:
             entry["appel_pending"] = True
@@ -212,8 +200,14 @@ def build_courses_section_context(*, request, branch, academic_class):
     }
 
 
-def build_attendance_monthly_report_context(*, branch, academic_class, month):
-    """Rapport mensuel de présence par étudiant pour une classe donnée."""
+def build_attendance_monthly_report_context(*, branch, academic_class, month, academic_classes=None):
+    """
+    Rapport mensuel de presence par etudiant.
+
+    Portee : la classe donnee, une liste de classes (`academic_classes`) ou,
+    si aucune des deux, toute l'annexe. Les compteurs viennent d'une seule
+    requete groupee (cf. students.services.attendance_report).
+    """
     import calendar
     from datetime import timedelta as _td
 
@@ -222,51 +216,14 @@ def build_attendance_monthly_report_context(*, branch, academic_class, month):
     prev_month = (month - _td(days=1)).replace(day=1)
     next_month = month_end + _td(days=1)
 
-    attendances = list(
-        StudentAttendance.objects.select_related("student", "student__inscription__candidature")
-        .filter(
-            branch=branch,
-            academic_class=academic_class,
-            date__gte=month,
-            date__lte=month_end,
-        )
-        .order_by("student__inscription__candidature__last_name", "date")
-    )
-
-    by_student = {}
-    for att in attendances:
-        student = att.student
-        entry = by_student.setdefault(
-            student.id,
-            {
-                "student": student,
-                "present": 0,
-                "absent": 0,
-                "late": 0,
-                "justified": 0,
-                "total": 0,
-            },
-        )
-        entry["total"] += 1
-        if att.status == StudentAttendance.STATUS_PRESENT:
-            entry["present"] += 1
-        elif att.status == StudentAttendance.STATUS_ABSENT:
-            if att.justification:
-                entry["justified"] += 1
-            else:
-                entry["absent"] += 1
-        elif att.status == StudentAttendance.STATUS_LATE:
-            entry["late"] += 1
-
-    rows = []
-    for entry in by_student.values():
-        total = entry["total"]
-        rate = round((entry["present"] / total) * 100) if total else None
-        rows.append({**entry, "rate": rate})
-    rows.sort(key=lambda r: (
-        r["student"].inscription.candidature.last_name if hasattr(r["student"], "inscription") else "",
-        r["student"].matricule,
-    ))
+    if academic_classes is not None:
+        class_ids = [getattr(item, "pk", item) for item in academic_classes]
+    elif academic_class is not None:
+        class_ids = [academic_class.pk]
+    else:
+        class_ids = None
+    report = StudentAttendanceReport(branch=branch, start_date=month, end_date=month_end, academic_class_ids=class_ids)
+    rows = list(report.iter_rows())
 
     return {
         "attendance_report_month": month,
@@ -275,7 +232,14 @@ def build_attendance_monthly_report_context(*, branch, academic_class, month):
         "attendance_report_next_month": next_month,
         "attendance_report_rows": rows,
         "attendance_report_class": academic_class,
-        "attendance_report_total_students": len(rows),
+        "attendance_report_export_query": urlencode(
+            ([("scope", "branch")] if class_ids is None else [("class_id", pk) for pk in class_ids])
+            + [("month", month.strftime("%Y-%m"))]
+        ),
+        "attendance_report_branch_scope": class_ids is None,
+        "attendance_report_show_class": class_ids is None or len(class_ids) > 1,
+        "attendance_report_total_students": len({row["student_id"] for row in rows}),
+        "attendance_report_totals": {**report.totals, "rate": report.total_rate},
     }
 
 
@@ -284,92 +248,7 @@ def build_teachers_weekly_report_context(*, branch, week_start):
     from datetime import timedelta as _td
 
     week_end = week_start + _td(days=7)
-
-    events = list(
-        AcademicScheduleEvent.objects.select_related("teacher", "ec", "academic_class")
-        .filter(
-            branch=branch,
-            start_datetime__date__gte=week_start,
-            start_datetime__date__lt=week_end,
-            event_type=AcademicScheduleEvent.EVENT_TYPE_COURSE,
-            is_active=True,
-        )
-        .exclude(status=AcademicScheduleEvent.STATUS_CANCELLED)
-        .order_by("teacher__first_name", "teacher__last_name", "start_datetime")
-    )
-    event_ids = [e.id for e in events]
-
-    attendance_map = {
-        row.schedule_event_id: row
-        for row in TeacherAttendance.objects.filter(
-            branch=branch,
-            date__gte=week_start,
-            date__lt=week_end,
-            schedule_event_id__in=event_ids,
-        )
-    }
-    lesson_map = {
-        row.schedule_event_id: row
-        for row in LessonLog.objects.filter(
-            branch=branch,
-            date__gte=week_start,
-            date__lt=week_end,
-            schedule_event_id__in=event_ids,
-        )
-    }
-
-    by_teacher = {}
-    for event in events:
-        teacher = event.teacher
-        entry = by_teacher.setdefault(
-            teacher.id,
-            {
-                "id": teacher.id,
-                "name": teacher.get_full_name() or teacher.username,
-                "subjects": set(),
-                "planned": 0,
-                "held": 0,
-                "absent": 0,
-                "late": 0,
-                "cancelled": 0,
-            },
-        )
-        entry["planned"] += 1
-        entry["subjects"].add(event.ec.title)
-
-        lesson = lesson_map.get(event.id)
-        attendance = attendance_map.get(event.id)
-
-        if lesson:
-            if lesson.status == LessonLog.STATUS_DONE:
-                entry["held"] += 1
-            elif lesson.status == LessonLog.STATUS_ABSENT_TEACHER:
-                entry["absent"] += 1
-            elif lesson.status == LessonLog.STATUS_CANCELLED:
-                entry["cancelled"] += 1
-
-        if attendance and attendance.status == TeacherAttendance.STATUS_LATE:
-            entry["late"] += 1
-
-    teachers = []
-    for entry in by_teacher.values():
-        planned = entry["planned"]
-        held = entry["held"]
-        rate = round((held / planned) * 100) if planned else None
-        teachers.append(
-            {
-                "id": entry["id"],
-                "name": entry["name"],
-                "subjects": sorted(entry["subjects"]),
-                "planned": planned,
-                "held": held,
-                "absent": entry["absent"],
-                "late": entry["late"],
-                "cancelled": entry["cancelled"],
-                "regularity_rate": rate,
-            }
-        )
-    teachers.sort(key=lambda t: t["name"])
+    teachers = teacher_regularity_rows(branch=branch, start_date=week_start, end_date=week_end - _td(days=1))
 
     return {
         "report_week_start": week_start,
@@ -377,7 +256,7 @@ def build_teachers_weekly_report_context(*, branch, week_start):
         "report_prev_week": week_start - _td(days=7),
         "report_next_week": week_start + _td(days=7),
         "report_teachers": teachers,
-        "report_total_events": len(events),
+        "report_total_events": sum(t["planned"] for t in teachers),
         "report_absent_count": sum(t["absent"] for t in teachers),
         "report_late_count": sum(t["late"] for t in teachers),
     }
@@ -1,7 +1,9 @@
 from collections import defaultdict
+from dataclasses import dataclass
 from datetime import timedelta
 from pathlib import Path
 from types import SimpleNamespace
+from typing import Callable
 
 from django.core.exceptions import ValidationError
 from django.db import OperationalError, ProgrammingError, transaction
@@ -13,6 +15,7 @@ from academics.services.lesson_log_service import get_teacher_lesson_logs
 from academics.services.schedule_service import get_teacher_next_events, get_teacher_week_schedule
 from accounts.models import BranchCashMovement, TeacherHonorariumEntry, UserPreference
 from portal.models import AccountSupportState
+from portal.services.teacher_panel_cache import branch_roster_tag, ec_supports_tag, get_teacher_panel_data
 from students.models import Student, TeacherAttendance
 from portal.models import TeacherDashboardPreference
 
@@ -601,18 +604,78 @@ def build_teacher_support_workspace_context(request, *, branch, class_id=None, e
     }
 
 
-def build_teacher_dashboard_context(request, *, branch, base_context_builder):
-    teacher = request.user
-    today = timezone.localdate()
-    week_start = today - timedelta(days=today.weekday())
-    week_end = week_start + timedelta(days=7)
-    now = timezone.now()
+# ==========================================================
+# PANNEAUX DU DASHBOARD (cf. portal/services/teacher_panel_cache.py)
+# ==========================================================
+
+UPCOMING_EVENTS_CACHE_TIMEOUT = 300
+
+
+@dataclass(frozen=True)
+class TeacherPanelSource:
+    """Donnees mises en cache par (enseignant, annexe, semaine[, jour])."""
+
+    builder: Callable
+    tags: Callable | None = None
+    daily: bool = False
+    timeout: int | None = None
+
+
+@dataclass(frozen=True)
+class TeacherPanel:
+    """Section du dashboard : gabarit, sources requises, rendu au premier affichage ou non."""
+
+    template: str
+    sources: tuple
+    above_fold: bool = False
+
+
+class TeacherPanelScope:
+    """Enseignant, annexe et semaine d'un affichage ; memorise les sources deja lues."""
+
+    def __init__(self, teacher, branch, *, today=None):
+        self.teacher = teacher
+        self.branch = branch
+        self.today = today or timezone.localdate()
+        self.week_start = self.today - timedelta(days=self.today.weekday())
+        self.week_end = self.week_start + timedelta(days=7)
+        self.now = timezone.now()
+        self._loaded = {}
+
+    def source(self, name):
+        if name not in self._loaded:
+            source = TEACHER_PANEL_SOURCES[name]
+            self._loaded[name] = get_teacher_panel_data(
+                name,
+                teacher=self.teacher,
+                branch=self.branch,
+                week_start=self.week_start,
+                builder=lambda: source.builder(self),
+                tags=source.tags(self) if source.tags else (),
+                day=self.today if source.daily else None,
+                timeout=source.timeout,
+            )
+        return self._loaded[name]
 
-    teacher_events_qs = (
+
+def _new_class_entry(academic_class):
+    return {
+        "academic_class": academic_class,
+        "event_count": 0,
+        "slot_count": 0,
+        "subjects": set(),
+        "ec_ids": set(),
+    }
+
+
+def _build_classes_source(scope):
+    teacher, branch = scope.teacher, scope.branch
+    week_events_qs = (
         AcademicScheduleEvent.objects.select_related(
             "academic_class",
             "academic_class__programme",
             "academic_class__academic_year",
+            "academic_class__branch",
             "teacher",
             "ec",
             "ec__ue",
@@ -622,43 +685,21 @@ def build_teacher_dashboard_context(request, *, branch, base_context_builder):
         .filter(
             teacher=teacher,
             is_active=True,
+            start_datetime__date__gte=scope.week_start,
+            start_datetime__date__lt=scope.week_end,
         )
         .exclude(status=AcademicScheduleEvent.STATUS_CANCELLED)
     )
     if branch is not None:
-        teacher_events_qs = teacher_events_qs.filter(branch=branch)
-
-    today_events = list(
-        teacher_events_qs
-        .filter(start_datetime__date=today)
-        .order_by("start_datetime", "id")
-    )
-    week_events = list(
-        teacher_events_qs
-        .filter(start_datetime__date__gte=week_start, start_datetime__date__lt=week_end)
-        .order_by("start_datetime", "id")
-    )
-    upcoming_events = get_teacher_next_events(teacher, limit=12)
-    if branch is not None:
-        upcoming_events = [event for event in upcoming_events if event.get("branch_name") == branch.name]
-    upcoming_events = upcoming_events[:8]
-
-    week_schedule = get_teacher_week_schedule(teacher, week_start)
-    if branch is not None:
-        week_schedule_events = [
-            event for event in week_schedule.get("events", [])
-            if event.get("branch_name") == branch.name
-        ]
-        week_schedule = {
-            **week_schedule,
-            "events": week_schedule_events,
-        }
+        week_events_qs = week_events_qs.filter(branch=branch)
+    week_events = list(week_events_qs.order_by("start_datetime", "id"))
 
     weekly_slots_qs = (
         WeeklyScheduleSlot.objects.select_related(
             "academic_class",
             "academic_class__programme",
             "academic_class__academic_year",
+            "academic_class__branch",
             "teacher",
             "ec",
         )
@@ -668,57 +709,26 @@ def build_teacher_dashboard_context(request, *, branch, base_context_builder):
     if branch is not None:
         weekly_slots_qs = weekly_slots_qs.filter(branch=branch)
     weekly_slots = list(weekly_slots_qs)
-    director_assignments = _get_teacher_director_assignments(teacher=teacher, branch=branch)
 
     class_map = {}
-    next_event_by_class = {}
     for event in week_events:
-        class_entry = class_map.setdefault(
-            event.academic_class_id,
-            {
-                "academic_class": event.academic_class,
-                "event_count": 0,
-                "slot_count": 0,
-                "subjects": set(),
-                "ec_ids": set(),
-            },
-        )
+        class_entry = class_map.setdefault(event.academic_class_id, _new_class_entry(event.academic_class))
         class_entry["event_count"] += 1
         if event.ec_id:
             class_entry["subjects"].add(event.ec.title)
             class_entry["ec_ids"].add(event.ec_id)
-        if event.academic_class_id not in next_event_by_class and event.start_datetime >= now:
-            next_event_by_class[event.academic_class_id] = event
 
     for slot in weekly_slots:
-        class_entry = class_map.setdefault(
-            slot.academic_class_id,
-            {
-                "academic_class": slot.academic_class,
-                "event_count": 0,
-                "slot_count": 0,
-                "subjects": set(),
-                "ec_ids": set(),
-            },
-        )
+        class_entry = class_map.setdefault(slot.academic_class_id, _new_class_entry(slot.academic_class))
         class_entry["slot_count"] += 1
         if slot.ec_id:
             class_entry["subjects"].add(slot.ec.title)
             class_entry["ec_ids"].add(slot.ec_id)
 
-    for assignment in director_assignments:
+    for assignment in _get_teacher_director_assignments(teacher=teacher, branch=branch):
         if assignment.academic_class_id is None:
             continue
-        class_entry = class_map.setdefault(
-            assignment.academic_class_id,
-            {
-                "academic_class": assignment.academic_class,
-                "event_count": 0,
-                "slot_count": 0,
-                "subjects": set(),
-                "ec_ids": set(),
-            },
-        )
+        class_entry = class_map.setdefault(assignment.academic_class_id, _new_class_entry(assignment.academic_class))
         if assignment.ec_id:
             class_entry["subjects"].add(assignment.ec.title)
             class_entry["ec_ids"].add(assignment.ec_id)
@@ -732,111 +742,102 @@ def build_teacher_dashboard_context(request, *, branch, base_context_builder):
     for class_id, item in class_map.items():
         setattr(item["academic_class"], "student_count", class_student_counts.get(class_id, 0))
 
-    class_focus_rows = [
-        _serialize_class_focus(
-            item["academic_class"],
-            event_count=item["event_count"],
-            slot_count=item["slot_count"],
-            subjects=item["subjects"],
-            next_event=next_event_by_class.get(class_id),
-        )
-        for class_id, item in class_map.items()
-    ]
-    class_focus_rows.sort(key=lambda row: (row["class_name"].lower(), row["programme_title"].lower()))
-    subject_titles = sorted(
-        {
-            subject
-            for row in class_focus_rows
-            for subject in row["subjects"]
-        }
-    )
-    teacher_ec_ids = {
+    return {
+        "week_events": week_events,
+        "weekly_slots": weekly_slots,
+        "classes": list(class_map.values()),
+    }
+
+
+def _classes_source_tags(scope):
+    return [branch_roster_tag(scope.branch.pk)] if scope.branch is not None else []
+
+
+def _teacher_ec_ids(classes_data):
+    return {
         ec_id
-        for item in class_map.values()
-        for ec_id in item.get("ec_ids", set())
+        for item in classes_data["classes"]
+        for ec_id in item["ec_ids"]
         if ec_id
     }
 
-    lesson_logs = get_teacher_lesson_logs(teacher, branch=branch, limit=6)
-    lesson_logs_this_week = [
-        log for log in lesson_logs
-        if week_start <= log.date < week_end
-    ]
+
+def _build_upcoming_source(scope):
+    upcoming_events = get_teacher_next_events(scope.teacher, limit=12)
+    if scope.branch is not None:
+        upcoming_events = [event for event in upcoming_events if event.get("branch_name") == scope.branch.name]
+    return {"upcoming_events": upcoming_events}
+
+
+def _build_logs_source(scope):
+    teacher, branch, today = scope.teacher, scope.branch, scope.today
 
     logged_event_qs = LessonLog.objects.filter(
         teacher=teacher,
         schedule_event__isnull=False,
-        schedule_event__start_datetime__date__gte=week_start,
-        schedule_event__start_datetime__date__lt=week_end,
+        schedule_event__start_datetime__date__gte=scope.week_start,
+        schedule_event__start_datetime__date__lt=scope.week_end,
     )
-    if branch is not None:
-        logged_event_qs = logged_event_qs.filter(branch=branch)
-    logged_event_ids = set(logged_event_qs.values_list("schedule_event_id", flat=True))
-
-    completed_or_past_week_events = [event for event in week_events if event.start_datetime <= now]
-    pending_lesson_logs = [
-        event for event in completed_or_past_week_events
-        if event.id not in logged_event_ids
-    ]
-
     monthly_done_logs = LessonLog.objects.filter(
         teacher=teacher,
         date__year=today.year,
         date__month=today.month,
         status=LessonLog.STATUS_DONE,
     )
-    if branch is not None:
-        monthly_done_logs = monthly_done_logs.filter(branch=branch)
-
-    support_chapters_count = ECChapter.objects.filter(ec_id__in=teacher_ec_ids).count() if teacher_ec_ids else 0
-    support_contents_qs = ECContent.objects.filter(chapter__ec_id__in=teacher_ec_ids, is_active=True)
-    support_contents_count = support_contents_qs.count() if teacher_ec_ids else 0
-    support_file_count = (
-        support_contents_qs.exclude(file="").filter(file__isnull=False).count()
-        if teacher_ec_ids
-        else 0
-    )
-    support_video_count = (
-        support_contents_qs.exclude(video_url="").filter(video_url__isnull=False).count()
-        if teacher_ec_ids
-        else 0
-    )
-    support_text_count = support_contents_qs.filter(content_type=ECContent.CONTENT_TYPE_TEXT).count() if teacher_ec_ids else 0
-
     teacher_attendance_month_qs = TeacherAttendance.objects.filter(
         teacher=teacher,
         date__year=today.year,
         date__month=today.month,
     )
     if branch is not None:
+        logged_event_qs = logged_event_qs.filter(branch=branch)
+        monthly_done_logs = monthly_done_logs.filter(branch=branch)
         teacher_attendance_month_qs = teacher_attendance_month_qs.filter(branch=branch)
-    teacher_attendance_summary = {
-        "present": teacher_attendance_month_qs.filter(status=TeacherAttendance.STATUS_PRESENT).count(),
-        "late": teacher_attendance_month_qs.filter(status=TeacherAttendance.STATUS_LATE).count(),
-        "absent": teacher_attendance_month_qs.filter(status=TeacherAttendance.STATUS_ABSENT).count(),
-        "total": teacher_attendance_month_qs.count(),
-    }
 
-    preference = get_teacher_dashboard_preference(teacher=teacher, branch=branch)
-    status_summary = {
-        "employment_status": getattr(getattr(teacher, "profile", None), "get_employment_status_display", lambda: "Inconnu")(),
-        "employee_code": getattr(getattr(teacher, "profile", None), "employee_code", "") or "Non renseigne",
-        "branch_name": getattr(branch, "name", "Non rattache"),
-        "hire_date": getattr(getattr(teacher, "profile", None), "hire_date", None),
+    return {
+        "recent_lesson_logs": get_teacher_lesson_logs(teacher, branch=branch, limit=6),
+        "logged_event_ids": set(logged_event_qs.values_list("schedule_event_id", flat=True)),
+        "month_done_logs": monthly_done_logs.count(),
+        "teacher_attendance_summary": teacher_attendance_month_qs.aggregate(
+            present=Count("pk", filter=Q(status=TeacherAttendance.STATUS_PRESENT)),
+            late=Count("pk", filter=Q(status=TeacherAttendance.STATUS_LATE)),
+            absent=Count("pk", filter=Q(status=TeacherAttendance.STATUS_ABSENT)),
+            total=Count("pk"),
+        ),
     }
 
+
+def _build_supports_source(scope):
+    teacher_ec_ids = _teacher_ec_ids(scope.source("classes"))
+    if not teacher_ec_ids:
+        return {"chapters": 0, "contents": 0, "files": 0, "videos": 0, "texts": 0}
+
+    stats = ECContent.objects.filter(chapter__ec_id__in=teacher_ec_ids, is_active=True).aggregate(
+        contents=Count("pk"),
+        files=Count("pk", filter=Q(file__isnull=False) & ~Q(file="")),
+        videos=Count("pk", filter=Q(video_url__isnull=False) & ~Q(video_url="")),
+        texts=Count("pk", filter=Q(content_type=ECContent.CONTENT_TYPE_TEXT)),
+    )
+    stats["chapters"] = ECChapter.objects.filter(ec_id__in=teacher_ec_ids).count()
+    return stats
+
+
+def _supports_source_tags(scope):
+    return [ec_supports_tag(ec_id) for ec_id in sorted(_teacher_ec_ids(scope.source("classes")))]
+
+
+def _build_schedule_source(scope):
+    week_schedule = get_teacher_week_schedule(scope.teacher, scope.week_start)
+    week_schedule_events = week_schedule.get("events", [])
+    if scope.branch is not None:
+        week_schedule_events = [
+            event for event in week_schedule_events
+            if event.get("branch_name") == scope.branch.name
+        ]
+
     day_buckets = defaultdict(list)
-    for event in week_schedule.get("events", []):
+    for event in week_schedule_events:
         day_buckets[event["weekday_index"]].append(event)
-    scheduled_days_count = len([events for events in day_buckets.values() if events])
-    weekly_rooms = {
-        location.strip()
-        for location in [
-            *[event.location or "" for event in week_events],
-            *[slot.room or "" for slot in weekly_slots],
-        ]
-        if location and location.strip()
-    }
 
     teaching_days = []
     for offset, day in enumerate(week_schedule.get("days", [])):
@@ -848,52 +849,11 @@ def build_teacher_dashboard_context(request, *, branch, base_context_builder):
                 "events": day_buckets.get(offset, []),
             }
         )
+    return {"teaching_days": teaching_days}
 
-    completed_or_past_count = len(completed_or_past_week_events)
-    lesson_completion_rate = round(
-        ((completed_or_past_count - len(pending_lesson_logs)) / completed_or_past_count) * 100
-    ) if completed_or_past_count else 100
-    total_students_visible = sum(row.get("student_count", 0) for row in class_focus_rows)
-    next_event_focus = upcoming_events[0] if upcoming_events else None
-    teacher_insights = []
-    if pending_lesson_logs:
-        teacher_insights.append(
-            {
-                "tone": "danger",
-                "label": "Cahiers en attente",
-                "message": f"{len(pending_lesson_logs)} seance(s) terminee(s) attendent un cahier de texte.",
-                "section": "logs",
-            }
-        )
-    if today_events:
-        teacher_insights.append(
-            {
-                "tone": "primary",
-                "label": "Cours aujourd'hui",
-                "message": f"{len(today_events)} cours programme(s) aujourd'hui.",
-                "section": "schedule",
-            }
-        )
-    if support_contents_count == 0 and class_focus_rows:
-        teacher_insights.append(
-            {
-                "tone": "warning",
-                "label": "Supports",
-                "message": "Aucun support actif n'est encore visible pour vos matieres.",
-                "section": "supports",
-            }
-        )
-    if not teacher_insights:
-        teacher_insights.append(
-            {
-                "tone": "success",
-                "label": "Situation stable",
-                "message": "Aucune action urgente detectee sur le perimetre enseignant.",
-                "section": "overview",
-            }
-        )
 
-    # Honoraires data
+def _build_salary_source(scope):
+    teacher, branch, today = scope.teacher, scope.branch, scope.today
     teacher_hours = {"month_hours": 0, "total_hours": 0}
     teacher_payments = {"pending_count": 0, "paid_count": 0, "recent_payments": []}
     teacher_hour_rows = []
@@ -906,18 +866,20 @@ def build_teacher_dashboard_context(request, *, branch, base_context_builder):
             teacher=teacher,
         ).order_by("-period_month")
 
+        status_map = {
+            TeacherHonorariumEntry.STATUS_DRAFT: ("pending", "A verifier"),
+            TeacherHonorariumEntry.STATUS_READY: ("pending", "Disponible"),
+            TeacherHonorariumEntry.STATUS_PARTIAL: ("partial", "Retrait partiel"),
+            TeacherHonorariumEntry.STATUS_PAID: ("paid", "Paye"),
+        }
+        teacher_entry_pks = []
         for entry in honorarium_entries:
+            teacher_entry_pks.append(entry.pk)
             if entry.period_month == current_month_start:
                 teacher_hours["month_hours"] = float(entry.validated_hours)
             if entry.period_month >= year_start:
                 teacher_hours["total_hours"] += float(entry.validated_hours)
 
-            status_map = {
-                TeacherHonorariumEntry.STATUS_DRAFT: ("pending", "A verifier"),
-                TeacherHonorariumEntry.STATUS_READY: ("pending", "Disponible"),
-                TeacherHonorariumEntry.STATUS_PARTIAL: ("partial", "Retrait partiel"),
-                TeacherHonorariumEntry.STATUS_PAID: ("paid", "Paye"),
-            }
             status_slug, status_label = status_map.get(entry.status, ("draft", "Brouillon"))
 
             teacher_hour_rows.append({
@@ -936,7 +898,6 @@ def build_teacher_dashboard_context(request, *, branch, base_context_builder):
                 teacher_payments["paid_count"] += 1
 
         # Cash movements for this teacher's honoraria
-        teacher_entry_pks = list(honorarium_entries.values_list("pk", flat=True))
         if teacher_entry_pks:
             ref_pattern = "|".join(f"^HON-{pk}-" for pk in teacher_entry_pks)
             recent_cash = BranchCashMovement.objects.filter(
@@ -952,6 +913,250 @@ def build_teacher_dashboard_context(request, *, branch, base_context_builder):
                     "montant": cm.amount,
                 })
 
+    return {
+        "teacher_hours": teacher_hours,
+        "teacher_payments": teacher_payments,
+        "teacher_hour_rows": teacher_hour_rows,
+    }
+
+
+TEACHER_PANEL_SOURCES = {
+    "classes": TeacherPanelSource(_build_classes_source, tags=_classes_source_tags),
+    "upcoming": TeacherPanelSource(_build_upcoming_source, daily=True, timeout=UPCOMING_EVENTS_CACHE_TIMEOUT),
+    "logs": TeacherPanelSource(_build_logs_source, daily=True),
+    "supports": TeacherPanelSource(_build_supports_source, tags=_supports_source_tags),
+    "schedule": TeacherPanelSource(_build_schedule_source, daily=True),
+    "salary": TeacherPanelSource(_build_salary_source, daily=True),
+}
+
+TEACHER_PANELS = {
+    "overview": TeacherPanel(
+        "portal/teacher/sg_partials/overview.html",
+        ("classes", "upcoming", "logs", "supports"),
+        above_fold=True,
+    ),
+    "classes": TeacherPanel("portal/teacher/sg_partials/classes.html", ("classes",), above_fold=True),
+    "supports": TeacherPanel("portal/teacher/sg_partials/supports.html", ("classes", "supports")),
+    "schedule": TeacherPanel("portal/teacher/sg_partials/schedule.html", ("classes", "schedule")),
+    "logs": TeacherPanel("portal/teacher/sg_partials/logs.html", ("classes", "logs")),
+    "salary": TeacherPanel("portal/teacher/sg_partials/salary.html", ("salary",)),
+}
+
+# Toujours lues : badge "cahiers en attente" de la barre laterale.
+TEACHER_SHELL_SOURCES = ("classes", "logs")
+
+
+def _teacher_insights(*, pending_count, today_count, support_contents_count, has_classes):
+    teacher_insights = []
+    if pending_count:
+        teacher_insights.append(
+            {
+                "tone": "danger",
+                "label": "Cahiers en attente",
+                "message": f"{pending_count} seance(s) terminee(s) attendent un cahier de texte.",
+                "section": "logs",
+            }
+        )
+    if today_count:
+        teacher_insights.append(
+            {
+                "tone": "primary",
+                "label": "Cours aujourd'hui",
+                "message": f"{today_count} cours programme(s) aujourd'hui.",
+                "section": "schedule",
+            }
+        )
+    if support_contents_count == 0 and has_classes:
+        teacher_insights.append(
+            {
+                "tone": "warning",
+                "label": "Supports",
+                "message": "Aucun support actif n'est encore visible pour vos matieres.",
+                "section": "supports",
+            }
+        )
+    if not teacher_insights:
+        teacher_insights.append(
+            {
+                "tone": "success",
+                "label": "Situation stable",
+                "message": "Aucune action urgente detectee sur le perimetre enseignant.",
+                "section": "overview",
+            }
+        )
+    return teacher_insights
+
+
+def _assemble_teacher_panels(scope, source_names):
+    """
+    Contexte des sources demandees : donnees en cache, puis derives qui
+    dependent de l'heure (cours du jour, prochaine seance, cahiers en
+    attente) recalcules a chaque affichage, sans requete.
+    """
+    data = {name: scope.source(name) for name in source_names}
+    now = scope.now
+    context = {
+        "today": scope.today,
+        "week_start": scope.week_start,
+        "week_end": scope.week_end - timedelta(days=1),
+    }
+    kpis = {}
+
+    classes_data = data.get("classes")
+    if classes_data is not None:
+        week_events = classes_data["week_events"]
+        today_events = [
+            event for event in week_events
+            if timezone.localtime(event.start_datetime).date() == scope.today
+        ]
+        next_event_by_class = {}
+        for event in week_events:
+            if event.academic_class_id not in next_event_by_class and event.start_datetime >= now:
+                next_event_by_class[event.academic_class_id] = event
+
+        class_focus_rows = [
+            _serialize_class_focus(
+                item["academic_class"],
+                event_count=item["event_count"],
+                slot_count=item["slot_count"],
+                subjects=item["subjects"],
+                next_event=next_event_by_class.get(item["academic_class"].id),
+            )
+            for item in classes_data["classes"]
+        ]
+        class_focus_rows.sort(key=lambda row: (row["class_name"].lower(), row["programme_title"].lower()))
+        subject_titles = {subject for row in class_focus_rows for subject in row["subjects"]}
+        weekly_rooms = {
+            location.strip()
+            for location in [
+                *[event.location or "" for event in week_events],
+                *[slot.room or "" for slot in classes_data["weekly_slots"]],
+            ]
+            if location and location.strip()
+        }
+        context.update(
+            {
+                "today_events": today_events,
+                "class_focus_rows": class_focus_rows,
+            }
+        )
+        kpis.update(
+            {
+                "today_courses": len(today_events),
+                "week_courses": len(week_events),
+                "active_classes": len(class_focus_rows),
+                "visible_students": sum(row.get("student_count", 0) for row in class_focus_rows),
+                "subjects_count": len(subject_titles),
+                "scheduled_days": len({timezone.localtime(event.start_datetime).date() for event in week_events}),
+                "weekly_rooms": len(weekly_rooms),
+            }
+        )
+
+    logs_data = data.get("logs")
+    if logs_data is not None:
+        lesson_logs = logs_data["recent_lesson_logs"]
+        completed_or_past_week_events = [
+            event for event in (classes_data or {}).get("week_events", [])
+            if event.start_datetime <= now
+        ]
+        pending_lesson_logs = [
+            event for event in completed_or_past_week_events
+            if event.id not in logs_data["logged_event_ids"]
+        ]
+        completed_or_past_count = len(completed_or_past_week_events)
+        context.update(
+            {
+                "recent_lesson_logs": lesson_logs,
+                "week_lesson_logs_count": len(
+                    [log for log in lesson_logs if scope.week_start <= log.date < scope.week_end]
+                ),
+                "pending_lesson_logs_count": len(pending_lesson_logs),
+                "pending_lesson_log_rows": pending_lesson_logs[:6],
+                "teacher_attendance_summary": logs_data["teacher_attendance_summary"],
+            }
+        )
+        kpis.update(
+            {
+                "month_done_logs": logs_data["month_done_logs"],
+                "lesson_completion_rate": round(
+                    ((completed_or_past_count - len(pending_lesson_logs)) / completed_or_past_count) * 100
+                ) if completed_or_past_count else 100,
+            }
+        )
+
+    upcoming_data = data.get("upcoming")
+    if upcoming_data is not None:
+        upcoming_events = [
+            event for event in upcoming_data["upcoming_events"]
+            if event["start_datetime"] >= now
+        ][:8]
+        context["upcoming_events"] = upcoming_events
+        context["next_event_focus"] = upcoming_events[0] if upcoming_events else None
+
+    supports_data = data.get("supports")
+    if supports_data is not None:
+        context["teacher_support_stats"] = supports_data
+        kpis.update(
+            {
+                "support_chapters": supports_data["chapters"],
+                "support_contents": supports_data["contents"],
+            }
+        )
+
+    if "schedule" in data:
+        context.update(data["schedule"])
+    if "salary" in data:
+        context.update(data["salary"])
+
+    if classes_data is not None and logs_data is not None and supports_data is not None:
+        context["teacher_insights"] = _teacher_insights(
+            pending_count=context["pending_lesson_logs_count"],
+            today_count=kpis["today_courses"],
+            support_contents_count=supports_data["contents"],
+            has_classes=bool(context["class_focus_rows"]),
+        )
+        context["has_teacher_activity"] = bool(
+            context["today_events"]
+            or context.get("upcoming_events")
+            or context["class_focus_rows"]
+            or context["recent_lesson_logs"]
+            or context["pending_lesson_logs_count"]
+        )
+
+    context["teacher_kpis"] = kpis
+    return context
+
+
+def _teacher_panel_sources(panel_names):
+    source_names = list(TEACHER_SHELL_SOURCES)
+    for name in panel_names:
+        for source_name in TEACHER_PANELS[name].sources:
+            if source_name not in source_names:
+                source_names.append(source_name)
+    return source_names
+
+
+def build_teacher_dashboard_context(request, *, branch, base_context_builder, active_section="overview"):
+    """
+    Premier affichage du dashboard : seuls les panneaux au-dessus de la ligne
+    de flottaison (et la section demandee) sont calcules ; les autres sont
+    charges en HTMX a leur premiere ouverture (build_teacher_panel_context).
+    """
+    teacher = request.user
+    scope = TeacherPanelScope(teacher, branch)
+    loaded_panels = [
+        name for name, panel in TEACHER_PANELS.items()
+        if panel.above_fold or name == active_section
+    ]
+
+    preference = get_teacher_dashboard_preference(teacher=teacher, branch=branch)
+    status_summary = {
+        "employment_status": getattr(getattr(teacher, "profile", None), "get_employment_status_display", lambda: "Inconnu")(),
+        "employee_code": getattr(getattr(teacher, "profile", None), "employee_code", "") or "Non renseigne",
+        "branch_name": getattr(branch, "name", "Non rattache"),
+        "hire_date": getattr(getattr(teacher, "profile", None), "hire_date", None),
+    }
+
     context = {
         **base_context_builder(
             request,
@@ -967,54 +1172,25 @@ def build_teacher_dashboard_context(request, *, branch, base_context_builder):
         "branch": branch,
         "teacher_dashboard_preference": serialize_teacher_dashboard_preference(preference) if preference is not None else _teacher_dashboard_preference_defaults(),
         "status_summary": status_summary,
-        "today": today,
-        "week_start": week_start,
-        "week_end": week_end - timedelta(days=1),
-        "today_events": today_events,
-        "upcoming_events": upcoming_events,
-        "teaching_days": teaching_days,
-        "class_focus_rows": class_focus_rows,
-        "recent_lesson_logs": lesson_logs,
-        "week_lesson_logs_count": len(lesson_logs_this_week),
-        "pending_lesson_logs_count": len(pending_lesson_logs),
-        "pending_lesson_log_rows": pending_lesson_logs[:6],
-        "has_teacher_activity": bool(
-            today_events
-            or upcoming_events
-            or class_focus_rows
-            or lesson_logs
-            or pending_lesson_logs
-        ),
-        "teacher_kpis": {
-            "today_courses": len(today_events),
-            "week_courses": len(week_events),
-            "active_classes": len(class_focus_rows),
-            "visible_students": total_students_visible,
-            "month_done_logs": monthly_done_logs.count(),
-            "subjects_count": len(subject_titles),
-            "scheduled_days": scheduled_days_count,
-            "weekly_rooms": len(weekly_rooms),
-            "support_chapters": support_chapters_count,
-            "support_contents": support_contents_count,
-            "lesson_completion_rate": lesson_completion_rate,
-        },
-        "teacher_support_stats": {
-            "chapters": support_chapters_count,
-            "contents": support_contents_count,
-            "files": support_file_count,
-            "videos": support_video_count,
-            "texts": support_text_count,
-        },
-        "teacher_attendance_summary": teacher_attendance_summary,
-        "next_event_focus": next_event_focus,
-        "teacher_insights": teacher_insights,
-        "teacher_hours": teacher_hours,
-        "teacher_payments": teacher_payments,
-        "teacher_hour_rows": teacher_hour_rows,
+        **_assemble_teacher_panels(scope, _teacher_panel_sources(loaded_panels)),
+        "teacher_loaded_panels": loaded_panels,
     }
     return context
 
 
+def build_teacher_panel_context(request, *, branch, panel):
+    """Gabarit et contexte d'un panneau charge seul (endpoint HTMX)."""
+    if panel not in TEACHER_PANELS:
+        raise ValidationError("Panneau inconnu.")
+    scope = TeacherPanelScope(request.user, branch)
+    context = {
+        "branch": branch,
+        "panel_name": panel,
+        **_assemble_teacher_panels(scope, _teacher_panel_sources([panel])),
+    }
+    return TEACHER_PANELS[panel].template, context
+
+
 def build_teacher_settings_context(request, *, branch, base_context_builder):
     teacher = request.user
     preference = get_teacher_dashboard_preference(teacher=teacher, branch=branch)
@@ -0,0 +1,122 @@
+"""
+Cache des panneaux du dashboard enseignant.
+
+Chaque source de donnees du dashboard (classes, cours a venir, cahiers,
+supports, planning, honoraires) est mise en cache par (enseignant, annexe,
+semaine) sous les tags dont elle depend : teacher, branch-roster, ec-supports.
+Les signaux ci-dessous invalident ces tags quand un cours, un creneau, une
+affectation, un cahier, un support ou un honoraire change ; le premier
+affichage et les chargements HTMX d'un panneau relisent les memes entrees.
+"""
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from academics.models import (
+    AcademicEnrollment,
+    AcademicScheduleEvent,
+    ECChapter,
+    ECContent,
+    LessonLog,
+    WeeklyScheduleSlot,
+)
+from accounts.models import BranchCashMovement, TeacherHonorariumEntry
+from core.cache import get_or_compute, invalidate_tags
+from portal.models import DirectorTeacherAssignment
+from students.models import TeacherAttendance
+
+PANEL_KEY_PREFIX = "portal_teacher:panel:v1"
+
+
+def panel_timeout():
+    return getattr(settings, "TEACHER_PANEL_CACHE_TIMEOUT", 600)
+
+
+def teacher_tag(user_id):
+    return f"teacher:{user_id}"
+
+
+def branch_roster_tag(branch_id):
+    return f"branch-roster:{branch_id}"
+
+
+def ec_supports_tag(ec_id):
+    return f"ec-supports:{ec_id}"
+
+
+def get_teacher_panel_data(source, *, teacher, branch, week_start, builder, tags, day=None, timeout=None):
+    """
+    Retourne les donnees d'une source depuis le cache, ou les calcule via builder().
+
+    `day` rattache en plus l'entree a la journee (compteurs du mois, cours a
+    venir) : elle est recalculee le lendemain meme sans invalidation.
+    """
+    base_key = (
+        f"{PANEL_KEY_PREFIX}:{source}:teacher:{teacher.pk}"
+        f":branch:{getattr(branch, 'pk', 'none')}:week:{week_start.isoformat()}"
+    )
+    if day is not None:
+        base_key = f"{base_key}:day:{day.isoformat()}"
+    return get_or_compute(
+        base_key,
+        builder,
+        timeout=panel_timeout() if timeout is None else timeout,
+        tags=[teacher_tag(teacher.pk), *tags],
+        namespace=f"portal_teacher:{source}",
+    )
+
+
+def invalidate_teacher_panels(*user_ids):
+    invalidate_tags(*(teacher_tag(user_id) for user_id in user_ids if user_id))
+
+
+# ==========================================================
+# INVALIDATION
+# ==========================================================
+
+@receiver([post_save, post_delete], sender=AcademicScheduleEvent)
+@receiver([post_save, post_delete], sender=WeeklyScheduleSlot)
+def _teacher_schedule_changed(sender, instance, **kwargs):
+    # _previous_teacher_id : cf. academics.signals.schedule_track_previous_class.
+    invalidate_teacher_panels(instance.teacher_id, getattr(instance, "_previous_teacher_id", None))
+
+
+@receiver([post_save, post_delete], sender=DirectorTeacherAssignment)
+@receiver([post_save, post_delete], sender=LessonLog)
+@receiver([post_save, post_delete], sender=TeacherAttendance)
+@receiver([post_save, post_delete], sender=TeacherHonorariumEntry)
+def _teacher_data_changed(sender, instance, **kwargs):
+    invalidate_teacher_panels(instance.teacher_id)
+
+
+@receiver([post_save, post_delete], sender=BranchCashMovement)
+def _honorarium_movement_changed(sender, instance, **kwargs):
+    if instance.source != BranchCashMovement.SOURCE_HONORARIUM:
+        return
+    # Reference "HON-<entree>-..." posee par le retrait d'honoraires.
+    parts = (instance.source_reference or "").split("-")
+    if len(parts) < 2 or parts[0] != "HON" or not parts[1].isdigit():
+        return
+    teacher_id = (
+        TeacherHonorariumEntry.objects.filter(pk=int(parts[1]))
+        .values_list("teacher_id", flat=True)
+        .first()
+    )
+    invalidate_teacher_panels(teacher_id)
+
+
+@receiver([post_save, post_delete], sender=AcademicEnrollment)
+def _roster_changed(sender, instance, **kwargs):
+    invalidate_tags(branch_roster_tag(instance.branch_id))
+
+
+@receiver([post_save, post_delete], sender=ECChapter)
+def _chapter_changed(sender, instance, **kwargs):
+    invalidate_tags(ec_supports_tag(instance.ec_id))
+
+
+@receiver([post_save, post_delete], sender=ECContent)
+def _support_content_changed(sender, instance, **kwargs):
+    ec_id = ECChapter.objects.filter(pk=instance.chapter_id).values_list("ec_id", flat=True).first()
+    invalidate_tags(ec_supports_tag(ec_id) if ec_id else "")
@@ -1,16 +1,17 @@
 from decimal import Decimal
 
 from django.db.models import Avg, Count, Prefetch, Sum
-from django.core.cache import cache
 from django.utils import timezone
 
 from academics.models import AcademicScheduleEvent, EC, ECContent, ECGrade, StudentContentProgress, WeeklyScheduleSlot
 from academics.services.schedule_service import get_student_week_schedule
 from communication.selectors import get_user_notifications
 from communication.models import CommunicationNotification
+from core.cache import get_or_compute
 from news.models import Event
 from payments.models import Payment
 from .profile_service import get_profile_completion, get_profile_data
+from .snapshot import get_student_section
 from portal.student.widgets.academics import get_academics_widget
 from portal.student.widgets.academics import get_student_academic_snapshot
 
@@ -495,8 +496,9 @@ def get_student_timetable(student):
     return get_student_week_schedule(student, None)
 
 
-def get_student_next_course(student):
-    timetable = get_student_timetable(student)
+def get_student_next_course(student, *, timetable=None):
+    if timetable is None:
+        timetable = get_student_timetable(student)
     events = timetable.get("events", []) if isinstance(timetable, dict) else []
     now = timezone.now()
     active_statuses = {"planned", "ongoing", "postponed", "draft"}
@@ -519,7 +521,7 @@ def get_student_next_course(student):
     return None
 
 
-def get_student_priority_actions(student, *, snapshot, next_course=None, stats=None):
+def get_student_priority_actions(student, *, snapshot, next_course=None, stats=None, unread_count=None):
     if student is None:
         return [
             {
@@ -560,7 +562,8 @@ def get_student_priority_actions(student, *, snapshot, next_course=None, stats=N
             }
         )
 
-    unread_count = get_student_unread_messages_count(student)
+    if unread_count is None:
+        unread_count = get_student_unread_messages_count(student)
     if unread_count:
         actions.append(
             {
@@ -616,24 +619,25 @@ def get_student_events(student):
     snapshot = get_student_academic_snapshot(student.user)
     branch = _get_student_branch(student, snapshot["academic_enrollment"])
 
-    cache_key = f"portal_student:events:v1:branch:{getattr(branch, 'id', 'none')}"
-    cached = cache.get(cache_key)
-    if cached is not None:
-        return cached
+    def build():
+        events = Event.objects.filter(is_published=True).order_by("event_date")[:4]
+        return [
+            {
+                "day": event.event_date.strftime("%d"),
+                "month": event.event_date.strftime("%b").upper(),
+                "title": event.title,
+                "desc": event.description[:90] + ("..." if len(event.description) > 90 else ""),
+                "branch": getattr(branch, "name", ""),
+            }
+            for event in events
+        ]
 
-    events = Event.objects.filter(is_published=True).order_by("event_date")[:4]
-    payload = [
-        {
-            "day": event.event_date.strftime("%d"),
-            "month": event.event_date.strftime("%b").upper(),
-            "title": event.title,
-            "desc": event.description[:90] + ("..." if len(event.description) > 90 else ""),
-            "branch": getattr(branch, "name", ""),
-        }
-        for event in events
-    ]
-    cache.set(cache_key, payload, 30)
-    return payload
+    return get_or_compute(
+        f"portal_student:events:v1:branch:{getattr(branch, 'id', 'none')}",
+        build,
+        timeout=30,
+        namespace="portal_student:events",
+    )
 
 
 def get_student_messages(student):
@@ -758,6 +762,32 @@ def get_student_unread_messages_count(student):
     ).count()
 
 
+# ==========================================================
+# SECTIONS EN CACHE (cf. portal/student/snapshot.py)
+# ==========================================================
+
+STUDENT_SECTIONS = {
+    "courses": (get_student_courses, ("enrollment", "class", "semester")),
+    "results": (get_student_results_summary, ("enrollment", "class", "semester")),
+    "teachers": (get_student_teachers, ("class", "branch")),
+    "stats": (get_student_stats, ("enrollment", "class", "semester", "inscription", "notifications")),
+    "messages": (get_student_messages, ("notifications",)),
+    "unread_messages_count": (get_student_unread_messages_count, ("notifications",)),
+    "message_summary": (get_student_message_summary, ("notifications",)),
+}
+
+
+def get_cached_student_section(name, student, snapshot):
+    builder, scopes = STUDENT_SECTIONS[name]
+    return get_student_section(
+        name,
+        student,
+        snapshot,
+        lambda: builder(student),
+        scopes=scopes,
+    )
+
+
 def get_student_dashboard_data(user):
     snapshot = get_student_academic_snapshot(user)
     student = snapshot["student"]
@@ -794,27 +824,30 @@ def get_student_dashboard_data(user):
             "subtitle": "Vue d'ensemble de votre parcours academique",
         }
 
+    # Emploi du temps : grilles de classe deja en cache (schedule_service).
     timetable = get_student_timetable(student)
-    next_course = get_student_next_course(student)
-    stats = get_student_stats(student)
+    next_course = get_student_next_course(student, timetable=timetable)
+    stats = get_cached_student_section("stats", student, snapshot)
+    unread_count = get_cached_student_section("unread_messages_count", student, snapshot)
     return {
         "student": student,
         "enrollment": enrollment,
-        "courses": get_student_courses(student),
-        "teachers": get_student_teachers(student),
+        "courses": get_cached_student_section("courses", student, snapshot),
+        "teachers": get_cached_student_section("teachers", student, snapshot),
         "timetable": timetable,
         "next_course": next_course,
         "events": get_student_events(student),
-        "messages": get_student_messages(student),
-        "unread_messages_count": get_student_unread_messages_count(student),
+        "messages": get_cached_student_section("messages", student, snapshot),
+        "unread_messages_count": unread_count,
         "stats": stats,
         "results": stats["results"],
-        "message_summary": get_student_message_summary(student),
+        "message_summary": get_cached_student_section("message_summary", student, snapshot),
         "priority_actions": get_student_priority_actions(
             student,
             snapshot=snapshot,
             next_course=next_course,
             stats=stats,
+            unread_count=unread_count,
         ),
         "academic_status": snapshot["academic_status"],
         "academic_status_message": snapshot["academic_status_message"],
@@ -876,27 +909,30 @@ def get_student_overview_data(user):
         }
 
     # Overview: hero + stats + courses overview + profile + events
+    # Emploi du temps : grilles de classe deja en cache (schedule_service).
     timetable = get_student_timetable(student)
-    next_course = get_student_next_course(student)
-    stats = get_student_stats(student)
+    next_course = get_student_next_course(student, timetable=timetable)
+    stats = get_cached_student_section("stats", student, snapshot)
+    unread_count = get_cached_student_section("unread_messages_count", student, snapshot)
     return {
         "student": student,
         "enrollment": enrollment,
-        "courses": get_student_courses(student),
+        "courses": get_cached_student_section("courses", student, snapshot),
         "timetable": timetable,
         "next_course": next_course,
         "events": get_student_events(student),
-        "messages": get_student_messages(student),
-        "teachers": get_student_teachers(student),
-        "unread_messages_count": get_student_unread_messages_count(student),
+        "messages": get_cached_student_section("messages", student, snapshot),
+        "teachers": get_cached_student_section("teachers", student, snapshot),
+        "unread_messages_count": unread_count,
         "stats": stats,
         "results": stats["results"],
-        "message_summary": get_student_message_summary(student),
+        "message_summary": get_cached_student_section("message_summary", student, snapshot),
         "priority_actions": get_student_priority_actions(
             student,
             snapshot=snapshot,
             next_course=next_course,
             stats=stats,
+            unread_count=unread_count,
         ),
         "academic_status": snapshot["academic_status"],
         "academic_status_message": snapshot["academic_status_message"],
@@ -913,11 +949,11 @@ def get_student_overview_data(user):
 def get_student_courses_context(user):
     snapshot = get_student_academic_snapshot(user)
     student = snapshot["student"]
-    courses = get_student_courses(student) if student else []
+    courses = get_cached_student_section("courses", student, snapshot) if student else []
     return {
         "courses": courses,
         "course_semesters": _build_course_semester_filters(courses),
-        "results": get_student_results_summary(student) if student else {},
+        "results": get_cached_student_section("results", student, snapshot) if student else {},
         "academic_status": snapshot["academic_status"],
         "academic_status_message": snapshot["academic_status_message"],
     }
@@ -934,9 +970,9 @@ def get_student_messages_context(user):
             "notification_events": [],
         }
     return {
-        "messages": get_student_messages(student),
-        "unread_messages_count": get_student_unread_messages_count(student),
-        "message_summary": get_student_message_summary(student),
+        "messages": get_cached_student_section("messages", student, snapshot),
+        "unread_messages_count": get_cached_student_section("unread_messages_count", student, snapshot),
+        "message_summary": get_cached_student_section("message_summary", student, snapshot),
         "notification_events": get_student_notification_events(student),
     }
 
@@ -0,0 +1,165 @@
+"""
+Cache des sections du portail etudiant.
+
+Chaque section du dashboard (cours, resultats, statistiques, enseignants,
+messages) est mise en cache par etudiant sous les tags
+dont elle depend : student, enrollment, class, semester, branch,
+inscription, notifications. Les signaux ci-dessous invalident ces tags
+quand une note, un paiement, un creneau ou une notification change ; les
+chargements HTMX d'une section relisent la meme entree que le dashboard.
+"""
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from academics.models import (
+    EC,
+    UE,
+    AcademicEnrollment,
+    AcademicScheduleEvent,
+    ECContent,
+    ECGrade,
+    Semester,
+    StudentContentProgress,
+    WeeklyScheduleSlot,
+)
+from communication.models import CommunicationNotification
+from core.cache import get_or_compute, invalidate_tags
+from inscriptions.models import Inscription
+from payments.models import Payment
+from portal.models import DirectorTeacherAssignment
+from students.models import Student
+
+SNAPSHOT_KEY_PREFIX = "portal_student:snapshot:v1"
+
+
+def snapshot_timeout():
+    return getattr(settings, "STUDENT_SNAPSHOT_CACHE_TIMEOUT", 600)
+
+
+def student_tag(user_id):
+    return f"student:{user_id}"
+
+
+def notifications_tag(user_id):
+    return f"notifications:{user_id}"
+
+
+def snapshot_tags(student, snapshot, scopes):
+    """Traduit les portees d'une section ("class", "semester"...) en tags."""
+    enrollment = snapshot["academic_enrollment"]
+    tags = [student_tag(student.user_id)]
+    for scope in scopes:
+        if scope == "notifications":
+            tags.append(notifications_tag(student.user_id))
+        elif scope == "inscription" and student.inscription_id:
+            tags.append(f"inscription:{student.inscription_id}")
+        elif enrollment is None:
+            continue
+        elif scope == "enrollment":
+            tags.append(f"enrollment:{enrollment.pk}")
+        elif scope == "class":
+            tags.append(f"class:{enrollment.academic_class_id}")
+        elif scope == "branch":
+            tags.append(f"branch:{enrollment.branch_id}")
+        elif scope == "semester":
+            tags.extend(
+                f"semester:{semester_id}"
+                for semester_id in {ec.ue.semester_id for ec in snapshot["academic_ecs"]}
+            )
+    return tags
+
+
+def get_student_section(section, student, snapshot, builder, *, scopes=(), timeout=None, variant=""):
+    """
+    Retourne la section depuis le cache, ou la calcule via builder().
+
+    `variant` distingue les versions d'une meme section dependant d'autre
+    chose que les donnees taguees.
+    """
+    enrollment = snapshot["academic_enrollment"]
+    base_key = (
+        f"{SNAPSHOT_KEY_PREFIX}:{section}:user:{student.user_id}"
+        f":enrollment:{getattr(enrollment, 'pk', 'none')}"
+    )
+    if variant:
+        base_key = f"{base_key}:{variant}"
+    return get_or_compute(
+        base_key,
+        builder,
+        timeout=snapshot_timeout() if timeout is None else timeout,
+        tags=snapshot_tags(student, snapshot, scopes),
+        namespace=f"portal_student:{section}",
+    )
+
+
+def invalidate_student_notifications(user_id):
+    invalidate_tags(notifications_tag(user_id))
+
+
+# ==========================================================
+# INVALIDATION
+# ==========================================================
+
+@receiver([post_save, post_delete], sender=ECGrade)
+def _grade_changed(sender, instance, **kwargs):
+    invalidate_tags(f"enrollment:{instance.enrollment_id}")
+
+
+@receiver([post_save, post_delete], sender=Payment)
+def _payment_changed(sender, instance, **kwargs):
+    invalidate_tags(f"inscription:{instance.inscription_id}")
+
+
+@receiver(post_save, sender=Inscription)
+def _inscription_changed(sender, instance, **kwargs):
+    invalidate_tags(f"inscription:{instance.pk}")
+
+
+@receiver([post_save, post_delete], sender=AcademicScheduleEvent)
+@receiver([post_save, post_delete], sender=WeeklyScheduleSlot)
+@receiver([post_save, post_delete], sender=DirectorTeacherAssignment)
+def _class_schedule_changed(sender, instance, **kwargs):
+    invalidate_tags(f"class:{instance.academic_class_id}")
+
+
+@receiver(post_save, sender=Semester)
+def _semester_changed(sender, instance, **kwargs):
+    invalidate_tags(f"semester:{instance.pk}")
+
+
+@receiver([post_save, post_delete], sender=EC)
+def _ec_changed(sender, instance, **kwargs):
+    semester_id = UE.objects.filter(pk=instance.ue_id).values_list("semester_id", flat=True).first()
+    invalidate_tags(f"semester:{semester_id}" if semester_id else "")
+
+
+@receiver([post_save, post_delete], sender=ECContent)
+def _content_changed(sender, instance, **kwargs):
+    semester_id = (
+        EC.objects.filter(chapters__pk=instance.chapter_id)
+        .values_list("ue__semester_id", flat=True)
+        .first()
+    )
+    invalidate_tags(f"semester:{semester_id}" if semester_id else "")
+
+
+@receiver(post_save, sender=StudentContentProgress)
+def _progress_changed(sender, instance, **kwargs):
+    invalidate_tags(student_tag(instance.student_id))
+
+
+@receiver(post_save, sender=Student)
+def _student_changed(sender, instance, **kwargs):
+    invalidate_tags(student_tag(instance.user_id))
+
+
+@receiver(post_save, sender=AcademicEnrollment)
+def _enrollment_changed(sender, instance, **kwargs):
+    invalidate_tags(student_tag(instance.student_id), f"enrollment:{instance.pk}")
+
+
+@receiver([post_save, post_delete], sender=CommunicationNotification)
+def _notification_changed(sender, instance, **kwargs):
+    invalidate_student_notifications(instance.recipient_id)
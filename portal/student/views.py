@@ -25,6 +25,7 @@ from .services import (
     get_student_timetable_context,
     is_semester_unlocked_for_enrollment,
 )
+from .snapshot import invalidate_student_notifications
 from .profile_service import (
     accept_internal_rules,
     get_internal_rules_status,
@@ -342,6 +343,8 @@ def mark_all_messages_read(request):
         status=CommunicationNotification.STATUS_READ,
         updated_at=now,
     )
+    # update() ne declenche pas post_save : invalidation explicite.
+    invalidate_student_notifications(request.user.pk)
     return JsonResponse({"ok": True, "unread_count": 0})
 
 
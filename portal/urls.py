@@ -73,6 +73,7 @@ from portal.views.supervisor_cases import (
 )
 from portal.views.supervisor import (
     supervisor_assign_replacement,
+    supervisor_attendance_report_export,
     supervisor_attendance_toggle_student,
     supervisor_class_detail,
     supervisor_convocation_create,
@@ -165,6 +166,7 @@ from portal.views.views import (
     teacher_portal,
     teacher_class_detail,
     teacher_content_viewer,
+    teacher_dashboard_panel,
     teacher_lesson_log_panel,
     teacher_settings_workspace,
     teacher_support_workspace,
@@ -180,6 +182,7 @@ urlpatterns = [
     path("student/", student_portal, name="portal_student"),
     path("staff/", staff_portal, name="portal_staff"),
     path("teacher/", teacher_portal, name="portal_teacher"),
+    path("teacher/panels/<slug:panel>/", teacher_dashboard_panel, name="teacher_dashboard_panel"),
     path("teacher/classes/<int:class_id>/", teacher_class_detail, name="teacher_class_detail"),
     path("teacher/supports/", teacher_support_workspace, name="teacher_support_workspace"),
     path("teacher/settings/", teacher_settings_workspace, name="teacher_settings_workspace"),
@@ -303,6 +306,11 @@ urlpatterns = [
         supervisor_workflow_workspace,
         name="supervisor_workflow_workspace",
     ),
+    path(
+        "supervisor/attendance/report/export/",
+        supervisor_attendance_report_export,
+        name="supervisor_attendance_report_export",
+    ),
     path(
         "supervisor/attendance/toggle/",
         supervisor_attendance_toggle_student,
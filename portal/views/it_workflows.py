@@ -71,6 +71,7 @@ from portal.models import SupportAuditLog, SupportTicket
 from students.models import Student
 from portal.views.admin_grades import _build_notes_grid_context
 from communication.models.notifications import CommunicationNotification
+from portal.student.snapshot import invalidate_student_notifications
 
 
 def _require_it_support(request):
@@ -1713,6 +1714,10 @@ def it_notifications_action(request):
     else:
         toast = {"level": "error", "message": f"Action inconnue: {action}"}
 
+    if action in ("mark_read", "mark_unread", "mark_all_read"):
+        # update() ne declenche pas post_save : compteurs de non-lus en cache.
+        invalidate_student_notifications(user.pk)
+
     # Re-render workspace with updated state
     from django.http import QueryDict
     get_params = QueryDict(mutable=True)
@@ -1,3 +1,4 @@
+import calendar
 import json
 from datetime import datetime, timedelta
 
@@ -5,7 +6,7 @@ from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db.models import Count, Q
-from django.http import HttpResponse, HttpResponseBadRequest
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
 from django.utils import timezone
@@ -36,6 +37,11 @@ from students.services.attendance_service import (
     mark_student_attendance,
     mark_teacher_attendance,
 )
+from students.services.attendance_report import (
+    StudentAttendanceReport,
+    iter_attendance_report_csv,
+    write_attendance_report_xlsx,
+)
 from students.services.attendance_workflow import (
     assert_roll_allows_editing,
     is_roll_locked_for_event,
@@ -154,6 +160,15 @@ def _parse_workflow_roll_date(request):
         return timezone.localdate()
 
 
+def _parse_report_month(request):
+    month_raw = (request.GET.get("month") or "").strip()
+    today = timezone.localdate()
+    try:
+        return datetime.strptime(month_raw, "%Y-%m").date().replace(day=1) if month_raw else today.replace(day=1)
+    except ValueError:
+        return today.replace(day=1)
+
+
 def _parse_supervisor_planner_request(request):
     branch = _resolve_academic_branch(request)
     class_id_raw = (request.GET.get("class_id") or request.POST.get("class_id") or "").strip()
@@ -252,15 +267,17 @@ def _render_supervisor_workflow_workspace(request, *, section=None, toast=None):
         return render(request, "portal/staff/supervisor/partials/workflow_workspace.html", context)
 
     if resolved_section == "attendance_report":
-        if selected_class is None:
+        # scope=branch : rapport de toute l'annexe, sans classe selectionnee.
+        branch_scope = (request.GET.get("scope") or "").strip() == "branch"
+        if selected_class is None and not branch_scope:
             return render(request, "portal/staff/supervisor/partials/workflow_workspace.html", context)
-        month_raw = (request.GET.get("month") or "").strip()
-        today = timezone.localdate()
-        try:
-            report_month = datetime.strptime(month_raw, "%Y-%m").date().replace(day=1) if month_raw else today.replace(day=1)
-        except ValueError:
-            report_month = today.replace(day=1)
-        context.update(build_attendance_monthly_report_context(branch=branch, academic_class=selected_class, month=report_month))
+        context.update(
+            build_attendance_monthly_report_context(
+                branch=branch,
+                academic_class=None if branch_scope else selected_class,
+                month=_parse_report_month(request),
+            )
+        )
         return render(request, "portal/staff/supervisor/partials/workflow_workspace.html", context)
 
     if resolved_section == "home":
@@ -299,6 +316,36 @@ def supervisor_workflow_workspace(request):
     return _render_supervisor_dashboard(request)
 
 
+@_position_required({"academic_supervisor"})
+def supervisor_attendance_report_export(request):
+    """Rapport mensuel etudiant x jour en CSV (defaut) ou XLSX, ecrit en flux."""
+    branch = _resolve_academic_branch(request)
+    if branch is None:
+        return HttpResponseBadRequest("Aucune annexe rattachee.")
+
+    class_ids = [int(raw) for raw in request.GET.getlist("class_id") if raw.strip().isdigit()]
+    if (request.GET.get("scope") or "").strip() == "branch":
+        class_ids = None
+    elif not class_ids:
+        return HttpResponseBadRequest("Classe ou portee annexe requise.")
+
+    month = _parse_report_month(request)
+    month_end = month.replace(day=calendar.monthrange(month.year, month.month)[1])
+    report = StudentAttendanceReport(branch=branch, start_date=month, end_date=month_end, academic_class_ids=class_ids)
+    filename = f"presences_{branch.code}_{month:%Y-%m}"
+
+    if (request.GET.get("format") or "").strip() == "xlsx":
+        return FileResponse(
+            write_attendance_report_xlsx(report),
+            as_attachment=True,
+            filename=f"{filename}.xlsx",
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+    response = StreamingHttpResponse(iter_attendance_report_csv(report), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
 @_position_required({"academic_supervisor"})
 def supervisor_attendance_toggle_student(request):
     if request.method != "POST":
@@ -1217,7 +1264,7 @@ def supervisor_week_materialize(request, class_id: int):
         )
         toast = {
             "level": "success",
-            "message": f"Semaine générée: {result['created']} cours créés ({result['skipped_existing']} déjà présents).",
+            "message": f"Semaine générée: {result['created']} cours créés ({result['skipped_existing']} déjà présents, {result['skipped_conflicts']} en conflit).",
         }
     except AcademicClass.DoesNotExist:
         toast = {"level": "error", "message": "Classe introuvable pour cette annexe."}
@@ -1269,7 +1316,7 @@ def supervisor_month_materialize(request, class_id: int):
         )
         toast = {
             "level": "success",
-            "message": f"Mois pedagogique genere: {result['created']} cours crees ({result['skipped_existing']} deja presents).",
+            "message": f"Mois pedagogique genere: {result['created']} cours crees ({result['skipped_existing']} deja presents, {result['skipped_conflicts']} en conflit).",
         }
     except AcademicClass.DoesNotExist:
         toast = {"level": "error", "message": "Classe introuvable pour cette annexe."}
@@ -10,7 +10,7 @@ from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
 from django.db.models import Count, Q, Sum
-from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
 from django.urls.exceptions import NoReverseMatch
@@ -67,6 +67,7 @@ from portal.services import (
     build_teacher_class_detail_context,
     build_teacher_dashboard_context,
     build_teacher_lesson_log_context,
+    build_teacher_panel_context,
 )
 from portal.services.teacher_dashboard_service import (
     _validate_content_file_extension,
@@ -1889,15 +1890,30 @@ def teacher_portal(request):
             })
         return render(request, "portal/partials/teacher_search_results.html", {"q": q})
 
+    active_section = section if section in ("overview", "classes", "supports", "schedule", "logs", "salary", "notifications", "settings") else "overview"
     context = build_teacher_dashboard_context(
         request,
         branch=branch,
         base_context_builder=_build_portal_context,
+        active_section=active_section,
     )
-    context["active_section"] = section if section in ("overview", "classes", "supports", "schedule", "logs", "salary", "notifications", "settings") else "overview"
+    context["active_section"] = active_section
     return render(request, "portal/teacher/sg_dashboard.html", context)
 
 
+@login_required
+def teacher_dashboard_panel(request, panel: str):
+    if not can_access(request.user, "view_portal", "teacher"):
+        return _deny_portal_access(request)
+
+    branch = _resolve_academic_branch(request)
+    try:
+        template_name, context = build_teacher_panel_context(request, branch=branch, panel=panel)
+    except ValidationError as exc:
+        raise Http404(" ".join(exc.messages)) from exc
+    return render(request, template_name, context)
+
+
 @_position_required({"teacher"})
 def teacher_class_detail(request, class_id: int):
     branch = _resolve_academic_branch(request)
@@ -2865,21 +2881,23 @@ def _inject_planner_route_context(context, *, role_prefix: str, workspace_target
 
 
 def _materialize_period_from_weekly_slots(*, user, academic_class, week_start, weeks_count: int):
-    from academics.services.schedule_service import materialize_week_events_from_weekly_slots
-
-    created = 0
-    skipped = 0
-    normalized_week = week_start
-    for offset in range(max(1, weeks_count)):
-        cursor = normalized_week + timedelta(days=7 * offset)
-        result = materialize_week_events_from_weekly_slots(
-            user=user,
-            academic_class=academic_class,
-            week_start=cursor,
-        )
-        created += result["created"]
-        skipped += result["skipped_existing"]
-    return {"created": created, "skipped_existing": skipped, "weeks_count": max(1, weeks_count)}
+    from academics.services.schedule_service import materialize_branch_weekly_slots
+
+    weeks_count = max(1, weeks_count)
+    week_start = week_start - timedelta(days=week_start.weekday())
+    result = materialize_branch_weekly_slots(
+        user=user,
+        branch=academic_class.branch,
+        start_date=week_start,
+        end_date=week_start + timedelta(days=7 * weeks_count - 1),
+        academic_classes=[academic_class],
+    )
+    return {
+        "created": result["created"],
+        "skipped_existing": result["skipped_existing"],
+        "skipped_conflicts": len(result["skipped_conflicts"]),
+        "weeks_count": weeks_count,
+    }
 
 
 def _parse_planning_period_request(request):
@@ -3094,7 +3112,7 @@ def director_week_materialize(request, class_id: int):
     try:
         academic_class = AcademicClass.objects.select_related("academic_year", "branch").get(pk=class_id, branch=branch, is_active=True)
         result = _materialize_period_from_weekly_slots(user=request.user, academic_class=academic_class, week_start=week_start, weeks_count=1)
-        toast = {"level": "success", "message": f"Semaine generee: {result['created']} cours crees ({result['skipped_existing']} deja presents)."}
+        toast = {"level": "success", "message": f"Semaine generee: {result['created']} cours crees ({result['skipped_existing']} deja presents, {result['skipped_conflicts']} en conflit)."}
     except AcademicClass.DoesNotExist:
         toast = {"level": "error", "message": "Classe introuvable pour cette annexe."}
     context = _build_weekly_slots_workspace_context(request, branch=branch, class_id=class_id, week_start=week_start, editing_slot_id=None, toast=toast)
@@ -3119,7 +3137,7 @@ def director_month_materialize(request, class_id: int):
     try:
         academic_class = AcademicClass.objects.select_related("academic_year", "branch").get(pk=class_id, branch=branch, is_active=True)
         result = _materialize_period_from_weekly_slots(user=request.user, academic_class=academic_class, week_start=week_start, weeks_count=4)
-        toast = {"level": "success", "message": f"Mois pedagogique genere: {result['created']} cours crees ({result['skipped_existing']} deja presents)."}
+        toast = {"level": "success", "message": f"Mois pedagogique genere: {result['created']} cours crees ({result['skipped_existing']} deja presents, {result['skipped_conflicts']} en conflit)."}
     except AcademicClass.DoesNotExist:
         toast = {"level": "error", "message": "Classe introuvable pour cette annexe."}
     context = _build_weekly_slots_workspace_context(request, branch=branch, class_id=class_id, week_start=week_start, editing_slot_id=None, toast=toast)
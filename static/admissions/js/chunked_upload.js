@@ -0,0 +1,206 @@
+(function () {
+  "use strict";
+
+  // Televersement fractionne des documents de candidature
+  // (admissions/services/uploads.py). Chaque <input type="file"
+  // data-chunked-upload="<id du document>"> d'un formulaire portant
+  // data-upload-url est envoye par morceaux des sa selection ; le jeton
+  // obtenu part dans un champ cache upload_<id> a la place du fichier.
+
+  var MAX_RETRIES = 6;
+  var POLL_INTERVAL = 2000;
+  var pending = [];
+
+  function wait(delay) {
+    return new Promise(function (resolve) {
+      setTimeout(resolve, delay);
+    });
+  }
+
+  function csrfToken(form) {
+    var input = form.querySelector("[name=csrfmiddlewaretoken]");
+    return input ? input.value : "";
+  }
+
+  function readJson(response) {
+    return response.json().then(function (data) {
+      data.httpStatus = response.status;
+      return data;
+    });
+  }
+
+  function statusNode(input) {
+    var node = input.parentNode.querySelector("[data-upload-status]");
+    if (!node) {
+      node = document.createElement("p");
+      node.setAttribute("data-upload-status", "");
+      node.className = "mt-1 text-[11px] text-slate-500";
+      input.parentNode.appendChild(node);
+    }
+    return node;
+  }
+
+  function tokenInput(input, documentId) {
+    var name = "upload_" + documentId;
+    var hidden = input.form.querySelector('input[type=hidden][name="' + name + '"]');
+    if (!hidden) {
+      hidden = document.createElement("input");
+      hidden.type = "hidden";
+      hidden.name = name;
+      input.form.appendChild(hidden);
+    }
+    return hidden;
+  }
+
+  function showStatus(input, message, isError) {
+    var node = statusNode(input);
+    node.textContent = message;
+    node.classList.toggle("text-red-600", Boolean(isError));
+  }
+
+  function startUpload(form, documentId, file) {
+    var body = new FormData();
+    body.append("document_id", documentId);
+    body.append("filename", file.name);
+    body.append("size", String(file.size));
+    return fetch(form.getAttribute("data-upload-url"), {
+      method: "POST",
+      body: body,
+      credentials: "same-origin",
+      headers: { "X-CSRFToken": csrfToken(form) },
+    }).then(readJson);
+  }
+
+  function sendChunks(form, input, file, upload) {
+    var url = form.getAttribute("data-upload-url") + upload.token + "/";
+    var offset = upload.offset;
+    var retries = 0;
+
+    function next() {
+      if (offset >= file.size) {
+        return Promise.resolve(url);
+      }
+      showStatus(input, "Envoi... " + Math.round((offset / file.size) * 100) + " %");
+      return fetch(url, {
+        method: "POST",
+        body: file.slice(offset, offset + upload.chunk_size),
+        credentials: "same-origin",
+        headers: {
+          "Content-Type": "application/octet-stream",
+          "Upload-Offset": String(offset),
+          "X-CSRFToken": csrfToken(form),
+        },
+      })
+        .then(readJson)
+        .then(function (state) {
+          if (state.httpStatus === 409 && state.offset === offset) {
+            throw new Error(state.error || "Envoi refuse.");
+          }
+          if (state.httpStatus >= 400 && state.httpStatus !== 409) {
+            throw new Error(state.error || "Envoi refuse.");
+          }
+          retries = 0;
+          offset = state.offset;
+          return state.status === "uploading" ? next() : url;
+        })
+        .catch(function (error) {
+          if (error instanceof TypeError && retries < MAX_RETRIES) {
+            // Coupure reseau : on relit l'offset recu par le serveur puis on reprend.
+            retries += 1;
+            return wait(1000 * Math.pow(2, retries))
+              .then(function () {
+                return fetch(url, { credentials: "same-origin" }).then(readJson);
+              })
+              .then(function (state) {
+                offset = state.offset;
+                return next();
+              }, next);
+          }
+          throw error;
+        });
+    }
+
+    return next();
+  }
+
+  function waitUntilProcessed(input, url) {
+    showStatus(input, "Verification du document...");
+    return fetch(url, { credentials: "same-origin" })
+      .then(readJson)
+      .then(function (state) {
+        if (state.status === "ready") {
+          return state;
+        }
+        if (state.status === "failed") {
+          throw new Error(state.error || "Document refuse.");
+        }
+        return wait(POLL_INTERVAL).then(function () {
+          return waitUntilProcessed(input, url);
+        });
+      });
+  }
+
+  function handleFile(input) {
+    var form = input.form;
+    var documentId = input.getAttribute("data-chunked-upload");
+    var file = input.files && input.files[0];
+    var hidden = tokenInput(input, documentId);
+    hidden.value = "";
+    if (!input.getAttribute("data-field-name")) {
+      input.setAttribute("data-field-name", input.name);
+    }
+    input.name = input.getAttribute("data-field-name");
+    if (!file) {
+      statusNode(input).textContent = "";
+      return;
+    }
+
+    // Le fichier ne repart plus avec le formulaire : seul le jeton est soumis.
+    input.removeAttribute("name");
+    var task = startUpload(form, documentId, file)
+      .then(function (upload) {
+        if (upload.httpStatus >= 400) {
+          throw new Error(upload.error || "Envoi refuse.");
+        }
+        return sendChunks(form, input, file, upload);
+      })
+      .then(function (url) {
+        return waitUntilProcessed(input, url);
+      })
+      .then(function (state) {
+        hidden.value = state.token;
+        showStatus(input, "Document pret.");
+      })
+      .catch(function (error) {
+        // Echec : retour a l'envoi classique avec le formulaire.
+        input.name = input.getAttribute("data-field-name");
+        showStatus(input, error.message, true);
+      })
+      .then(function () {
+        pending = pending.filter(function (item) {
+          return item !== task;
+        });
+      });
+    pending.push(task);
+  }
+
+  document.addEventListener("change", function (event) {
+    var input = event.target;
+    if (input && input.matches && input.matches("input[type=file][data-chunked-upload]") && input.form) {
+      handleFile(input);
+    }
+  });
+
+  document.addEventListener("submit", function (event) {
+    if (pending.length && event.target.hasAttribute("data-upload-url")) {
+      event.preventDefault();
+      window.alert("Vos documents sont encore en cours d'envoi. Patientez quelques secondes.");
+    }
+  });
+
+  window.AdmissionUploads = {
+    pendingCount: function () {
+      return pending.length;
+    },
+  };
+})();
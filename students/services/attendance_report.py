@@ -0,0 +1,286 @@
+"""
+Moteur des rapports d'assiduite (mensuel etudiants, hebdomadaire enseignants).
+
+Les compteurs sont calcules par la base : une seule requete groupee par
+(etudiant, classe, jour) avec un COUNT conditionnel par statut, triee par
+etudiant. Les lignes de la matrice etudiant x jour sont pivotees au fil de
+l'eau, un etudiant a la fois, ce qui permet d'exporter un rapport d'annexe
+en CSV ou XLSX en flux sans charger l'historique en memoire.
+"""
+
+from __future__ import annotations
+
+import csv
+import tempfile
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from functools import cached_property
+from itertools import groupby
+
+from django.db.models import Count, Q
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from academics.models import AcademicClass, AcademicScheduleEvent, LessonLog
+from branches.models import Branch
+from students.models import StudentAttendance, TeacherAttendance
+
+REPORT_STATUSES = ("present", "absent", "justified", "late")
+STATUS_LETTERS = {"present": "P", "absent": "A", "justified": "J", "late": "R"}
+STATUS_HEADERS = {"present": "Present", "absent": "Absent", "justified": "Justifie", "late": "Retard"}
+
+_CANDIDATURE = "student__inscription__candidature"
+
+
+def _student_status_counts():
+    # Absence justifiee = absence avec un motif saisi (meme regle que l'ancien rapport).
+    justified = Q(status=StudentAttendance.STATUS_ABSENT) & ~Q(justification="")
+    return {
+        "present": Count("id", filter=Q(status=StudentAttendance.STATUS_PRESENT)),
+        "absent": Count("id", filter=Q(status=StudentAttendance.STATUS_ABSENT, justification="")),
+        "justified": Count("id", filter=justified),
+        "late": Count("id", filter=Q(status=StudentAttendance.STATUS_LATE)),
+        "total": Count("id"),
+    }
+
+
+def _presence_rate(counts):
+    total = counts["total"]
+    return round((counts["present"] / total) * 100) if total else None
+
+
+def attendance_cell_label(counts):
+    """Cellule de la matrice : "P", "A"... ou "2P 1R" si plusieurs seances le meme jour."""
+    if not counts:
+        return ""
+    parts = [(counts[status], STATUS_LETTERS[status]) for status in REPORT_STATUSES if counts[status]]
+    if len(parts) == 1 and parts[0][0] == 1:
+        return parts[0][1]
+    return " ".join(f"{count}{letter}" for count, letter in parts)
+
+
+@dataclass
+class StudentAttendanceReport:
+    """Rapport etudiant x jour sur une periode, pour des classes ou toute l'annexe."""
+
+    branch: Branch
+    start_date: date
+    end_date: date
+    academic_class_ids: list[int] | None = None
+    totals: Counter = field(default_factory=Counter)
+    class_labels: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        classes = AcademicClass.objects.select_related("programme", "branch").filter(branch=self.branch)
+        if self.academic_class_ids is not None:
+            classes = classes.filter(pk__in=self.academic_class_ids)
+        self.class_labels = {academic_class.pk: academic_class.display_name for academic_class in classes}
+
+    @cached_property
+    def days(self):
+        return [
+            self.start_date + timedelta(days=offset)
+            for offset in range((self.end_date - self.start_date).days + 1)
+        ]
+
+    @property
+    def total_rate(self):
+        return _presence_rate(self.totals)
+
+    def grouped_counts(self):
+        """La requete groupee : une ligne par (etudiant, classe, jour) avec ses compteurs."""
+        queryset = StudentAttendance.objects.filter(
+            branch=self.branch,
+            date__gte=self.start_date,
+            date__lte=self.end_date,
+        )
+        if self.academic_class_ids is not None:
+            queryset = queryset.filter(academic_class_id__in=self.academic_class_ids)
+        return (
+            queryset.values(
+                "student_id",
+                "academic_class_id",
+                "date",
+                "student__matricule",
+                f"{_CANDIDATURE}__last_name",
+                f"{_CANDIDATURE}__first_name",
+            )
+            .annotate(**_student_status_counts())
+            .order_by(
+                f"{_CANDIDATURE}__last_name",
+                f"{_CANDIDATURE}__first_name",
+                "student_id",
+                "academic_class_id",
+                "date",
+            )
+        )
+
+    def iter_rows(self):
+        """
+        Lignes de la matrice, une par (etudiant, classe), dans l'ordre alphabetique.
+
+        Les totaux du rapport (self.totals) sont cumules au fil de l'iteration.
+        """
+        self.totals.clear()
+        grouped = self.grouped_counts().iterator(chunk_size=2000)
+        for (student_id, class_id), day_rows in groupby(
+            grouped, key=lambda item: (item["student_id"], item["academic_class_id"])
+        ):
+            day_rows = list(day_rows)
+            first = day_rows[0]
+            counts = Counter()
+            cells = {}
+            for item in day_rows:
+                day_counts = {key: item[key] for key in (*REPORT_STATUSES, "total")}
+                counts.update(day_counts)
+                cells[item["date"]] = day_counts
+            self.totals.update(counts)
+            last_name = first[f"{_CANDIDATURE}__last_name"] or ""
+            first_name = first[f"{_CANDIDATURE}__first_name"] or ""
+            yield {
+                "student_id": student_id,
+                "matricule": first["student__matricule"],
+                "last_name": last_name,
+                "first_name": first_name,
+                "full_name": f"{first_name} {last_name}".strip(),
+                "academic_class_id": class_id,
+                "class_name": self.class_labels.get(class_id, ""),
+                "cells": cells,
+                **{key: counts[key] for key in (*REPORT_STATUSES, "total")},
+                "rate": _presence_rate(counts),
+            }
+
+
+# ==========================================================
+# EXPORTS EN FLUX
+# ==========================================================
+
+class _Echo:
+    """Pseudo-fichier pour csv.writer : writerow retourne la ligne au lieu de l'ecrire."""
+
+    def write(self, value):
+        return value
+
+
+def _export_header(report):
+    return [
+        "Matricule",
+        "Etudiant",
+        "Classe",
+        *(day.strftime("%d/%m") for day in report.days),
+        *(STATUS_HEADERS[status] for status in REPORT_STATUSES),
+        "Total seances",
+        "Taux presence (%)",
+    ]
+
+
+def _export_values(report, row):
+    return [
+        row["matricule"],
+        row["full_name"],
+        row["class_name"],
+        *(attendance_cell_label(row["cells"].get(day)) for day in report.days),
+        *(row[status] for status in REPORT_STATUSES),
+        row["total"],
+        "" if row["rate"] is None else row["rate"],
+    ]
+
+
+def _export_totals(report):
+    return [
+        "",
+        "TOTAL",
+        "",
+        *("" for _ in report.days),
+        *(report.totals[status] for status in REPORT_STATUSES),
+        report.totals["total"],
+        "" if report.total_rate is None else report.total_rate,
+    ]
+
+
+def iter_attendance_report_csv(report):
+    """Morceaux CSV (separateur ;, BOM pour Excel) a passer a un StreamingHttpResponse."""
+    writer = csv.writer(_Echo(), delimiter=";")
+    yield "\ufeff"
+    yield writer.writerow(_export_header(report))
+    for row in report.iter_rows():
+        yield writer.writerow(_export_values(report, row))
+    yield writer.writerow(_export_totals(report))
+
+
+def write_attendance_report_xlsx(report):
+    """
+    Classeur en mode write_only (lignes ecrites au fil de l'eau, pas de
+    feuille en memoire) dans un fichier temporaire rembobine, a servir
+    avec un FileResponse.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Presences")
+    header = []
+    for value in _export_header(report):
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+    for row in report.iter_rows():
+        sheet.append(_export_values(report, row))
+    sheet.append(_export_totals(report))
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+# ==========================================================
+# REGULARITE ENSEIGNANTS
+# ==========================================================
+
+def teacher_regularity_rows(*, branch, start_date, end_date):
+    """
+    Cours planifies, tenus, absences, retards et annulations par enseignant.
+
+    Une requete groupee sur les cours de la periode (compteurs distincts par
+    cours, les jointures cahier/presence ne dupliquent rien) et une seconde
+    pour la liste des matieres.
+    """
+    events = AcademicScheduleEvent.objects.filter(
+        branch=branch,
+        start_datetime__date__gte=start_date,
+        start_datetime__date__lte=end_date,
+        event_type=AcademicScheduleEvent.EVENT_TYPE_COURSE,
+        is_active=True,
+    ).exclude(status=AcademicScheduleEvent.STATUS_CANCELLED)
+
+    subjects = {}
+    for teacher_id, title in events.values_list("teacher_id", "ec__title").distinct():
+        subjects.setdefault(teacher_id, set()).add(title)
+
+    grouped = events.values("teacher_id", "teacher__first_name", "teacher__last_name", "teacher__username").annotate(
+        planned=Count("id", distinct=True),
+        held=Count("id", filter=Q(lesson_logs__status=LessonLog.STATUS_DONE), distinct=True),
+        absent=Count("id", filter=Q(lesson_logs__status=LessonLog.STATUS_ABSENT_TEACHER), distinct=True),
+        cancelled=Count("id", filter=Q(lesson_logs__status=LessonLog.STATUS_CANCELLED), distinct=True),
+        late=Count("id", filter=Q(teacher_attendances__status=TeacherAttendance.STATUS_LATE), distinct=True),
+    )
+
+    rows = []
+    for item in grouped.order_by():
+        name = f"{item['teacher__first_name']} {item['teacher__last_name']}".strip() or item["teacher__username"]
+        rows.append(
+            {
+                "id": item["teacher_id"],
+                "name": name,
+                "subjects": sorted(subjects.get(item["teacher_id"], ())),
+                "planned": item["planned"],
+                "held": item["held"],
+                "absent": item["absent"],
+                "late": item["late"],
+                "cancelled": item["cancelled"],
+                "regularity_rate": round((item["held"] / item["planned"]) * 100) if item["planned"] else None,
+            }
+        )
+    rows.sort(key=lambda row: row["name"])
+    return rows
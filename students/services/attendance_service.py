@@ -8,6 +8,7 @@ from django.utils import timezone
 
 from academics.models import AcademicClass, AcademicEnrollment, AcademicScheduleEvent
 from branches.models import Branch
+from core.cache import invalidate_tags
 from students.models import AttendanceAlert, Student, StudentAttendance, TeacherAttendance
 
 User = get_user_model()
@@ -95,6 +96,7 @@ def _attendance_queryset_for_student(student: Student, branch: Branch):
 
 def _sync_lesson_logs_for_teacher_absence(*, teacher: User, branch: Branch, date_value):
     from academics.models import LessonLog
+    from portal.services.supervisor_day_snapshot import branch_day_tag
 
     updated_ids = []
     attendances = TeacherAttendance.objects.filter(
@@ -123,6 +125,9 @@ def _sync_lesson_logs_for_teacher_absence(*, teacher: User, branch: Branch, date
         if ids:
             updated.update(status=LessonLog.STATUS_ABSENT_TEACHER, validated_by=None)
             updated_ids.extend(ids)
+    if updated_ids:
+        # update() ne declenche pas post_save : instantane du surveillant, panneaux enseignant.
+        invalidate_tags(branch_day_tag(branch.id, date_value), f"teacher:{teacher.id}")
     return updated_ids
 
 
@@ -36,6 +36,11 @@ from students.services.attendance_service import (
     mark_student_attendance,
     mark_teacher_attendance,
 )
+from students.services.attendance_report import (
+    StudentAttendanceReport,
+    attendance_cell_label,
+    iter_attendance_report_csv,
+)
 from students.services.create_student import create_student_after_first_payment
 
 
@@ -900,6 +905,42 @@ class AttendanceServiceTests(TestCase):
         self.assertEqual(attendance.status, TeacherAttendance.STATUS_ABSENT)
         self.assertEqual(attendance.schedule_event, self.event_day_1)
 
+    def test_attendance_report_pivots_grouped_counts_and_streams_csv(self):
+        for event, status, justification in [
+            (self.event_day_1, StudentAttendance.STATUS_PRESENT, ""),
+            (self.event_day_2, StudentAttendance.STATUS_ABSENT, "Malade"),
+            (self.event_day_3, StudentAttendance.STATUS_LATE, ""),
+        ]:
+            mark_student_attendance(
+                student=self.student,
+                academic_class=self.academic_class,
+                schedule_event=event,
+                status=status,
+                recorded_by=self.recorder,
+                branch=self.branch,
+                justification=justification,
+            )
+        report = StudentAttendanceReport(
+            branch=self.branch,
+            start_date=date(2026, 10, 1),
+            end_date=date(2026, 10, 31),
+        )
+
+        with self.assertNumQueries(1):
+            rows = list(report.iter_rows())
+
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual((row["present"], row["absent"], row["justified"], row["late"]), (1, 0, 1, 1))
+        self.assertEqual(row["rate"], 33)
+        self.assertEqual(attendance_cell_label(row["cells"][date(2026, 10, 6)]), "J")
+        self.assertEqual(report.totals["total"], 3)
+
+        csv_lines = "".join(iter_attendance_report_csv(report)).splitlines()
+        self.assertEqual(len(csv_lines), 3)
+        self.assertIn("MAT-PRES-01;Awa Diallo;", csv_lines[1])
+        self.assertTrue(csv_lines[2].startswith(";TOTAL;"))
+
 
 class AttendanceApiTests(TestCase):
     def setUp(self):
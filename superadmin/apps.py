@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class SuperadminConfig(AppConfig):
     name = 'superadmin'
+
+    def ready(self):
+        from superadmin import search  # noqa: F401
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from superadmin.models import SearchDocument
+from superadmin.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit la table de recherche globale du cockpit superadmin "
+        "(apres un import ou des ecritures groupees qui ne declenchent pas les signaux)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            action="append",
+            dest="kinds",
+            help="Limite la reconstruction a ce type (option repetable) : "
+            + ", ".join(kind for kind, _label in SearchDocument.KIND_CHOICES),
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Lignes inserees par lot (defaut: 1000).")
+
+    def handle(self, *args, **options):
+        known_kinds = {kind for kind, _label in SearchDocument.KIND_CHOICES}
+        unknown = set(options["kinds"] or ()) - known_kinds
+        if unknown:
+            raise CommandError(f"Type(s) inconnu(s) : {', '.join(sorted(unknown))}")
+
+        summary = rebuild_search_index(kinds=options["kinds"], batch_size=max(1, options["batch_size"]))
+        for kind, count in summary.items():
+            self.stdout.write(f"  {kind:<12} {count:>8} document(s)")
+        self.stdout.write(self.style.SUCCESS(f"[search] {sum(summary.values())} document(s) indexe(s)."))
@@ -0,0 +1,62 @@
+from django.db import migrations, models
+
+
+# Index propres a PostgreSQL : trigrammes pour les recherches "contient"
+# (LIKE '%...%') et varchar_pattern_ops pour les prefixes du titre.
+# Sans effet sur les autres moteurs (sqlite des tests).
+POSTGRES_INDEXES = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS superadmin_searchdoc_text_trgm "
+    "ON superadmin_searchdocument USING gin (search_text gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS superadmin_searchdoc_title_prefix "
+    "ON superadmin_searchdocument (title_key varchar_pattern_ops)",
+)
+
+POSTGRES_INDEXES_DROP = (
+    "DROP INDEX IF EXISTS superadmin_searchdoc_title_prefix",
+    "DROP INDEX IF EXISTS superadmin_searchdoc_text_trgm",
+)
+
+
+def create_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in POSTGRES_INDEXES:
+        schema_editor.execute(statement)
+
+
+def drop_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in POSTGRES_INDEXES_DROP:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('superadmin', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('programme', 'Formation'), ('article', 'Article'), ('student', 'Etudiant'), ('candidature', 'Candidature'), ('payment', 'Paiement'), ('staff', 'Staff')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('subtitle', models.CharField(blank=True, max_length=255)),
+                ('url', models.CharField(max_length=255)),
+                ('title_key', models.CharField(db_index=True, max_length=255)),
+                ('search_text', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Document de recherche',
+                'verbose_name_plural': 'Documents de recherche',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='search_document_unique_object')],
+            },
+        ),
+        migrations.RunPython(create_postgres_indexes, drop_postgres_indexes),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def backfill_search_documents(apps, schema_editor):
+    # Memes constructeurs que les signaux et la commande rebuild_search_index :
+    # ils s'appuient sur les modeles reels (full_name, reference, reverse()),
+    # d'ou les dependances sur les dernieres migrations des applications indexees.
+    from superadmin.search import rebuild_search_index
+
+    rebuild_search_index()
+
+
+def clear_search_documents(apps, schema_editor):
+    SearchDocument = apps.get_model('superadmin', 'SearchDocument')
+    SearchDocument.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('superadmin', '0002_searchdocument'),
+        ('accounts', '0023_branchcashmonthtotal'),
+        ('admissions', '0005_documentupload'),
+        ('blog', '0007_alter_commentlike_unique_together_and_more'),
+        ('formations', '0009_programme_meta_description_programme_meta_title_and_more'),
+        ('payments', '0009_payment_post_validation_started_at'),
+        ('students', '0013_alter_studentcase_status_teachercase_convocation_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_documents, clear_search_documents),
+    ]
@@ -29,3 +29,49 @@ class SuperadminCockpitPreference(models.Model):
 
     def __str__(self):
         return f'CockpitPref<{self.user_id}>'
+
+
+class SearchDocument(models.Model):
+    """
+    Ligne denormalisee de la recherche globale du cockpit.
+
+    Une ligne par objet indexe (formation, article, etudiant, candidature,
+    paiement, compte staff), tenue a jour par superadmin.search. Le texte
+    de recherche est deja normalise (minuscules, sans accents) ; sous
+    PostgreSQL il porte un index trigramme (cf. migration 0002).
+    """
+
+    KIND_PROGRAMME = 'programme'
+    KIND_ARTICLE = 'article'
+    KIND_STUDENT = 'student'
+    KIND_CANDIDATURE = 'candidature'
+    KIND_PAYMENT = 'payment'
+    KIND_STAFF = 'staff'
+
+    KIND_CHOICES = (
+        (KIND_PROGRAMME, 'Formation'),
+        (KIND_ARTICLE, 'Article'),
+        (KIND_STUDENT, 'Etudiant'),
+        (KIND_CANDIDATURE, 'Candidature'),
+        (KIND_PAYMENT, 'Paiement'),
+        (KIND_STAFF, 'Staff'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+    url = models.CharField(max_length=255)
+    title_key = models.CharField(max_length=255, db_index=True)
+    search_text = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Document de recherche'
+        verbose_name_plural = 'Documents de recherche'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_document_unique_object'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind}:{self.object_id} {self.title}'
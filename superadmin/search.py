@@ -0,0 +1,369 @@
+"""
+Recherche globale du cockpit superadmin.
+
+Chaque objet recherchable (formation, article, etudiant, candidature,
+paiement, compte staff) a une ligne SearchDocument : titre, sous-titre,
+lien et texte de recherche normalise (minuscules, sans accents). Les
+signaux ci-dessous la tiennent a jour. Les ecritures groupees (bulk_update,
+.update()) ne declenchent pas les signaux : leur service reindexe les objets
+touches (index_payments) ; la commande rebuild_search_index reconstruit la
+table apres un import.
+
+Une recherche est une seule requete sur cette table : chaque mot doit
+apparaitre dans le texte (index trigramme sous PostgreSQL), le classement
+favorise le titre exact, puis le debut du titre, puis le debut d'un mot.
+"""
+
+import unicodedata
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, IntegerField, Value, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from accounts.models import Profile
+from admissions.models import Candidature
+from blog.models import Article
+from formations.models import Programme
+from payments.models import Payment
+from students.models import Student
+from superadmin.models import SearchDocument
+
+User = get_user_model()
+
+SEARCH_MIN_LENGTH = 2
+SEARCH_MAX_LENGTH = 64
+SEARCH_MAX_TERMS = 4
+SEARCH_DEFAULT_LIMIT = 8
+SEARCH_PAGE_LIMIT = 50
+
+# Ordre d'affichage a pertinence egale.
+KIND_PRIORITY = {
+    SearchDocument.KIND_STUDENT: 0,
+    SearchDocument.KIND_CANDIDATURE: 1,
+    SearchDocument.KIND_PAYMENT: 2,
+    SearchDocument.KIND_PROGRAMME: 3,
+    SearchDocument.KIND_STAFF: 4,
+    SearchDocument.KIND_ARTICLE: 5,
+}
+
+KIND_LABELS = dict(SearchDocument.KIND_CHOICES)
+
+
+def normalize_search_text(value):
+    """Minuscules, accents retires, espaces compactes."""
+    value = unicodedata.normalize("NFKD", str(value or ""))
+    value = "".join(char for char in value if not unicodedata.combining(char))
+    return " ".join(value.lower().split())
+
+
+def _truncate(value, length=255):
+    value = " ".join(str(value or "").split())
+    return value if len(value) <= length else f"{value[:length - 3]}..."
+
+
+def _document(kind, pk, *, title, url, subtitle="", keywords=()):
+    title = _truncate(title) or f"#{pk}"
+    subtitle = _truncate(subtitle)
+    return {
+        "kind": kind,
+        "object_id": pk,
+        "title": title,
+        "subtitle": subtitle,
+        "url": url,
+        "title_key": normalize_search_text(title)[:255],
+        "search_text": normalize_search_text(" ".join([title, subtitle, *(str(word) for word in keywords if word)])),
+    }
+
+
+# ==========================================================
+# DOCUMENTS PAR TYPE D'OBJET
+# ==========================================================
+# Chaque fonction retourne le document de l'objet, ou None s'il ne doit
+# pas apparaitre dans la recherche (candidature supprimee, compte non staff).
+
+def programme_document(programme):
+    return _document(
+        SearchDocument.KIND_PROGRAMME,
+        programme.pk,
+        title=programme.title,
+        subtitle=programme.short_description,
+        url=reverse("superadmin:formation_edit", args=[programme.pk]),
+        keywords=[programme.slug],
+    )
+
+
+def article_document(article):
+    return _document(
+        SearchDocument.KIND_ARTICLE,
+        article.pk,
+        title=article.title,
+        subtitle=article.get_status_display(),
+        url=reverse("superadmin:article_edit", args=[article.pk]),
+        keywords=[article.slug, article.excerpt[:300]],
+    )
+
+
+def student_document(student):
+    user = student.user
+    candidature = student.inscription.candidature
+    name = user.get_full_name() or candidature.full_name or user.username
+    return _document(
+        SearchDocument.KIND_STUDENT,
+        student.pk,
+        title=name,
+        subtitle=student.matricule,
+        url=reverse("superadmin:student_detail", args=[student.pk]),
+        keywords=[candidature.full_name, user.email, candidature.phone],
+    )
+
+
+def candidature_document(candidature):
+    if candidature.is_deleted:
+        return None
+    return _document(
+        SearchDocument.KIND_CANDIDATURE,
+        candidature.pk,
+        title=candidature.full_name,
+        subtitle=f"{candidature.programme.title} - {candidature.get_status_display()}",
+        url=reverse("superadmin:candidature_detail", args=[candidature.pk]),
+        keywords=[candidature.reference, candidature.email, candidature.phone, candidature.academic_year],
+    )
+
+
+def payment_document(payment):
+    candidature = payment.inscription.candidature
+    label = payment.receipt_number or payment.reference or f"#{payment.pk}"
+    return _document(
+        SearchDocument.KIND_PAYMENT,
+        payment.pk,
+        title=f"Paiement {label}",
+        subtitle=f"{candidature.full_name} - {payment.amount} FCFA - {payment.get_status_display()}",
+        url=reverse("superadmin:payment_detail", args=[payment.pk]),
+        keywords=[payment.reference, payment.receipt_number],
+    )
+
+
+def staff_document(user):
+    profile = getattr(user, "profile", None)
+    if not (user.is_staff or (profile is not None and profile.user_type == "staff")):
+        return None
+    role_label = (profile.get_position_display() or profile.get_role_display()) if profile else ""
+    return _document(
+        SearchDocument.KIND_STAFF,
+        user.pk,
+        title=user.get_full_name() or user.username,
+        subtitle=role_label or "Staff",
+        url=reverse("superadmin:user_edit", args=[user.pk]),
+        keywords=[user.username, user.email],
+    )
+
+
+INDEXED_TYPES = (
+    (SearchDocument.KIND_PROGRAMME, Programme.objects.all, programme_document),
+    (SearchDocument.KIND_ARTICLE, Article.objects.all, article_document),
+    (
+        SearchDocument.KIND_STUDENT,
+        lambda: Student.objects.select_related("user", "inscription__candidature"),
+        student_document,
+    ),
+    (
+        SearchDocument.KIND_CANDIDATURE,
+        lambda: Candidature.objects.select_related("programme").filter(is_deleted=False),
+        candidature_document,
+    ),
+    (
+        SearchDocument.KIND_PAYMENT,
+        lambda: Payment.objects.select_related("inscription__candidature"),
+        payment_document,
+    ),
+    (SearchDocument.KIND_STAFF, lambda: User.objects.select_related("profile"), staff_document),
+)
+
+
+# ==========================================================
+# INDEXATION
+# ==========================================================
+
+def index_document(kind, pk, document):
+    """Enregistre (ou retire si document est None) la ligne d'un objet."""
+    if document is None:
+        remove_document(kind, pk)
+        return
+    SearchDocument.objects.update_or_create(
+        kind=kind,
+        object_id=pk,
+        defaults={key: value for key, value in document.items() if key not in ("kind", "object_id")},
+    )
+
+
+def remove_document(kind, pk):
+    SearchDocument.objects.filter(kind=kind, object_id=pk).delete()
+
+
+def index_payments(payments):
+    """Reindexe des paiements ecrits sans post_save (inscription__candidature charge)."""
+    for payment in payments:
+        index_document(SearchDocument.KIND_PAYMENT, payment.pk, payment_document(payment))
+
+
+def rebuild_search_index(*, kinds=None, batch_size=1000):
+    """Reconstruit la table pour les types demandes (tous par defaut). Retourne {type: lignes}."""
+    summary = {}
+    for kind, queryset_factory, build in INDEXED_TYPES:
+        if kinds and kind not in kinds:
+            continue
+        SearchDocument.objects.filter(kind=kind).delete()
+        batch = []
+        count = 0
+        for instance in queryset_factory().iterator(chunk_size=batch_size):
+            document = build(instance)
+            if document is None:
+                continue
+            batch.append(SearchDocument(**document))
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            SearchDocument.objects.bulk_create(batch)
+            count += len(batch)
+        summary[kind] = count
+    return summary
+
+
+# ==========================================================
+# RECHERCHE
+# ==========================================================
+
+def clean_search_query(raw_query):
+    """
+    Requete normalisee et bornee, ou "" si elle est trop courte.
+
+    Les limites protegent la base des saisies longues ou collees : au plus
+    SEARCH_MAX_LENGTH caracteres et SEARCH_MAX_TERMS mots.
+    """
+    query = normalize_search_text(raw_query)[:SEARCH_MAX_LENGTH]
+    terms = query.split()[:SEARCH_MAX_TERMS]
+    query = " ".join(terms)
+    return query if len(query) >= SEARCH_MIN_LENGTH else ""
+
+
+def search_documents(raw_query, *, limit=SEARCH_DEFAULT_LIMIT, kinds=None):
+    """Documents classes par pertinence (une requete) ; liste vide si la requete est trop courte."""
+    query = clean_search_query(raw_query)
+    if not query:
+        return []
+
+    terms = query.split()
+    queryset = SearchDocument.objects.all()
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    for term in terms:
+        queryset = queryset.filter(search_text__contains=term)
+
+    first_term = terms[0]
+    queryset = queryset.annotate(
+        relevance=Case(
+            When(title_key=query, then=Value(0)),
+            When(title_key__startswith=query, then=Value(1)),
+            When(title_key__startswith=first_term, then=Value(2)),
+            When(search_text__contains=f" {first_term}", then=Value(3)),
+            default=Value(4),
+            output_field=IntegerField(),
+        ),
+        kind_priority=Case(
+            *(When(kind=kind, then=Value(priority)) for kind, priority in KIND_PRIORITY.items()),
+            default=Value(len(KIND_PRIORITY)),
+            output_field=IntegerField(),
+        ),
+    )
+    return list(
+        queryset.order_by("relevance", "kind_priority", "title_key").values(
+            "kind", "object_id", "title", "subtitle", "url"
+        )[:limit]
+    )
+
+
+# ==========================================================
+# SIGNAUX
+# ==========================================================
+
+def _touches(update_fields, fields):
+    """Faux si save(update_fields=...) ne modifie aucun champ indexe."""
+    return update_fields is None or bool(set(update_fields) & set(fields))
+
+
+@receiver(post_save, sender=Programme)
+def _programme_saved(sender, instance, **kwargs):
+    index_document(SearchDocument.KIND_PROGRAMME, instance.pk, programme_document(instance))
+
+
+@receiver(post_save, sender=Article)
+def _article_saved(sender, instance, **kwargs):
+    index_document(SearchDocument.KIND_ARTICLE, instance.pk, article_document(instance))
+
+
+@receiver(post_save, sender=Student)
+def _student_saved(sender, instance, **kwargs):
+    index_document(SearchDocument.KIND_STUDENT, instance.pk, student_document(instance))
+
+
+@receiver(post_save, sender=Candidature)
+def _candidature_saved(sender, instance, **kwargs):
+    index_document(SearchDocument.KIND_CANDIDATURE, instance.pk, candidature_document(instance))
+    if not _touches(kwargs.get("update_fields"), ("first_name", "last_name", "email", "phone")):
+        return
+    # Le nom du candidat figure aussi sur ses paiements et sa fiche etudiant.
+    for payment in Payment.objects.select_related("inscription__candidature").filter(
+        inscription__candidature=instance
+    ):
+        index_document(SearchDocument.KIND_PAYMENT, payment.pk, payment_document(payment))
+    student = Student.objects.select_related("user", "inscription__candidature").filter(
+        inscription__candidature=instance
+    ).first()
+    if student is not None:
+        index_document(SearchDocument.KIND_STUDENT, student.pk, student_document(student))
+
+
+@receiver(post_save, sender=Payment)
+def _payment_saved(sender, instance, **kwargs):
+    # Les passes du recu (receipt_status, receipt_pdf) ne changent rien a l'index.
+    if not _touches(kwargs.get("update_fields"), ("inscription", "amount", "status", "reference", "receipt_number")):
+        return
+    index_document(SearchDocument.KIND_PAYMENT, instance.pk, payment_document(instance))
+
+
+@receiver(post_save, sender=User)
+def _user_saved(sender, instance, **kwargs):
+    # La connexion n'enregistre que last_login.
+    if not _touches(kwargs.get("update_fields"), ("first_name", "last_name", "username", "email", "is_staff")):
+        return
+    index_document(SearchDocument.KIND_STAFF, instance.pk, staff_document(instance))
+    student = Student.objects.select_related("user", "inscription__candidature").filter(user=instance).first()
+    if student is not None:
+        index_document(SearchDocument.KIND_STUDENT, student.pk, student_document(student))
+
+
+@receiver(post_save, sender=Profile)
+def _profile_saved(sender, instance, **kwargs):
+    index_document(SearchDocument.KIND_STAFF, instance.user_id, staff_document(instance.user))
+
+
+@receiver(post_delete, sender=Programme)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Candidature)
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=User)
+def _indexed_object_deleted(sender, instance, **kwargs):
+    kind = {
+        Programme: SearchDocument.KIND_PROGRAMME,
+        Article: SearchDocument.KIND_ARTICLE,
+        Student: SearchDocument.KIND_STUDENT,
+        Candidature: SearchDocument.KIND_CANDIDATURE,
+        Payment: SearchDocument.KIND_PAYMENT,
+        User: SearchDocument.KIND_STAFF,
+    }[sender]
+    remove_document(kind, instance.pk)
@@ -13,6 +13,8 @@ from branches.models import Branch
 from payments.models import PaymentAgent
 from formations.models import Filiere
 from memoires.models import Memoire, PageMemoire
+from superadmin.models import SearchDocument
+from superadmin.search import rebuild_search_index, search_documents
 
 
 User = get_user_model()
@@ -128,6 +130,69 @@ class SuperadminUserManagementTests(TestCase):
         self.assertEqual(response.status_code, 302)
 
 
+class GlobalSearchTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin_search',
+            email='admin_search@example.com',
+            password='pass1234',
+        )
+        self.client.force_login(self.admin)
+        self.agent = User.objects.create_user(
+            username='agent_traore',
+            email='agent_traore@example.com',
+            password='pass1234',
+            first_name='Aminata',
+            last_name='Traoré',
+            is_staff=True,
+        )
+        User.objects.create_user(
+            username='agent_diallo',
+            email='diallo@example.com',
+            password='pass1234',
+            first_name='Moussa',
+            last_name='Diallo Aminata',
+            is_staff=True,
+        )
+
+    def test_search_documents_are_ranked_in_one_query(self):
+        with self.assertNumQueries(1):
+            results = search_documents('aminata')
+
+        self.assertEqual(
+            [result['title'] for result in results],
+            ['Aminata Traoré', 'Moussa Diallo Aminata'],
+        )
+        self.assertEqual(search_documents('AMINATA TRAORE')[0]['object_id'], self.agent.pk)
+        self.assertEqual(search_documents('a'), [])
+
+    def test_signals_keep_documents_in_sync(self):
+        self.agent.last_name = 'Keita'
+        self.agent.save()
+        # 'traore' reste trouve via l'identifiant (agent_traore), mais plus par le nom.
+        self.assertEqual([result['title'] for result in search_documents('traore')], ['Aminata Keita'])
+        self.assertEqual(search_documents('keita')[0]['title'], 'Aminata Keita')
+
+        self.agent.is_staff = False
+        self.agent.save()
+        self.assertEqual(search_documents('keita'), [])
+
+        self.assertTrue(SearchDocument.objects.filter(kind=SearchDocument.KIND_STAFF).exists())
+        SearchDocument.objects.all().delete()
+        rebuild_search_index()
+        self.assertEqual(search_documents('diallo')[0]['title'], 'Moussa Diallo Aminata')
+
+    def test_search_view_renders_partial_for_htmx_and_page_otherwise(self):
+        response = self.client.get(reverse('superadmin:search_global'), {'q': 'traore'}, HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'superadmin/search/_results.html')
+        self.assertContains(response, reverse('superadmin:user_edit', args=[self.agent.pk]))
+
+        response = self.client.get(reverse('superadmin:search_global'), {'q': 'x'})
+        self.assertTemplateUsed(response, 'superadmin/search/results.html')
+        self.assertTrue(response.context['query_too_short'])
+
+
 class GalleryBulkUploadTests(TestCase):
     def setUp(self):
         self.user = User.objects.create_superuser(
@@ -557,10 +622,11 @@ class MemoireSuperadminModuleTests(TestCase):
         self.client.force_login(self.admin)
         fichier = SimpleUploadedFile('memoire.pdf', _pdf_bytes(2), content_type='application/pdf')
 
-        response = self.client.post(
-            reverse('superadmin:memoire_create'),
-            self._donnees_formulaire(fichier_source=fichier),
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('superadmin:memoire_create'),
+                self._donnees_formulaire(fichier_source=fichier),
+            )
 
         self.assertEqual(response.status_code, 302)
         memoire = Memoire.objects.get(slug='prise-en-charge-des-urgences')
@@ -584,10 +650,11 @@ class MemoireSuperadminModuleTests(TestCase):
         nouveau_fichier = SimpleUploadedFile(
             'remplace.pdf', _pdf_bytes(3), content_type='application/pdf'
         )
-        response = self.client.post(
-            reverse('superadmin:memoire_edit', args=[memoire.pk]),
-            self._donnees_formulaire(fichier_source=nouveau_fichier),
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('superadmin:memoire_edit', args=[memoire.pk]),
+                self._donnees_formulaire(fichier_source=nouveau_fichier),
+            )
 
         self.assertEqual(response.status_code, 302)
         memoire.refresh_from_db()
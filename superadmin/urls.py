@@ -165,6 +165,7 @@ urlpatterns = [
     path('gallery/<int:pk>/edit/', views.gallery_edit, name='gallery_edit'),
     path('gallery/<int:pk>/delete/', views.gallery_delete, name='gallery_delete'),
     path('gallery/<int:pk>/featured/', views.gallery_toggle_featured, name='gallery_toggle_featured'),
+    path('gallery/<int:pk>/traitement-statut/', views.gallery_processing_status, name='gallery_processing_status'),
 
     # ============================================================================
     # PAGES (Legal / Institutionnelles)
@@ -213,6 +214,7 @@ urlpatterns = [
     path('memoires/<int:pk>/toggle-publication/', views.toggle_memoire_publication, name='toggle_memoire_publication'),
     path('memoires/<int:pk>/toggle-avant/', views.toggle_memoire_avant, name='toggle_memoire_avant'),
     path('memoires/<int:pk>/regenerer-pages/', views.memoire_regenerate_pages, name='memoire_regenerate_pages'),
+    path('memoires/<int:pk>/rendu-statut/', views.memoire_render_status, name='memoire_render_status'),
 
     # ============================================================================
     # MESSAGES (Contact)
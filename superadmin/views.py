@@ -38,6 +38,7 @@ from news.models import News, Event, EventType, MediaItem, ResultSession, Catego
 from news.services import create_event_media_batch
 from communication.models import CommunicationNotification
 from communication.services import EmailService
+from core.fragments import htmx_fragment
 from core.models import (
     Institution,
     InstitutionPresentation,
@@ -51,11 +52,12 @@ from core.models import (
 )
 from inscriptions.models import Inscription, StatusHistory
 from payments.models import Payment, PaymentAgent, CashPaymentSession
+from payments.services.validation import validate_payments_bulk
 from students.models import Student
 from branches.models import Branch
 from memoires.models import Memoire
 from memoires.forms import MemoireForm
-from memoires.services.rendering import render_memoire_pages
+from memoires.services.rendering import schedule_memoire_rendering
 from accounts.models import Profile
 from academics.models import AcademicClass
 from academics.services.academic_years import (
@@ -66,6 +68,15 @@ from academics.services.academic_years import (
 from academics.services.academic_positioning import get_positioning_context, get_positioning_fee_for_level
 from community.models import Category as CommunityCategory, Topic, Answer
 from .models import SuperadminCockpitPreference
+from .search import (
+    KIND_LABELS as SEARCH_KIND_LABELS,
+    SEARCH_DEFAULT_LIMIT,
+    SEARCH_MAX_LENGTH,
+    SEARCH_MIN_LENGTH,
+    SEARCH_PAGE_LIMIT,
+    clean_search_query,
+    search_documents,
+)
 from students.services.email import send_payment_confirmation_email
 
 User = get_user_model()
@@ -441,7 +452,30 @@ def cockpit_preferences_update(request):
 
 
 @user_passes_test(superuser_required, login_url='/accounts/login/')
+@htmx_fragment(
+    'superadmin:mini-widgets',
+    'superadmin/dashboard/_mini_widgets.html',
+    dependencies=(
+        'admissions.Candidature',
+        'core.ContactMessage',
+        'inscriptions.Inscription',
+        'payments.Payment',
+        'payments.CashPaymentSession',
+        'blog.Article',
+        'blog.Comment',
+        'news.News',
+        'news.Event',
+        'community.Topic',
+        'community.Answer',
+        'branches.Branch',
+        'communication.CommunicationNotification',
+    ),
+    # Fenetres glissantes (inscrits sur 7 jours, sessions non expirees) ;
+    # les comptes ne sont pas suivis (last_login change a chaque connexion).
+    timeout=60,
+)
 def dashboard_widgets_fragment(request):
+    """Mini-widgets du cockpit (rafraichis toutes les 30 s) : contexte propre, sans celui du dashboard."""
     today = timezone.localdate()
     week_ago = today - timedelta(days=6)
 
@@ -568,7 +602,7 @@ def dashboard_widgets_fragment(request):
         .values_list('created_at', flat=True)
         .first()
     )
-    return render(request, 'superadmin/dashboard/_mini_widgets.html', context)
+    return context
 
 
 @user_passes_test(superuser_required, login_url='/accounts/login/')
@@ -3464,7 +3498,11 @@ def gallery_bulk_upload(request):
             errors = result['errors']
 
             if created_count:
-                messages.success(request, f'{created_count} média(s) importé(s) avec succès.')
+                messages.success(
+                    request,
+                    f'{created_count} média(s) importé(s) avec succès. '
+                    'Le traitement (miniatures, vidéos) se poursuit en arrière-plan.',
+                )
             if errors:
                 messages.warning(request, f'{len(errors)} fichier(s) ignoré(s).')
                 for err in errors[:5]:
@@ -3480,6 +3518,18 @@ def gallery_bulk_upload(request):
     })
 
 
+@user_passes_test(superuser_required, login_url='/accounts/login/')
+def gallery_processing_status(request, pk):
+    """Fragment HTMX : apercu et statut de traitement du media (se re-interroge tant qu'il est en cours)."""
+    media = get_object_or_404(
+        MediaItem.objects.only(
+            'pk', 'media_type', 'image', 'thumbnail', 'processing_status', 'processing_error'
+        ),
+        pk=pk,
+    )
+    return render(request, 'superadmin/gallery/_processing_status.html', {'media': media})
+
+
 @user_passes_test(superuser_required, login_url='/accounts/login/')
 def gallery_bulk_action(request):
     if request.method != 'POST':
@@ -4021,32 +4071,23 @@ def settings(request):
 
 @user_passes_test(superuser_required, login_url='/accounts/login/')
 def search_global(request):
-    query = request.GET.get('q', '').strip()
-    if len(query) < 2:
-        return HttpResponse('<div class="p-3 text-sm text-slate-500">Tapez au moins 2 caracteres...</div>')
-
-    results = []
-    for p in Programme.objects.filter(Q(title__icontains=query) | Q(description__icontains=query)).order_by('title')[:5]:
-        results.append(('Formation', p.title, f'/superadmin/formations/{p.pk}/edit/'))
-    for a in Article.objects.filter(Q(title__icontains=query) | Q(content__icontains=query)).order_by('-created_at')[:5]:
-        results.append(('Article', a.title, f'/superadmin/articles/{a.pk}/edit/'))
-    for s in Student.objects.select_related('user').filter(
-        Q(user__first_name__icontains=query) | Q(user__last_name__icontains=query) | Q(matricule__icontains=query)
-    )[:5]:
-        results.append(('Etudiant', s.user.get_full_name() or s.user.username, f'/superadmin/students/{s.pk}/'))
-
-    if not results:
-        return HttpResponse(f'<div class="p-3 text-sm text-slate-500">Aucun resultat pour "{query}"</div>')
-
-    html = ['<div class="divide-y divide-slate-100">']
-    for kind, title, url in results:
-        html.append(
-            f'<a href="{url}" class="block px-3 py-2 hover:bg-slate-50">'
-            f'<span class="text-xs text-slate-500">{kind}</span><br>'
-            f'<span class="text-sm text-slate-800">{title}</span></a>'
-        )
-    html.append('</div>')
-    return HttpResponse(''.join(html))
+    raw_query = request.GET.get('q', '')
+    query = clean_search_query(raw_query)
+    is_htmx = bool(request.headers.get('HX-Request'))
+    results = search_documents(query, limit=SEARCH_DEFAULT_LIMIT if is_htmx else SEARCH_PAGE_LIMIT)
+    for result in results:
+        result['kind_label'] = SEARCH_KIND_LABELS.get(result['kind'], result['kind'])
+
+    context = {
+        'query': raw_query.strip()[:SEARCH_MAX_LENGTH],
+        'query_too_short': not query,
+        'min_length': SEARCH_MIN_LENGTH,
+        'results': results,
+    }
+    if is_htmx:
+        return render(request, 'superadmin/search/_results.html', context)
+    context.update({'page_title': 'Recherche globale', 'active_menu': 'dashboard'})
+    return render(request, 'superadmin/search/results.html', context)
 
 
 @user_passes_test(superuser_required, login_url='/accounts/login/')
@@ -4088,29 +4129,20 @@ def bulk_action(request):
         failed = 0
 
         if action == 'validate':
-            for payment in qs:
-                if payment.status != Payment.STATUS_PENDING:
-                    skipped += 1
-                    continue
-
-                if _is_manual_payment_method(payment.method):
-                    if not payment.agent_id:
-                        payment.agent = _get_or_create_superadmin_agent(request.user, payment.inscription)
-                    inscription_branch = getattr(payment.inscription.candidature, 'branch', None)
-                    if not payment.agent_id or (inscription_branch and payment.agent.branch_id != inscription_branch.id):
-                        failed += 1
-                        continue
-
-                payment.status = Payment.STATUS_VALIDATED
-                update_fields = ['status']
-                if payment.agent_id:
-                    update_fields.append('agent')
-                try:
-                    payment.save(update_fields=update_fields)
-                    done += 1
-                except Exception:
-                    logger.exception('Echec validation bulk paiement id=%s', payment.pk)
-                    failed += 1
+            try:
+                report = validate_payments_bulk(
+                    qs.values_list('pk', flat=True),
+                    require_agent=True,
+                    resolve_agent=lambda payment: _get_or_create_superadmin_agent(request.user, payment.inscription),
+                )
+            except Exception:
+                logger.exception('Echec validation groupee des paiements %s', selected_ids)
+                messages.error(request, 'Validation groupee en echec. Aucun paiement modifie.')
+                return _redirect_back(request, default='superadmin:payment_list')
+            done, skipped, failed = report.validated, report.skipped, report.failed
+            failures = [result for result in report.results if result.outcome == 'failed']
+            for result in failures[:10]:
+                messages.warning(request, f'Paiement #{result.payment_id} : {result.message}')
 
         elif action == 'cancel':
             for payment in qs:
@@ -4468,12 +4500,8 @@ def toggle_branch(request, pk):
 # ============================================
 
 def _generer_pages_memoire(request, memoire):
-    try:
-        nb_pages = render_memoire_pages(memoire)
-    except Exception as exc:  # noqa: BLE001 - message clair en l'absence de file de taches
-        messages.error(request, f"Echec de la generation des pages pour « {memoire.titre} » : {exc}")
-    else:
-        messages.success(request, f"{nb_pages} page(s) generee(s) pour « {memoire.titre} ».")
+    schedule_memoire_rendering(memoire)
+    messages.info(request, f"Generation des pages lancee en arriere-plan pour « {memoire.titre} ».")
 
 
 def _memoire_list_context(request):
@@ -4625,6 +4653,18 @@ def memoire_regenerate_pages(request, pk):
     return redirect('superadmin:memoire_list')
 
 
+@user_passes_test(superuser_required, login_url='/accounts/login/')
+def memoire_render_status(request, pk):
+    """Fragment HTMX : progression du rendu des pages (se re-interroge tant qu'il est en cours)."""
+    memoire = get_object_or_404(
+        Memoire.objects.only(
+            'pk', 'nb_pages', 'rendu_statut', 'rendu_pages_total', 'rendu_pages_faites', 'rendu_erreur'
+        ),
+        pk=pk,
+    )
+    return render(request, 'superadmin/memoires/_render_status.html', {'memoire': memoire})
+
+
 def _programme_filter(qs, programme_id):
     if programme_id:
         return qs.filter(programme_id=programme_id)
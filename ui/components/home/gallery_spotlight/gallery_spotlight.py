@@ -1,6 +1,7 @@
 from django_components import component
 import json
 
+from core.images.variants import build_srcset, variants_for_field
 from news.models import MediaItem
 
 
@@ -11,7 +12,11 @@ class GallerySpotlight(component.Component):
     def get_context_data(self, **kwargs):
         base_qs = (
             MediaItem.objects
-            .filter(media_type=MediaItem.IMAGE, event__is_published=True)
+            .filter(
+                media_type=MediaItem.IMAGE,
+                processing_status=MediaItem.STATUS_READY,
+                event__is_published=True,
+            )
             .select_related("event", "event__event_type")
             .order_by("-created_at")
         )
@@ -25,9 +30,11 @@ class GallerySpotlight(component.Component):
         for item in featured[:30]:
             if not item.image:
                 continue
+            variants = variants_for_field(item.image)
             gallery_images.append({
                 "id": item.id,
                 "src": item.thumbnail.url if item.thumbnail else item.image.url,
+                "srcset": build_srcset(variants.get("webp", [])),
                 "full_src": item.image.url,
                 "title": item.caption or item.event.title,
                 "date": item.event.event_date.strftime("%d/%m/%Y") if item.event.event_date else "",